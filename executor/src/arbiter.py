@@ -0,0 +1,154 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 通道仲裁（日志优先，按需升级到视觉）
+
+截图 + 视觉模型是三个通道中最贵的一个（单次数秒到数十秒 GPU 时间），
+而 renderer.log 几乎零成本。仲裁器根据日志通道的信号给出一个
+「AI 正在工作」的置信度，仅当廉价通道不足以下结论时才升级到截图分析：
+
+  置信度来源：
+    - 进行中的 ToolCall（pending > 0）       → 强信号 0.95
+    - 距最后一次活动事件的空闲秒数            → 1.0 线性衰减到 0.5（idle_threshold 处）
+    - DevPlan 先验：wait +0.15 / send_task −0.1
+    - 近 60 秒网络错误：每个 −0.2；达到突发阈值直接判为不确定
+
+  日志（扩展宿主 / network）显示仍处于限流时直接给出 RATE_LIMIT，不做截图。
+
+  不需要 UI 状态的 DevPlan 动作（all_done / start_phase）完全跳过视觉。
+
+每次仲裁结果都带 channel 字段（devplan / log / vision / none），
+用于决策归因与指标统计。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Optional
+
+from .config import UIStatus
+
+# 决策引擎不读取 UI 状态的 DevPlan 动作
+UI_INDEPENDENT_ACTIONS = frozenset({"all_done", "start_phase"})
+
+# DevPlan 动作对「AI 正在工作」的先验修正
+_DEVPLAN_PRIOR = {"wait": 0.15, "send_task": -0.1}
+
+
+@dataclass
+class ArbiterVerdict:
+    """一次仲裁结果"""
+    need_vision: bool                  # 是否需要截图分析
+    channel: str                       # 结论来源：devplan | log | vision（待升级）
+    confidence: float = 0.0            # 廉价通道对结论的置信度
+    ui_status: UIStatus = UIStatus.UNKNOWN   # need_vision=False 时推断的 UI 状态
+    screen_changing: bool = False      # need_vision=False 时推断的屏幕变化
+    reason: str = ""
+
+
+class ChannelArbiter:
+    """
+    日志优先的通道仲裁器（纯计算，不持有监控器引用）。
+
+    使用方式：
+        arbiter = ChannelArbiter(idle_threshold=30)
+        verdict = arbiter.assess("wait", log_state)
+        if verdict.need_vision:
+            status, changing, raw = analyzer.analyze()
+    """
+
+    def __init__(
+        self,
+        idle_threshold: float = 30.0,
+        confidence_threshold: float = 0.6,
+        error_burst_threshold: int = 3,
+    ):
+        self.idle_threshold = max(1.0, float(idle_threshold))
+        self.confidence_threshold = float(confidence_threshold)
+        self.error_burst_threshold = max(1, int(error_burst_threshold))
+
+    def activity_confidence(self, log_state: Any, devplan_action: str = "") -> tuple[float, str]:
+        """
+        计算「AI 正在工作」的置信度。
+
+        Returns:
+            (confidence ∈ [0, 1], 依据说明)
+        """
+        if log_state is None or not getattr(log_state, "log_file_found", False):
+            return 0.0, "日志通道不可用"
+
+        errors = len(getattr(log_state, "recent_errors", []) or [])
+        if errors >= self.error_burst_threshold:
+            return 0.0, f"近 60s 网络错误突发 {errors} 次"
+
+        pending = int(getattr(log_state, "pending_tool_calls", 0))
+        idle = float(getattr(log_state, "idle_seconds", float("inf")))
+        if pending > 0:
+            confidence = 0.95
+            basis = f"{pending} 个 ToolCall 进行中"
+        elif idle < self.idle_threshold:
+            confidence = 1.0 - 0.5 * idle / self.idle_threshold
+            basis = f"空闲 {idle:.0f}s"
+        else:
+            return 0.0, "日志长时间无活动（状态需视觉确认）"
+
+        confidence += _DEVPLAN_PRIOR.get(devplan_action, 0.0)
+        confidence -= 0.2 * errors
+        if errors:
+            basis += f"，近期网络错误 {errors} 次"
+        return max(0.0, min(1.0, confidence)), basis
+
+    def assess(self, devplan_action: str, log_state: Any) -> ArbiterVerdict:
+        """决定本轮是否需要截图分析"""
+        if devplan_action in UI_INDEPENDENT_ACTIONS:
+            return ArbiterVerdict(
+                need_vision=False,
+                channel="devplan",
+                confidence=1.0,
+                reason=f"DevPlan 动作 {devplan_action} 不依赖 UI 状态",
+            )
+
+        # 仍有进行中的 ToolCall 时对话显然没有被限流：日志限流信号让位于活动证据
+        if getattr(log_state, "rate_limited", False) and not getattr(log_state, "pending_tool_calls", 0):
+            retry_after = float(getattr(log_state, "retry_after", 0.0))
+            return ArbiterVerdict(
+                need_vision=False,
+                channel="log",
+                confidence=0.9,
+                ui_status=UIStatus.RATE_LIMIT,
+                screen_changing=False,
+                reason=f"日志检测到限流（约 {retry_after:.0f}s 后解除）",
+            )
+
+        confidence, basis = self.activity_confidence(log_state, devplan_action)
+        if confidence >= self.confidence_threshold:
+            return ArbiterVerdict(
+                need_vision=False,
+                channel="log",
+                confidence=confidence,
+                ui_status=UIStatus.AI_GENERATING,
+                screen_changing=True,
+                reason=f"日志确认 AI 活跃（{basis}）",
+            )
+        return ArbiterVerdict(
+            need_vision=True,
+            channel="vision",
+            confidence=confidence,
+            reason=f"日志信号不足（{basis}），升级到截图分析",
+        )
+
+    def send_confirmed_by_log(self, log_state: Any, sent_at: float) -> Optional[str]:
+        """
+        发送后确认：日志中出现发送之后的新活动即视为已被 AI 接收。
+
+        Returns:
+            确认依据（无需视觉检查）；None 表示需要视觉确认 queued 状态
+        """
+        if log_state is None or not getattr(log_state, "log_file_found", False):
+            return None
+        if getattr(log_state, "recent_errors", None) or getattr(log_state, "rate_limited", False):
+            return None
+        if int(getattr(log_state, "pending_tool_calls", 0)) > 0:
+            return "日志显示 ToolCall 进行中"
+        if float(getattr(log_state, "last_tool_call_time", 0.0)) >= sent_at:
+            return "日志在发送后出现新活动"
+        return None
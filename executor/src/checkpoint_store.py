@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 恢复 checkpoint 存储
+
+把每次保存的 RecoveryCheckpoint 追加写入 log_dir/checkpoints.db（SQLite，WAL 模式）：
+  - 单条 INSERT 即一次原子提交，进程中途崩溃不会留下半行记录
+  - 最新 checkpoint 走主键倒序 LIMIT 1，与历史条数无关
+  - phase_id / task_id / interrupt_reason 建索引，支持按阶段 / 子任务 / 中断原因查询
+  - 保留条数按自增主键裁剪（每 PRUNE_EVERY 次写入一次），不需要读出全部历史
+
+首次打开空库时会导入旧版 checkpoint_history.jsonl，升级后历史不丢失。
+atomic_write_text 提供 临时文件 + fsync + 原子 rename 的单文件写入。
+仅依赖标准库 sqlite3。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import sqlite3
+import tempfile
+import threading
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("executor.recovery")
+
+
+def atomic_write_text(path: Path, text: str) -> None:
+    """
+    原子写文本文件：同目录临时文件 → fsync → os.replace → fsync 目录。
+
+    任意时刻崩溃，path 要么是旧内容要么是新内容，不会出现半截文件。
+    不做换行转换（Windows 上也写 "\n"），文件大小恒等于 len(text.encode("utf-8"))，
+    供 checkpoint manifest 校验。失败时抛出 OSError（临时文件会被清理）。
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(prefix=f".{path.name}.", dir=str(path.parent))
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8", newline="") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except OSError:
+            pass
+        raise
+    # rename 本身的持久化需要 fsync 目录（Windows 不支持打开目录，跳过）
+    if hasattr(os, "O_DIRECTORY"):
+        try:
+            dir_fd = os.open(str(path.parent), os.O_RDONLY | os.O_DIRECTORY)
+        except OSError:
+            return
+        try:
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
+
+
+class CheckpointStore:
+    """
+    嵌入式 checkpoint 存储（SQLite WAL）。
+
+    使用方式：
+        store = CheckpointStore("logs")
+        store.append(asdict(cp))
+        latest = store.latest()
+        rows = store.query(task_id="T87.2")
+    """
+
+    # 每写入多少条执行一次保留条数裁剪
+    PRUNE_EVERY = 50
+
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        max_history: int = 1000,
+        filename: str = "checkpoints.db",
+    ):
+        self.path = Path(log_dir) / filename
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_history = max(1, max_history)
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            # checkpoint 写入频率很低，用 FULL 保证断电后最后一次提交也不丢
+            cur.execute("PRAGMA synchronous=FULL")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS checkpoints (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    timestamp TEXT NOT NULL,
+                    phase_id TEXT NOT NULL DEFAULT '',
+                    task_id TEXT NOT NULL DEFAULT '',
+                    interrupt_reason TEXT NOT NULL DEFAULT '',
+                    data TEXT NOT NULL
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_cp_phase ON checkpoints(phase_id, id)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_cp_task ON checkpoints(task_id, id)")
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_cp_reason ON checkpoints(interrupt_reason, id)")
+            self._conn.commit()
+
+    # ── 写入 ─────────────────────────────────────────────────
+
+    def append(self, checkpoint: dict[str, Any]) -> Optional[int]:
+        """追加一条 checkpoint（asdict 后的字典），返回行 id；失败返回 None"""
+        try:
+            with self._lock:
+                cur = self._conn.cursor()
+                self._insert(cur, checkpoint)
+                row_id = cur.lastrowid
+                self._conn.commit()
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= self.PRUNE_EVERY:
+                    self._writes_since_prune = 0
+                    self._prune_locked()
+                return row_id
+        except sqlite3.Error as e:
+            logger.warning("写入 checkpoint 存储失败: %s", e)
+            return None
+
+    @staticmethod
+    def _insert(cur: sqlite3.Cursor, checkpoint: dict[str, Any]) -> None:
+        cur.execute(
+            """
+            INSERT INTO checkpoints (timestamp, phase_id, task_id, interrupt_reason, data)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            (
+                str(checkpoint.get("timestamp", "")),
+                str(checkpoint.get("phase_id", "")),
+                str(checkpoint.get("task_id", "")),
+                str(checkpoint.get("interrupt_reason", "")),
+                json.dumps(checkpoint, ensure_ascii=False),
+            ),
+        )
+
+    def import_jsonl(self, path: Path) -> int:
+        """
+        把旧版 checkpoint_history.jsonl 导入空库（库内已有数据时不导入）。
+
+        Returns:
+            导入条数
+        """
+        if not path.exists():
+            return 0
+        try:
+            with self._lock:
+                cur = self._conn.cursor()
+                if cur.execute("SELECT 1 FROM checkpoints LIMIT 1").fetchone():
+                    return 0
+                imported = 0
+                with path.open("r", encoding="utf-8") as f:
+                    for line in f:
+                        try:
+                            data = json.loads(line)
+                        except json.JSONDecodeError:
+                            continue
+                        if isinstance(data, dict):
+                            self._insert(cur, data)
+                            imported += 1
+                self._conn.commit()
+                self._prune_locked()
+        except (OSError, sqlite3.Error) as e:
+            logger.warning("导入 %s 失败: %s", path.name, e)
+            return 0
+        if imported:
+            logger.info("已从 %s 导入 %d 条历史 checkpoint", path.name, imported)
+        return imported
+
+    def prune(self) -> None:
+        """只保留最新 max_history 条"""
+        try:
+            with self._lock:
+                self._prune_locked()
+        except sqlite3.Error as e:
+            logger.warning("裁剪 checkpoint 存储失败: %s", e)
+
+    def _prune_locked(self) -> None:
+        cur = self._conn.cursor()
+        row = cur.execute("SELECT MAX(id) FROM checkpoints").fetchone()
+        if row and row[0] is not None:
+            cur.execute("DELETE FROM checkpoints WHERE id <= ?", (row[0] - self.max_history,))
+            self._conn.commit()
+
+    # ── 查询 ─────────────────────────────────────────────────
+
+    def latest(self) -> Optional[dict[str, Any]]:
+        """最新一条 checkpoint；库为空或读取失败返回 None"""
+        rows = self.query(limit=1)
+        return rows[0] if rows else None
+
+    def query(
+        self,
+        phase_id: Optional[str] = None,
+        task_id: Optional[str] = None,
+        interrupt_reason: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[dict[str, Any]]:
+        """按阶段 / 子任务 / 中断原因过滤，按时间倒序返回最多 limit 条"""
+        clauses, params = [], []
+        for column, value in (
+            ("phase_id", phase_id),
+            ("task_id", task_id),
+            ("interrupt_reason", interrupt_reason),
+        ):
+            if value:
+                clauses.append(f"{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        try:
+            with self._lock:
+                rows = self._conn.execute(
+                    f"SELECT data FROM checkpoints {where} ORDER BY id DESC LIMIT ?",
+                    (*params, max(1, int(limit))),
+                ).fetchall()
+        except sqlite3.Error as e:
+            logger.warning("查询 checkpoint 存储失败: %s", e)
+            return []
+        result = []
+        for (data,) in rows:
+            try:
+                result.append(json.loads(data))
+            except json.JSONDecodeError:
+                continue
+        return result
+
+    def count(self) -> int:
+        try:
+            with self._lock:
+                return int(self._conn.execute("SELECT COUNT(*) FROM checkpoints").fetchone()[0])
+        except sqlite3.Error:
+            return 0
+
+    def close(self) -> None:
+        try:
+            with self._lock:
+                self._conn.close()
+        except sqlite3.Error:
+            pass
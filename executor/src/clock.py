@@ -0,0 +1,58 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 可注入时钟
+
+引擎 / 状态追踪器通过 clock.time() 取时间，而不是直接调用 time.time()，
+从而可以在回放与仿真中使用虚拟时钟（瞬间推进、完全确定）。
+
+  - SystemClock：真实时间（默认）
+  - VirtualClock：手动推进的虚拟时间，sleep() 只推进时间不阻塞
+"""
+
+from __future__ import annotations
+
+import time
+
+
+class SystemClock:
+    """真实系统时钟"""
+
+    def time(self) -> float:
+        return time.time()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    虚拟时钟：时间只在 advance() / sleep() / set() 时前进。
+
+    使用方式：
+        clock = VirtualClock(start=1_700_000_000.0)
+        engine = DualChannelEngine(clock=clock)
+        clock.advance(15)
+    """
+
+    def __init__(self, start: float = 0.0):
+        self._now = float(start)
+
+    def time(self) -> float:
+        return self._now
+
+    def sleep(self, seconds: float) -> None:
+        self.advance(seconds)
+
+    def advance(self, seconds: float) -> None:
+        if seconds > 0:
+            self._now += seconds
+
+    def set(self, timestamp: float) -> None:
+        """跳到指定时间（不允许倒退）"""
+        if timestamp > self._now:
+            self._now = float(timestamp)
+
+
+# 默认共享的系统时钟
+SYSTEM_CLOCK = SystemClock()
@@ -76,7 +76,27 @@ class ExecutorConfig(BaseSettings):
     # ── 轮询 & 超时 ──────────────────────────────────────────
     poll_interval: int = Field(
         default=10,
-        description="主循环轮询间隔（秒）",
+        description="主循环轮询间隔（秒）；自适应调度开启时作为常态基准间隔",
+    )
+    adaptive_poll_enabled: bool = Field(
+        default=True,
+        description="是否启用自适应轮询调度（关闭则固定使用 poll_interval）",
+    )
+    poll_interval_min: int = Field(
+        default=3,
+        description="自适应轮询最小间隔（秒）：发送后 / 网络错误恢复期间使用",
+    )
+    poll_interval_max: int = Field(
+        default=60,
+        description="自适应轮询最大间隔（秒）：AI 持续活跃时指数退避的上限",
+    )
+    poll_backoff_factor: float = Field(
+        default=1.5,
+        description="AI 持续活跃时每轮间隔的放大倍数",
+    )
+    poll_idle_pause: int = Field(
+        default=300,
+        description="all_done 保活 / 熔断打开期间的暂停间隔上限（秒）",
     )
     http_timeout: int = Field(
         default=10,
@@ -110,6 +130,74 @@ class ExecutorConfig(BaseSettings):
         default=120,
         description="视觉模型调用超时（秒）",
     )
+    vision_backend: str = Field(
+        default="auto",
+        description="视觉后端：auto（按显存自动选择）或逗号分隔的顺序，如 onnx,ollama（可选 ollama / openai / onnx）",
+    )
+    vision_gpu_min_vram_gb: float = Field(
+        default=16.0,
+        description="auto 模式下优先使用 Ollama 大模型所需的最小显存（GB），不足时优先轻量后端",
+    )
+    openai_base_url: str = Field(
+        default="",
+        description="OpenAI 兼容视觉服务地址（如 http://127.0.0.1:8080/v1，留空不启用）",
+    )
+    openai_model: str = Field(
+        default="",
+        description="OpenAI 兼容服务的视觉模型名（留空沿用 model_name）",
+    )
+    openai_api_key: str = Field(
+        default="",
+        description="OpenAI 兼容服务的 API Key（本地服务通常留空）",
+    )
+    onnx_model_path: str = Field(
+        default="",
+        description="CPU ONNX 截图状态分类器路径（留空不启用；标签见同名 .labels 文件）",
+    )
+    onnx_labels: list[str] = Field(
+        default_factory=list,
+        description="ONNX 分类器输出标签顺序（无 .labels 文件时使用）",
+    )
+    vision_cascade_model: str = Field(
+        default="",
+        description="级联小模型（Ollama 模型名，如 qwen2.5vl:3b）：小模型先答，置信度不足时再问 model_name（留空关闭）",
+    )
+    vision_cascade_min_confidence: float = Field(
+        default=0.7,
+        description="级联升级阈值：小模型置信度（显式分数或多次采样一致比例）低于此值时交给大模型",
+    )
+    vision_cascade_samples: int = Field(
+        default=2,
+        description="小模型无显式分数时的自洽采样次数（1 表示不做一致性检查，仅无法解析时升级）",
+    )
+    model_preload: bool = Field(
+        default=True,
+        description="启动时后台预加载视觉模型，避免首次分析承担冷加载",
+    )
+    model_keep_alive: str = Field(
+        default="30m",
+        description="视觉模型驻留时间（随每次请求传给 Ollama keep_alive，如 30m / 1h / -1 永久）",
+    )
+    model_warm_interval: float = Field(
+        default=240.0,
+        description="空闲保温间隔（秒）：距上次模型活动超过此时间发一次空请求保持模型常驻（0 关闭）",
+    )
+    model_ready_recheck_interval: float = Field(
+        default=30.0,
+        description="模型未就绪时重新检测的最小间隔（秒）",
+    )
+    vision_stream: bool = Field(
+        default=True,
+        description="流式接收视觉模型输出，解析到明确的状态词 / 判定后立即停止生成",
+    )
+    vision_result_cache: bool = Field(
+        default=False,
+        description="缓存视觉结果：prompt 与截图字节完全相同时复用上次结果（每次调用需对整张截图求摘要，默认关闭）",
+    )
+    vision_num_predict: dict[str, int] = Field(
+        default_factory=dict,
+        description="按 prompt 类型覆盖最大生成 token 数（status / change / queued / locate；0 表示不限制）",
+    )
     screenshot_interval: float = Field(
         default=3.0,
         description="连续截图间隔（秒），用于屏幕变化检测",
@@ -148,6 +236,30 @@ class ExecutorConfig(BaseSettings):
         default=30,
         description="日志无新 ToolCall 事件超过此秒数后，判定 AI 停止工作并触发截图分析",
     )
+    log_ingest_sources: list[str] = Field(
+        default_factory=lambda: ["renderer", "exthost", "network"],
+        description="日志监控采集的来源（renderer / exthost / network，见 log_ingest.PARSERS）；exthost / network 提供限流、token 用量、模型切换信号",
+    )
+    log_ingest_bus_capacity: int = Field(
+        default=2000,
+        description="日志事件总线容量（单轮积压超过时丢弃最旧事件并计数）",
+    )
+    log_monitor_window_owners: dict[str, str] = Field(
+        default_factory=dict,
+        description="多窗口部署时 Cursor 窗口 → 所属 executor_id（如 {\"window1\": \"executor-a\", \"window2\": \"executor-b\"}）；为空时 window1 归本 executor",
+    )
+    arbiter_enabled: bool = Field(
+        default=True,
+        description="日志优先通道仲裁：日志信号足够确定时跳过截图分析（含 send_task 与发送后检测）",
+    )
+    arbiter_confidence_threshold: float = Field(
+        default=0.6,
+        description="日志通道「AI 活跃」置信度达到该值即跳过截图分析（0~1，越高越保守）",
+    )
+    arbiter_error_burst: int = Field(
+        default=3,
+        description="近 60 秒日志网络错误达到该次数时，强制升级到截图分析确认错误类型",
+    )
 
     # ── 恢复策略 ──────────────────────────────────────────────
     rate_limit_wait: int = Field(
@@ -194,6 +306,14 @@ class ExecutorConfig(BaseSettings):
         default=300,
         description="网络恢复超窗后的保护冷却时长（秒）",
     )
+    decision_policy_file: str = Field(
+        default="",
+        description="决策策略表 JSON 文件（空 = 内置矩阵；可用 python -m src.policy --dump 导出后编辑，修改后自动热加载）",
+    )
+    decision_policy_check_interval: float = Field(
+        default=5.0,
+        description="检查策略文件是否变化的最小间隔（秒）",
+    )
 
     # ── Executor 标识 ────────────────────────────────────────
     executor_id: str = Field(
@@ -215,6 +335,32 @@ class ExecutorConfig(BaseSettings):
         description="调试开关：收到 all_done 时保持 executor 运行（默认 false，自动停机）",
     )
 
+    # ── GUI 时序 ─────────────────────────────────────────────
+    gui_delays: dict[str, float] = Field(
+        default_factory=dict,
+        description="覆盖 GUI 各步骤之后的等待秒数（键见 cursor_controller.GUI_DELAYS，如 {\"paste\": 0.5}）",
+    )
+    gui_delay_scale: float = Field(
+        default=1.0,
+        description="GUI 等待时间整体缩放系数（慢机器可调大；0 表示不等待，仅用于测试）",
+    )
+    gui_vision_locate_input: bool = Field(
+        default=False,
+        description="用视觉模型定位聊天输入框（按窗口边界缓存，移动 / 缩放后重新定位；默认按窗口底部中央估算）",
+    )
+    send_confirm_enabled: bool = Field(
+        default=True,
+        description="发送后用输入框 ROI 差分确认 sent / queued / failed（仅结论不明确时才调用视觉模型）",
+    )
+    send_confirm_timeout: float = Field(
+        default=0.6,
+        description="ROI 发送确认的最长轮询时间（秒）",
+    )
+    gui_adaptive_timing: bool = Field(
+        default=True,
+        description="按实测窗口响应速度自适应调整 GUI 等待（结果持久化到 log_dir/gui_timing.json）",
+    )
+
     # ── Web UI ───────────────────────────────────────────────
     ui_port: int = Field(
         default=5000,
@@ -225,6 +371,73 @@ class ExecutorConfig(BaseSettings):
         description="禁用 Web UI 监控面板",
     )
 
+    # ── 运行指标 ─────────────────────────────────────────────
+    metrics_enabled: bool = Field(
+        default=True,
+        description="是否启用时序指标存储（log_dir/metrics.db，SQLite WAL）",
+    )
+    metrics_raw_retention_hours: int = Field(
+        default=48,
+        description="原始 tick 指标保留小时数（超过后仅保留分钟/小时降采样数据）",
+    )
+    metrics_retention_days: int = Field(
+        default=30,
+        description="降采样指标（分钟/小时桶）保留天数",
+    )
+    profile_enabled: bool = Field(
+        default=False,
+        description="性能剖析模式（--profile）：定期输出各阶段耗时分位数，退出时导出 folded 火焰图数据",
+    )
+    profile_report_every: int = Field(
+        default=20,
+        description="性能剖析模式下每隔多少个 tick 输出一次阶段耗时表",
+    )
+    run_journal_enabled: bool = Field(
+        default=True,
+        description="定期快照熔断 / 退避 / 去重等运行状态到 log_dir/run_journal.json，重启后回填（热重启）",
+    )
+    run_journal_interval: int = Field(
+        default=30,
+        description="运行状态快照最小写盘间隔（秒）；熔断 / 退避状态变化时立即写盘",
+    )
+    run_journal_max_age_hours: float = Field(
+        default=6.0,
+        description="超过该时长的运行状态快照视为过期，启动时忽略",
+    )
+    context_budget_enabled: bool = Field(
+        default=False,
+        description="估算对话上下文用量，接近上限时在发送前预防性开新对话（避免 CONTEXT_OVERFLOW 失败路径）；"
+                    "估算基于经验值，默认关闭，按实际上下文窗口调好 context_budget_* 后再开启",
+    )
+    context_budget_tokens: int = Field(
+        default=200000,
+        description="对话上下文窗口大小估计（tokens）",
+    )
+    context_budget_trigger_ratio: float = Field(
+        default=0.8,
+        description="估算用量达到 context_budget_tokens 的该比例时触发预防性开新对话",
+    )
+    context_budget_tool_call_tokens: int = Field(
+        default=1500,
+        description="每次 ToolCall（参数 + 结果）计入上下文的估计 token 数",
+    )
+    context_budget_turn_tokens: int = Field(
+        default=2000,
+        description="每个对话轮次（发送任务 / 请继续）模型输出计入上下文的估计 token 数",
+    )
+    config_watch_enabled: bool = Field(
+        default=True,
+        description="运行中监视 executor.json / .env 变化，校验通过后把阈值等参数热推送到运行中的组件（无需重启）",
+    )
+    config_watch_interval: float = Field(
+        default=5.0,
+        description="检查配置文件是否变化的最小间隔（秒）",
+    )
+    trace_enabled: bool = Field(
+        default=False,
+        description="记录每个 tick 的决策输入到 log_dir/traces/*.jsonl.gz（--trace），供 simulator 离线回放",
+    )
+
     # ── 日志 ─────────────────────────────────────────────────
     log_dir: str = Field(
         default="logs",
@@ -0,0 +1,165 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 配置热加载
+
+ExecutorConfig 只在 main() 中加载一次，而 DualChannelEngine / CursorLogMonitor /
+ChannelArbiter / AdaptivePollScheduler 在构造时就把参数拷贝成了自身属性：
+调整 stall_threshold、退避上限等阈值原本必须重启进程，正在进行的网络恢复 /
+熔断窗口 / 防抖计数也随之丢失。
+
+ConfigWatcher 按 mtime 检测 executor.json 与 .env（环境变量覆盖来源）的变化：
+  - get 风格的 poll() 每 check_interval 秒最多 stat 一次，其余调用直接返回 None
+  - 变化后用 ExecutorConfig.load_from_file 完整重新校验（环境变量仍优先于文件）；
+    JSON 或字段校验失败时记录错误并继续使用当前配置
+  - 与上一次成功加载的配置逐字段比较，只产出变化的字段（ConfigDelta）；
+    命令行参数覆盖的字段（pinned）不会被文件改回
+  - 只在构造时生效的字段（端口、日志目录、子系统开关等）归入 restart_required，
+    由调用方提示需要重启，其余字段由 ExecutorLoop.apply_config_delta 推送到运行中的组件
+
+推送只改参数，不动 StateTracker：进行中的退避 / 熔断 / 防抖计数按新阈值继续。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Optional
+
+from .clock import SYSTEM_CLOCK
+from .config import ExecutorConfig
+
+logger = logging.getLogger("executor.config")
+
+# 只在进程 / 组件构造时读取的字段：修改后需要重启才生效
+RESTART_REQUIRED_FIELDS = frozenset({
+    # DevPlan 连接与身份
+    "devplan_host", "devplan_port", "project_name", "http_timeout", "executor_id",
+    # 视觉后端（VisionAnalyzer 初始化时选定，模型名与级联参数已拷贝进后端对象）
+    "vision_backend", "model_name", "vision_cascade_min_confidence", "vision_cascade_samples",
+    "vision_gpu_min_vram_gb", "openai_base_url", "openai_model",
+    "openai_api_key", "onnx_model_path", "onnx_labels", "vision_cascade_model", "vision_result_cache",
+    # 子系统开关与 GUI 初始化参数
+    "log_monitor_enabled", "log_monitor_window_owners", "log_ingest_sources",
+    "log_ingest_bus_capacity", "arbiter_enabled",
+    "gui_delays", "gui_delay_scale", "gui_adaptive_timing", "gui_vision_locate_input",
+    "send_confirm_enabled", "send_confirm_timeout",
+    "ui_port", "no_ui", "metrics_enabled", "run_journal_enabled", "trace_enabled",
+    "profile_enabled", "config_watch_enabled", "context_budget_enabled",
+    # 日志目录（checkpoint / 指标 / 快照都已打开）
+    "log_dir",
+})
+
+
+@dataclass
+class ConfigDelta:
+    """一次热加载产生的配置变化"""
+
+    changes: dict[str, Any] = field(default_factory=dict)        # 可热更新字段 → 新值
+    previous: dict[str, Any] = field(default_factory=dict)       # 变化字段 → 旧值
+    restart_required: list[str] = field(default_factory=list)    # 已变化但需重启才生效的字段
+
+    def __bool__(self) -> bool:
+        return bool(self.changes or self.restart_required)
+
+    def describe(self) -> str:
+        parts = [f"{k}: {self.previous.get(k)!r} → {v!r}" for k, v in self.changes.items()]
+        if self.restart_required:
+            parts.append(f"需重启生效: {', '.join(self.restart_required)}")
+        return "; ".join(parts)
+
+
+class ConfigWatcher:
+    """
+    使用方式：
+        watcher = ConfigWatcher("executor.json", pinned=cli_overrides, check_interval=5)
+        delta = watcher.poll()            # 每个 tick；无变化返回 None
+        if delta:
+            loop.apply_config_delta(delta)
+    """
+
+    def __init__(
+        self,
+        path: str | Path = "executor.json",
+        env_file: str | Path | None = ".env",
+        pinned: Iterable[str] = (),
+        check_interval: float = 5.0,
+        clock: Any = None,
+    ):
+        self.path = Path(path)
+        self.env_file = Path(env_file) if env_file else None
+        self.pinned = frozenset(pinned)
+        self.check_interval = max(0.0, float(check_interval))
+        self.clock = clock or SYSTEM_CLOCK
+        self._mtimes = self._stat()
+        self._next_check: float = self.clock.time() + self.check_interval
+        self._config: Optional[ExecutorConfig] = None
+        self.reloads = 0
+        self.failures = 0
+        try:
+            self._config = ExecutorConfig.load_from_file(self.path)
+        except (OSError, ValueError) as e:
+            logger.error("配置文件加载失败，热加载基线使用默认值: %s", e)
+            self._config = ExecutorConfig()
+
+    @property
+    def config(self) -> ExecutorConfig:
+        """最近一次成功校验的配置（不含 pinned 覆盖）"""
+        return self._config
+
+    def poll(self) -> Optional[ConfigDelta]:
+        """节流检查文件变化；有有效变化时返回 ConfigDelta"""
+        now = self.clock.time()
+        if now < self._next_check - 1e-9:
+            return None
+        self._next_check = now + self.check_interval
+        mtimes = self._stat()
+        if mtimes == self._mtimes:
+            return None
+        self._mtimes = mtimes
+        return self.reload()
+
+    def reload(self) -> Optional[ConfigDelta]:
+        """强制重新加载并校验；失败或无变化返回 None，保留当前配置"""
+        if not self.path.exists():
+            logger.warning("配置文件不存在，继续使用当前配置: %s", self.path)
+            return None
+        try:
+            new = ExecutorConfig.load_from_file(self.path)
+        except (OSError, ValueError) as e:
+            # json.JSONDecodeError 与 pydantic ValidationError 都是 ValueError
+            self.failures += 1
+            logger.error("配置文件校验失败，继续使用当前配置: %s", e)
+            return None
+        delta = self.diff(self._config, new, pinned=self.pinned)
+        self._config = new
+        if not delta:
+            return None
+        self.reloads += 1
+        logger.info("配置已热加载（%s）: %s", self.path.name, delta.describe())
+        return delta
+
+    @staticmethod
+    def diff(old: ExecutorConfig, new: ExecutorConfig, pinned: Iterable[str] = ()) -> ConfigDelta:
+        """逐字段比较两份配置，跳过 pinned 字段"""
+        pinned = frozenset(pinned)
+        delta = ConfigDelta()
+        for name in type(new).model_fields:
+            if name in pinned:
+                continue
+            before, after = getattr(old, name), getattr(new, name)
+            if before == after:
+                continue
+            delta.previous[name] = before
+            if name in RESTART_REQUIRED_FIELDS:
+                delta.restart_required.append(name)
+            else:
+                delta.changes[name] = after
+        return delta
+
+    def _stat(self) -> tuple[Optional[float], Optional[float]]:
+        return tuple(
+            os.path.getmtime(p) if p is not None and p.exists() else None
+            for p in (self.path, self.env_file)
+        )
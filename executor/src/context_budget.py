@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 对话上下文预算
+
+CONTEXT_OVERFLOW 原本只能在 Cursor 弹出提示之后由视觉模型识别：先浪费一次截图分析
+和一个失败的对话轮次，再走 recall → checkpoint → 注入 的完整恢复流程。
+
+ContextBudget 在主循环侧估算当前对话已占用的上下文 token 数：
+  - 发送的任务 / 恢复 prompt：按文本长度估算（CJK 字符约 1 token，其余约 4 字符 1 token）
+  - 每个对话轮次（发送任务、"请继续"）：加上一轮模型输出的估计值
+  - 日志中的 ToolCall：每次调用的参数与结果都会进入上下文
+  - 日志（exthost / network）报告了单次请求的 token 用量时，以最近一次实测值为下限校正估算；
+    读数带单调序号，开新对话后只有序号更新的读数才计入，旧对话的最后一次读数不会被重复采纳
+
+估算值达到 budget_tokens × trigger_ratio 时视为预算耗尽：DualChannelEngine 在下一个
+安全点（准备发送任务或"请继续"、AI 已空闲）改为有计划地开新对话，
+沿用 checkpoint 恢复流程，而不是等到溢出提示出现。新对话开始后估算清零。
+"""
+
+from __future__ import annotations
+
+import re
+from typing import Any
+
+# 按 1 token 计的字符（CJK 统一表意文字、日文假名、全角符号等）
+_WIDE_CHARS = re.compile(r"[\u3000-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uff00-\uffef]")
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本 token 数（不依赖 tokenizer；误差由 trigger_ratio 余量吸收）"""
+    if not text:
+        return 0
+    wide = len(_WIDE_CHARS.findall(text))
+    return wide + (len(text) - wide + 3) // 4
+
+
+class ContextBudget:
+    """
+    使用方式：
+        budget = ContextBudget(budget_tokens=200_000, trigger_ratio=0.8)
+        budget.record_send(task_text)     # 发送任务 / 恢复 prompt 后
+        budget.record_continue()          # 发送"请继续"后
+        budget.record_tool_calls(3)       # 日志新增的 ToolCall 数
+        budget.observe_usage(151_000, seq=7)  # 日志报告的单次请求 token 数及其序号
+        if budget.exhausted:
+            ...                           # 在安全点开新对话
+        budget.reset()                    # 新对话开始
+    """
+
+    def __init__(
+        self,
+        budget_tokens: int = 200_000,
+        trigger_ratio: float = 0.8,
+        tool_call_tokens: int = 1500,
+        turn_tokens: int = 2000,
+    ):
+        self.budget_tokens = max(1, int(budget_tokens))
+        self.trigger_ratio = min(1.0, max(0.1, float(trigger_ratio)))
+        self.tool_call_tokens = max(0, int(tool_call_tokens))
+        self.turn_tokens = max(0, int(turn_tokens))
+        self._estimated = 0
+        self._observed = 0
+        self._usage_seq = 0
+        self.turns = 0
+        self.tool_calls = 0
+        self.rotations = 0
+
+    # ── 记录 ─────────────────────────────────────────────────
+
+    def record_send(self, text: str) -> None:
+        """发送了一条消息（任务 / 恢复 prompt），模型随后会输出一轮"""
+        self._estimated += estimate_tokens(text) + self.turn_tokens
+        self.turns += 1
+
+    def record_continue(self) -> None:
+        """发送了"请继续"：消息本身可忽略，主要是模型的下一轮输出"""
+        self._estimated += self.turn_tokens
+        self.turns += 1
+
+    def record_tool_calls(self, count: int) -> None:
+        if count > 0:
+            self._estimated += count * self.tool_call_tokens
+            self.tool_calls += count
+
+    def observe_usage(self, tokens: int, seq: int | None = None) -> None:
+        """
+        日志报告的单次请求 token 数（≈ 当时的上下文长度），最近一次读数作为估算下限。
+
+        seq 为读数的单调序号：不大于已采纳序号的读数（同一读数重复上报、
+        或开新对话前的旧读数）被忽略。
+        """
+        if seq is not None:
+            if seq <= self._usage_seq:
+                return
+            self._usage_seq = seq
+        self._observed = max(0, int(tokens))
+
+    def reset(self, planned: bool = False) -> None:
+        """新对话开始：清零估算（保留读数序号）；planned=True 表示由预算主动触发"""
+        self._estimated = 0
+        self._observed = 0
+        self.turns = 0
+        self.tool_calls = 0
+        if planned:
+            self.rotations += 1
+
+    # ── 查询 ─────────────────────────────────────────────────
+
+    @property
+    def estimated_tokens(self) -> int:
+        return max(self._estimated, self._observed)
+
+    @property
+    def trigger_tokens(self) -> int:
+        return int(self.budget_tokens * self.trigger_ratio)
+
+    @property
+    def usage_ratio(self) -> float:
+        return self.estimated_tokens / self.budget_tokens
+
+    @property
+    def exhausted(self) -> bool:
+        return self.estimated_tokens >= self.trigger_tokens
+
+    def describe(self) -> str:
+        return (
+            f"约 {self.estimated_tokens} / {self.budget_tokens} tokens（{self.usage_ratio:.0%}，"
+            f"{self.turns} 轮，{self.tool_calls} 次 ToolCall）"
+        )
+
+    # ── 运行状态快照（热重启）─────────────────────────────────
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "estimated": self._estimated,
+            "observed": self._observed,
+            "turns": self.turns,
+            "tool_calls": self.tool_calls,
+        }
+
+    def restore(self, data: dict[str, Any]) -> None:
+        for key, attr in (("estimated", "_estimated"), ("observed", "_observed"),
+                          ("turns", "turns"), ("tool_calls", "tool_calls")):
+            value = data.get(key)
+            if isinstance(value, int) and value >= 0:
+                setattr(self, attr, value)
@@ -3,11 +3,11 @@
 DevPlan Executor — Cursor IDE GUI 自动化控制模块
 
 使用 pyautogui + pyperclip + pygetwindow 实现：
-  - Cursor 窗口定位与激活
+  - Cursor 窗口定位与激活（窗口句柄 / 输入框坐标缓存，边界校验失效）
   - 输入框区域点击
   - 文本粘贴发送（支持中文）
   - 组合键操作
-  - 排队状态检测
+  - 发送确认（输入框 ROI 差分判定 sent / queued / failed，见 send_confirm.py）
   - 安全防护（FAILSAFE / 操作间隔 / 发送冷却）
 
 迁移自 cursor_auto 项目，精简并适配 DevPlan Executor 架构。
@@ -17,14 +17,54 @@ DevPlan Executor — Cursor IDE GUI 自动化控制模块
 from __future__ import annotations
 
 import logging
-import time
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
 
+from .clock import SYSTEM_CLOCK
 from .config import ExecutorConfig
+from .profiler import profiler
+from .send_confirm import ConfirmResult, SendConfirmEngine, SendVerdict
+from .timing_calibrator import TimingCalibrator, region_change_probe
 
 logger = logging.getLogger("executor.cursor_controller")
 
+# GUI 各步骤之后的默认等待秒数（config.gui_delays 可逐项覆盖，gui_delay_scale 整体缩放；
+# 启用 gui_adaptive_timing 时作为校准基准，实际等待由 TimingCalibrator 按实测调整）
+GUI_DELAYS: dict[str, float] = {
+    "restore": 0.3,            # 最小化窗口恢复后
+    "activate": 0.5,           # window.activate() 后
+    "alt_tab": 0.3,            # Alt+Tab 回退后
+    "focus_settle": 0.5,       # send_text 激活窗口后额外稳定
+    "click": 0.3,              # 点击输入框后
+    "clear": 0.2,              # Ctrl+A / Backspace 后
+    "clipboard": 0.2,          # 写入剪贴板后
+    "paste": 0.3,              # Ctrl+V 后
+    "queued_check": 1.0,       # Enter 后到检查排队状态
+    "requeue": 0.5,            # 排队时再次 Enter 后
+    "new_conversation_focus": 0.3,   # 开新对话前激活窗口后
+    "new_conversation_load": 1.0,    # Ctrl+L 后等待新对话界面加载
+    "key": 0.1,                # press_key 每次按键后
+    "confirm_wait": 3.0,       # send_with_confirm 发送后等待生效
+    "confirm_retry": 2.0,      # send_with_confirm 补按 Enter 后
+    "pyautogui_pause": 0.1,    # pyautogui 每个操作的内置间隔
+}
+
+# 探测几乎立即返回（读的是 API 状态而非界面渲染），不代表本机界面响应速度，不参与本机系数
+TIMING_FACTOR_EXCLUDE = frozenset({"activate", "clipboard"})
+# 等待的是 Cursor / AI 侧处理，与本机 GUI 快慢无关，校准时不缩放
+TIMING_FIXED_STEPS = frozenset({"queued_check", "requeue", "confirm_wait", "confirm_retry"})
+
+
+@dataclass
+class WindowGeometry:
+    """缓存的 Cursor 窗口句柄与几何信息（边界变化时输入框坐标失效）"""
+    window: Any
+    title: str
+    bounds: Tuple[int, int, int, int]          # (left, top, width, height)
+    input_point: Optional[Tuple[int, int]] = None
+    input_source: str = ""                     # heuristic / vision
+
 
 @dataclass
 class SendResult:
@@ -32,6 +72,7 @@ class SendResult:
     success: bool
     message: str
     queued: bool = False  # 是否进入排队状态
+    verdict: str = ""     # 发送确认结论（sent / queued / failed / ambiguous；空表示未确认）
 
 
 class CursorController:
@@ -42,7 +83,7 @@ class CursorController:
       1. 窗口管理 — 激活 / 最小化恢复 / 前置
       2. 输入操作 — 粘贴文本 / 按回车 / 快捷键
       3. 安全机制 — FAILSAFE / 操作间隔 / 冷却计时
-      4. 排队检测 — 发送后检测消息是否排队
+      4. 发送确认 — 输入框 ROI 差分判定是否发出 / 排队
 
     使用方式：
         controller = CursorController(config)
@@ -53,8 +94,31 @@ class CursorController:
     # ── 窗口标题匹配列表 ─────────────────────────────────────
     WINDOW_TITLES = ["Cursor", "Cursor -", "- Cursor"]
 
-    def __init__(self, config: ExecutorConfig):
+    # 输入区域探测截图的半宽 / 半高（像素）
+    PROBE_HALF_WIDTH = 200
+    PROBE_HALF_HEIGHT = 20
+
+    def __init__(self, config: ExecutorConfig, clock: Any = None):
         self.config = config
+        self.clock = clock or SYSTEM_CLOCK
+        # 步骤延迟（默认值 + 配置覆盖）与可选的时序校准 / 发送确认
+        self._delays: dict[str, float] = self.resolve_delays(config)
+        self.timing: Optional[TimingCalibrator] = None
+        self.confirm: Optional[SendConfirmEngine] = None
+        if getattr(config, "gui_adaptive_timing", False) and any(self._delays.values()):
+            self.timing = TimingCalibrator(
+                self._delays,
+                path=Path(config.log_dir) / "gui_timing.json",
+                clock=self.clock,
+                factor_exclude=TIMING_FACTOR_EXCLUDE,
+                fixed_steps=TIMING_FIXED_STEPS,
+            )
+        if getattr(config, "send_confirm_enabled", False):
+            self.confirm = SendConfirmEngine(
+                grab=self._grab_input_roi,
+                clock=self.clock,
+                timeout=config.send_confirm_timeout,
+            )
 
         # GUI 依赖（延迟导入）
         self._pyautogui = None
@@ -65,6 +129,17 @@ class CursorController:
         # 发送冷却
         self._last_send_time: float = 0.0
 
+        # 最近一次点击输入框的屏幕坐标（用于输入区域像素探测）
+        self._input_point: Optional[Tuple[int, int]] = None
+        # 窗口 / 几何缓存；input_locator(bounds) -> 窗口内相对坐标或 None（视觉定位，可选）
+        self._geometry: Optional[WindowGeometry] = None
+        self.input_locator: Optional[Callable[[Tuple[int, int, int, int]], Optional[Tuple[int, int]]]] = None
+
+        # 窗口缓存统计：命中 / 枚举 / 失效 / 视觉定位
+        self.window_cache_stats: dict[str, int] = {
+            "hits": 0, "enumerations": 0, "invalidations": 0, "vision_locates": 0,
+        }
+
         self._init_deps()
 
     def _init_deps(self) -> None:
@@ -74,7 +149,7 @@ class CursorController:
             self._pyautogui = pyautogui
             # 安全设置
             pyautogui.FAILSAFE = True     # 鼠标移到左上角触发异常
-            pyautogui.PAUSE = 0.1         # 每个操作间隔 0.1 秒
+            pyautogui.PAUSE = self._delays["pyautogui_pause"]  # 每个操作间隔（默认 0.1 秒）
         except ImportError:
             logger.warning("pyautogui 不可用，GUI 控制功能禁用")
             return
@@ -95,19 +170,136 @@ class CursorController:
         self._available = True
         logger.info("GUI 控制器初始化完成")
 
+    @staticmethod
+    def resolve_delays(config: Any) -> dict[str, float]:
+        """合并默认延迟、config.gui_delays 覆盖项与 gui_delay_scale 缩放"""
+        overrides = dict(getattr(config, "gui_delays", None) or {})
+        unknown = set(overrides) - set(GUI_DELAYS)
+        if unknown:
+            logger.warning("忽略未知的 gui_delays 键: %s", ", ".join(sorted(unknown)))
+        scale = max(0.0, float(getattr(config, "gui_delay_scale", 1.0)))
+        return {
+            name: max(0.0, float(overrides.get(name, default))) * scale
+            for name, default in GUI_DELAYS.items()
+        }
+
+    def _pause(self, step: str) -> None:
+        """按步骤名等待（经由可注入时钟，测试中可用 VirtualClock 跳过）"""
+        delay = self.timing.delay(step) if self.timing is not None else self._delays[step]
+        self.clock.sleep(delay)
+
+    def _wait_for(self, step: str, predicate: Optional[Callable[[], bool]]) -> None:
+        """可观测步骤：轮询到生效为止并记录响应时间；无校准器 / 无探测时退化为固定等待"""
+        if self.timing is None or predicate is None:
+            self._pause(step)
+            return
+        self.timing.wait_until(step, predicate)
+
+    def _input_region(self) -> Optional[Tuple[int, int, int, int]]:
+        """最近一次点击的输入框周围截图区域 (left, top, width, height)；未点击过返回 None"""
+        if self._input_point is None:
+            return None
+        x, y = self._input_point
+        return (
+            max(0, x - self.PROBE_HALF_WIDTH),
+            max(0, y - self.PROBE_HALF_HEIGHT),
+            self.PROBE_HALF_WIDTH * 2,
+            self.PROBE_HALF_HEIGHT * 2,
+        )
+
+    def _grab_input_roi(self) -> bytes:
+        region = self._input_region()
+        if region is None:
+            raise RuntimeError("输入框位置未知")
+        return self._pyautogui.screenshot(region=region).tobytes()
+
+    def _input_probe(self) -> Optional[Callable[[], bool]]:
+        """输入框区域像素变化探测（粘贴落地 / 新对话界面出现）"""
+        if self.timing is None or self._input_point is None:
+            return None
+        return region_change_probe(self._grab_input_roi)
+
+    def save_timing(self) -> None:
+        """持久化 GUI 时序校准结果（退出时调用）"""
+        if self.timing is not None:
+            self.timing.save()
+
     @property
     def available(self) -> bool:
         """GUI 控制是否可用"""
         return self._available
 
+    @property
+    def last_send_time(self) -> float:
+        """最近一次按下 Enter 发送的时间戳（epoch 秒，0 表示尚未发送）"""
+        return self._last_send_time
+
     # ── 窗口管理 ─────────────────────────────────────────────
 
+    def _bump(self, key: str) -> None:
+        self.window_cache_stats[key] += 1
+
+    @staticmethod
+    def _read_bounds(window: Any) -> Tuple[int, int, int, int]:
+        return (int(window.left), int(window.top), int(window.width), int(window.height))
+
+    def invalidate_window_cache(self, reason: str = "") -> None:
+        """丢弃缓存的窗口句柄与几何信息（下次操作重新枚举）"""
+        if self._geometry is not None:
+            logger.debug("窗口缓存失效: %s", reason or "手动")
+            self._bump("invalidations")
+        self._geometry = None
+
+    def _revalidate(self, geo: WindowGeometry) -> bool:
+        """
+        边界校验：窗口已关闭返回 False；移动 / 缩放时保留句柄，仅丢弃输入框坐标。
+        """
+        try:
+            bounds = self._read_bounds(geo.window)
+        except Exception:
+            self.invalidate_window_cache("窗口已关闭")
+            return False
+        if bounds != geo.bounds:
+            logger.debug("窗口边界变化 %s → %s，重新计算输入框坐标", geo.bounds, bounds)
+            geo.bounds = bounds
+            geo.input_point = None
+            geo.input_source = ""
+            self._bump("invalidations")
+        return True
+
+    def _enumerate_window(self) -> Optional[WindowGeometry]:
+        """按标题枚举 Cursor 窗口（慢路径）"""
+        self._bump("enumerations")
+        for title in self.WINDOW_TITLES:
+            try:
+                windows = self._pygetwindow.getWindowsWithTitle(title)
+                if windows:
+                    w = windows[0]
+                    return WindowGeometry(window=w, title=w.title, bounds=self._read_bounds(w))
+            except Exception:
+                continue
+        return None
+
+    def _locate_window(self) -> Optional[WindowGeometry]:
+        """
+        返回 Cursor 窗口几何信息：缓存有效时只做一次边界校验，不再枚举窗口。
+        """
+        if self._pygetwindow is None:
+            return None
+        geo = self._geometry
+        if geo is not None and self._revalidate(geo):
+            self._bump("hits")
+            return geo
+        self._geometry = self._enumerate_window()
+        return self._geometry
+
     def activate_window(self) -> bool:
         """
         激活 Cursor 窗口使其获得焦点。
 
         尝试策略：
-          1. pygetwindow 按标题查找并激活
+          1. 缓存 / pygetwindow 按标题查找；已是前台窗口则跳过激活，
+             失焦时重新激活并做一次边界校验
           2. 回退到 Alt+Tab
 
         Returns:
@@ -116,27 +308,27 @@ class CursorController:
         if not self._available:
             return False
 
-        # 策略 1: pygetwindow 查找
-        if self._pygetwindow is not None:
-            for title in self.WINDOW_TITLES:
-                try:
-                    windows = self._pygetwindow.getWindowsWithTitle(title)
-                    if windows:
-                        window = windows[0]
-                        if window.isMinimized:
-                            window.restore()
-                            time.sleep(0.3)
-                        window.activate()
-                        time.sleep(0.5)
-                        logger.debug("已激活窗口: %s", window.title)
-                        return True
-                except Exception:
-                    continue
+        # 策略 1: 窗口句柄（缓存或枚举）
+        geo = self._locate_window()
+        if geo is not None:
+            window = geo.window
+            try:
+                if window.isMinimized:
+                    window.restore()
+                    self._pause("restore")
+                if not window.isActive:
+                    window.activate()
+                    self._wait_for("activate", lambda w=window: bool(w.isActive))
+                    self._revalidate(geo)
+                    logger.debug("已激活窗口: %s", geo.title)
+                return True
+            except Exception as e:
+                self.invalidate_window_cache(f"激活失败: {e}")
 
         # 策略 2: Alt+Tab 回退
         logger.debug("窗口定位失败，使用 Alt+Tab 回退")
         self._pyautogui.hotkey("alt", "tab")
-        time.sleep(0.3)
+        self._pause("alt_tab")
         return True
 
     def get_window_info(self) -> Optional[dict]:
@@ -146,26 +338,48 @@ class CursorController:
         Returns:
             窗口信息 dict（title, left, top, width, height）或 None
         """
-        if not self._pygetwindow:
+        geo = self._locate_window()
+        if geo is None:
+            return None
+        try:
+            left, top, width, height = geo.bounds
+            return {
+                "title": geo.title,
+                "left": left,
+                "top": top,
+                "width": width,
+                "height": height,
+                "isMinimized": geo.window.isMinimized,
+                "isActive": geo.window.isActive,
+                "input_point": geo.input_point,
+                "input_source": geo.input_source,
+            }
+        except Exception:
+            self.invalidate_window_cache("读取窗口状态失败")
             return None
 
-        for title in self.WINDOW_TITLES:
+    def _input_point_for(self, geo: WindowGeometry) -> Tuple[int, int]:
+        """输入框屏幕坐标：同一窗口边界内只计算一次（视觉定位优先，启发式兜底）"""
+        if geo.input_point is not None:
+            return geo.input_point
+        left, top, width, height = geo.bounds
+        locator = self.input_locator
+        if locator is not None:
+            self._bump("vision_locates")
             try:
-                windows = self._pygetwindow.getWindowsWithTitle(title)
-                if windows:
-                    w = windows[0]
-                    return {
-                        "title": w.title,
-                        "left": w.left,
-                        "top": w.top,
-                        "width": w.width,
-                        "height": w.height,
-                        "isMinimized": w.isMinimized,
-                        "isActive": w.isActive,
-                    }
-            except Exception:
-                continue
-        return None
+                rel = locator(geo.bounds)
+            except Exception as e:
+                logger.debug("视觉定位输入框失败: %s", e)
+                rel = None
+            if rel is not None and 0 <= rel[0] < width and 0 <= rel[1] < height:
+                geo.input_point = (left + int(rel[0]), top + int(rel[1]))
+                geo.input_source = "vision"
+                logger.info("视觉定位输入框: %s", geo.input_point)
+                return geo.input_point
+        # 输入框在窗口底部中央偏下
+        geo.input_point = (left + width // 2, top + height - 80)
+        geo.input_source = "heuristic"
+        return geo.input_point
 
     # ── 输入操作 ─────────────────────────────────────────────
 
@@ -173,8 +387,8 @@ class CursorController:
         """
         点击 Cursor 的聊天输入框区域。
 
-        输入框位置假设在屏幕底部中央。
-        如果有窗口信息，使用窗口相对坐标。
+        输入框位置假设在窗口底部中央（可由视觉定位覆盖），结果按窗口边界缓存；
+        无窗口信息时回退到屏幕底部中央。
 
         Returns:
             是否点击成功
@@ -183,24 +397,24 @@ class CursorController:
             return False
 
         try:
-            # 尝试使用窗口相对坐标
-            win_info = self.get_window_info()
-            if win_info and not win_info["isMinimized"]:
-                # 输入框在窗口底部中央偏下
-                x = win_info["left"] + win_info["width"] // 2
-                y = win_info["top"] + win_info["height"] - 80
-                self._pyautogui.click(x=x, y=y)
+            # 尝试使用窗口相对坐标（缓存）
+            geo = self._locate_window()
+            if geo is not None and not geo.window.isMinimized:
+                x, y = self._input_point_for(geo)
             else:
                 # 回退：屏幕底部中央
                 screen_w, screen_h = self._pyautogui.size()
-                self._pyautogui.click(x=screen_w // 2, y=screen_h - 100)
+                x, y = screen_w // 2, screen_h - 100
+            self._pyautogui.click(x=x, y=y)
+            self._input_point = (x, y)
 
-            time.sleep(0.3)
+            self._pause("click")
             return True
         except Exception as e:
             logger.error("点击输入框失败: %s", e)
             return False
 
+    @profiler.timed("gui.send_text")
     def send_text(self, text: str, clear_first: bool = False) -> SendResult:
         """
         在 Cursor 输入框中发送文本。
@@ -218,7 +432,7 @@ class CursorController:
             return SendResult(success=False, message="GUI 控制不可用")
 
         # 发送冷却检查
-        elapsed = time.time() - self._last_send_time
+        elapsed = self.clock.time() - self._last_send_time
         if elapsed < self.config.min_send_interval:
             remaining = self.config.min_send_interval - elapsed
             return SendResult(
@@ -228,46 +442,69 @@ class CursorController:
 
         try:
             # 1. 激活 Cursor 窗口
-            if not self.activate_window():
-                return SendResult(success=False, message="无法激活 Cursor 窗口")
-            time.sleep(0.5)
+            with profiler.span("gui.activate"):
+                if not self.activate_window():
+                    return SendResult(success=False, message="无法激活 Cursor 窗口")
+                self._pause("focus_settle")
 
             # 2. 点击输入框
-            if not self.click_input_area():
-                return SendResult(success=False, message="无法点击输入框")
-            time.sleep(0.3)
+            with profiler.span("gui.click_input"):
+                if not self.click_input_area():
+                    return SendResult(success=False, message="无法点击输入框")
+                self._pause("click")
 
             # 3. 可选：清除旧内容
             if clear_first:
-                self._pyautogui.hotkey("ctrl", "a")
-                time.sleep(0.2)
-                self._pyautogui.press("backspace")
-                time.sleep(0.2)
-
-            # 4. 粘贴文本（通过剪贴板，支持中文）
-            self._pyperclip.copy(text)
-            time.sleep(0.2)
-            self._pyautogui.hotkey("ctrl", "v")
-            time.sleep(0.3)
+                with profiler.span("gui.clear"):
+                    self._pyautogui.hotkey("ctrl", "a")
+                    self._pause("clear")
+                    self._pyautogui.press("backspace")
+                    self._pause("clear")
+
+            # 4. 粘贴文本（通过剪贴板，支持中文），前后各截一次输入框 ROI
+            with profiler.span("gui.paste"):
+                empty = self.confirm.capture() if self.confirm is not None else None
+                self._pyperclip.copy(text)
+                self._wait_for("clipboard", lambda: self._pyperclip.paste() == text)
+                probe = self._input_probe()
+                self._pyautogui.hotkey("ctrl", "v")
+                self._wait_for("paste", probe)
+                filled = self.confirm.capture() if empty is not None else None
 
             # 5. 按 Enter 发送
-            self._pyautogui.press("enter")
-            self._last_send_time = time.time()
+            with profiler.span("gui.enter"):
+                self._pyautogui.press("enter")
+            self._last_send_time = self.clock.time()
 
             logger.info("已发送: %s", text[:80] + ("..." if len(text) > 80 else ""))
 
-            # 6. 等待后检查排队状态
-            time.sleep(1.0)
-            queued = self._check_queued_state()
+            # 6. 确认发送结果：文本仍在输入框 → 排队，补按一次 Enter 后复查
+            with profiler.span("gui.queued_check"):
+                check = self._check_send_state(empty, filled)
+            queued = check is not None and check.verdict == SendVerdict.QUEUED
             if queued:
                 logger.info("检测到排队状态，再次按 Enter")
                 self._pyautogui.press("enter")
-                time.sleep(0.5)
+                with profiler.span("gui.queued_check"):
+                    check = self._check_send_state(empty, filled, after_requeue=True)
+                if check is not None and check.verdict == SendVerdict.QUEUED:
+                    check.verdict = SendVerdict.FAILED
+            if check is not None:
+                self.confirm.record(check.verdict)
+                logger.debug("发送确认: %s", check.detail)
+                if check.verdict == SendVerdict.FAILED:
+                    return SendResult(
+                        success=False,
+                        message="补按 Enter 后文本仍留在输入框，发送未生效",
+                        queued=True,
+                        verdict=check.verdict.value,
+                    )
 
             return SendResult(
                 success=True,
                 message=f"已发送: {text[:40]}",
                 queued=queued,
+                verdict=check.verdict.value if check is not None else "",
             )
 
         except Exception as e:
@@ -290,10 +527,11 @@ class CursorController:
         try:
             # 先激活 Cursor 窗口
             self.activate_window()
-            time.sleep(0.3)
-            # Ctrl+L 开新对话
+            self._pause("new_conversation_focus")
+            # Ctrl+L 开新对话，等待新对话界面出现
+            probe = self._input_probe()
             self._pyautogui.hotkey("ctrl", "l")
-            time.sleep(1.0)  # 等待新对话界面加载
+            self._wait_for("new_conversation_load", probe)
             logger.info("已发送 Ctrl+L 开新对话")
             return SendResult(success=True, message="新对话已开启")
         except Exception as e:
@@ -324,7 +562,7 @@ class CursorController:
         try:
             for _ in range(times):
                 self._pyautogui.press(key)
-                time.sleep(0.1)
+                self._pause("key")
             return True
         except Exception as e:
             logger.error("按键失败 (%s): %s", key, e)
@@ -402,19 +640,22 @@ class CursorController:
 
     # ── 排队状态检测 ─────────────────────────────────────────
 
-    def _check_queued_state(self) -> bool:
+    def _check_send_state(
+        self,
+        empty: Optional[bytes],
+        filled: Optional[bytes],
+        after_requeue: bool = False,
+    ) -> Optional[ConfirmResult]:
         """
-        检测消息是否进入排队状态。
+        按 Enter 后确认消息是否离开输入框（ROI 差分，毫秒级）。
 
-        简单检查：如果发送后光标还在输入框且内容未清空，可能排队了。
-        注意：这是一个启发式检测，不一定 100% 准确。
-
-        Returns:
-            是否检测到排队状态
+        ROI 不可用（无截图 / 未启用）时退化为固定等待并返回 None，
+        由调用方交给视觉通道确认。
         """
-        # 基础实现：暂时不调用视觉模型（避免在发送时产生额外延迟）
-        # 后续阶段可增强为视觉模型检测
-        return False
+        if self.confirm is None or empty is None or filled is None:
+            self._pause("requeue" if after_requeue else "queued_check")
+            return None
+        return self.confirm.confirm(empty, filled)
 
     # ── 发送确认 ─────────────────────────────────────────────
 
@@ -441,7 +682,7 @@ class CursorController:
                 continue
 
             # 等待生效
-            time.sleep(3)
+            self._pause("confirm_wait")
 
             # 如果有回调，验证状态变化
             if check_callback:
@@ -454,7 +695,7 @@ class CursorController:
                 # 状态未变化，再按一次 Enter
                 logger.info("状态未变化，再次按 Enter（第 %d 次）", attempt + 2)
                 self.press_key("enter")
-                time.sleep(2)
+                self._pause("confirm_retry")
             else:
                 return result
 
@@ -477,6 +718,8 @@ class CursorController:
             "screen_size": None,
             "mouse_position": None,
             "cursor_window": None,
+            "window_cache": dict(self.window_cache_stats),
+            "send_confirm": dict(self.confirm.stats) if self.confirm is not None else None,
         }
 
         if self._available:
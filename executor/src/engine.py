@@ -20,6 +20,12 @@ DevPlan Executor — 三通道决策引擎
 | RESPONSE_INTERRUPTED| SEND_CONTINUE        | 响应被截断，发"请继续"           |
 | RESPONSE_STALL      | SEND_CONTINUE/升级    | 累积型中断，N 次无效→开新对话     |
 | IDLE + 无变化        | SEND_TASK/唤醒        | 空闲，发新任务或唤醒             |
+
+矩阵本身以声明式规则表的形式定义在 policy.py（DEFAULT_POLICY），启动时编译为
+O(1) 查找表；引擎只实现各处理器（防抖、退避、熔断、升级等带状态的逻辑）。
+
+绑定了 ContextBudget 时，估算的对话上下文达到预算后，下一次 SEND_TASK / SEND_CONTINUE
+会改为有计划的 NEW_CONVERSATION（reason=CONTEXT_BUDGET），在溢出提示出现之前换新对话。
 """
 
 from __future__ import annotations
@@ -27,12 +33,16 @@ from __future__ import annotations
 import logging
 import math
 import random
-import time
 from dataclasses import dataclass, field
 from enum import Enum
-from typing import Optional
+from typing import TYPE_CHECKING, Any, Optional
 
+from .clock import SYSTEM_CLOCK
 from .config import UIStatus
+from .policy import CompiledPolicy, PolicyStore
+
+if TYPE_CHECKING:
+    from .context_budget import ContextBudget
 
 logger = logging.getLogger("executor.engine")
 
@@ -63,6 +73,10 @@ class Decision:
     phase_id: Optional[str] = None
     # wait_cooldown 时的等待秒数
     cooldown_seconds: int = 0
+    # UI 状态来源通道（devplan / log / vision / none），由主循环在仲裁后填写
+    channel: str = ""
+    # new_conversation 的触发原因（CONTEXT_BUDGET 等）；为空时主循环取最近的 UI 状态
+    reason: str = ""
 
 
 # ── 状态追踪器 ───────────────────────────────────────────────
@@ -97,6 +111,31 @@ class StateTracker:
     circuit_open_until: float = 0.0
     # 网络恢复窗口起点（epoch 秒），用于限制持续恢复时长
     recovery_window_start: float = 0.0
+    # 时间源（回放 / 仿真时注入 VirtualClock）
+    clock: Any = field(default=SYSTEM_CLOCK, repr=False, compare=False)
+    # 退避 jitter 随机源（仿真时注入带种子的 random.Random）
+    rng: Any = field(default_factory=random.Random, repr=False, compare=False)
+
+    # ── 热重启快照（见 run_journal） ──
+
+    def snapshot(self) -> dict[str, Any]:
+        """可持久化字段的快照（时间戳均为 epoch 秒）"""
+        data = {name: getattr(self, name) for name in _TRACKER_JOURNAL_FIELDS}
+        data["status_counts"] = dict(self.status_counts)
+        return data
+
+    def restore(self, data: dict[str, Any]) -> None:
+        """从快照回填；缺失或类型不符的字段保持默认值"""
+        for name in _TRACKER_JOURNAL_FIELDS:
+            if name not in data:
+                continue
+            try:
+                setattr(self, name, type(getattr(self, name))(data[name]))
+            except (TypeError, ValueError):
+                continue
+        counts = data.get("status_counts")
+        if isinstance(counts, dict):
+            self.status_counts = {str(k): int(v) for k, v in counts.items()}
 
     def increment_status(self, status: str) -> int:
         """
@@ -139,7 +178,7 @@ class StateTracker:
 
     def get_network_backoff_remaining(self) -> float:
         """获取当前网络退避剩余秒数"""
-        return max(0.0, self.network_backoff_until - time.time())
+        return max(0.0, self.network_backoff_until - self.clock.time())
 
     def schedule_network_backoff(self, base_seconds: int, max_seconds: int, jitter_ratio: float) -> int:
         """
@@ -149,9 +188,9 @@ class StateTracker:
         """
         self.network_backoff_attempts = min(self.network_backoff_attempts + 1, 12)
         raw_delay = min(max_seconds, base_seconds * (2 ** (self.network_backoff_attempts - 1)))
-        jitter = random.uniform(0.0, raw_delay * max(0.0, jitter_ratio))
+        jitter = self.rng.uniform(0.0, raw_delay * max(0.0, jitter_ratio))
         delay = max(1, int(round(raw_delay + jitter)))
-        self.network_backoff_until = time.time() + delay
+        self.network_backoff_until = self.clock.time() + delay
         return delay
 
     def resolve_circuit_state(self) -> str:
@@ -159,7 +198,7 @@ class StateTracker:
         解析当前 circuit breaker 状态。
         open 超时后自动转 half_open。
         """
-        if self.circuit_state == "open" and time.time() >= self.circuit_open_until:
+        if self.circuit_state == "open" and self.clock.time() >= self.circuit_open_until:
             self.circuit_state = "half_open"
             self.circuit_failures = 0
         return self.circuit_state
@@ -168,7 +207,7 @@ class StateTracker:
         """获取 open 状态剩余秒数"""
         if self.resolve_circuit_state() != "open":
             return 0.0
-        return max(0.0, self.circuit_open_until - time.time())
+        return max(0.0, self.circuit_open_until - self.clock.time())
 
     def record_network_failure(self, threshold: int, open_seconds: int) -> None:
         """
@@ -177,7 +216,7 @@ class StateTracker:
         threshold = max(1, threshold)
         open_seconds = max(1, open_seconds)
         state = self.resolve_circuit_state()
-        now = time.time()
+        now = self.clock.time()
         if self.recovery_window_start <= 0.0:
             self.recovery_window_start = now
 
@@ -210,7 +249,7 @@ class StateTracker:
         """获取当前恢复窗口已持续时长（秒）"""
         if self.recovery_window_start <= 0.0:
             return 0.0
-        return max(0.0, time.time() - self.recovery_window_start)
+        return max(0.0, self.clock.time() - self.recovery_window_start)
 
     def can_send(self, min_interval: float) -> bool:
         """
@@ -222,11 +261,28 @@ class StateTracker:
         Returns:
             是否可以发送
         """
-        return (time.time() - self.last_send_time) >= min_interval
+        return (self.clock.time() - self.last_send_time) >= min_interval
 
     def record_send(self) -> None:
         """记录发送时间"""
-        self.last_send_time = time.time()
+        self.last_send_time = self.clock.time()
+
+
+# StateTracker 中需要跨进程保留的标量字段
+_TRACKER_JOURNAL_FIELDS = (
+    "last_send_time",
+    "terminal_start_time",
+    "continue_retries",
+    "last_devplan_action",
+    "last_ui_status",
+    "stall_continue_count",
+    "network_backoff_attempts",
+    "network_backoff_until",
+    "circuit_state",
+    "circuit_failures",
+    "circuit_open_until",
+    "recovery_window_start",
+)
 
 
 # ── 双通道决策引擎 ───────────────────────────────────────────
@@ -242,6 +298,9 @@ class DualChannelEngine:
     输出 Decision，由主循环执行。
     """
 
+    # 对话上下文预算（由主循环绑定；None 表示不做预防性换对话）
+    context_budget: Optional["ContextBudget"] = None
+
     def __init__(
         self,
         status_trigger_threshold: int = 3,
@@ -260,6 +319,9 @@ class DualChannelEngine:
         circuit_breaker_open_seconds: int = 90,
         network_recovery_window_seconds: int = 900,
         network_recovery_window_cooldown: int = 300,
+        clock: Any = None,
+        rng: Optional[random.Random] = None,
+        policy: PolicyStore | CompiledPolicy | dict | None = None,
     ):
         self.threshold = status_trigger_threshold
         self.min_send_interval = min_send_interval
@@ -277,7 +339,25 @@ class DualChannelEngine:
         self.circuit_breaker_open_seconds = circuit_breaker_open_seconds
         self.network_recovery_window_seconds = network_recovery_window_seconds
         self.network_recovery_window_cooldown = network_recovery_window_cooldown
-        self.tracker = StateTracker()
+        self.clock = clock or SYSTEM_CLOCK
+        self.tracker = StateTracker(clock=self.clock, rng=rng or random.Random())
+
+        # 决策策略表（默认内置矩阵；PolicyStore 可绑定文件热替换）
+        if isinstance(policy, PolicyStore):
+            self.policy = policy
+        else:
+            self.policy = PolicyStore(clock=self.clock, policy=policy)
+        self._handlers = {
+            "all_done": self._on_all_done,
+            "start_phase": self._on_start_phase,
+            "wait": self._on_wait,
+            "send_task": self._on_send_task,
+            "send_continue": self._on_send_continue,
+            "network_recovery": self._on_network_recovery,
+            "rate_limit": self._on_rate_limit,
+            "context_overflow": self._on_context_overflow,
+            "response_stall": self._on_response_stall,
+        }
 
     def decide(
         self,
@@ -302,229 +382,85 @@ class DualChannelEngine:
         self.tracker.last_devplan_action = devplan_action
         self.tracker.last_ui_status = ui_status.value
 
-        # ── Case 1: 全部完成 ──
-        if devplan_action == "all_done":
-            return Decision(
-                action=Action.ALL_DONE,
-                message=devplan_data.get("message", "所有任务已完成"),
-            )
+        # ── 查策略表：(DevPlan 动作, UI 状态, 屏幕变化, 是否超过兜底阈值) → 处理器 ──
+        stale = br_no_change_seconds >= self.fallback_no_change_timeout
+        entry = self.policy.get().lookup(devplan_action, ui_status, screen_changing, stale)
+        decision = self._handlers[entry.handler](devplan_data, entry.message)
 
-        # ── Case 2: 启动新阶段 ──
-        if devplan_action == "start_phase":
-            phase_info = devplan_data.get("phase", {})
-            phase_id = phase_info.get("taskId", "")
-            if self.auto_start_next_phase and phase_id:
-                self.tracker.reset_all()
-                return Decision(
-                    action=Action.START_PHASE,
-                    message=f"启动新阶段: {phase_id} — {phase_info.get('title', '')}",
-                    phase_id=phase_id,
-                )
-            else:
-                return Decision(
-                    action=Action.WAIT,
-                    message=f"有待启动阶段 {phase_id}，但自动启动已禁用",
-                )
-
-        # ── Case 3: 有待发送的子任务 (send_task) ──
-        if devplan_action == "send_task":
-            decision = self._decide_send_task(devplan_data, ui_status, screen_changing)
-            # 如果常规决策是 WAIT，再检查兜底策略
-            if decision.action == Action.WAIT:
-                fallback = self._check_fallback(devplan_data, br_no_change_seconds)
-                if fallback is not None:
-                    return fallback
-            return decision
+        # 常规决策是 WAIT 时，再检查 3 分钟兜底策略
+        if entry.fallback and decision.action == Action.WAIT:
+            fallback = self._check_fallback(devplan_data, br_no_change_seconds)
+            if fallback is not None:
+                decision = fallback
+        return self._check_context_budget(devplan_data, decision)
 
-        # ── Case 4: 等待中 (wait) — AI 正在工作 ──
-        if devplan_action == "wait":
-            decision = self._decide_wait(devplan_data, ui_status, screen_changing)
-            # 如果常规决策是 WAIT，再检查兜底策略
-            if decision.action == Action.WAIT:
-                fallback = self._check_fallback(devplan_data, br_no_change_seconds)
-                if fallback is not None:
-                    return fallback
-            return decision
+    def set_policy(self, policy: CompiledPolicy | dict) -> None:
+        """热替换决策策略（dict 会先编译；编译失败抛出 PolicyError，当前策略不变）"""
+        self.policy.swap(policy)
 
-        # ── Case 5: 未知 devplan_action，检查兜底策略 ──
-        fallback = self._check_fallback(devplan_data, br_no_change_seconds)
-        if fallback is not None:
-            return fallback
+    # ── 策略处理器 ───────────────────────────────────────────
+    # 签名统一为 (devplan_data, message_template) -> Decision，由策略表按名称调度
 
-        # ── 未知的 devplan_action ──
-        return Decision(
-            action=Action.WAIT,
-            message=f"未知的 DevPlan 动作: {devplan_action}",
+    @staticmethod
+    def _render(template: str, devplan_data: dict) -> str:
+        sub_task = devplan_data.get("subTask", {})
+        return template.format(
+            task_id=sub_task.get("taskId", ""),
+            title=sub_task.get("title", ""),
+            devplan_action=devplan_data.get("action", "wait"),
         )
 
-    # ── 内部决策分支 ─────────────────────────────────────────
-
-    def _decide_send_task(
-        self,
-        devplan_data: dict,
-        ui_status: UIStatus,
-        screen_changing: bool,
-    ) -> Decision:
-        """DevPlan 说"有待发任务"时的决策（8 状态版）
-
-        判断逻辑（按优先级）：
-        1. AI_GENERATING → AI 正在工作，等待
-        2. CONNECTION_ERROR → 发送"请继续"恢复连接
-        3. PROVIDER_ERROR → 发送"请继续"恢复
-        4. CONTEXT_OVERFLOW → 开新对话 (Ctrl+L) + 恢复 prompt
-        5. RATE_LIMIT → 等待冷却期
-        6. API_TIMEOUT → 即时重试
-        7. RESPONSE_INTERRUPTED → 发送"请继续"
-        8. RESPONSE_STALL → 发送"请继续"唤醒，连续无效→升级
-        9. 屏幕有变化 → AI 可能在忙，等待
-        10. 屏幕无变化 + IDLE/UNKNOWN → 发送新任务
-        """
-        sub_task = devplan_data.get("subTask", {})
-        task_id = sub_task.get("taskId", "")
-        title = sub_task.get("title", "")
-        description = sub_task.get("description", "")
+    def _on_all_done(self, devplan_data: dict, template: str) -> Decision:
+        return Decision(
+            action=Action.ALL_DONE,
+            message=devplan_data.get("message", template or "所有任务已完成"),
+        )
 
-        # AI 正在生成 → 等待
-        if ui_status == UIStatus.AI_GENERATING:
+    def _on_start_phase(self, devplan_data: dict, template: str) -> Decision:
+        phase_info = devplan_data.get("phase", {})
+        phase_id = phase_info.get("taskId", "")
+        if self.auto_start_next_phase and phase_id:
+            self.tracker.reset_all()
             return Decision(
-                action=Action.WAIT,
-                message=f"DevPlan 有待发任务 {task_id}，AI 正在生成中，等待",
-            )
-
-        # 连接错误 → 尝试恢复
-        if ui_status == UIStatus.CONNECTION_ERROR:
-            return self._handle_network_recovery(
-                f"DevPlan 有待发任务 {task_id}，但 UI 检测到连接错误，尝试恢复"
-            )
-
-        # Provider 错误 → 尝试恢复
-        if ui_status == UIStatus.PROVIDER_ERROR:
-            return self._handle_network_recovery(
-                f"DevPlan 有待发任务 {task_id}，但 UI 检测到 Provider Error，尝试恢复"
-            )
-
-        # 上下文溢出 → 开新对话
-        if ui_status == UIStatus.CONTEXT_OVERFLOW:
-            return self._handle_context_overflow(devplan_data, task_id)
-
-        # 限流 → 等待冷却
-        if ui_status == UIStatus.RATE_LIMIT:
-            return self._handle_rate_limit_with_backoff(
-                f"DevPlan 有待发任务 {task_id}，检测到限流"
-            )
-
-        # API 超时 → 即时重试
-        if ui_status == UIStatus.API_TIMEOUT:
-            return self._handle_network_recovery(
-                f"DevPlan 有待发任务 {task_id}，API 超时，尝试恢复"
-            )
-
-        # 响应被中断 → 发送"请继续"
-        if ui_status == UIStatus.RESPONSE_INTERRUPTED:
-            return self._maybe_send_continue(
-                f"DevPlan 有待发任务 {task_id}，AI 响应被中断，发送继续"
+                action=Action.START_PHASE,
+                message=f"启动新阶段: {phase_id} — {phase_info.get('title', '')}",
+                phase_id=phase_id,
             )
+        return Decision(
+            action=Action.WAIT,
+            message=f"有待启动阶段 {phase_id}，但自动启动已禁用",
+        )
 
-        # 响应中断（累积型）→ 唤醒，多次无效则升级
-        if ui_status == UIStatus.RESPONSE_STALL:
-            return self._handle_response_stall(devplan_data, task_id)
-
-        # 屏幕有变化 → AI 可能正在工作，等一等
-        if screen_changing:
-            return Decision(
-                action=Action.WAIT,
-                message=f"DevPlan 有待发任务 {task_id}，但屏幕有变化（AI 可能在忙），等待中",
-            )
+    def _on_wait(self, devplan_data: dict, template: str) -> Decision:
+        return Decision(action=Action.WAIT, message=self._render(template, devplan_data))
 
-        # 屏幕无变化 + IDLE/UNKNOWN → 发送新任务
-        task_content = self._format_task_content(task_id, title, description)
+    def _on_send_task(self, devplan_data: dict, template: str) -> Decision:
+        """屏幕无变化 + IDLE/UNKNOWN → 发送新任务"""
+        sub_task = devplan_data.get("subTask", {})
+        task_id = sub_task.get("taskId", "")
+        task_content = self._format_task_content(task_id, sub_task.get("title", ""), sub_task.get("description", ""))
         self.tracker.reset_all()
         return Decision(
             action=Action.SEND_TASK,
-            message=f"发送子任务: {task_id} — {title}",
+            message=self._render(template, devplan_data),
             task_content=task_content,
             task_id=task_id,
         )
 
-    def _decide_wait(
-        self,
-        devplan_data: dict,
-        ui_status: UIStatus,
-        screen_changing: bool,
-    ) -> Decision:
-        """DevPlan 说"等待中（AI 正在工作）"时的决策（5 状态版）
-
-        判断逻辑（8 状态版）：
-        1. AI_GENERATING → AI 正在工作，等待
-        2. CONNECTION_ERROR → 发送"请继续"恢复连接
-        3. PROVIDER_ERROR → 发送"请继续"恢复
-        4. CONTEXT_OVERFLOW → 开新对话 + 恢复
-        5. RATE_LIMIT → 等待冷却
-        6. API_TIMEOUT → 即时重试
-        7. RESPONSE_INTERRUPTED → 发送"请继续"
-        8. RESPONSE_STALL → 唤醒，连续无效→升级
-        9. 屏幕有变化 → AI 正在工作，继续等待
-        10. 屏幕无变化 → AI 可能已停止，尝试唤醒
-        """
-        sub_task = devplan_data.get("subTask", {})
-        task_id = sub_task.get("taskId", "")
-
-        # AI 正在生成 → 等待
-        if ui_status == UIStatus.AI_GENERATING:
-            return Decision(
-                action=Action.WAIT,
-                message=f"{task_id} 执行中，AI 正在生成，继续等待",
-            )
-
-        # 连接错误 → 尝试恢复
-        if ui_status == UIStatus.CONNECTION_ERROR:
-            return self._handle_network_recovery(
-                f"{task_id} 执行中但 UI 检测到连接错误，尝试恢复"
-            )
+    def _on_send_continue(self, devplan_data: dict, template: str) -> Decision:
+        return self._maybe_send_continue(self._render(template, devplan_data))
 
-        # Provider 错误 → 尝试恢复
-        if ui_status == UIStatus.PROVIDER_ERROR:
-            return self._handle_network_recovery(
-                f"{task_id} 执行中但 UI 检测到 Provider Error，尝试恢复"
-            )
+    def _on_network_recovery(self, devplan_data: dict, template: str) -> Decision:
+        return self._handle_network_recovery(self._render(template, devplan_data))
 
-        # 上下文溢出 → 开新对话
-        if ui_status == UIStatus.CONTEXT_OVERFLOW:
-            return self._handle_context_overflow(devplan_data, task_id)
+    def _on_rate_limit(self, devplan_data: dict, template: str) -> Decision:
+        return self._handle_rate_limit_with_backoff(self._render(template, devplan_data))
 
-        # 限流 → 等待冷却
-        if ui_status == UIStatus.RATE_LIMIT:
-            return self._handle_rate_limit_with_backoff(
-                f"{task_id} 执行中检测到限流"
-            )
+    def _on_context_overflow(self, devplan_data: dict, template: str) -> Decision:
+        return self._handle_context_overflow(devplan_data, devplan_data.get("subTask", {}).get("taskId", ""))
 
-        # API 超时 → 即时重试
-        if ui_status == UIStatus.API_TIMEOUT:
-            return self._handle_network_recovery(
-                f"{task_id} 执行中，API 超时，尝试恢复"
-            )
-
-        # 响应被中断 → 发送"请继续"
-        if ui_status == UIStatus.RESPONSE_INTERRUPTED:
-            return self._maybe_send_continue(
-                f"{task_id} 执行中，AI 响应被中断，发送继续"
-            )
-
-        # 响应中断（累积型）→ 唤醒，多次无效则升级
-        if ui_status == UIStatus.RESPONSE_STALL:
-            return self._handle_response_stall(devplan_data, task_id)
-
-        # 屏幕有变化 → AI 正在工作（代替原 WORKING / TERMINAL_RUNNING 判断）
-        if screen_changing:
-            return Decision(
-                action=Action.WAIT,
-                message=f"{task_id} 执行中，屏幕有变化（AI 在工作），继续等待",
-            )
-
-        # 屏幕无变化 + IDLE/UNKNOWN → AI 可能已停止，尝试唤醒
-        return self._maybe_send_continue(
-            f"{task_id} 执行中但屏幕无变化且 UI 空闲，尝试唤醒"
-        )
+    def _on_response_stall(self, devplan_data: dict, template: str) -> Decision:
+        return self._handle_response_stall(devplan_data, devplan_data.get("subTask", {}).get("taskId", ""))
 
     # ── 3 分钟兜底策略 ─────────────────────────────────────────
 
@@ -578,6 +514,29 @@ class DualChannelEngine:
             message=f'兜底策略: 右下角 {br_no_change_seconds:.0f} 秒无变化，发送"请继续"唤醒',
         )
 
+    # ── 上下文预算 ───────────────────────────────────────────
+
+    def _check_context_budget(self, devplan_data: dict, decision: Decision) -> Decision:
+        """
+        预算耗尽时，把即将发送的任务 / "请继续"改为有计划的开新对话。
+
+        只在发送类决策上触发：此时 AI 已空闲，换对话不会打断正在生成的回复。
+        """
+        budget = self.context_budget
+        if budget is None or decision.action not in (Action.SEND_TASK, Action.SEND_CONTINUE):
+            return decision
+        if not budget.exhausted:
+            return decision
+        task_id = devplan_data.get("subTask", {}).get("taskId", "") or decision.task_id or ""
+        logger.warning("🟠 对话上下文接近上限（%s），预防性开新对话", budget.describe())
+        return self._new_conversation(
+            devplan_data,
+            task_id,
+            message=f"上下文预算耗尽（{budget.usage_ratio:.0%}），预防性开新对话 {task_id}",
+            note="对话上下文接近上限，已主动开启新对话",
+            reason="CONTEXT_BUDGET",
+        )
+
     # ── 辅助方法 ─────────────────────────────────────────────
 
     def _handle_context_overflow(self, devplan_data: dict, task_id: str) -> Decision:
@@ -590,7 +549,22 @@ class DualChannelEngine:
         3. 重置所有状态计数
         """
         logger.warning("🔴 检测到上下文溢出 (CONTEXT_OVERFLOW)，准备开新对话恢复")
+        return self._new_conversation(
+            devplan_data,
+            task_id,
+            message=f"上下文溢出，开新对话恢复 {task_id}",
+            note="上下文过长导致中断",
+        )
 
+    def _new_conversation(
+        self,
+        devplan_data: dict,
+        task_id: str,
+        message: str,
+        note: str,
+        reason: str = "",
+    ) -> Decision:
+        """构建开新对话决策（恢复 prompt 告诉新对话从哪里继续）"""
         # 构建恢复 prompt
         sub_task = devplan_data.get("subTask", {})
         phase = devplan_data.get("phase", {})
@@ -605,15 +579,16 @@ class DualChannelEngine:
             restore_prompt += f"\n当前子任务: {task_id} — {sub_title}"
         if sub_desc:
             restore_prompt += f"\n任务描述: {sub_desc}"
-        restore_prompt += "\n\n上下文过长导致中断，请使用 devplan 工具查询任务状态后继续开发。"
+        restore_prompt += f"\n\n{note}，请使用 devplan 工具查询任务状态后继续开发。"
 
         self.tracker.reset_all()
         return Decision(
             action=Action.NEW_CONVERSATION,
-            message=f"上下文溢出，开新对话恢复 {task_id}",
+            message=message,
             task_content=restore_prompt,
             task_id=task_id,
             cooldown_seconds=self.context_overflow_wait,
+            reason=reason,
         )
 
     def _handle_rate_limit_with_backoff(self, message: str) -> Decision:
@@ -712,7 +687,7 @@ class DualChannelEngine:
 
         cooldown = max(30, int(self.network_recovery_window_cooldown))
         self.tracker.circuit_state = "open"
-        self.tracker.circuit_open_until = time.time() + cooldown
+        self.tracker.circuit_open_until = self.clock.time() + cooldown
         return Decision(
             action=Action.ERROR_RECOVERY,
             message=(
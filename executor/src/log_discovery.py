@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — Cursor 会话日志发现索引
+
+Cursor 每次启动在 %APPDATA%/Cursor/logs 下新建一个 session 目录（名称即启动时间，
+如 20260219T151323），每个窗口一个 windowN/renderer.log。长期运行的机器上这里会
+积累成百上千个历史 session，而原实现在启动和每次轮转检测失败时都要列出并排序全部
+目录，且只认 window1。
+
+SessionLogIndex 缓存发现结果并增量跟进：
+  - logs 目录 mtime 未变化 → 不列目录（新建 session 会改变父目录 mtime）
+  - 只检查名称比当前 session 新的目录；尚无 renderer.log 的最新 session 记为待定，
+    之后每次刷新只复查这一个目录
+  - 当前 session 目录 mtime 变化（新开窗口）时才重新列出其 windowN 子目录
+  - 同时跟踪当前 session 的全部 windowN/renderer.log，按 window_owners
+    映射到所属 executor；未配置映射时 window1 归本 executor（与旧行为一致）
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Mapping, Optional
+
+logger = logging.getLogger(__name__)
+
+# 未配置窗口映射时归本 executor 的窗口
+DEFAULT_WINDOW = "window1"
+RENDERER_LOG = "renderer.log"
+
+
+@dataclass(frozen=True)
+class RendererLog:
+    """一个窗口的 renderer.log"""
+    session: str    # session 目录名（启动时间）
+    window: str     # windowN
+    path: Path
+    owner: str      # 所属 executor_id（空字符串 = 不属于任何已配置的 executor）
+
+
+def default_logs_dir() -> Path:
+    """Cursor 日志根目录：%APPDATA%/Cursor/logs"""
+    appdata = os.environ.get("APPDATA", "")
+    if not appdata:
+        # 尝试 Windows 默认路径
+        appdata = os.path.expandvars(r"%APPDATA%")
+    return Path(appdata) / "Cursor" / "logs"
+
+
+def _mtime(path: Path) -> Optional[float]:
+    try:
+        return os.stat(path).st_mtime
+    except OSError:
+        return None
+
+
+class SessionLogIndex:
+    """
+    使用方式：
+        index = SessionLogIndex(window_owners={"window2": "executor-b"}, default_owner="executor-a")
+        index.refresh()                   # 启动时及每轮轮询；返回日志集合是否变化
+        for log in index.for_owner("executor-a"):
+            tail(log.path)
+    """
+
+    def __init__(
+        self,
+        logs_dir: str | Path | None = None,
+        window_owners: Optional[Mapping[str, str]] = None,
+        default_owner: str = "",
+    ):
+        self.logs_dir = Path(logs_dir) if logs_dir else default_logs_dir()
+        self.window_owners = dict(window_owners or {})
+        self.default_owner = default_owner
+        self._logs_dir_mtime: Optional[float] = None
+        self._session: str = ""                 # 当前跟踪的 session
+        self._session_mtime: Optional[float] = None
+        self._pending: set[str] = set()         # 比当前新、但尚无 renderer.log 的 session
+        self._logs: dict[str, RendererLog] = {}  # window → RendererLog
+        self._window_dirs = 0                    # 当前 session 的 windowN 目录数（含尚未写出日志的窗口）
+        self.stats = {"dir_listings": 0, "sessions_checked": 0, "skipped": 0}
+
+    # ── 查询 ─────────────────────────────────────────────────
+
+    @property
+    def session(self) -> str:
+        return self._session
+
+    def logs(self) -> list[RendererLog]:
+        """当前 session 的全部 renderer.log（按窗口名排序）"""
+        return [self._logs[w] for w in sorted(self._logs)]
+
+    def for_owner(self, owner: str) -> list[RendererLog]:
+        return [log for log in self.logs() if log.owner == owner]
+
+    def owner_of(self, window: str) -> str:
+        if self.window_owners:
+            return self.window_owners.get(window, "")
+        return self.default_owner if window == DEFAULT_WINDOW else ""
+
+    # ── 刷新 ─────────────────────────────────────────────────
+
+    def refresh(self) -> bool:
+        """增量更新索引；返回跟踪的日志集合是否变化"""
+        before = set(self._logs.values())
+        mtime = _mtime(self.logs_dir)
+        if mtime is None:
+            if self._logs_dir_mtime is not None:
+                logger.debug("Cursor logs 目录不存在: %s", self.logs_dir)
+            self._reset()
+            return bool(before)
+
+        if mtime != self._logs_dir_mtime:
+            self._logs_dir_mtime = mtime
+            self._discover_sessions()
+        elif self._pending:
+            self._check_pending()
+        else:
+            self.stats["skipped"] += 1
+
+        if self._session:
+            session_mtime = _mtime(self.logs_dir / self._session)
+            if session_mtime is None:
+                # 当前 session 被清理：退回全量发现
+                self._reset()
+                self._logs_dir_mtime = mtime
+                self._discover_sessions()
+            elif session_mtime != self._session_mtime or len(self._logs) < self._window_dirs:
+                self._session_mtime = session_mtime
+                self._scan_windows()
+        return set(self._logs.values()) != before
+
+    def _reset(self) -> None:
+        self._logs_dir_mtime = None
+        self._session = ""
+        self._session_mtime = None
+        self._pending.clear()
+        self._logs.clear()
+        self._window_dirs = 0
+
+    def _discover_sessions(self) -> None:
+        """列出 logs 目录，只检查比当前 session 新的目录"""
+        self.stats["dir_listings"] += 1
+        try:
+            with os.scandir(self.logs_dir) as it:
+                newer = [e.name for e in it if e.name > self._session and e.is_dir()]
+        except OSError as e:
+            logger.debug("列出 Cursor logs 目录失败: %s", e)
+            return
+        self._pending.update(newer)
+        self._check_pending()
+
+    def _check_pending(self) -> None:
+        """从新到旧检查待定 session，找到第一个含 renderer.log 的即切换"""
+        for name in sorted(self._pending, reverse=True):
+            self.stats["sessions_checked"] += 1
+            windows = self._list_windows(self.logs_dir / name)
+            if windows is None:
+                self._pending.discard(name)
+                continue
+            if any((self.logs_dir / name / w / RENDERER_LOG).exists() for w in windows):
+                self._switch_session(name)
+                return
+        # 都还没有日志：只有最新的目录可能是刚启动、尚未写日志的 session，其余不再复查
+        if self._pending:
+            self._pending = {max(self._pending)}
+
+    def _switch_session(self, name: str) -> None:
+        if self._session:
+            logger.info("检测到新的 Cursor session: %s", name)
+        self._session = name
+        self._session_mtime = _mtime(self.logs_dir / name)
+        # 更旧的待定目录不会再成为当前 session
+        self._pending = {p for p in self._pending if p > name}
+        self._logs.clear()
+        self._scan_windows()
+
+    def _scan_windows(self) -> None:
+        session_dir = self.logs_dir / self._session
+        windows = self._list_windows(session_dir) or []
+        self._window_dirs = len(windows)
+        logs: dict[str, RendererLog] = {}
+        for window in windows:
+            path = session_dir / window / RENDERER_LOG
+            if path.exists():
+                logs[window] = self._logs.get(window) or RendererLog(
+                    session=self._session, window=window, path=path, owner=self.owner_of(window),
+                )
+        self._logs = logs
+
+    @staticmethod
+    def _list_windows(session_dir: Path) -> Optional[list[str]]:
+        try:
+            with os.scandir(session_dir) as it:
+                return [e.name for e in it if e.name.startswith("window") and e.is_dir()]
+        except OSError:
+            return None
@@ -0,0 +1,383 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 多源日志采集管线
+
+renderer.log 只能看到 ToolCall 与少数网络错误；限流响应头、token 用量、模型切换等
+更早、更具体的信号散落在同一窗口的其他 Cursor 日志里（扩展宿主 exthost、network）。
+
+管线结构：
+  SessionLogIndex（当前 session 中归属本 executor 的窗口）
+    → 每个窗口按各 LogParser.patterns 匹配日志文件，逐文件增量 tail
+    → LogParser.parse(line) 产出 LogEvent（按来源的解析器可插拔，见 PARSERS / register_parser）
+    → EventBus（共享、有界；满了丢弃最旧事件并计数）
+    → CursorLogMonitor 消费，汇总成 LogMonitorState 供仲裁器 / 决策引擎使用
+
+每个来源维护吞吐计数（文件数 / 行数 / 字节数 / 事件数 / 解析异常数），
+由 /metrics 按 source 标签导出。
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from enum import Enum
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+from .log_discovery import SessionLogIndex
+
+logger = logging.getLogger(__name__)
+
+
+class LogEventType(str, Enum):
+    """日志事件类型"""
+    TOOL_CALL_START = "TOOL_CALL_START"        # AI 发起了工具调用
+    TOOL_CALL_END = "TOOL_CALL_END"            # 工具调用完成
+    TOOL_CALL_FAILED = "TOOL_CALL_FAILED"      # 工具调用传输失败
+    NETWORK_ERROR = "NETWORK_ERROR"            # 网络级错误 (ECONNRESET / TLS / socket)
+    RATE_LIMIT = "RATE_LIMIT"                  # 429 / 限流响应头（value = retry-after 秒，0 表示未知）
+    TOKEN_USAGE = "TOKEN_USAGE"                # 一次请求的 token 用量（value = token 数）
+    MODEL_SWITCH = "MODEL_SWITCH"              # 当前使用的模型（detail = 模型名）
+    UNKNOWN = "UNKNOWN"
+
+
+@dataclass
+class LogEvent:
+    """一条解析后的日志事件"""
+    event_type: LogEventType
+    timestamp: float           # 事件时间 (time.time())
+    raw_line: str              # 原始日志行
+    detail: str = ""           # 额外信息（如工具名、错误类型）
+    source: str = "renderer"   # 来源解析器名
+    value: float = 0.0         # 数值信号（retry-after 秒数 / token 数）
+
+
+# ── 日志解析正则 ──────────────────────────────────────────────
+
+# ToolCallEventService: Tracked tool call start - {id} ({tool_name})
+RE_TOOL_CALL_START = re.compile(
+    r"Tracked tool call start - (\S+)\s+\(([^)]+)\)"
+)
+
+# ToolCallEventService: Tracked tool call end - {id}
+RE_TOOL_CALL_END = re.compile(
+    r"Tracked tool call end - (\S+)"
+)
+
+# ToolCallEventService: Failed to send tool call event
+RE_TOOL_CALL_FAILED = re.compile(
+    r"Failed to send tool call"
+)
+
+# [error] [aborted] read ECONNRESET / socket hang up / TLS connection
+RE_NETWORK_ERROR = re.compile(
+    r"\[error\].*(?:ECONNRESET|socket hang up|TLS connection|ETIMEDOUT|ENOTFOUND)",
+    re.IGNORECASE,
+)
+
+# status 429 / Too Many Requests / resource_exhausted / x-ratelimit-remaining: 0
+RE_RATE_LIMIT = re.compile(
+    r"(?:(?:status|code|http/[\d.]+)[\"']?\s*[:=]?\s*429\b|too many requests"
+    r"|rate[ _-]?limit(?:ed| exceeded)|resource_exhausted"
+    r"|x-ratelimit-remaining[\w-]*[\"']?\s*[:=]\s*[\"']?0\b)",
+    re.IGNORECASE,
+)
+# retry-after: 30 / "retryAfter": 30 / x-ratelimit-reset-requests: 12s
+RE_RETRY_AFTER = re.compile(
+    r"(?:retry[-_ ]?after|x-ratelimit-reset[\w-]*)[\"']?\s*[:=]\s*[\"']?(\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+# "total_tokens": 1234 / totalTokens=1234 / prompt_tokens / completion_tokens / input_tokens / output_tokens
+RE_TOKENS = re.compile(
+    r"\b(total|prompt|completion|input|output)_?tokens[\"']?\s*[:=]\s*(\d+)",
+    re.IGNORECASE,
+)
+# model changed to claude-4-sonnet / Switched model: gpt-5 / "modelName": "claude-4-opus"
+RE_MODEL = re.compile(
+    r"(?:model\s+(?:changed|switched|set)\s+to|switch(?:ed|ing)\s+model\s*(?:to|:)|[\"']?modelName[\"']?\s*[:=])"
+    r"\s*[\"']?([\w.:/-]+)",
+    re.IGNORECASE,
+)
+
+
+def extract_error_type(line: str) -> str:
+    """从错误日志行中提取错误类型关键词"""
+    lower = line.lower()
+    if "econnreset" in lower:
+        return "ECONNRESET"
+    if "tls" in lower:
+        return "TLS_ERROR"
+    if "socket hang up" in lower:
+        return "SOCKET_HANGUP"
+    if "etimedout" in lower:
+        return "ETIMEDOUT"
+    if "enotfound" in lower:
+        return "ENOTFOUND"
+    return "UNKNOWN_NETWORK_ERROR"
+
+
+# ── 解析器 ───────────────────────────────────────────────────
+
+# 来源名 → 解析器类（第三方解析器用 register_parser 注册后即可在配置中启用）
+PARSERS: dict[str, type[LogParser]] = {}
+
+
+def register_parser(cls: type[LogParser]) -> type[LogParser]:
+    """注册解析器类（装饰器）"""
+    if not cls.name or not cls.patterns:
+        raise ValueError(f"解析器 {cls.__name__} 缺少 name 或 patterns")
+    PARSERS[cls.name] = cls
+    return cls
+
+
+class LogParser:
+    """
+    按来源的日志解析器基类。
+
+    子类设置 name（来源名，用于计数与事件标注）和 patterns（相对窗口目录的 glob），
+    实现 parse(line, now) → LogEvent | None。
+    """
+
+    name: str = ""
+    patterns: tuple[str, ...] = ()
+
+    def parse(self, line: str, now: float) -> Optional[LogEvent]:
+        raise NotImplementedError
+
+    def _event(self, event_type: LogEventType, now: float, line: str, detail: str = "", value: float = 0.0) -> LogEvent:
+        return LogEvent(event_type=event_type, timestamp=now, raw_line=line, detail=detail,
+                        source=self.name, value=value)
+
+    def _parse_signals(self, line: str, now: float) -> Optional[LogEvent]:
+        """限流 / token 用量 / 模型切换（exthost 与 network 共用）"""
+        if RE_RATE_LIMIT.search(line):
+            m = RE_RETRY_AFTER.search(line)
+            return self._event(LogEventType.RATE_LIMIT, now, line, "rate_limit", float(m.group(1)) if m else 0.0)
+        tokens = RE_TOKENS.findall(line)
+        if tokens:
+            counts = {kind.lower(): int(n) for kind, n in tokens}
+            total = counts.get("total") or sum(counts.values())
+            return self._event(LogEventType.TOKEN_USAGE, now, line, "tokens", float(total))
+        m = RE_MODEL.search(line)
+        if m:
+            return self._event(LogEventType.MODEL_SWITCH, now, line, m.group(1))
+        return None
+
+
+@register_parser
+class RendererLogParser(LogParser):
+    """renderer.log：ToolCall 生命周期与网络错误"""
+
+    name = "renderer"
+    patterns = ("renderer.log",)
+
+    def parse(self, line: str, now: float) -> Optional[LogEvent]:
+        m = RE_TOOL_CALL_START.search(line)
+        if m:
+            call_id, tool_name = m.group(1), m.group(2)
+            return self._event(LogEventType.TOOL_CALL_START, now, line, f"{call_id}:{tool_name}")
+        m = RE_TOOL_CALL_END.search(line)
+        if m:
+            return self._event(LogEventType.TOOL_CALL_END, now, line, m.group(1))
+        if RE_TOOL_CALL_FAILED.search(line):
+            return self._event(LogEventType.TOOL_CALL_FAILED, now, line, "tool_call_send_failure")
+        if RE_NETWORK_ERROR.search(line):
+            return self._event(LogEventType.NETWORK_ERROR, now, line, extract_error_type(line))
+        return None
+
+
+@register_parser
+class ExtHostLogParser(LogParser):
+    """
+    扩展宿主日志：Cursor 自带 AI 扩展输出的请求结果（限流头、用量、模型）。
+
+    只匹配 Cursor 自己的扩展（发布者 anysphere）与名为 Cursor 的输出通道：
+    exthost.log 与其他扩展（GitHub PR、GitLens 等）的输出里同样会出现 429 /
+    rate limit，不能当作 Cursor 对话被限流的信号。
+    """
+
+    name = "exthost"
+    patterns = ("exthost/anysphere.*/*.log", "exthost/output_logging_*/*-Cursor*.log")
+
+    def parse(self, line: str, now: float) -> Optional[LogEvent]:
+        return self._parse_signals(line, now)
+
+
+@register_parser
+class NetworkLogParser(LogParser):
+    """network 日志：请求级错误与限流响应"""
+
+    name = "network"
+    patterns = ("network.log", "network-*.log")
+
+    def parse(self, line: str, now: float) -> Optional[LogEvent]:
+        event = self._parse_signals(line, now)
+        if event is None and RE_NETWORK_ERROR.search(line):
+            event = self._event(LogEventType.NETWORK_ERROR, now, line, extract_error_type(line))
+        return event
+
+
+def build_parsers(names: Iterable[str]) -> list[LogParser]:
+    """按来源名创建解析器；未知来源记录警告后跳过"""
+    parsers = []
+    for name in names:
+        cls = PARSERS.get(name)
+        if cls is None:
+            logger.warning("未知日志来源 %r（可用: %s），已忽略", name, ", ".join(sorted(PARSERS)))
+            continue
+        parsers.append(cls())
+    return parsers
+
+
+# ── 事件总线 ─────────────────────────────────────────────────
+
+class EventBus:
+    """有界事件队列：生产者（各来源）publish，消费者 drain；超出容量时丢弃最旧事件"""
+
+    def __init__(self, capacity: int = 2000):
+        self.capacity = max(1, int(capacity))
+        self._events: deque[LogEvent] = deque(maxlen=self.capacity)
+        self.published = 0
+        self.dropped = 0
+
+    def publish(self, event: LogEvent) -> None:
+        if len(self._events) == self.capacity:
+            self.dropped += 1
+        self._events.append(event)
+        self.published += 1
+
+    def drain(self) -> list[LogEvent]:
+        events = list(self._events)
+        self._events.clear()
+        return events
+
+    def __len__(self) -> int:
+        return len(self._events)
+
+
+# ── 采集器 ───────────────────────────────────────────────────
+
+@dataclass
+class _LogTail:
+    """单个日志文件的增量读取位置"""
+    path: Path
+    parser: LogParser
+    position: int = 0
+
+
+class LogIngestor:
+    """
+    使用方式：
+        ingestor = LogIngestor(index, owner="executor-a", parsers=build_parsers(["renderer", "exthost"]))
+        ingestor.start()                  # 已存在的文件从末尾开始
+        ingestor.poll()                   # 每轮：跟进新文件并读取新行，事件进入 ingestor.bus
+        events = ingestor.bus.drain()
+    """
+
+    # 当前窗口内重新匹配日志文件的最小间隔（秒；扩展日志会在运行中陆续创建）
+    RESCAN_INTERVAL = 30.0
+
+    def __init__(
+        self,
+        index: SessionLogIndex,
+        owner: str = "",
+        parsers: Optional[Sequence[LogParser]] = None,
+        bus: Optional[EventBus] = None,
+    ):
+        self.index = index
+        self.owner = owner
+        self.parsers = list(parsers) if parsers is not None else [RendererLogParser()]
+        self.bus = bus or EventBus()
+        self._tails: dict[Path, _LogTail] = {}
+        self._next_rescan = 0.0
+        self.stats: dict[str, dict[str, int]] = {
+            p.name: {"files": 0, "lines": 0, "bytes": 0, "events": 0, "errors": 0} for p in self.parsers
+        }
+
+    @property
+    def paths(self) -> list[Path]:
+        return list(self._tails)
+
+    def paths_for(self, source: str) -> list[Path]:
+        return [t.path for t in self._tails.values() if t.parser.name == source]
+
+    def start(self) -> int:
+        """发现当前日志文件并跳到末尾（只采集新内容）；返回跟踪的文件数"""
+        self.index.refresh()
+        self._sync(from_end=True)
+        return len(self._tails)
+
+    def poll(self) -> int:
+        """跟进新 session / 新文件、检测截断并读取新行；返回本次发布的事件数"""
+        changed = self.index.refresh()
+        now = time.time()
+        if changed or now >= self._next_rescan:
+            self._sync(from_end=False)
+        published = 0
+        for tail in self._tails.values():
+            published += self._read(tail, now)
+        return published
+
+    def _sync(self, from_end: bool) -> None:
+        """按索引与解析器 patterns 同步跟踪文件：新文件加入，消失的移除"""
+        self._next_rescan = time.time() + self.RESCAN_INTERVAL
+        current: dict[Path, LogParser] = {}
+        for log in self.index.for_owner(self.owner):
+            window_dir = log.path.parent
+            for parser in self.parsers:
+                for pattern in parser.patterns:
+                    for path in window_dir.glob(pattern):
+                        current.setdefault(path, parser)
+        for path in list(self._tails):
+            if path not in current:
+                del self._tails[path]
+        for path in sorted(current.keys() - self._tails.keys()):
+            position = 0
+            if from_end:
+                try:
+                    position = os.stat(path).st_size
+                except OSError:
+                    continue
+            else:
+                logger.info("检测到新的日志文件: %s", path)
+            self._tails[path] = _LogTail(path, current[path], position)
+        for parser in self.parsers:
+            self.stats[parser.name]["files"] = sum(1 for t in self._tails.values() if t.parser is parser)
+
+    def _read(self, tail: _LogTail, now: float) -> int:
+        try:
+            size = os.stat(tail.path).st_size
+            if size < tail.position:
+                logger.info("检测到日志文件被截断或轮转，重置读取位置: %s", tail.path)
+                tail.position = 0
+            if size == tail.position:
+                return 0
+            start = tail.position
+            with open(tail.path, "r", encoding="utf-8", errors="replace") as f:
+                f.seek(start)
+                content = f.read()
+                tail.position = f.tell()
+        except OSError as e:
+            logger.debug("读取日志失败: %s", e)
+            return 0
+
+        counters = self.stats[tail.parser.name]
+        counters["bytes"] += tail.position - start
+        published = 0
+        for line in content.splitlines():
+            counters["lines"] += 1
+            try:
+                event = tail.parser.parse(line, now)
+            except Exception as e:
+                counters["errors"] += 1
+                logger.debug("%s 解析失败: %s", tail.parser.name, e)
+                continue
+            if event is not None:
+                counters["events"] += 1
+                self.bus.publish(event)
+                published += 1
+        return published
@@ -2,12 +2,15 @@
 """
 DevPlan Executor — Cursor 日志监控模块 (Channel 1)
 
-监控 Cursor 的 renderer.log，实时追踪 AI 活动状态：
+监控 Cursor 的 renderer.log（及扩展宿主 / network 日志），实时追踪 AI 活动状态：
   - ToolCall start/end 事件 → 判断 AI 是否在工作
   - 网络错误日志 → 提前发现 ECONNRESET / TLS / Socket 错误
+  - 限流响应 / token 用量 / 模型切换 → 无需截图即可识别 RATE_LIMIT
   - 空闲时间统计 → AI 停止工作后经过的秒数
 
-日志路径: %APPDATA%/Cursor/logs/{latest_session}/window1/renderer.log
+日志路径: %APPDATA%/Cursor/logs/{latest_session}/windowN/renderer.log
+（由 log_discovery.SessionLogIndex 增量发现；同时跟踪本 executor 所属的全部窗口日志；
+  多来源采集与解析见 log_ingest）
 
 与截图分析形成互补：
   - 日志监控 = 快速（毫秒级）、精确、低资源
@@ -18,33 +21,39 @@ DevPlan Executor — Cursor 日志监控模块 (Channel 1)
 from __future__ import annotations
 
 import logging
-import os
-import re
 import time
 from dataclasses import dataclass, field
-from enum import Enum
 from pathlib import Path
-from typing import Optional
+from typing import Iterable, Mapping, Optional
+
+from .log_discovery import SessionLogIndex
+from .log_ingest import (  # noqa: F401  LogEvent / LogEventType / 正则保持从本模块可导入
+    RE_NETWORK_ERROR,
+    RE_TOOL_CALL_END,
+    RE_TOOL_CALL_FAILED,
+    RE_TOOL_CALL_START,
+    EventBus,
+    LogEvent,
+    LogEventType,
+    LogIngestor,
+    build_parsers,
+)
 
 logger = logging.getLogger(__name__)
 
+# 默认启用的日志来源（见 log_ingest.PARSERS）
+DEFAULT_SOURCES = ("renderer", "exthost", "network")
 
-class LogEventType(str, Enum):
-    """日志事件类型"""
-    TOOL_CALL_START = "TOOL_CALL_START"        # AI 发起了工具调用
-    TOOL_CALL_END = "TOOL_CALL_END"            # 工具调用完成
-    TOOL_CALL_FAILED = "TOOL_CALL_FAILED"      # 工具调用传输失败
-    NETWORK_ERROR = "NETWORK_ERROR"            # 网络级错误 (ECONNRESET / TLS / socket)
-    UNKNOWN = "UNKNOWN"
-
+# 限流日志未给出 retry-after 时，视为仍处于限流的秒数
+RATE_LIMIT_HOLD_SECONDS = 60.0
 
-@dataclass
-class LogEvent:
-    """一条解析后的日志事件"""
-    event_type: LogEventType
-    timestamp: float           # 事件时间 (time.time())
-    raw_line: str              # 原始日志行
-    detail: str = ""           # 额外信息（如工具名、错误类型）
+# 计入「AI 活动」的事件（限流 / 用量 / 模型切换不代表 AI 正在工作）
+_ACTIVITY_EVENTS = frozenset({
+    LogEventType.TOOL_CALL_START,
+    LogEventType.TOOL_CALL_END,
+    LogEventType.TOOL_CALL_FAILED,
+    LogEventType.NETWORK_ERROR,
+})
 
 
 @dataclass
@@ -58,37 +67,21 @@ class LogMonitorState:
     total_tool_calls: int = 0             # 累计 ToolCall 数量
     total_errors: int = 0                 # 累计错误数量
     log_file_found: bool = False          # 是否找到了日志文件
-
-
-# ── 日志解析正则 ──────────────────────────────────────────────
-
-# ToolCallEventService: Tracked tool call start - {id} ({tool_name})
-RE_TOOL_CALL_START = re.compile(
-    r"Tracked tool call start - (\S+)\s+\(([^)]+)\)"
-)
-
-# ToolCallEventService: Tracked tool call end - {id}
-RE_TOOL_CALL_END = re.compile(
-    r"Tracked tool call end - (\S+)"
-)
-
-# ToolCallEventService: Failed to send tool call event
-RE_TOOL_CALL_FAILED = re.compile(
-    r"Failed to send tool call"
-)
-
-# [error] [aborted] read ECONNRESET / socket hang up / TLS connection
-RE_NETWORK_ERROR = re.compile(
-    r"\[error\].*(?:ECONNRESET|socket hang up|TLS connection|ETIMEDOUT|ENOTFOUND)",
-    re.IGNORECASE,
-)
+    log_files: int = 0                    # 当前跟踪的日志文件数量（所有来源）
+    rate_limited: bool = False            # 日志显示仍处于限流中
+    retry_after: float = 0.0              # 限流剩余秒数（估计）
+    model: str = ""                       # 日志中最近一次出现的模型名
+    tokens_used: int = 0                  # 累计 token 用量
+    last_request_tokens: int = 0          # 最近一次请求的 token 数（≈ 当时的对话上下文长度）
+    token_usage_events: int = 0           # 累计 TOKEN_USAGE 事件数（单调递增，用于区分新读数）
 
 
 class CursorLogMonitor:
     """
-    Cursor renderer.log 日志监控器。
+    Cursor 日志监控器。
 
-    通过 tail 方式增量读取 renderer.log，解析 ToolCall 事件和网络错误，
+    通过 LogIngestor 增量读取 renderer.log 及扩展宿主 / network 日志，
+    消费事件总线上的 ToolCall、网络错误、限流、token 用量与模型切换事件，
     提供 AI 活动状态的实时判断。
 
     用法:
@@ -101,209 +94,139 @@ class CursorLogMonitor:
             # AI 停了 30 秒，触发截图分析
     """
 
-    def __init__(self, idle_threshold: float = 30.0):
+    def __init__(
+        self,
+        idle_threshold: float = 30.0,
+        owner: str = "",
+        window_owners: Optional[Mapping[str, str]] = None,
+        logs_dir: str | Path | None = None,
+        sources: Iterable[str] = DEFAULT_SOURCES,
+        bus_capacity: int = 2000,
+    ):
         """
         Args:
             idle_threshold: AI 无新事件超过此秒数后判定为「停止工作」
+            owner: 本 executor 的 executor_id，只跟踪归属于它的窗口日志
+            window_owners: 窗口 → executor_id 映射（空 = window1 归本 executor）
+            logs_dir: Cursor 日志根目录（默认 %APPDATA%/Cursor/logs）
+            sources: 启用的日志来源（log_ingest.PARSERS 中的名称）
+            bus_capacity: 事件总线容量（单轮积压超过时丢弃最旧事件）
         """
         self.idle_threshold = idle_threshold
-        self._log_path: Optional[Path] = None
-        self._file_handle = None
-        self._file_position: int = 0
-        self._file_inode: Optional[int] = None  # 用于检测日志文件轮转
+        self.owner = owner
+        self.index = SessionLogIndex(logs_dir, window_owners=window_owners, default_owner=owner)
+        self.ingestor = LogIngestor(
+            self.index,
+            owner=owner,
+            parsers=build_parsers(sources),
+            bus=EventBus(bus_capacity),
+        )
         self._pending_calls: dict[str, float] = {}  # call_id → start_time
         self._last_event_time: float = 0.0
         self._recent_errors: list[LogEvent] = []
         self._total_tool_calls: int = 0
         self._total_errors: int = 0
+        self._rate_limit_until: float = 0.0
+        self._total_rate_limits: int = 0
+        self._model: str = ""
+        self._model_switches: int = 0
+        self._tokens_used: int = 0
+        self._last_request_tokens: int = 0
+        self._token_usage_events: int = 0
         self._started: bool = False
 
     def start(self) -> bool:
         """
-        初始化监控器：查找最新的 Cursor 日志文件。
+        初始化监控器：查找最新 Cursor session 中归属本 executor 的日志文件。
 
         Returns:
             True 如果成功找到日志文件，False 如果未找到
         """
-        log_path = self._find_latest_renderer_log()
-        if log_path:
-            self._log_path = log_path
-            # 跳到文件末尾（只监控新事件）
-            try:
-                file_stat = os.stat(log_path)
-                self._file_position = file_stat.st_size
-                self._file_inode = file_stat.st_ino
-                self._started = True
-                logger.info("CursorLogMonitor 启动成功: %s (跳到 offset %d)",
-                            log_path, self._file_position)
-                return True
-            except OSError as e:
-                logger.warning("无法读取日志文件: %s", e)
-                return False
-        else:
+        if not self.ingestor.start():
             logger.warning("未找到 Cursor renderer.log，日志监控通道不可用")
             return False
+        for path in self.ingestor.paths:
+            logger.info("CursorLogMonitor 启动成功: %s", path)
+        self._started = True
+        return True
 
     def poll(self) -> LogMonitorState:
         """
-        轮询一次：读取新日志行，更新内部状态，返回快照。
+        轮询一次：采集各来源新日志行，消费事件总线，返回快照。
 
         应在主循环中每次迭代调用。
         """
-        if not self._started or not self._log_path:
+        if not self._started:
             return LogMonitorState(is_ai_active=False, log_file_found=False)
 
-        # 检查日志文件是否被轮转（新 session 会创建新目录）
-        self._check_log_rotation()
-
-        # 增量读取新行
-        new_lines = self._read_new_lines()
-
-        # 解析事件
-        for line in new_lines:
-            event = self._parse_line(line)
-            if event:
-                self._process_event(event)
+        self.ingestor.poll()
+        for event in self.ingestor.bus.drain():
+            self._process_event(event)
 
         # 构建状态快照
         return self._build_state()
 
+    @property
+    def total_errors(self) -> int:
+        """启动以来累计检测到的网络错误数"""
+        return self._total_errors
+
+    @property
+    def total_tool_calls(self) -> int:
+        """启动以来累计检测到的 ToolCall 数"""
+        return self._total_tool_calls
+
+    @property
+    def pending_tool_calls(self) -> int:
+        """当前进行中的 ToolCall 数（不触发轮询）"""
+        return len(self._pending_calls)
+
+    @property
+    def log_paths(self) -> list[Path]:
+        """当前跟踪的日志文件路径（所有来源）"""
+        return self.ingestor.paths
+
+    @property
+    def source_stats(self) -> dict[str, dict[str, int]]:
+        """各来源吞吐计数：files / lines / bytes / events / errors"""
+        return {name: dict(counters) for name, counters in self.ingestor.stats.items()}
+
+    @property
+    def total_rate_limits(self) -> int:
+        """启动以来日志中检测到的限流次数"""
+        return self._total_rate_limits
+
+    @property
+    def model_switches(self) -> int:
+        """启动以来检测到的模型切换次数"""
+        return self._model_switches
+
+    @property
+    def tokens_used(self) -> int:
+        """启动以来日志中累计的 token 用量"""
+        return self._tokens_used
+
+    @property
+    def bus_dropped(self) -> int:
+        """事件总线因积压丢弃的事件数"""
+        return self.ingestor.bus.dropped
+
+    @property
+    def last_event_time(self) -> float:
+        """最后一次 AI 活动事件时间（epoch 秒，0 表示从未检测到）"""
+        return self._last_event_time
+
     def stop(self):
-        """停止监控，关闭文件句柄"""
-        if self._file_handle:
-            try:
-                self._file_handle.close()
-            except Exception:
-                pass
-            self._file_handle = None
+        """停止监控"""
         self._started = False
         logger.info("CursorLogMonitor 已停止")
 
     # ── 内部方法 ──────────────────────────────────────────────
 
-    @staticmethod
-    def _find_latest_renderer_log() -> Optional[Path]:
-        """查找最新的 Cursor session 的 renderer.log"""
-        appdata = os.environ.get("APPDATA", "")
-        if not appdata:
-            # 尝试 Windows 默认路径
-            appdata = os.path.expandvars(r"%APPDATA%")
-
-        logs_dir = Path(appdata) / "Cursor" / "logs"
-        if not logs_dir.exists():
-            logger.debug("Cursor logs 目录不存在: %s", logs_dir)
-            return None
-
-        # 找到最新的 session 目录（按名称排序，格式: 20260219T151323）
-        session_dirs = sorted(
-            [d for d in logs_dir.iterdir() if d.is_dir()],
-            key=lambda d: d.name,
-            reverse=True,
-        )
-
-        for session_dir in session_dirs:
-            renderer_log = session_dir / "window1" / "renderer.log"
-            if renderer_log.exists():
-                return renderer_log
-
-        logger.debug("未在 %s 中找到 renderer.log", logs_dir)
-        return None
-
-    def _check_log_rotation(self):
-        """检测日志文件是否被轮转（Cursor 重启会创建新 session）"""
-        if not self._log_path:
-            return
-
-        try:
-            file_stat = os.stat(self._log_path)
-            # 文件被截断（大小变小了）或 inode 变了 → 重新打开
-            if file_stat.st_size < self._file_position:
-                logger.info("检测到日志文件被截断或轮转，重置读取位置")
-                self._file_position = 0
-                if self._file_handle:
-                    self._file_handle.close()
-                    self._file_handle = None
-        except OSError:
-            # 文件可能被删除 → 尝试重新查找
-            new_log = self._find_latest_renderer_log()
-            if new_log and new_log != self._log_path:
-                logger.info("检测到新的日志文件: %s", new_log)
-                self._log_path = new_log
-                self._file_position = 0
-                if self._file_handle:
-                    self._file_handle.close()
-                    self._file_handle = None
-
-    def _read_new_lines(self) -> list[str]:
-        """增量读取日志文件的新行"""
-        if not self._log_path:
-            return []
-
-        try:
-            with open(self._log_path, "r", encoding="utf-8", errors="replace") as f:
-                f.seek(self._file_position)
-                new_content = f.read()
-                self._file_position = f.tell()
-
-            if not new_content:
-                return []
-
-            lines = new_content.splitlines()
-            return lines
-
-        except OSError as e:
-            logger.debug("读取日志失败: %s", e)
-            return []
-
-    def _parse_line(self, line: str) -> Optional[LogEvent]:
-        """解析单行日志，返回事件或 None"""
-        now = time.time()
-
-        # ToolCall start
-        m = RE_TOOL_CALL_START.search(line)
-        if m:
-            call_id, tool_name = m.group(1), m.group(2)
-            return LogEvent(
-                event_type=LogEventType.TOOL_CALL_START,
-                timestamp=now,
-                raw_line=line,
-                detail=f"{call_id}:{tool_name}",
-            )
-
-        # ToolCall end
-        m = RE_TOOL_CALL_END.search(line)
-        if m:
-            call_id = m.group(1)
-            return LogEvent(
-                event_type=LogEventType.TOOL_CALL_END,
-                timestamp=now,
-                raw_line=line,
-                detail=call_id,
-            )
-
-        # ToolCall failed
-        if RE_TOOL_CALL_FAILED.search(line):
-            return LogEvent(
-                event_type=LogEventType.TOOL_CALL_FAILED,
-                timestamp=now,
-                raw_line=line,
-                detail="tool_call_send_failure",
-            )
-
-        # Network error
-        if RE_NETWORK_ERROR.search(line):
-            return LogEvent(
-                event_type=LogEventType.NETWORK_ERROR,
-                timestamp=now,
-                raw_line=line,
-                detail=self._extract_error_type(line),
-            )
-
-        return None
-
     def _process_event(self, event: LogEvent):
         """处理解析后的事件，更新内部状态"""
-        self._last_event_time = event.timestamp
+        if event.event_type in _ACTIVITY_EVENTS:
+            self._last_event_time = event.timestamp
 
         if event.event_type == LogEventType.TOOL_CALL_START:
             # 提取 call_id
@@ -327,6 +250,24 @@ class CursorLogMonitor:
             self._recent_errors.append(event)
             logger.warning("网络错误: %s", event.detail)
 
+        elif event.event_type == LogEventType.RATE_LIMIT:
+            hold = event.value or RATE_LIMIT_HOLD_SECONDS
+            self._rate_limit_until = max(self._rate_limit_until, event.timestamp + hold)
+            self._total_rate_limits += 1
+            logger.warning("日志检测到限流（%s，约 %.0fs 后重试）", event.source, hold)
+
+        elif event.event_type == LogEventType.TOKEN_USAGE:
+            self._tokens_used += int(event.value)
+            self._last_request_tokens = int(event.value)
+            self._token_usage_events += 1
+
+        elif event.event_type == LogEventType.MODEL_SWITCH:
+            if event.detail != self._model:
+                if self._model:
+                    self._model_switches += 1
+                    logger.info("日志检测到模型切换: %s → %s", self._model, event.detail)
+                self._model = event.detail
+
         # 清理过期的 recent_errors（只保留 60 秒内的）
         cutoff = time.time() - 60
         self._recent_errors = [e for e in self._recent_errors if e.timestamp > cutoff]
@@ -362,21 +303,12 @@ class CursorLogMonitor:
             recent_errors=list(self._recent_errors),
             total_tool_calls=self._total_tool_calls,
             total_errors=self._total_errors,
-            log_file_found=True,
+            log_file_found=bool(self.ingestor.paths),
+            log_files=len(self.ingestor.paths),
+            rate_limited=self._rate_limit_until > now,
+            retry_after=max(0.0, self._rate_limit_until - now),
+            model=self._model,
+            tokens_used=self._tokens_used,
+            last_request_tokens=self._last_request_tokens,
+            token_usage_events=self._token_usage_events,
         )
-
-    @staticmethod
-    def _extract_error_type(line: str) -> str:
-        """从错误日志行中提取错误类型关键词"""
-        lower = line.lower()
-        if "econnreset" in lower:
-            return "ECONNRESET"
-        if "tls" in lower:
-            return "TLS_ERROR"
-        if "socket hang up" in lower:
-            return "SOCKET_HANGUP"
-        if "etimedout" in lower:
-            return "ETIMEDOUT"
-        if "enotfound" in lower:
-            return "ENOTFOUND"
-        return "UNKNOWN_NETWORK_ERROR"
@@ -25,10 +25,9 @@ import logging
 import os
 import signal
 import sys
-import time
 from datetime import datetime
 from pathlib import Path
-from typing import Optional, Any
+from typing import TYPE_CHECKING, Iterable, Optional, Any
 
 
 def _ensure_utf8_stdio() -> None:
@@ -46,17 +45,74 @@ def _ensure_utf8_stdio() -> None:
                     line_buffering=stream.line_buffering,
                 ))
 
+from .clock import SYSTEM_CLOCK
 from .config import ExecutorConfig, UIStatus, get_config
-from .cursor_controller import CursorController
+from .config_watcher import ConfigDelta, ConfigWatcher
+from .context_budget import ContextBudget
+from .cursor_controller import CursorController, SendResult
 from .devplan_client import DevPlanClient
+from .arbiter import ArbiterVerdict, ChannelArbiter
 from .engine import Action, Decision, DualChannelEngine
+from .policy import PolicyStore
 from .log_monitor import CursorLogMonitor
+from .metrics_store import MetricsStore, TickMetrics
+from .profiler import profiler
+from .scheduler import AdaptivePollScheduler
+from .trace import TraceRecorder
 from .recovery_manager import RecoveryManager
+from .run_journal import RunJournal
+from .send_confirm import SendVerdict
 from .ui_server import image_to_base64, set_executor_refs, start_server_thread, ui_state
-from .vision_analyzer import VisionAnalyzer
+
+if TYPE_CHECKING:
+    from .vision_analyzer import VisionAnalyzer
 
 logger = logging.getLogger("executor")
 
+# 视为网络类错误的 UI 状态（触发快速轮询 / 计入指标网络错误数）
+NETWORK_ERROR_STATUSES = frozenset({UIStatus.CONNECTION_ERROR, UIStatus.PROVIDER_ERROR, UIStatus.API_TIMEOUT})
+
+# 跨重启保留的去重指纹（ExecutorLoop._<name> 属性）
+_JOURNAL_FINGERPRINTS = (
+    "last_dead_letter_fingerprint",
+    "last_recovery_memory_fingerprint",
+    "last_startup_restore_fingerprint",
+)
+
+# 热加载时直接推送到 DualChannelEngine 的字段（配置名 → 引擎属性名）
+_ENGINE_CONFIG_FIELDS = {
+    "status_trigger_threshold": "threshold",
+    "min_send_interval": "min_send_interval",
+    "max_continue_retries": "max_continue_retries",
+    "auto_start_next_phase": "auto_start_next_phase",
+    "fallback_no_change_timeout": "fallback_no_change_timeout",
+    "rate_limit_wait": "rate_limit_wait",
+    "api_timeout_wait": "api_timeout_wait",
+    "context_overflow_wait": "context_overflow_wait",
+    "stall_escalate_threshold": "stall_escalate_threshold",
+    "network_backoff_base": "network_backoff_base",
+    "network_backoff_max": "network_backoff_max",
+    "network_backoff_jitter_ratio": "network_backoff_jitter_ratio",
+    "circuit_breaker_failure_threshold": "circuit_breaker_failure_threshold",
+    "circuit_breaker_open_seconds": "circuit_breaker_open_seconds",
+    "network_recovery_window_seconds": "network_recovery_window_seconds",
+    "network_recovery_window_cooldown": "network_recovery_window_cooldown",
+}
+
+# 热加载时直接推送到 ContextBudget 的字段（配置名 → 属性名）
+_BUDGET_CONFIG_FIELDS = {
+    "context_budget_tokens": "budget_tokens",
+    "context_budget_trigger_ratio": "trigger_ratio",
+    "context_budget_tool_call_tokens": "tool_call_tokens",
+    "context_budget_turn_tokens": "turn_tokens",
+}
+
+# 热加载时推送到视觉模型生命周期管理（ModelLifecycle）的字段
+_LIFECYCLE_CONFIG_FIELDS = ("model_keep_alive", "model_warm_interval", "model_ready_recheck_interval")
+
+# 热加载时需要重新配置自适应调度器的字段
+_SCHEDULER_CONFIG_FIELDS = ("poll_interval", "poll_interval_min", "poll_interval_max", "poll_backoff_factor", "poll_idle_pause")
+
 
 # ── 主循环 ───────────────────────────────────────────────────
 
@@ -72,9 +128,11 @@ class ExecutorLoop:
       5. 定期上报心跳
     """
 
-    def __init__(self, config: ExecutorConfig):
+    def __init__(self, config: ExecutorConfig, clock: Any = None, pinned_config: Iterable[str] = ()):
         self.config = config
         self.running = False
+        # 时间源（端到端测试注入 VirtualClock 后所有等待瞬间完成）
+        self.clock = clock or SYSTEM_CLOCK
 
         # 核心组件
         self.client = DevPlanClient(config)
@@ -95,17 +153,52 @@ class ExecutorLoop:
             circuit_breaker_open_seconds=config.circuit_breaker_open_seconds,
             network_recovery_window_seconds=config.network_recovery_window_seconds,
             network_recovery_window_cooldown=config.network_recovery_window_cooldown,
+            clock=self.clock,
+            policy=PolicyStore(
+                config.decision_policy_file or None,
+                check_interval=config.decision_policy_check_interval,
+                clock=self.clock,
+            ),
         )
-        self.analyzer = VisionAnalyzer(config)
-        self.gui = CursorController(config)
+        self.gui = CursorController(config, clock=self.clock)
         self.vision_enabled: bool = not config.disable_vision
+        # 视觉分析器实例（惰性创建，见 analyzer 属性）
+        self._analyzer: Optional["VisionAnalyzer"] = None
+        if config.gui_vision_locate_input and self.vision_enabled:
+            self.gui.input_locator = lambda bounds: self.analyzer.locate_input_box(bounds)
 
         # Channel 1: 日志监控（可选，启用后能跳过不必要的截图分析）
         self.log_monitor: Optional[CursorLogMonitor] = None
         if config.log_monitor_enabled:
             self.log_monitor = CursorLogMonitor(
                 idle_threshold=config.log_monitor_idle_threshold,
+                owner=config.executor_id,
+                window_owners=config.log_monitor_window_owners,
+                sources=config.log_ingest_sources,
+                bus_capacity=config.log_ingest_bus_capacity,
+            )
+
+        # 通道仲裁：日志信号足够确定时跳过截图分析
+        self.arbiter: Optional[ChannelArbiter] = None
+        if config.arbiter_enabled:
+            self.arbiter = ChannelArbiter(
+                idle_threshold=config.log_monitor_idle_threshold,
+                confidence_threshold=config.arbiter_confidence_threshold,
+                error_burst_threshold=config.arbiter_error_burst,
+            )
+        self.channel_counts: dict[str, int] = {}  # 各决策的 UI 状态来源通道计数（/metrics 导出）
+
+        # 对话上下文预算：接近上限时在发送前预防性开新对话，避免 CONTEXT_OVERFLOW 失败路径
+        self.context_budget: Optional[ContextBudget] = None
+        self._budget_tool_calls_seen: int = 0
+        if config.context_budget_enabled:
+            self.context_budget = ContextBudget(
+                budget_tokens=config.context_budget_tokens,
+                trigger_ratio=config.context_budget_trigger_ratio,
+                tool_call_tokens=config.context_budget_tool_call_tokens,
+                turn_tokens=config.context_budget_turn_tokens,
             )
+            self.engine.context_budget = self.context_budget
 
         # 心跳计时
         self._last_heartbeat_time: float = 0
@@ -133,6 +226,63 @@ class ExecutorLoop:
         self._tick_count: int = 0
         self.CLEANUP_EVERY_TICKS: int = 50  # ~50 ticks ≈ 50*15s ≈ 12.5 分钟
 
+        # 运行指标持久化（SQLite 时间序列，供 /api/metrics 查询历史趋势）
+        self.metrics: Optional[MetricsStore] = None
+        if config.metrics_enabled:
+            try:
+                self.metrics = MetricsStore(
+                    log_dir=config.log_dir,
+                    raw_retention_hours=config.metrics_raw_retention_hours,
+                    retention_days=config.metrics_retention_days,
+                )
+            except Exception as e:
+                logger.warning("运行指标存储初始化失败，已禁用: %s", e)
+        # 运行状态快照（熔断 / 退避 / 去重指纹，重启后回填，避免熔断窗口内重启立刻重试）
+        self.journal: Optional[RunJournal] = None
+        if config.run_journal_enabled:
+            self.journal = RunJournal(
+                log_dir=config.log_dir,
+                interval=config.run_journal_interval,
+                max_age=config.run_journal_max_age_hours * 3600,
+                clock=self.clock,
+            )
+        # 配置热加载（命令行覆盖的字段固定，不会被文件改回）
+        self.config_watcher: Optional[ConfigWatcher] = None
+        if config.config_watch_enabled:
+            self.config_watcher = ConfigWatcher(
+                pinned=pinned_config,
+                check_interval=config.config_watch_interval,
+                clock=self.clock,
+            )
+        self._tick_timings: dict[str, float] = {}  # 本 tick 各阶段耗时（毫秒）
+        self._last_decision_action: str = ""
+        self.decision_counts: dict[str, int] = {}  # 各决策动作累计次数（/metrics 导出）
+        self._last_rss_mb: float = 0.0
+        self._metrics_vision_seen: tuple[int, int] = (0, 0)  # (calls, cache_hits) 上次记录值
+        self._metrics_log_errors_seen: int = 0
+
+        # 自适应轮询调度（替代固定 poll_interval）
+        self.scheduler = AdaptivePollScheduler(
+            base_interval=config.poll_interval,
+            min_interval=config.poll_interval_min,
+            max_interval=config.poll_interval_max,
+            backoff_factor=config.poll_backoff_factor,
+            idle_pause=config.poll_idle_pause,
+        )
+        self._last_log_ai_active: bool = False
+
+        # tick 轨迹记录（--trace），供 simulator 离线回放
+        self.tracer: Optional[TraceRecorder] = None
+        if config.trace_enabled:
+            try:
+                self.tracer = TraceRecorder.for_session(Path(config.log_dir) / "traces", config)
+                logger.info("tick 轨迹记录已启用: %s", self.tracer.path)
+            except Exception as e:
+                logger.warning("tick 轨迹记录初始化失败，已禁用: %s", e)
+
+        # 阶段耗时剖析：直方图常开；--profile 时额外累计调用栈供火焰图导出
+        profiler.configure(collect_stacks=config.profile_enabled)
+
     def start(self) -> None:
         """启动主循环"""
         self.running = True
@@ -146,7 +296,7 @@ class ExecutorLoop:
         # 启动 Web UI 监控面板
         self._ui_thread = None
         if not self.config.no_ui:
-            set_executor_refs(gui=self.gui, client=self.client, executor=self)
+            set_executor_refs(gui=self.gui, client=self.client, executor=self, metrics=self.metrics)
             ui_state.update(
                 running=True,
                 executor_id=self.config.executor_id,
@@ -175,6 +325,12 @@ class ExecutorLoop:
         logger.info("DevPlan 服务已连接: %s", self.config.devplan_base_url)
         if not self.vision_enabled:
             logger.warning("视觉分析已显式禁用（EXECUTOR_DISABLE_VISION=true），将仅依赖日志+DevPlan 通道")
+        elif self.config.model_preload:
+            # 后台预加载视觉模型，首个 tick 不必承担冷加载
+            self.analyzer.preload_model()
+
+        # 回填上次运行的熔断 / 退避 / 去重状态（须在启动恢复之前，去重指纹才生效）
+        self._restore_run_journal()
 
         # 启动后优先尝试从 checkpoint 恢复（T87.4）
         self._attempt_startup_recovery()
@@ -193,14 +349,21 @@ class ExecutorLoop:
         # 主循环
         logger.info("开始自动化轮询（间隔: %d 秒）...", self.config.poll_interval)
         while self.running:
-            try:
-                self._tick()
-            except Exception as e:
-                logger.error("主循环异常: %s", e, exc_info=True)
-                time.sleep(10)
+            with profiler.span("tick") as tick_span:
+                try:
+                    self._tick()
+                except Exception as e:
+                    logger.error("主循环异常: %s", e, exc_info=True)
+                    self.clock.sleep(10)
+            self._record_tick_metrics(tick_span.elapsed_ms)
+            self._save_run_journal()
+            self._poll_config()
+            self._maybe_report_profile()
+            if self.vision_enabled:
+                self.analyzer.keep_model_warm()
 
-            # 等待下次轮询
-            self._countdown_wait(self.config.poll_interval)
+            # 等待下次轮询（自适应间隔）
+            self._countdown_wait(self._next_poll_interval())
 
         # 停止
         self._shutdown()
@@ -209,6 +372,23 @@ class ExecutorLoop:
         """停止主循环"""
         self.running = False
 
+    @property
+    def analyzer(self) -> "VisionAnalyzer":
+        """
+        视觉分析器：首次访问时才导入并创建。
+
+        禁用视觉（--disable-vision）时全程不会加载 ollama / numpy / PIL；
+        运行中通过 Web UI 打开视觉后再按需创建。
+        """
+        if self._analyzer is None:
+            from .vision_analyzer import VisionAnalyzer
+            self._analyzer = VisionAnalyzer(self.config, clock=self.clock)
+        return self._analyzer
+
+    @analyzer.setter
+    def analyzer(self, value: "VisionAnalyzer") -> None:
+        self._analyzer = value
+
     # ── 主循环单步 ───────────────────────────────────────────
 
     def _tick(self) -> None:
@@ -216,9 +396,14 @@ class ExecutorLoop:
         self._tick_count += 1
         if self._tick_count % self.CLEANUP_EVERY_TICKS == 0:
             self._periodic_cleanup()
+        timings: dict[str, float] = {}
+        self._tick_timings = timings
+        self._last_decision_action = ""
 
         # ── Channel 1: DevPlan 任务状态 ──
-        devplan_data = self.client.get_next_action()
+        with profiler.span("tick.devplan") as sp:
+            devplan_data = self.client.get_next_action()
+        timings["devplan_ms"] = sp.elapsed_ms
         if devplan_data is None:
             logger.warning("DevPlan API 无响应，跳过本轮")
             self._send_heartbeat("active", "API_UNREACHABLE")
@@ -230,7 +415,13 @@ class ExecutorLoop:
         if devplan_action != "all_done":
             self._all_done_keepalive_logged = False
         self._last_devplan_data = devplan_data
-        self.recovery.record_event(f"DevPlan: action={devplan_action} message={devplan_message[:120]}")
+        self.recovery.record_event(
+            f"DevPlan: action={devplan_action} message={devplan_message[:120]}",
+            kind="devplan",
+            action=devplan_action,
+            phase_id=(devplan_data.get("phase") or {}).get("taskId", ""),
+            task_id=(devplan_data.get("subTask") or {}).get("taskId", ""),
+        )
         logger.info(
             "[DevPlan] action=%s | %s",
             devplan_action,
@@ -257,9 +448,15 @@ class ExecutorLoop:
 
         # ── Channel 1.5: 日志监控（快速判断 AI 是否活跃）──
         log_ai_active = False
+        self._last_log_ai_active = False
+        log_state = None
         if self.log_monitor:
-            log_state = self.log_monitor.poll()
+            with profiler.span("tick.log_poll") as sp:
+                log_state = self.log_monitor.poll()
+            timings["log_ms"] = sp.elapsed_ms
             log_ai_active = log_state.is_ai_active
+            self._last_log_ai_active = log_ai_active
+            self._update_context_budget(log_state)
             if log_state.log_file_found:
                 logger.info(
                     "[LogMonitor] AI活跃=%s | 空闲%.0fs | pending=%d | 错误=%d",
@@ -281,20 +478,29 @@ class ExecutorLoop:
                     )
 
         # ── Channel 2: 屏幕 UI 状态 ──
-        # 如果日志监控确认 AI 活跃，可以跳过昂贵的 Ollama 截图分析
-        if log_ai_active and devplan_action == "wait":
-            # AI 在活跃工作 → 跳过截图分析，直接用 IDLE + screen_changing=True
-            ui_status = UIStatus.AI_GENERATING
-            screen_changing = True
-            raw_response = "[LogMonitor] AI 活跃，跳过截图分析"
-            logger.info("[Screen] 日志监控确认 AI 活跃，跳过 Ollama 分析（节省 GPU）")
-        else:
-            if self.vision_enabled:
+        # 通道仲裁：廉价通道（DevPlan / 日志）能下结论时跳过昂贵的 Ollama 截图分析
+        verdict = self._arbitrate(devplan_action, log_state, log_ai_active)
+        channel = verdict.channel
+        if not verdict.need_vision:
+            ui_status = verdict.ui_status
+            screen_changing = verdict.screen_changing
+            raw_response = f"[Arbiter:{verdict.channel}] {verdict.reason}，跳过截图分析"
+            logger.info(
+                "[Screen] %s（置信度 %.2f），跳过 Ollama 分析（节省 GPU）",
+                verdict.reason, verdict.confidence,
+            )
+            if screen_changing and self.vision_enabled:
+                # 日志确认 AI 仍在工作：视同工作区有变化，避免跳过截图期间兜底计时持续累积
+                self.analyzer.mark_activity()
+        elif self.vision_enabled:
+            with profiler.span("tick.vision") as sp:
                 ui_status, screen_changing, raw_response = self.analyzer.analyze()
-            else:
-                ui_status = UIStatus.UNKNOWN
-                screen_changing = False
-                raw_response = "[VisionDisabled] 已禁用截图分析（需要 ollama + gemma3:27b）"
+            timings["vision_ms"] = sp.elapsed_ms
+        else:
+            channel = "none"
+            ui_status = UIStatus.UNKNOWN
+            screen_changing = False
+            raw_response = "[VisionDisabled] 已禁用截图分析（需要 ollama + gemma3:27b）"
 
         change_str = "有变化" if screen_changing else "无变化"
         logger.info(
@@ -304,44 +510,27 @@ class ExecutorLoop:
             raw_response[:60] if raw_response else "",
         )
         self._last_ui_status = ui_status
-        self.recovery.record_event(f"UI: status={ui_status.value} changing={screen_changing}")
+        self.recovery.record_event(
+            f"UI: status={ui_status.value} changing={screen_changing} via={channel}",
+            kind="ui",
+            ui_status=ui_status.value,
+        )
 
         # 更新 Web UI — 视觉通道状态 + 截图
         ui_update: dict = {
             "ui_status": ui_status.value,
             "screen_changing": screen_changing,
+            "decision_channel": channel,
+            "arbiter_confidence": round(verdict.confidence, 2),
             "raw_response": raw_response or "[empty]",
-            "screenshot_time_1": getattr(self.analyzer, "screenshot_time_1", ""),
-            "screenshot_time_2": getattr(self.analyzer, "screenshot_time_2", ""),
+            "screenshot_time_1": getattr(self._analyzer, "screenshot_time_1", ""),
+            "screenshot_time_2": getattr(self._analyzer, "screenshot_time_2", ""),
             "split_quadrant": self.config.split_quadrant,
             "vision_enabled": self.vision_enabled,
-            "top_right_changed": getattr(self.analyzer, "last_top_right_changed", None),
-            "bottom_right_changed": getattr(self.analyzer, "last_bottom_right_changed", None),
+            "top_right_changed": getattr(self._analyzer, "last_top_right_changed", None),
+            "bottom_right_changed": getattr(self._analyzer, "last_bottom_right_changed", None),
         }
-        # 截图 base64（如果文件存在）
-        log_dir = Path(self.config.log_dir)
-        ss1 = str(log_dir / "snapshot_1.png")
-        ss2 = str(log_dir / "snapshot_2.png")
-        if Path(ss1).exists():
-            ui_update["screenshot_base64_1"] = image_to_base64(ss1)
-        if Path(ss2).exists():
-            ui_update["screenshot_base64_2"] = image_to_base64(ss2)
-        # 四象限模式：附加四象限截图及各象限判断结果
-        if self.config.split_quadrant:
-            quad_tl = str(log_dir / "quad_top_left.png")
-            quad_tr = str(log_dir / "quad_top_right.png")
-            quad_bl = str(log_dir / "quad_bottom_left.png")
-            quad_br = str(log_dir / "quad_bottom_right.png")
-            if Path(quad_tl).exists():
-                ui_update["quad_top_left_b64"] = image_to_base64(quad_tl)
-            if Path(quad_tr).exists():
-                ui_update["quad_top_right_b64"] = image_to_base64(quad_tr)
-            if Path(quad_bl).exists():
-                ui_update["quad_bottom_left_b64"] = image_to_base64(quad_bl)
-            if Path(quad_br).exists():
-                ui_update["quad_bottom_right_b64"] = image_to_base64(quad_br)
-            ui_update["quad_top_right_status"] = getattr(self.analyzer, "last_quad_top_right_status", "")
-            ui_update["quad_bottom_right_status"] = getattr(self.analyzer, "last_quad_bottom_right_status", "")
+        self._attach_screenshots(ui_update)
         ui_state.update(**ui_update)
 
         # 检测 AI 恢复工作状态 → 重置 continue 重试计数
@@ -365,13 +554,31 @@ class ExecutorLoop:
             )
 
         # ── 双通道决策 ──
-        decision = self.engine.decide(devplan_data, ui_status, screen_changing, br_no_change_seconds)
+        with profiler.span("tick.decide") as sp:
+            decision = self.engine.decide(devplan_data, ui_status, screen_changing, br_no_change_seconds)
+        timings["decide_ms"] = sp.elapsed_ms
+        decision.channel = channel
+        self._last_decision_action = decision.action.value
+        self.decision_counts[decision.action.value] = self.decision_counts.get(decision.action.value, 0) + 1
+        self.channel_counts[channel] = self.channel_counts.get(channel, 0) + 1
+        if self.tracer is not None:
+            self.tracer.record(
+                self.clock.time(), devplan_data, ui_status.value, screen_changing,
+                br_no_change_seconds, log_state, decision.action.value, channel,
+            )
         logger.info(
-            "[Decision] action=%s | %s",
+            "[Decision] action=%s | via=%s | %s",
             decision.action.value,
+            channel,
             decision.message[:80],
         )
-        self.recovery.record_event(f"Decision: action={decision.action.value} message={decision.message[:120]}")
+        self.recovery.record_event(
+            f"Decision: action={decision.action.value} message={decision.message[:120]}",
+            kind="decision",
+            action=decision.action.value,
+            task_id=decision.task_id or "",
+            phase_id=decision.phase_id or "",
+        )
 
         # 更新 Web UI — 决策结果
         ui_state.update(
@@ -379,23 +586,89 @@ class ExecutorLoop:
             decision_message=decision.message,
             continue_retries=self.engine.tracker.continue_retries,
         )
-        ui_state.add_log("INFO", f"[{devplan_action}|{ui_status.value}] → {decision.action.value}: {decision.message[:60]}")
+        ui_state.add_log("INFO", f"[{devplan_action}|{ui_status.value}|{channel}] → {decision.action.value}: {decision.message[:60]}")
 
         # ── 执行决策 ──
-        self._execute(decision)
+        with profiler.span("tick.execute") as sp:
+            self._execute(decision)
+        timings["execute_ms"] = sp.elapsed_ms
 
         # ── 心跳上报 ──
-        self._send_heartbeat("active", ui_status.value)
+        with profiler.span("tick.heartbeat"):
+            self._send_heartbeat("active", ui_status.value)
+
+    def _update_context_budget(self, log_state: Any) -> None:
+        """把日志里新增的 ToolCall 与实测 token 用量计入对话上下文预算"""
+        budget = self.context_budget
+        if budget is None:
+            return
+        total = log_state.total_tool_calls
+        if total < self._budget_tool_calls_seen:
+            # 日志切换到新 session 时计数从头开始
+            self._budget_tool_calls_seen = 0
+        budget.record_tool_calls(total - self._budget_tool_calls_seen)
+        self._budget_tool_calls_seen = total
+        budget.observe_usage(log_state.last_request_tokens, seq=log_state.token_usage_events)
+
+    def _arbitrate(self, devplan_action: str, log_state: Any, log_ai_active: bool) -> ArbiterVerdict:
+        """决定本轮 UI 状态来源通道（仲裁器关闭时保留旧规则：日志活跃且 wait 才跳过视觉）"""
+        if self.arbiter is not None:
+            return self.arbiter.assess(devplan_action, log_state)
+        if log_ai_active and devplan_action == "wait":
+            return ArbiterVerdict(
+                need_vision=False,
+                channel="log",
+                confidence=1.0,
+                ui_status=UIStatus.AI_GENERATING,
+                screen_changing=True,
+                reason="日志监控确认 AI 活跃",
+            )
+        return ArbiterVerdict(need_vision=True, channel="vision")
+
+    @profiler.timed("tick.ui_encode")
+    def _attach_screenshots(self, ui_update: dict) -> None:
+        """把最新截图（及四象限截图）编码为 base64 附加到 Web UI 更新"""
+        # 截图 base64（如果文件存在）
+        log_dir = Path(self.config.log_dir)
+        ss1 = str(log_dir / "snapshot_1.png")
+        ss2 = str(log_dir / "snapshot_2.png")
+        if Path(ss1).exists():
+            ui_update["screenshot_base64_1"] = image_to_base64(ss1)
+        if Path(ss2).exists():
+            ui_update["screenshot_base64_2"] = image_to_base64(ss2)
+        # 四象限模式：附加四象限截图及各象限判断结果
+        if self.config.split_quadrant:
+            quad_tl = str(log_dir / "quad_top_left.png")
+            quad_tr = str(log_dir / "quad_top_right.png")
+            quad_bl = str(log_dir / "quad_bottom_left.png")
+            quad_br = str(log_dir / "quad_bottom_right.png")
+            if Path(quad_tl).exists():
+                ui_update["quad_top_left_b64"] = image_to_base64(quad_tl)
+            if Path(quad_tr).exists():
+                ui_update["quad_top_right_b64"] = image_to_base64(quad_tr)
+            if Path(quad_bl).exists():
+                ui_update["quad_bottom_left_b64"] = image_to_base64(quad_bl)
+            if Path(quad_br).exists():
+                ui_update["quad_bottom_right_b64"] = image_to_base64(quad_br)
+            ui_update["quad_top_right_status"] = getattr(self._analyzer, "last_quad_top_right_status", "")
+            ui_update["quad_bottom_right_status"] = getattr(self._analyzer, "last_quad_bottom_right_status", "")
 
     def _execute(self, decision: Decision) -> None:
-        """执行决策动作"""
+        """执行决策动作（按动作类型计入剖析器 execute.<action>）"""
+        with profiler.span(f"execute.{decision.action.value}"):
+            self._execute_action(decision)
+
+    def _execute_action(self, decision: Decision) -> None:
+        """按决策动作分派执行"""
 
         if decision.action == Action.SEND_TASK:
             if decision.task_content and self.gui.available:
                 result = self.gui.send_task(decision.task_content)
                 if result.success:
                     logger.info("✅ 已发送子任务: %s%s", decision.task_id, " (排队)" if result.queued else "")
-                    self._post_send_vision_check(source_label=f"task:{decision.task_id or ''}")
+                    if self.context_budget is not None:
+                        self.context_budget.record_send(decision.task_content)
+                    self._post_send_vision_check(source_label=f"task:{decision.task_id or ''}", result=result)
                 else:
                     logger.error("❌ 发送子任务失败: %s — %s", decision.task_id, result.message)
             else:
@@ -406,7 +679,9 @@ class ExecutorLoop:
                 result = self.gui.send_continue()
                 if result.success:
                     logger.info("✅ 已发送继续指令")
-                    self._post_send_vision_check(source_label="continue")
+                    if self.context_budget is not None:
+                        self.context_budget.record_continue()
+                    self._post_send_vision_check(source_label="continue", result=result)
                 else:
                     logger.error("❌ 发送继续指令失败: %s", result.message)
 
@@ -436,8 +711,8 @@ class ExecutorLoop:
             logger.debug("⏳ %s", decision.message)
 
         elif decision.action == Action.NEW_CONVERSATION:
-            # 上下文溢出：先固化 checkpoint + 记忆，再 Ctrl+L 恢复
-            logger.warning("🔴 执行新对话恢复流程（CONTEXT_OVERFLOW）")
+            # 上下文溢出 / 预算耗尽：先固化 checkpoint + 记忆，再 Ctrl+L 恢复
+            logger.warning("🔴 执行新对话恢复流程（%s）", decision.reason or "CONTEXT_OVERFLOW")
             phase = self._last_devplan_data.get("phase", {}) if isinstance(self._last_devplan_data, dict) else {}
             sub_task = self._last_devplan_data.get("subTask", {}) if isinstance(self._last_devplan_data, dict) else {}
             phase_id = phase.get("taskId", "")
@@ -445,7 +720,9 @@ class ExecutorLoop:
             task_id = sub_task.get("taskId", decision.task_id or "")
             task_title = sub_task.get("title", "")
             task_desc = sub_task.get("description", "")
-            interrupt_reason = (self._last_ui_status.value if self._last_ui_status else "CONTEXT_OVERFLOW")
+            interrupt_reason = decision.reason or (
+                self._last_ui_status.value if self._last_ui_status else "CONTEXT_OVERFLOW"
+            )
 
             # 1) recall_unified 补全关键记忆（中断时用于 checkpoint 组装）
             recalled_lines = self._recall_recovery_memories(
@@ -456,15 +733,16 @@ class ExecutorLoop:
             )
 
             # 2) 生成并持久化 checkpoint_prompt
-            cp = self.recovery.create_and_persist_checkpoint(
-                phase_id=phase_id,
-                phase_title=phase_title,
-                task_id=task_id,
-                task_title=task_title,
-                task_desc=task_desc,
-                interrupt_reason=interrupt_reason,
-                recalled_memories=recalled_lines,
-            )
+            with profiler.span("execute.checkpoint"):
+                cp = self.recovery.create_and_persist_checkpoint(
+                    phase_id=phase_id,
+                    phase_title=phase_title,
+                    task_id=task_id,
+                    task_title=task_title,
+                    task_desc=task_desc,
+                    interrupt_reason=interrupt_reason,
+                    recalled_memories=recalled_lines,
+                )
 
             # 3) 中断摘要写入长期记忆（summary + insight）
             self._save_recovery_memories(
@@ -490,12 +768,16 @@ class ExecutorLoop:
                     base_checkpoint_prompt=base_prompt,
                 )
 
-                self._inject_recovery_prompt(
+                injected = self._inject_recovery_prompt(
                     final_prompt=final_prompt,
                     wait_sec=decision.cooldown_seconds or 3,
                     source_label="new_conversation",
                     fallback_to_continue=True,
                 )
+                # 只有新对话真正开启并注入成功后才清零预算
+                if injected and self.context_budget is not None:
+                    self.context_budget.reset(planned=decision.reason == "CONTEXT_BUDGET")
+                    self.context_budget.record_send(final_prompt)
             ui_state.add_log("WARNING", f"新对话恢复: {decision.message[:60]}")
 
         elif decision.action == Action.WAIT_COOLDOWN:
@@ -533,6 +815,7 @@ class ExecutorLoop:
             # 超窗后不再继续打 continue，进入保护性冷却，等待外部环境恢复
             self._countdown_wait(wait_sec)
 
+    @profiler.timed("execute.save_memories")
     def _save_recovery_memories(
         self,
         checkpoint: Any,
@@ -564,7 +847,7 @@ class ExecutorLoop:
                     return True
                 if i < retries:
                     logger.warning("memory_save 失败，准备重试 (%d/%d)", i + 1, retries)
-                    time.sleep(0.2)
+                    self.clock.sleep(0.2)
             return False
 
         template_ver = str(getattr(checkpoint, "template_version", "v1") or "v1")
@@ -646,6 +929,7 @@ class ExecutorLoop:
             logger.info("✅ 启动恢复已注入 checkpoint_prompt（task=%s）", cp.task_id)
             ui_state.add_log("WARNING", f"启动恢复已注入: {cp.phase_id}/{cp.task_id}")
 
+    @profiler.timed("execute.recall_memories")
     def _recall_recovery_memories(
         self,
         phase_id: str,
@@ -670,6 +954,7 @@ class ExecutorLoop:
                     lines.append(content[:200])
         return lines
 
+    @profiler.timed("execute.inject_prompt")
     def _inject_recovery_prompt(
         self,
         final_prompt: str,
@@ -696,28 +981,40 @@ class ExecutorLoop:
 
         wait_sec = max(1, int(wait_sec or 1))
         logger.info("⏳ 恢复注入（%s）：等待 %d 秒让新对话就绪...", source_label, wait_sec)
-        time.sleep(wait_sec)
+        self.clock.sleep(wait_sec)
 
         result2 = self.gui.send_task(final_prompt)
         if result2.success:
             logger.info("✅ 恢复提示已注入（%s）", source_label)
-            self._post_send_vision_check(source_label=f"{source_label}:recovery-prompt")
+            self._post_send_vision_check(source_label=f"{source_label}:recovery-prompt", result=result2)
             return True
 
         logger.error("❌ 发送恢复提示失败（%s）: %s", source_label, result2.message)
         return False
 
-    def _post_send_vision_check(self, source_label: str) -> None:
+    @profiler.timed("execute.post_send_check")
+    def _post_send_vision_check(self, source_label: str, result: Optional[SendResult] = None) -> None:
         """
         发送后 1 秒快速右下象限检测：
         若识别到 queued/waiting，则补按一次 Enter。
+
+        GUI 层 ROI 差分已确认文本离开输入框（verdict=sent）时跳过，
+        仅在 ROI 结论不明确或不可用时才截图调用视觉模型。
         """
+        if result is not None and result.verdict == SendVerdict.SENT.value:
+            logger.info("[%s] 发送后确认（via=roi）: 文本已离开输入框，跳过视觉检测", source_label)
+            return
         if not self.vision_enabled:
             return
         if not getattr(self.analyzer, "available", False):
             return
         if not self.gui.available:
             return
+        # 日志优先：发送后日志已出现新活动 → 已被 AI 接收，无需截图确认
+        confirmed = self._confirm_send_by_log()
+        if confirmed:
+            logger.info("[%s] 发送后确认（via=log）: %s，跳过视觉检测", source_label, confirmed)
+            return
         try:
             queued, detail = self.analyzer.check_send_queued_after_delay(delay_seconds=1.0)
             logger.info("[%s] 发送后快速检测: queued=%s | %s", source_label, queued, detail)
@@ -729,11 +1026,22 @@ class ExecutorLoop:
         except Exception as e:
             logger.warning("[%s] 发送后快速视觉检测失败: %s", source_label, e)
 
+    def _confirm_send_by_log(self) -> Optional[str]:
+        """用日志通道确认发送已被接收；返回确认依据，无法确认返回 None"""
+        sent_at = float(getattr(self.gui, "last_send_time", 0.0) or 0.0)
+        if self.arbiter is None or self.log_monitor is None or sent_at <= 0:
+            return None
+        try:
+            return self.arbiter.send_confirmed_by_log(self.log_monitor.poll(), sent_at)
+        except Exception as e:
+            logger.debug("日志通道发送确认失败: %s", e)
+            return None
+
     # ── 心跳 ─────────────────────────────────────────────────
 
     def _send_heartbeat(self, status: str, last_screen_state: str) -> None:
         """定期上报心跳"""
-        now = time.time()
+        now = self.clock.time()
         if now - self._last_heartbeat_time < self._heartbeat_interval:
             return
         self._last_heartbeat_time = now
@@ -796,22 +1104,169 @@ class ExecutorLoop:
         collected = gc.collect()
 
         # 2) 记录进程内存使用（需要 psutil，可选）
-        rss_mb = "N/A"
+        rss_mb_val = self._read_rss_mb()
+        rss_mb = f"{rss_mb_val:.1f}" if rss_mb_val is not None else "N/A"
+        if rss_mb_val is not None:
+            self._last_rss_mb = rss_mb_val
+
+        logger.info(
+            "[Cleanup] tick=%d | GC collected=%d | RSS=%s MB",
+            self._tick_count, collected, rss_mb,
+        )
+
+    @staticmethod
+    def _read_rss_mb() -> Optional[float]:
+        """读取当前进程 RSS（MB）；psutil 不可用时返回 None"""
         try:
             import psutil
             proc = psutil.Process(os.getpid())
-            rss_mb_val = proc.memory_info().rss / (1024 * 1024)
-            rss_mb = f"{rss_mb_val:.1f}"
+            return proc.memory_info().rss / (1024 * 1024)
         except ImportError:
-            pass
+            return None
         except Exception:
-            pass
+            return None
 
+    def _record_tick_metrics(self, total_ms: float) -> None:
+        """
+        将本 tick 的阶段耗时 / 决策 / 视觉调用 / 网络错误写入指标存储。
+
+        视觉调用与日志错误均为累计计数，这里换算成本 tick 的增量；
+        任何异常只记日志，不影响主循环。
+        """
+        store = self.metrics
+        if store is None:
+            return
+        try:
+            timings = self._tick_timings
+            stats = self._analyzer.stats if self._analyzer is not None else {}
+            calls = int(stats.get("calls", 0))
+            hits = int(stats.get("cache_hits", 0))
+            prev_calls, prev_hits = self._metrics_vision_seen
+            self._metrics_vision_seen = (calls, hits)
+
+            network_errors = 0
+            if self.log_monitor:
+                total_errors = self.log_monitor.total_errors
+                network_errors += max(0, total_errors - self._metrics_log_errors_seen)
+                self._metrics_log_errors_seen = total_errors
+            ui_status = self._last_ui_status.value if self._last_ui_status else ""
+            if self._last_ui_status in NETWORK_ERROR_STATUSES:
+                network_errors += 1
+
+            # RSS 采样：每 10 个 tick 读一次，避免高频系统调用
+            if self._tick_count % 10 == 1:
+                rss = self._read_rss_mb()
+                if rss is not None:
+                    self._last_rss_mb = rss
+
+            store.record(TickMetrics(
+                ts=self.clock.time(),
+                tick=self._tick_count,
+                total_ms=total_ms,
+                devplan_ms=timings.get("devplan_ms", 0.0),
+                log_ms=timings.get("log_ms", 0.0),
+                vision_ms=timings.get("vision_ms", 0.0),
+                decide_ms=timings.get("decide_ms", 0.0),
+                execute_ms=timings.get("execute_ms", 0.0),
+                action=self._last_decision_action,
+                ui_status=ui_status,
+                vision_calls=max(0, calls - prev_calls),
+                vision_cache_hits=max(0, hits - prev_hits),
+                network_errors=network_errors,
+                rss_mb=self._last_rss_mb,
+            ))
+        except Exception as e:
+            logger.debug("记录运行指标失败: %s", e)
+
+    # ── 运行状态快照（热重启） ────────────────────────────────
+
+    def _journal_snapshot(self) -> dict[str, Any]:
+        state: dict[str, Any] = {
+            "tracker": self.engine.tracker.snapshot(),
+            "loop": {name: getattr(self, f"_{name}") for name in _JOURNAL_FINGERPRINTS},
+        }
+        if self._analyzer is not None:
+            state["vision"] = self._analyzer.journal_state()
+        if self.context_budget is not None:
+            state["budget"] = self.context_budget.snapshot()
+        return state
+
+    def _restore_run_journal(self) -> None:
+        """启动时从 run_journal.json 回填上次运行的状态"""
+        if self.journal is None:
+            return
+        state = self.journal.load()
+        if not state:
+            return
+        tracker = self.engine.tracker
+        tracker.restore(state.get("tracker") or {})
+        loop_state = state.get("loop") or {}
+        for name in _JOURNAL_FINGERPRINTS:
+            if isinstance(loop_state.get(name), str):
+                setattr(self, f"_{name}", loop_state[name])
+        if self.vision_enabled and isinstance(state.get("vision"), dict):
+            self.analyzer.restore_journal_state(state["vision"])
+        if self.context_budget is not None and isinstance(state.get("budget"), dict):
+            self.context_budget.restore(state["budget"])
         logger.info(
-            "[Cleanup] tick=%d | GC collected=%d | RSS=%s MB",
-            self._tick_count, collected, rss_mb,
+            "已回填上次运行状态: circuit=%s（剩余 %.0fs）backoff 剩余 %.0fs，continue 重试 %d 次",
+            tracker.resolve_circuit_state(),
+            tracker.get_circuit_open_remaining(),
+            tracker.get_network_backoff_remaining(),
+            tracker.continue_retries,
         )
 
+    def _save_run_journal(self, force: bool = False) -> None:
+        if self.journal is None:
+            return
+        try:
+            state = self._journal_snapshot()
+            if force:
+                self.journal.save(state)
+            else:
+                self.journal.maybe_save(state)
+        except Exception as e:
+            logger.debug("运行状态快照失败: %s", e)
+
+    def _next_poll_interval(self) -> int:
+        """根据上一轮决策与通道信号计算下次轮询间隔，并上报 Web UI"""
+        if not self.config.adaptive_poll_enabled:
+            return self.config.poll_interval
+        tracker = self.engine.tracker
+        action = self._last_decision_action
+        decision = self.scheduler.next_interval(
+            last_action=action,
+            ai_active=self._last_log_ai_active,
+            recovering=(
+                self._last_ui_status in NETWORK_ERROR_STATUSES
+                or tracker.recovery_window_start > 0
+            ),
+            backoff_remaining=tracker.get_network_backoff_remaining(),
+            circuit_open_remaining=tracker.get_circuit_open_remaining(),
+            all_done_keepalive=(action == "all_done" and self.config.keep_alive_on_all_done),
+        )
+        if decision.interval != self.config.poll_interval:
+            logger.debug("[Scheduler] 下次轮询 %ds（%s）", decision.interval, decision.reason)
+        ui_state.update(poll_interval=decision.interval, poll_reason=decision.reason)
+        return decision.interval
+
+    def _maybe_report_profile(self) -> None:
+        """--profile 模式：每 profile_report_every 个 tick 输出一次阶段耗时表"""
+        every = self.config.profile_report_every
+        if not self.config.profile_enabled or every <= 0 or self._tick_count % every:
+            return
+        logger.info("[Profile] 阶段耗时分位数（tick=%d）:\n%s", self._tick_count, profiler.format_table())
+
+    def _dump_profile(self) -> None:
+        """--profile 模式退出时：输出最终耗时表并导出 folded 调用栈"""
+        if not self.config.profile_enabled:
+            return
+        logger.info("[Profile] 最终阶段耗时分位数:\n%s", profiler.format_table())
+        dumped = profiler.dump_folded(Path(self.config.log_dir) / "profile.folded")
+        if dumped:
+            logger.info("[Profile] folded 调用栈已导出: %s（可用 flamegraph.pl / speedscope 打开）", dumped)
+
+    @profiler.timed("wait.countdown")
     def _countdown_wait(self, seconds: int) -> None:
         """倒计时等待，支持中断。通知前端开始客户端倒计时。"""
         # 通知前端：倒计时开始（前端用 JS 定时器本地倒计时）
@@ -819,7 +1274,7 @@ class ExecutorLoop:
         for remaining in range(seconds, 0, -1):
             if not self.running:
                 break
-            time.sleep(1)
+            self.clock.sleep(1)
         # 通知前端：倒计时结束，即将开始截图分析
         ui_state.update(next_tick_countdown=0)
 
@@ -834,6 +1289,15 @@ class ExecutorLoop:
         # 停止日志监控
         if self.log_monitor:
             self.log_monitor.stop()
+        # 关闭运行指标存储
+        if self.metrics is not None:
+            self.metrics.close()
+        self._save_run_journal(force=True)
+        self.recovery.close()
+        if self.tracer is not None:
+            self.tracer.close()
+        self.gui.save_timing()
+        self._dump_profile()
         # 更新 Web UI 状态
         ui_state.update(running=False, decision_action="STOPPED", decision_message="Executor 已停止")
         ui_state.add_log("INFO", "Executor 正在停止...")
@@ -845,6 +1309,101 @@ class ExecutorLoop:
         self.client.close()
         logger.info("Executor 已停止")
 
+    # ── 配置热加载 ───────────────────────────────────────────
+
+    def _poll_config(self) -> None:
+        """检查配置文件变化，有效变化推送到运行中的组件"""
+        if self.config_watcher is None:
+            return
+        try:
+            delta = self.config_watcher.poll()
+        except Exception as e:
+            logger.warning("配置热加载检查失败: %s", e)
+            return
+        if delta:
+            self.apply_config_delta(delta)
+
+    def apply_config_delta(self, delta: ConfigDelta) -> list[str]:
+        """
+        把热加载得到的配置变化推送到运行中的组件，返回已应用的字段名。
+
+        只更新参数，不重置 StateTracker：进行中的退避 / 熔断 / 防抖计数按新阈值继续。
+        GUI 控制器 / 视觉分析器 / DevPlan 客户端与主循环共享同一个 config 对象，
+        运行时直接读取的字段（stall_threshold、screenshot_interval 等）改完即生效。
+        """
+        if delta.restart_required:
+            logger.warning("以下配置修改需重启 Executor 才能生效: %s", ", ".join(delta.restart_required))
+        changes = delta.changes
+        if not changes:
+            return []
+        for name, value in changes.items():
+            if name != "disable_vision":
+                setattr(self.config, name, value)
+
+        # 构造时拷贝了参数的组件
+        for name, attr in _ENGINE_CONFIG_FIELDS.items():
+            if name in changes:
+                setattr(self.engine, attr, changes[name])
+        if self.context_budget is not None:
+            for name, attr in _BUDGET_CONFIG_FIELDS.items():
+                if name in changes:
+                    setattr(self.context_budget, attr, changes[name])
+        if "decision_policy_check_interval" in changes:
+            self.engine.policy.check_interval = max(0.0, float(self.config.decision_policy_check_interval))
+        if "decision_policy_file" in changes:
+            self.engine.policy.path = Path(self.config.decision_policy_file) if self.config.decision_policy_file else None
+            self.engine.policy.reload()
+        if any(name in changes for name in _SCHEDULER_CONFIG_FIELDS):
+            self.scheduler.configure(
+                base_interval=self.config.poll_interval,
+                min_interval=self.config.poll_interval_min,
+                max_interval=self.config.poll_interval_max,
+                backoff_factor=self.config.poll_backoff_factor,
+                idle_pause=self.config.poll_idle_pause,
+            )
+        # 视觉分析器尚未懒加载时不构造：之后构造会直接读到共享 config 的新值
+        if self._analyzer is not None and any(name in changes for name in _LIFECYCLE_CONFIG_FIELDS):
+            for lifecycle in (self._analyzer.lifecycle, self._analyzer.cascade_lifecycle):
+                if lifecycle is not None:
+                    lifecycle.configure(
+                        keep_alive=self.config.model_keep_alive,
+                        warm_interval=self.config.model_warm_interval,
+                        recheck_interval=self.config.model_ready_recheck_interval,
+                    )
+        if "poll_interval" in changes:
+            self._heartbeat_interval = self.config.poll_interval * 2
+        if "log_monitor_idle_threshold" in changes and self.log_monitor is not None:
+            self.log_monitor.idle_threshold = self.config.log_monitor_idle_threshold
+        if self.arbiter is not None:
+            if "log_monitor_idle_threshold" in changes:
+                self.arbiter.idle_threshold = max(1.0, float(self.config.log_monitor_idle_threshold))
+            if "arbiter_confidence_threshold" in changes:
+                self.arbiter.confidence_threshold = float(self.config.arbiter_confidence_threshold)
+            if "arbiter_error_burst" in changes:
+                self.arbiter.error_burst_threshold = max(1, int(self.config.arbiter_error_burst))
+        if self.journal is not None:
+            if "run_journal_interval" in changes:
+                self.journal.interval = max(0.0, float(self.config.run_journal_interval))
+            if "run_journal_max_age_hours" in changes:
+                self.journal.max_age = self.config.run_journal_max_age_hours * 3600
+        if self.metrics is not None:
+            if "metrics_raw_retention_hours" in changes:
+                self.metrics.raw_retention_seconds = max(1, self.config.metrics_raw_retention_hours) * 3600
+            if "metrics_retention_days" in changes:
+                self.metrics.retention_seconds = max(1, self.config.metrics_retention_days) * 86400
+        if "config_watch_interval" in changes:
+            self.config_watcher.check_interval = max(0.0, float(self.config.config_watch_interval))
+        if "log_level" in changes:
+            logging.getLogger().setLevel(getattr(logging, self.config.log_level.upper(), logging.INFO))
+        if "disable_vision" in changes:
+            self.set_vision_enabled(not changes["disable_vision"])
+
+        ui_update = {k: getattr(self.config, k) for k in ("poll_interval", "screenshot_interval") if k in changes}
+        if ui_update:
+            ui_state.update(**ui_update)
+        ui_state.add_log("INFO", f"配置已热加载: {', '.join(changes)}")
+        return list(changes)
+
     def set_vision_enabled(self, enabled: bool) -> tuple[bool, str]:
         """运行时切换视觉分析分支开关（用于 Web UI 配置开关）"""
         self.vision_enabled = bool(enabled)
@@ -982,6 +1541,18 @@ def parse_args() -> argparse.Namespace:
         type=float,
         help="左侧裁剪比例（默认: 0.35 表示左 35%% 为边栏）",
     )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        dest="profile_enabled",
+        help="性能剖析模式：定期输出阶段耗时 p50/p95/p99，退出时导出 logs/profile.folded 火焰图数据",
+    )
+    parser.add_argument(
+        "--trace",
+        action="store_true",
+        dest="trace_enabled",
+        help="记录每个 tick 的决策输入到 logs/traces/，可用 python -m src.simulator 回放",
+    )
     parser.add_argument(
         "--log-level",
         dest="log_level",
@@ -1000,7 +1571,7 @@ def main() -> None:
     config = get_config()
 
     # 命令行参数覆盖（布尔 flag 特殊处理：仅在为 True 时覆盖）
-    bool_flags = {"no_gui", "no_ui", "no_split", "disable_vision", "keep_alive_on_all_done"}
+    bool_flags = {"no_gui", "no_ui", "no_split", "disable_vision", "keep_alive_on_all_done", "profile_enabled", "trace_enabled"}
     overrides = {}
     for k, v in vars(args).items():
         if k in bool_flags:
@@ -1018,7 +1589,7 @@ def main() -> None:
     setup_logging(config)
 
     # 启动主循环
-    loop = ExecutorLoop(config)
+    loop = ExecutorLoop(config, pinned_config=overrides)
     loop.start()
 
 
@@ -0,0 +1,130 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 状态关键词多模式匹配（Aho-Corasick）
+
+VisionAnalyzer._parse_status 的兜底层原先对 STATUS_MARKERS 做双重循环：
+每次调用都把每个关键词 upper() 一遍，再逐个做子串查找，耗时随关键词数线性增长。
+
+MarkerMatcher 在构造时把全部关键词（统一大写）编译成一个 Aho-Corasick 自动机，
+匹配时对文本只扫描一遍即可找出所有命中，再按状态声明顺序（= 优先级）决出结果，
+并返回命中的关键词列表用于解释判定依据。关键词扩充到数百个（多语言 / 多个
+Cursor 版本）时匹配耗时基本不变。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Iterable, Mapping, Optional
+
+
+@dataclass(frozen=True)
+class MarkerHit:
+    """一次关键词命中"""
+    status: str
+    marker: str     # 原始关键词（声明时的大小写）
+    start: int      # 在文本中的起始下标
+
+
+@dataclass
+class MarkerMatch:
+    """按优先级决出的匹配结果"""
+    status: str
+    markers: list[str]                              # 胜出状态命中的关键词（去重，按出现顺序）
+    hits: list[MarkerHit] = field(default_factory=list)   # 全部命中（含低优先级状态）
+
+
+class MarkerMatcher:
+    """
+    大小写不敏感的多状态关键词匹配器。
+
+    使用方式：
+        matcher = MarkerMatcher(STATUS_MARKERS)     # 构造一次
+        m = matcher.match(raw_text)
+        if m: print(m.status, m.markers)
+    """
+
+    def __init__(self, markers: Mapping[str, Iterable[str]]):
+        # 优先级 = 声明顺序
+        self.priority: dict[str, int] = {}
+        # 模式表：(状态, 原始关键词)；同一状态下大写相同的关键词只保留第一个
+        self._patterns: list[tuple[str, str]] = []
+        self._goto: list[dict[str, int]] = [{}]
+        self._fail: list[int] = [0]
+        self._out: list[list[int]] = [[]]
+        self._lengths: list[int] = []
+
+        for status, words in markers.items():
+            self.priority.setdefault(status, len(self.priority))
+            seen: set[str] = set()
+            for word in words:
+                key = word.upper()
+                if not key or key in seen:
+                    continue
+                seen.add(key)
+                self._add(key, (status, word))
+        self._build_failure_links()
+
+    @property
+    def size(self) -> int:
+        """关键词数量"""
+        return len(self._patterns)
+
+    def _add(self, key: str, pattern: tuple[str, str]) -> None:
+        node = 0
+        for ch in key:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[node][ch] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            node = nxt
+        self._out[node].append(len(self._patterns))
+        self._patterns.append(pattern)
+        self._lengths.append(len(key))
+
+    def _build_failure_links(self) -> None:
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for ch, child in self._goto[node].items():
+                queue.append(child)
+                if node:
+                    f = self._fail[node]
+                    while f and ch not in self._goto[f]:
+                        f = self._fail[f]
+                    self._fail[child] = self._goto[f].get(ch, 0)
+                # 输出集合并入失败链终点的输出（后缀关键词）
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+
+    def find_all(self, text: str) -> list[MarkerHit]:
+        """单次扫描找出全部命中（按结束位置排序）"""
+        hits: list[MarkerHit] = []
+        if not text or not self._patterns:
+            return hits
+        goto, fail, out = self._goto, self._fail, self._out
+        node = 0
+        for i, ch in enumerate(text.upper()):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for pid in out[node]:
+                status, word = self._patterns[pid]
+                hits.append(MarkerHit(status, word, i - self._lengths[pid] + 1))
+        return hits
+
+    def match(self, text: str) -> Optional[MarkerMatch]:
+        """
+        返回优先级最高的命中状态及其命中关键词；无命中返回 None。
+        """
+        hits = self.find_all(text)
+        if not hits:
+            return None
+        best = min(hits, key=lambda h: self.priority[h.status]).status
+        markers: list[str] = []
+        for h in hits:
+            if h.status == best and h.marker not in markers:
+                markers.append(h.marker)
+        return MarkerMatch(status=best, markers=markers, hits=hits)
@@ -0,0 +1,342 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 时序指标存储
+
+把每个 tick 的运行指标追加写入 log_dir/metrics.db（SQLite，WAL 模式），
+用于跨天观察无人值守运行的吞吐退化：
+  - ticks 表：原始 tick 记录（只追加），保留 metrics_raw_retention_hours
+  - rollup 表：按 1 分钟 / 1 小时桶增量降采样，保留 metrics_retention_days
+  - rollup_actions 表：各桶内决策动作计数
+
+查询入口 query(range) 会按时间跨度自动选择分辨率：
+  ≤ 2h → 原始 tick；≤ 2d → 分钟桶；更长 → 小时桶。
+
+仅依赖标准库 sqlite3；写入失败只记日志，不影响主循环。
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+logger = logging.getLogger("executor.metrics")
+
+
+# ── 单 tick 指标 ─────────────────────────────────────────────
+
+@dataclass
+class TickMetrics:
+    """一个 tick 的指标快照（各阶段耗时单位为毫秒）"""
+    ts: float
+    tick: int
+    total_ms: float = 0.0
+    devplan_ms: float = 0.0
+    log_ms: float = 0.0
+    vision_ms: float = 0.0
+    decide_ms: float = 0.0
+    execute_ms: float = 0.0
+    action: str = ""
+    ui_status: str = ""
+    vision_calls: int = 0
+    vision_cache_hits: int = 0
+    network_errors: int = 0
+    rss_mb: Optional[float] = None
+
+
+# 参与降采样求和的耗时/计数列
+_SUM_COLUMNS = (
+    "total_ms", "devplan_ms", "log_ms", "vision_ms", "decide_ms", "execute_ms",
+    "vision_calls", "vision_cache_hits", "network_errors",
+)
+
+# 降采样分辨率（秒）
+ROLLUP_MINUTE = 60
+ROLLUP_HOUR = 3600
+
+_RANGE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhd]?)\s*$", re.IGNORECASE)
+_RANGE_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400}
+
+
+def parse_range(value: Optional[str], default: float = 6 * 3600) -> float:
+    """
+    解析查询范围字符串为秒数。
+
+    支持 "90"（秒）、"30m"、"6h"、"7d"；非法值返回 default。
+    """
+    if not value:
+        return default
+    m = _RANGE_RE.match(str(value))
+    if not m:
+        return default
+    seconds = float(m.group(1)) * _RANGE_UNITS[m.group(2).lower()]
+    return seconds if seconds > 0 else default
+
+
+class MetricsStore:
+    """
+    嵌入式只追加指标存储（SQLite WAL）。
+
+    使用方式：
+        store = MetricsStore("logs")
+        store.record(TickMetrics(ts=time.time(), tick=1, total_ms=1234.0, action="wait"))
+        data = store.query("6h")
+    """
+
+    # 每写入多少条执行一次过期清理
+    PRUNE_EVERY = 200
+
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        raw_retention_hours: int = 48,
+        retention_days: int = 30,
+        filename: str = "metrics.db",
+    ):
+        self.path = Path(log_dir) / filename
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.raw_retention_seconds = max(1, raw_retention_hours) * 3600
+        self.retention_seconds = max(1, retention_days) * 86400
+        self._lock = threading.Lock()
+        self._writes_since_prune = 0
+        # Web UI 线程与主循环共享连接，统一由 _lock 串行化
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, timeout=5.0)
+        self._init_schema()
+
+    def _init_schema(self) -> None:
+        with self._lock:
+            cur = self._conn.cursor()
+            cur.execute("PRAGMA journal_mode=WAL")
+            cur.execute("PRAGMA synchronous=NORMAL")
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS ticks (
+                    ts REAL NOT NULL,
+                    tick INTEGER NOT NULL,
+                    total_ms REAL, devplan_ms REAL, log_ms REAL,
+                    vision_ms REAL, decide_ms REAL, execute_ms REAL,
+                    action TEXT, ui_status TEXT,
+                    vision_calls INTEGER, vision_cache_hits INTEGER,
+                    network_errors INTEGER, rss_mb REAL
+                )
+                """
+            )
+            cur.execute("CREATE INDEX IF NOT EXISTS idx_ticks_ts ON ticks(ts)")
+            sum_cols = ", ".join(f"{c} REAL NOT NULL DEFAULT 0" for c in _SUM_COLUMNS)
+            cur.execute(
+                f"""
+                CREATE TABLE IF NOT EXISTS rollup (
+                    resolution INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    ticks INTEGER NOT NULL DEFAULT 0,
+                    {sum_cols},
+                    total_ms_max REAL NOT NULL DEFAULT 0,
+                    rss_mb_max REAL,
+                    PRIMARY KEY (resolution, bucket)
+                )
+                """
+            )
+            cur.execute(
+                """
+                CREATE TABLE IF NOT EXISTS rollup_actions (
+                    resolution INTEGER NOT NULL,
+                    bucket INTEGER NOT NULL,
+                    action TEXT NOT NULL,
+                    count INTEGER NOT NULL DEFAULT 0,
+                    PRIMARY KEY (resolution, bucket, action)
+                )
+                """
+            )
+            self._conn.commit()
+
+    # ── 写入 ─────────────────────────────────────────────────
+
+    def record(self, m: TickMetrics) -> None:
+        """追加一条 tick 指标，并增量更新分钟/小时降采样桶"""
+        try:
+            with self._lock:
+                cur = self._conn.cursor()
+                cur.execute(
+                    """
+                    INSERT INTO ticks (ts, tick, total_ms, devplan_ms, log_ms, vision_ms,
+                                       decide_ms, execute_ms, action, ui_status,
+                                       vision_calls, vision_cache_hits, network_errors, rss_mb)
+                    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                    """,
+                    (
+                        m.ts, m.tick, m.total_ms, m.devplan_ms, m.log_ms, m.vision_ms,
+                        m.decide_ms, m.execute_ms, m.action, m.ui_status,
+                        m.vision_calls, m.vision_cache_hits, m.network_errors, m.rss_mb,
+                    ),
+                )
+                for resolution in (ROLLUP_MINUTE, ROLLUP_HOUR):
+                    self._upsert_rollup(cur, resolution, m)
+                self._conn.commit()
+                self._writes_since_prune += 1
+                if self._writes_since_prune >= self.PRUNE_EVERY:
+                    self._writes_since_prune = 0
+                    self._prune_locked(m.ts)
+        except sqlite3.Error as e:
+            logger.warning("写入指标失败: %s", e)
+
+    def _upsert_rollup(self, cur: sqlite3.Cursor, resolution: int, m: TickMetrics) -> None:
+        bucket = int(m.ts // resolution) * resolution
+        values = [getattr(m, c) or 0 for c in _SUM_COLUMNS]
+        cols = ", ".join(_SUM_COLUMNS)
+        placeholders = ", ".join("?" for _ in _SUM_COLUMNS)
+        updates = ", ".join(f"{c} = {c} + excluded.{c}" for c in _SUM_COLUMNS)
+        cur.execute(
+            f"""
+            INSERT INTO rollup (resolution, bucket, ticks, {cols}, total_ms_max, rss_mb_max)
+            VALUES (?, ?, 1, {placeholders}, ?, ?)
+            ON CONFLICT(resolution, bucket) DO UPDATE SET
+                ticks = ticks + 1,
+                {updates},
+                total_ms_max = MAX(total_ms_max, excluded.total_ms_max),
+                rss_mb_max = MAX(COALESCE(rss_mb_max, 0), COALESCE(excluded.rss_mb_max, 0))
+            """,
+            (resolution, bucket, *values, m.total_ms or 0, m.rss_mb),
+        )
+        if m.action:
+            cur.execute(
+                """
+                INSERT INTO rollup_actions (resolution, bucket, action, count)
+                VALUES (?, ?, ?, 1)
+                ON CONFLICT(resolution, bucket, action) DO UPDATE SET count = count + 1
+                """,
+                (resolution, bucket, m.action),
+            )
+
+    def prune(self, now: Optional[float] = None) -> None:
+        """按保留策略删除过期数据"""
+        try:
+            with self._lock:
+                self._prune_locked(now if now is not None else time.time())
+        except sqlite3.Error as e:
+            logger.warning("清理过期指标失败: %s", e)
+
+    def _prune_locked(self, now: float) -> None:
+        cur = self._conn.cursor()
+        cur.execute("DELETE FROM ticks WHERE ts < ?", (now - self.raw_retention_seconds,))
+        cutoff = now - self.retention_seconds
+        cur.execute("DELETE FROM rollup WHERE bucket < ?", (cutoff,))
+        cur.execute("DELETE FROM rollup_actions WHERE bucket < ?", (cutoff,))
+        self._conn.commit()
+
+    # ── 查询 ─────────────────────────────────────────────────
+
+    @staticmethod
+    def pick_resolution(range_seconds: float) -> int:
+        """按查询跨度选择分辨率：0 表示原始 tick"""
+        if range_seconds <= 2 * 3600:
+            return 0
+        if range_seconds <= 2 * 86400:
+            return ROLLUP_MINUTE
+        return ROLLUP_HOUR
+
+    def query(self, range_value: Optional[str] = None, now: Optional[float] = None) -> dict[str, Any]:
+        """
+        查询最近一段时间的指标序列。
+
+        Returns:
+            {"range_seconds", "resolution", "points": [...]}；
+            每个点含 ts、ticks、各阶段平均耗时、vision/cache/网络错误计数、rss_mb、decisions。
+        """
+        range_seconds = parse_range(range_value)
+        now = now if now is not None else time.time()
+        since = now - range_seconds
+        resolution = self.pick_resolution(range_seconds)
+        try:
+            with self._lock:
+                if resolution == 0:
+                    points = self._query_raw(since)
+                else:
+                    points = self._query_rollup(resolution, since)
+        except sqlite3.Error as e:
+            logger.warning("查询指标失败: %s", e)
+            points = []
+        return {
+            "range_seconds": range_seconds,
+            "resolution": resolution,
+            "points": points,
+        }
+
+    def _query_raw(self, since: float) -> list[dict[str, Any]]:
+        cur = self._conn.execute(
+            """
+            SELECT ts, total_ms, devplan_ms, log_ms, vision_ms, decide_ms, execute_ms,
+                   action, ui_status, vision_calls, vision_cache_hits, network_errors, rss_mb
+            FROM ticks WHERE ts >= ? ORDER BY ts
+            """,
+            (since,),
+        )
+        points: list[dict[str, Any]] = []
+        for row in cur.fetchall():
+            (ts, total, devplan, log_ms, vision, decide, execute,
+             action, ui_status, vcalls, vhits, nerr, rss) = row
+            points.append({
+                "ts": ts,
+                "ticks": 1,
+                "total_ms": total or 0.0,
+                "total_ms_max": total or 0.0,
+                "devplan_ms": devplan or 0.0,
+                "log_ms": log_ms or 0.0,
+                "vision_ms": vision or 0.0,
+                "decide_ms": decide or 0.0,
+                "execute_ms": execute or 0.0,
+                "vision_calls": vcalls or 0,
+                "vision_cache_hits": vhits or 0,
+                "network_errors": nerr or 0,
+                "rss_mb": rss,
+                "ui_status": ui_status or "",
+                "decisions": {action: 1} if action else {},
+            })
+        return points
+
+    def _query_rollup(self, resolution: int, since: float) -> list[dict[str, Any]]:
+        cols = ", ".join(_SUM_COLUMNS)
+        cur = self._conn.execute(
+            f"""
+            SELECT bucket, ticks, {cols}, total_ms_max, rss_mb_max
+            FROM rollup WHERE resolution = ? AND bucket >= ? ORDER BY bucket
+            """,
+            (resolution, int(since // resolution) * resolution),
+        )
+        points: list[dict[str, Any]] = []
+        index: dict[int, dict[str, Any]] = {}
+        for row in cur.fetchall():
+            bucket, ticks = row[0], row[1] or 0
+            sums = dict(zip(_SUM_COLUMNS, row[2:2 + len(_SUM_COLUMNS)]))
+            total_ms_max, rss_max = row[2 + len(_SUM_COLUMNS):]
+            point: dict[str, Any] = {"ts": float(bucket), "ticks": ticks}
+            for c in ("total_ms", "devplan_ms", "log_ms", "vision_ms", "decide_ms", "execute_ms"):
+                point[c] = (sums[c] / ticks) if ticks else 0.0
+            point["total_ms_max"] = total_ms_max or 0.0
+            for c in ("vision_calls", "vision_cache_hits", "network_errors"):
+                point[c] = int(sums[c] or 0)
+            point["rss_mb"] = rss_max
+            point["decisions"] = {}
+            points.append(point)
+            index[bucket] = point
+
+        cur = self._conn.execute(
+            "SELECT bucket, action, count FROM rollup_actions WHERE resolution = ? AND bucket >= ?",
+            (resolution, int(since // resolution) * resolution),
+        )
+        for bucket, action, count in cur.fetchall():
+            if bucket in index:
+                index[bucket]["decisions"][action] = count
+        return points
+
+    def close(self) -> None:
+        """关闭数据库连接"""
+        with self._lock:
+            try:
+                self._conn.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — Ollama 视觉模型生命周期管理
+
+原先 VisionAnalyzer._ensure_model_ready 只在首次调用时检查一次模型列表：
+  - 启动后第一次分析要承担完整的冷加载（gemma3:27b 需数秒到数十秒）
+  - Ollama 默认 5 分钟无请求即卸载模型，空闲后下一次分析再次冷启动
+  - 首次检查失败（Ollama 尚未启动）后永远判定不可用
+
+ModelLifecycle 负责：
+  1. 预加载：启动时用空 prompt 的 generate 把模型载入显存（后台线程）
+  2. keep_alive：所有请求携带 keep_alive，延长 Ollama 的驻留时间
+  3. 空闲保温：距上次模型活动超过 warm_interval 时发一次空 prompt 保温请求
+  4. 就绪重检：未就绪时每 recheck_interval 秒重新检测，连续失败后重新判定
+  5. 冷启动统计：加载耗时超过 cold_threshold 记为一次冷启动，写入诊断信息
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+import threading
+from typing import Any, Optional
+
+from .clock import SYSTEM_CLOCK
+
+logger = logging.getLogger("executor.model_lifecycle")
+
+
+def extract_model_names(result: Any) -> list[str]:
+    """从 ollama.list() 结果中提取模型名列表（兼容新旧 SDK 版本）"""
+    try:
+        # 新版 SDK: Pydantic 对象 → result.models[i].model
+        if hasattr(result, "models") and not isinstance(result, dict):
+            return [m.model for m in result.models if hasattr(m, "model")]
+    except Exception:
+        pass
+    try:
+        # 旧版 SDK: dict → result["models"][i]["name"]
+        if isinstance(result, dict):
+            return [m.get("name", "") for m in result.get("models", [])]
+    except Exception:
+        pass
+    return []
+
+
+def duration_seconds(value: Any) -> float:
+    """解析 Ollama keep_alive 取值（"30m" / "1h" / "90s" / 300 / -1）为秒；负数表示永久驻留"""
+    if isinstance(value, (int, float)):
+        return float("inf") if value < 0 else float(value)
+    m = re.fullmatch(r"\s*(-?\d+(?:\.\d+)?)\s*([smh]?)\s*", str(value))
+    if not m:
+        return 300.0
+    n = float(m.group(1))
+    if n < 0:
+        return float("inf")
+    return n * {"": 1, "s": 1, "m": 60, "h": 3600}[m.group(2)]
+
+
+def _load_seconds(response: Any, fallback: float) -> float:
+    """从 generate 响应中取 load_duration（纳秒），缺失时用请求耗时"""
+    raw = getattr(response, "load_duration", None)
+    if raw is None and isinstance(response, dict):
+        raw = response.get("load_duration")
+    try:
+        return float(raw) / 1e9 if raw else fallback
+    except (TypeError, ValueError):
+        return fallback
+
+
+class ModelLifecycle:
+    """
+    Ollama 模型预加载 / 保温 / 就绪重检。
+
+    使用方式：
+        lifecycle = ModelLifecycle(ollama, "gemma3:27b", keep_alive="30m")
+        lifecycle.preload()            # 启动时（后台线程）
+        lifecycle.ensure_ready()       # 每次调用模型前
+        lifecycle.note_call(seconds)   # 每次调用模型后
+        lifecycle.keep_warm()          # 每个 tick 结束时
+    """
+
+    # 连续调用失败多少次后判定模型失效并重新检测
+    FAILURE_THRESHOLD = 2
+
+    def __init__(
+        self,
+        client: Any,
+        model_name: str,
+        clock: Any = None,
+        keep_alive: str | int = "30m",
+        warm_interval: float = 240.0,
+        recheck_interval: float = 30.0,
+        cold_threshold: float = 2.0,
+        background: bool = True,
+    ):
+        self.client = client
+        self.model_name = model_name
+        self.clock = clock or SYSTEM_CLOCK
+        self.configure(keep_alive, warm_interval, recheck_interval)
+        self.cold_threshold = max(0.0, float(cold_threshold))
+        self.background = background
+
+        self._ready = False
+        self._checked_at: Optional[float] = None
+        self._last_activity: Optional[float] = None   # 最近一次模型实际运行（调用 / 预加载 / 保温）
+        self._failures = 0
+        self._loading = threading.Lock()               # 预加载 / 保温不重叠
+        self.stats: dict[str, float] = {
+            "readiness_checks": 0,
+            "preloads": 0,
+            "warm_pings": 0,
+            "cold_starts": 0,
+            "failures": 0,
+            "last_load_seconds": 0.0,
+            "max_load_seconds": 0.0,
+            "load_seconds_total": 0.0,
+        }
+
+    def configure(self, keep_alive: str | int, warm_interval: float, recheck_interval: float) -> None:
+        """设置（或运行中热更新）保温参数；下一次预加载 / 保温 / 就绪检测按新值进行"""
+        self.keep_alive = keep_alive
+        self.keep_alive_seconds = duration_seconds(keep_alive)
+        self.warm_interval = max(0.0, float(warm_interval))
+        self.recheck_interval = max(0.0, float(recheck_interval))
+
+    @property
+    def ready(self) -> bool:
+        return self._ready
+
+    # ── 就绪检测 ─────────────────────────────────────────────
+
+    def ensure_ready(self) -> bool:
+        """已就绪直接返回；未就绪时按 recheck_interval 限频重新检测"""
+        if self._ready:
+            return True
+        now = self.clock.time()
+        if self._checked_at is not None and now - self._checked_at < self.recheck_interval:
+            return False
+        recovering = self._checked_at is not None or self._failures > 0
+        if self.check_ready() and recovering:
+            # 重新检测到模型（Ollama 重启 / 模型刚拉取完）→ 立即预加载
+            self._spawn("preloads")
+        return self._ready
+
+    def check_ready(self) -> bool:
+        """查询 ollama.list()，确认模型已安装"""
+        self._checked_at = self.clock.time()
+        self.stats["readiness_checks"] += 1
+        try:
+            model_names = extract_model_names(self.client.list())
+        except Exception as e:
+            logger.error("检查 Ollama 模型失败: %s", e)
+            self._ready = False
+            return False
+        # 检查模型名是否存在（支持 tag 匹配）
+        model_base = self.model_name.split(":")[0]
+        self._ready = any(model_base in name for name in model_names)
+        if self._ready:
+            self._failures = 0
+            logger.info("视觉模型已就绪: %s", self.model_name)
+        else:
+            logger.warning("视觉模型 %s 未找到，可用模型: %s", self.model_name, ", ".join(model_names[:5]))
+        return self._ready
+
+    # ── 预加载 / 保温 ────────────────────────────────────────
+
+    def preload(self) -> None:
+        """启动时预加载模型（background=True 时不阻塞启动流程）"""
+        if self.ensure_ready():
+            self._spawn("preloads")
+
+    def keep_warm(self) -> bool:
+        """
+        空闲保温：距上次模型活动超过 warm_interval 时发一次空 prompt 请求。
+
+        Returns:
+            是否发起了保温请求
+        """
+        if self.warm_interval <= 0 or not self._ready:
+            return False
+        last = self._last_activity
+        if last is not None and self.clock.time() - last < self.warm_interval:
+            return False
+        self._spawn("warm_pings")
+        return True
+
+    def _spawn(self, kind: str) -> None:
+        if self.background:
+            threading.Thread(target=self._load, args=(kind,), name="ollama-warm", daemon=True).start()
+        else:
+            self._load(kind)
+
+    def _load(self, kind: str) -> bool:
+        """空 prompt generate：模型未加载时触发加载，已加载时几乎零开销"""
+        if not self._loading.acquire(blocking=False):
+            return False
+        try:
+            started = self.clock.time()
+            response = self.client.generate(model=self.model_name, prompt="", keep_alive=self.keep_alive)
+            load = _load_seconds(response, self.clock.time() - started)
+            self.stats[kind] += 1
+            self._record_load(load, kind)
+            self._last_activity = self.clock.time()
+            self._failures = 0
+            return True
+        except Exception as e:
+            logger.warning("视觉模型%s失败: %s", "预加载" if kind == "preloads" else "保温", e)
+            self.note_failure()
+            return False
+        finally:
+            self._loading.release()
+
+    # ── 调用记录 ─────────────────────────────────────────────
+
+    def note_call(self, seconds: float) -> None:
+        """记录一次成功的模型调用；驻留期外的慢调用计为冷启动"""
+        now = self.clock.time()
+        expired = self._last_activity is None or now - self._last_activity > self.keep_alive_seconds
+        if expired and seconds >= self.cold_threshold:
+            self._record_load(seconds, "call")
+        self._last_activity = now
+        self._failures = 0
+
+    def note_failure(self) -> None:
+        """记录一次调用失败；连续失败达到阈值后标记未就绪，下次使用前重新检测"""
+        self._failures += 1
+        self.stats["failures"] += 1
+        if self._failures >= self.FAILURE_THRESHOLD and self._ready:
+            logger.warning("视觉模型连续 %d 次调用失败，重新检测就绪状态", self._failures)
+            self._ready = False
+            self._checked_at = None
+
+    def _record_load(self, seconds: float, source: str) -> None:
+        if seconds < self.cold_threshold:
+            return
+        self.stats["cold_starts"] += 1
+        self.stats["last_load_seconds"] = round(seconds, 3)
+        self.stats["max_load_seconds"] = round(max(self.stats["max_load_seconds"], seconds), 3)
+        self.stats["load_seconds_total"] = round(self.stats["load_seconds_total"] + seconds, 3)
+        logger.info("视觉模型冷启动（%s）: 加载 %.1f 秒", source, seconds)
+
+    # ── 诊断 ─────────────────────────────────────────────────
+
+    def diagnostics(self) -> dict[str, Any]:
+        idle = None if self._last_activity is None else round(self.clock.time() - self._last_activity, 1)
+        return {
+            "ready": self._ready,
+            "keep_alive": self.keep_alive,
+            "warm_interval": self.warm_interval,
+            "idle_seconds": idle,
+            "consecutive_failures": self._failures,
+            **self.stats,
+        }
@@ -0,0 +1,363 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 声明式决策策略表
+
+把 DualChannelEngine 的决策矩阵从嵌套 if/else 抽成一张有序规则表：
+
+  规则字段：
+    devplan   DevPlan 动作（send_task / wait / all_done / start_phase / "*"）
+    ui        UIStatus 值或值列表（"*" 表示任意）
+    changing  屏幕是否变化（true / false / 省略表示任意）
+    handler   处理器名（见 HANDLERS，由引擎实现带状态的防抖 / 退避 / 熔断逻辑）
+    message   决策说明模板，可用 {task_id} {title} {devplan_action}
+    fallback  处理结果为 WAIT 且右下角无变化超过 fallback_no_change_timeout 时，
+              改走 3 分钟兜底（发送"请继续"）
+
+启动时按「先匹配者胜」把规则编译成
+  (devplan, ui_status, screen_changing, stale) → CompiledEntry
+的完整查找表（stale = 右下角无变化时长是否超过兜底阈值），
+每次决策只做一次 dict 查找；编译时校验所有组合都被覆盖。
+
+策略可来自 JSON 文件（config.decision_policy_file），PolicyStore 按 mtime
+检测文件变化并热替换；新文件编译失败时保留旧策略继续运行。
+
+命令行：
+    python -m src.policy --dump policy.json     # 导出内置策略作为编辑起点
+    python -m src.policy --check policy.json    # 校验策略文件
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import os
+import sys
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Optional
+
+from .clock import SYSTEM_CLOCK
+from .config import UIStatus
+
+logger = logging.getLogger("executor.policy")
+
+# 引擎实现的处理器
+HANDLERS = frozenset({
+    "all_done",           # 全部完成
+    "start_phase",        # 启动新阶段（受 auto_start_next_phase 控制）
+    "wait",               # 本轮不操作
+    "send_task",          # 发送子任务（重置所有计数）
+    "send_continue",      # 带防抖 / 冷却 / 重试上限的"请继续"
+    "network_recovery",   # 熔断 + 指数退避后发送"请继续"
+    "rate_limit",         # 限流：指数退避冷却，不发送
+    "context_overflow",   # 开新对话 + 恢复 prompt
+    "response_stall",     # 唤醒，连续无效后升级为开新对话
+})
+
+# message 模板可用的占位符（DualChannelEngine._render 提供）
+TEMPLATE_FIELDS = ("task_id", "title", "devplan_action")
+
+# 规则未显式列出的 DevPlan 动作统一落到 "*"
+ANY = "*"
+KNOWN_DEVPLAN_ACTIONS = ("all_done", "start_phase", "send_task", "wait")
+
+
+class PolicyError(ValueError):
+    """策略表格式错误或覆盖不完整"""
+
+
+def _status_rules(devplan: str, messages: dict[str, str], changing_wait: str, idle_rule: dict) -> list[dict]:
+    """send_task / wait 共用的状态行（两者只在说明文字和空闲行为上不同）"""
+    return [
+        {"devplan": devplan, "ui": "AI_GENERATING", "handler": "wait",
+         "message": messages["generating"], "fallback": True},
+        {"devplan": devplan, "ui": "CONNECTION_ERROR", "handler": "network_recovery",
+         "message": messages["connection"], "fallback": True},
+        {"devplan": devplan, "ui": "PROVIDER_ERROR", "handler": "network_recovery",
+         "message": messages["provider"], "fallback": True},
+        {"devplan": devplan, "ui": "CONTEXT_OVERFLOW", "handler": "context_overflow", "fallback": True},
+        {"devplan": devplan, "ui": "RATE_LIMIT", "handler": "rate_limit",
+         "message": messages["rate_limit"], "fallback": True},
+        {"devplan": devplan, "ui": "API_TIMEOUT", "handler": "network_recovery",
+         "message": messages["timeout"], "fallback": True},
+        {"devplan": devplan, "ui": "RESPONSE_INTERRUPTED", "handler": "send_continue",
+         "message": messages["interrupted"], "fallback": True},
+        {"devplan": devplan, "ui": "RESPONSE_STALL", "handler": "response_stall", "fallback": True},
+        {"devplan": devplan, "ui": ANY, "changing": True, "handler": "wait",
+         "message": changing_wait, "fallback": True},
+        dict(idle_rule, devplan=devplan, ui=ANY, fallback=True),
+    ]
+
+
+# 内置策略：与 engine.py 模块文档中的决策矩阵一致
+DEFAULT_POLICY: dict[str, Any] = {
+    "name": "builtin",
+    "rules": [
+        {"devplan": "all_done", "handler": "all_done", "message": "所有任务已完成"},
+        {"devplan": "start_phase", "handler": "start_phase"},
+        *_status_rules(
+            "send_task",
+            {
+                "generating": "DevPlan 有待发任务 {task_id}，AI 正在生成中，等待",
+                "connection": "DevPlan 有待发任务 {task_id}，但 UI 检测到连接错误，尝试恢复",
+                "provider": "DevPlan 有待发任务 {task_id}，但 UI 检测到 Provider Error，尝试恢复",
+                "rate_limit": "DevPlan 有待发任务 {task_id}，检测到限流",
+                "timeout": "DevPlan 有待发任务 {task_id}，API 超时，尝试恢复",
+                "interrupted": "DevPlan 有待发任务 {task_id}，AI 响应被中断，发送继续",
+            },
+            "DevPlan 有待发任务 {task_id}，但屏幕有变化（AI 可能在忙），等待中",
+            {"handler": "send_task", "message": "发送子任务: {task_id} — {title}"},
+        ),
+        *_status_rules(
+            "wait",
+            {
+                "generating": "{task_id} 执行中，AI 正在生成，继续等待",
+                "connection": "{task_id} 执行中但 UI 检测到连接错误，尝试恢复",
+                "provider": "{task_id} 执行中但 UI 检测到 Provider Error，尝试恢复",
+                "rate_limit": "{task_id} 执行中检测到限流",
+                "timeout": "{task_id} 执行中，API 超时，尝试恢复",
+                "interrupted": "{task_id} 执行中，AI 响应被中断，发送继续",
+            },
+            "{task_id} 执行中，屏幕有变化（AI 在工作），继续等待",
+            {"handler": "send_continue", "message": "{task_id} 执行中但屏幕无变化且 UI 空闲，尝试唤醒"},
+        ),
+        {"devplan": ANY, "handler": "wait", "message": "未知的 DevPlan 动作: {devplan_action}", "fallback": True},
+    ],
+}
+
+
+# ── 编译 ─────────────────────────────────────────────────────
+
+@dataclass(frozen=True)
+class CompiledEntry:
+    """查找表中的一项"""
+    handler: str
+    message: str
+    fallback: bool      # 已与 stale 维度合并：仅 stale=True 的键上可能为真
+    rule_index: int     # 命中的规则序号（调试 / 统计用）
+
+
+def _as_list(value: Any) -> list:
+    if value is None or value == ANY:
+        return [ANY]
+    return list(value) if isinstance(value, (list, tuple)) else [value]
+
+
+class CompiledPolicy:
+    """
+    编译后的策略：完整的 (devplan, ui_status, changing, stale) 查找表。
+
+    使用方式：
+        policy = CompiledPolicy(DEFAULT_POLICY)
+        entry = policy.lookup("wait", UIStatus.IDLE, False, False)
+    """
+
+    def __init__(self, table: dict[str, Any], source: str = "builtin"):
+        if not isinstance(table, dict) or not isinstance(table.get("rules"), list):
+            raise PolicyError("策略表需要是包含 rules 列表的对象")
+        self.name = str(table.get("name") or source)
+        self.source = source
+        rules = list(table["rules"])
+        if table.get("extends") == "builtin":
+            rules += DEFAULT_POLICY["rules"]
+        self.rules = [self._validate(i, r) for i, r in enumerate(rules)]
+
+        devplan_keys = set(KNOWN_DEVPLAN_ACTIONS)
+        for rule in self.rules:
+            devplan_keys.update(d for d in rule["devplan"] if d != ANY)
+        self.devplan_keys = frozenset(devplan_keys)
+        self._table = self._compile()
+
+    @staticmethod
+    def _validate(index: int, rule: Any) -> dict[str, Any]:
+        if not isinstance(rule, dict):
+            raise PolicyError(f"规则 #{index} 不是对象")
+        handler = rule.get("handler")
+        if handler not in HANDLERS:
+            raise PolicyError(f"规则 #{index} 的 handler 无效: {handler!r}（可选: {', '.join(sorted(HANDLERS))}）")
+        uis = _as_list(rule.get("ui"))
+        for ui in uis:
+            if ui != ANY and ui not in UIStatus.__members__:
+                raise PolicyError(f"规则 #{index} 的 ui 无效: {ui!r}")
+        changing = rule.get("changing")
+        if changing is not None and not isinstance(changing, bool):
+            raise PolicyError(f"规则 #{index} 的 changing 必须是布尔值")
+        message = str(rule.get("message", ""))
+        try:
+            # 编译时试渲染：坏模板在热替换前就被拒绝，而不是每个 tick 决策时抛异常
+            message.format(**dict.fromkeys(TEMPLATE_FIELDS, ""))
+        except (KeyError, IndexError, ValueError, AttributeError, TypeError) as e:
+            raise PolicyError(
+                f"规则 #{index} 的 message 模板无效: {message!r}（{type(e).__name__}: {e}；"
+                f"可用占位符: {', '.join(TEMPLATE_FIELDS)}，字面量花括号写作 {{{{ }}}}）"
+            ) from None
+        return {
+            "devplan": _as_list(rule.get("devplan")),
+            "ui": uis,
+            "changing": changing,
+            "handler": handler,
+            "message": message,
+            "fallback": bool(rule.get("fallback", False)),
+        }
+
+    def _match(self, devplan: str, ui: str, changing: bool) -> Optional[tuple[int, dict]]:
+        for i, rule in enumerate(self.rules):
+            if ANY not in rule["devplan"] and devplan not in rule["devplan"]:
+                continue
+            if ANY not in rule["ui"] and ui not in rule["ui"]:
+                continue
+            if rule["changing"] is not None and rule["changing"] != changing:
+                continue
+            return i, rule
+        return None
+
+    def _compile(self) -> dict[tuple, CompiledEntry]:
+        table: dict[tuple, CompiledEntry] = {}
+        for devplan in [*sorted(self.devplan_keys), ANY]:
+            for status in UIStatus:
+                for changing in (False, True):
+                    hit = self._match(devplan, status.value, changing)
+                    if hit is None:
+                        raise PolicyError(
+                            f"策略未覆盖: devplan={devplan} ui={status.value} changing={changing}"
+                        )
+                    i, rule = hit
+                    for stale in (False, True):
+                        table[(devplan, status, changing, stale)] = CompiledEntry(
+                            handler=rule["handler"],
+                            message=rule["message"],
+                            fallback=rule["fallback"] and stale,
+                            rule_index=i,
+                        )
+        return table
+
+    def lookup(self, devplan_action: str, ui_status: UIStatus, screen_changing: bool, stale: bool) -> CompiledEntry:
+        """O(1) 查表"""
+        if devplan_action not in self.devplan_keys:
+            devplan_action = ANY
+        return self._table[(devplan_action, ui_status, bool(screen_changing), bool(stale))]
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+_BUILTIN: Optional[CompiledPolicy] = None
+
+
+def _builtin_policy() -> CompiledPolicy:
+    """内置策略只编译一次，所有引擎实例共享（编译结果只读）"""
+    global _BUILTIN
+    if _BUILTIN is None:
+        _BUILTIN = CompiledPolicy(DEFAULT_POLICY)
+    return _BUILTIN
+
+
+def load_policy_file(path: str | Path) -> CompiledPolicy:
+    """读取并编译 JSON 策略文件"""
+    with open(path, "r", encoding="utf-8") as f:
+        table = json.load(f)
+    return CompiledPolicy(table, source=str(path))
+
+
+# ── 热替换 ───────────────────────────────────────────────────
+
+class PolicyStore:
+    """
+    持有当前生效的策略；配置了文件时按 mtime 检测变化并热替换。
+
+    get() 每 check_interval 秒最多 stat 一次文件，其余调用直接返回缓存的编译结果。
+    """
+
+    def __init__(
+        self,
+        path: str | Path | None = None,
+        check_interval: float = 5.0,
+        clock: Any = None,
+        policy: CompiledPolicy | dict | None = None,
+    ):
+        self.path = Path(path) if path else None
+        self.check_interval = max(0.0, float(check_interval))
+        self.clock = clock or SYSTEM_CLOCK
+        if isinstance(policy, dict):
+            policy = CompiledPolicy(policy, source="runtime")
+        self._policy = policy or _builtin_policy()
+        self._mtime: float = 0.0
+        self._next_check: float = 0.0
+        self.swaps = 0
+        if self.path is not None:
+            self.reload()
+
+    @property
+    def policy(self) -> CompiledPolicy:
+        return self._policy
+
+    def get(self) -> CompiledPolicy:
+        if self.path is not None:
+            now = self.clock.time()
+            if now >= self._next_check:
+                self._next_check = now + self.check_interval
+                self._maybe_reload()
+        return self._policy
+
+    def swap(self, policy: CompiledPolicy | dict) -> CompiledPolicy:
+        """以编程方式替换当前策略（dict 会先编译）"""
+        if isinstance(policy, dict):
+            policy = CompiledPolicy(policy, source="runtime")
+        self._policy = policy
+        self.swaps += 1
+        logger.info("决策策略已切换: %s（%d 条规则）", policy.name, len(policy.rules))
+        return policy
+
+    def reload(self) -> bool:
+        """强制重新加载策略文件；失败时保留当前策略"""
+        if self.path is None:
+            return False
+        try:
+            mtime = os.path.getmtime(self.path)
+            policy = load_policy_file(self.path)
+        except FileNotFoundError:
+            logger.warning("策略文件不存在，继续使用 %s: %s", self._policy.name, self.path)
+            return False
+        except (OSError, ValueError) as e:
+            logger.error("策略文件加载失败，继续使用 %s: %s", self._policy.name, e)
+            return False
+        self._mtime = mtime
+        self.swap(policy)
+        return True
+
+    def _maybe_reload(self) -> None:
+        try:
+            mtime = os.path.getmtime(self.path)
+        except OSError:
+            return
+        if mtime != self._mtime:
+            self.reload()
+
+
+# ── 命令行 ───────────────────────────────────────────────────
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DevPlan Executor 决策策略表工具")
+    parser.add_argument("--dump", metavar="PATH", help="导出内置策略到 JSON 文件")
+    parser.add_argument("--check", metavar="PATH", help="校验策略文件并输出编译结果")
+    args = parser.parse_args(argv)
+
+    if args.dump:
+        with open(args.dump, "w", encoding="utf-8") as f:
+            json.dump(DEFAULT_POLICY, f, ensure_ascii=False, indent=2)
+        print(f"已导出内置策略: {args.dump}")
+    if args.check:
+        try:
+            policy = load_policy_file(args.check)
+        except (OSError, ValueError) as e:
+            print(f"策略无效: {e}")
+            return 1
+        print(f"策略有效: {policy.name}（{len(policy.rules)} 条规则，编译为 {len(policy)} 项）")
+    if not (args.dump or args.check):
+        parser.print_help()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 阶段耗时剖析器
+
+轻量 span 埋点，回答「一个 20–40 秒的 tick 到底花在哪」：
+  - 每个 span 名（如 tick.devplan / vision.model / gui.paste）维护一个
+    HDR 风格的对数分桶直方图，提供 p50 / p95 / p99 / max
+  - span 可嵌套（线程内栈），--profile 模式下额外累计各调用栈的自身耗时，
+    可导出 Brendan Gregg folded 格式（flamegraph.pl / speedscope 直接可读）
+
+直方图常开（每个 span 只做一次 perf_counter 差值 + 一次加锁计数），
+调用栈累计仅在 collect_stacks=True 时进行。
+
+使用方式：
+    from .profiler import profiler
+
+    with profiler.span("tick.devplan"):
+        client.get_next_action()
+
+    @profiler.timed("execute.recall_memories")
+    def _recall(...): ...
+"""
+
+from __future__ import annotations
+
+import functools
+import logging
+import math
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+logger = logging.getLogger("executor.profiler")
+
+
+# ── HDR 风格直方图 ───────────────────────────────────────────
+
+# 每个 2 的幂区间再线性划分 2^SUB_BITS 个子桶 → 相对误差 ≤ 1/32 ≈ 3%
+SUB_BITS = 5
+_SUB_COUNT = 1 << SUB_BITS
+
+
+def _bucket_index(value_us: int) -> int:
+    """微秒值 → 桶序号（小于 _SUB_COUNT 的值精确落桶）"""
+    if value_us < _SUB_COUNT:
+        return max(0, value_us)
+    exp = value_us.bit_length() - 1
+    shift = exp - SUB_BITS
+    return (shift + 1) * _SUB_COUNT + ((value_us >> shift) - _SUB_COUNT)
+
+
+def _bucket_upper(index: int) -> int:
+    """桶序号 → 该桶可表示的最大微秒值"""
+    if index < _SUB_COUNT:
+        return index
+    shift = index // _SUB_COUNT - 1
+    mantissa = index % _SUB_COUNT + _SUB_COUNT
+    return ((mantissa + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    """
+    对数分桶延迟直方图（微秒精度，稀疏存储）。
+
+    非线程安全，由 Profiler 的锁串行化。
+    """
+
+    __slots__ = ("count", "total_us", "min_us", "max_us", "_buckets")
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.total_us = 0
+        self.min_us = 0
+        self.max_us = 0
+        self._buckets: dict[int, int] = {}
+
+    def record(self, value_us: int) -> None:
+        value_us = max(0, int(value_us))
+        idx = _bucket_index(value_us)
+        self._buckets[idx] = self._buckets.get(idx, 0) + 1
+        if self.count == 0 or value_us < self.min_us:
+            self.min_us = value_us
+        if value_us > self.max_us:
+            self.max_us = value_us
+        self.count += 1
+        self.total_us += value_us
+
+    def percentile(self, p: float) -> int:
+        """返回第 p 百分位（0-100）对应的微秒值（桶上界，不超过 max）"""
+        if self.count == 0:
+            return 0
+        target = max(1, math.ceil(self.count * p / 100.0))
+        seen = 0
+        for idx in sorted(self._buckets):
+            seen += self._buckets[idx]
+            if seen >= target:
+                return min(_bucket_upper(idx), self.max_us)
+        return self.max_us
+
+    def summary(self) -> dict[str, float]:
+        """毫秒单位摘要"""
+        mean_us = self.total_us / self.count if self.count else 0.0
+        return {
+            "count": self.count,
+            "mean_ms": round(mean_us / 1000.0, 3),
+            "p50_ms": round(self.percentile(50) / 1000.0, 3),
+            "p95_ms": round(self.percentile(95) / 1000.0, 3),
+            "p99_ms": round(self.percentile(99) / 1000.0, 3),
+            "max_ms": round(self.max_us / 1000.0, 3),
+            "total_s": round(self.total_us / 1_000_000.0, 3),
+        }
+
+
+# ── Span ─────────────────────────────────────────────────────
+
+class _Span:
+    """一次计时区间；退出后 elapsed_ms 可读"""
+
+    __slots__ = ("_profiler", "name", "_start", "_child_us", "elapsed_ms")
+
+    def __init__(self, profiler: "Profiler", name: str):
+        self._profiler = profiler
+        self.name = name
+        self._start = 0.0
+        self._child_us = 0
+        self.elapsed_ms = 0.0
+
+    def __enter__(self) -> "_Span":
+        self._profiler._stack().append(self)
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        elapsed = time.perf_counter() - self._start
+        self.elapsed_ms = elapsed * 1000.0
+        self._profiler._finish(self, int(elapsed * 1_000_000))
+
+
+class Profiler:
+    """
+    进程级 span 剖析器。
+
+    直方图按 span 名聚合；collect_stacks=True 时按「父;子;孙」调用栈累计自身耗时。
+    """
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._histograms: dict[str, LatencyHistogram] = {}
+        self._folded: dict[str, int] = {}
+        self.collect_stacks: bool = False
+
+    def configure(self, collect_stacks: bool) -> None:
+        """开关调用栈累计（--profile）"""
+        self.collect_stacks = bool(collect_stacks)
+
+    def span(self, name: str) -> _Span:
+        """创建计时区间（with 语句使用）"""
+        return _Span(self, name)
+
+    def timed(self, name: str) -> Callable:
+        """装饰器：整个函数体计入 name"""
+        def decorator(func: Callable) -> Callable:
+            @functools.wraps(func)
+            def wrapper(*args: Any, **kwargs: Any) -> Any:
+                with _Span(self, name):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    # ── 内部 ─────────────────────────────────────────────────
+
+    def _stack(self) -> list[_Span]:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = []
+            self._local.stack = stack
+        return stack
+
+    def _finish(self, span: _Span, elapsed_us: int) -> None:
+        stack = self._stack()
+        folded_key = ""
+        if self.collect_stacks:
+            folded_key = ";".join(s.name for s in stack)
+        # 正常情况下 span 位于栈顶；异常路径下容错地移除
+        if stack and stack[-1] is span:
+            stack.pop()
+        elif span in stack:
+            stack.remove(span)
+        if stack:
+            stack[-1]._child_us += elapsed_us
+        with self._lock:
+            hist = self._histograms.get(span.name)
+            if hist is None:
+                hist = LatencyHistogram()
+                self._histograms[span.name] = hist
+            hist.record(elapsed_us)
+            if folded_key:
+                self_us = max(0, elapsed_us - span._child_us)
+                self._folded[folded_key] = self._folded.get(folded_key, 0) + self_us
+
+    # ── 读取 / 导出 ──────────────────────────────────────────
+
+    def snapshot(self) -> list[dict[str, Any]]:
+        """所有 span 的分位数摘要（按名称排序）"""
+        with self._lock:
+            items = [(name, hist.summary()) for name, hist in self._histograms.items()]
+        return [{"name": name, **summary} for name, summary in sorted(items)]
+
+    def export_buckets(self) -> dict[str, tuple[int, int, dict[int, int]]]:
+        """
+        导出原始直方图（供 /metrics 使用）：name → (count, total_us, {桶上界微秒: 次数})。
+
+        锁内只做浅拷贝，换算在锁外完成，避免抓取拖慢主循环。
+        """
+        with self._lock:
+            raw = {
+                name: (hist.count, hist.total_us, dict(hist._buckets))
+                for name, hist in self._histograms.items()
+            }
+        return {
+            name: (count, total_us, {_bucket_upper(idx): n for idx, n in buckets.items()})
+            for name, (count, total_us, buckets) in raw.items()
+        }
+
+    def format_table(self) -> str:
+        """文本表格（--profile 模式下写入日志）"""
+        rows = self.snapshot()
+        if not rows:
+            return "(暂无剖析数据)"
+        width = max(len(r["name"]) for r in rows)
+        lines = [
+            f"{'stage':<{width}}  {'count':>6}  {'p50':>9}  {'p95':>9}  {'p99':>9}  {'max':>9}  {'total':>9}"
+        ]
+        for r in rows:
+            lines.append(
+                f"{r['name']:<{width}}  {r['count']:>6}  {r['p50_ms']:>7.1f}ms  {r['p95_ms']:>7.1f}ms  "
+                f"{r['p99_ms']:>7.1f}ms  {r['max_ms']:>7.1f}ms  {r['total_s']:>8.1f}s"
+            )
+        return "\n".join(lines)
+
+    def folded_lines(self) -> list[str]:
+        """folded 格式行：「a;b;c <自身耗时微秒>」"""
+        with self._lock:
+            items = sorted(self._folded.items())
+        return [f"{stack} {us}" for stack, us in items if us > 0]
+
+    def dump_folded(self, path: str | Path) -> Optional[Path]:
+        """
+        导出 folded 调用栈文件（flamegraph.pl / speedscope 可直接加载）。
+
+        Returns:
+            写入的文件路径；无数据或写入失败返回 None
+        """
+        lines = self.folded_lines()
+        if not lines:
+            return None
+        target = Path(path)
+        try:
+            target.parent.mkdir(parents=True, exist_ok=True)
+            target.write_text("\n".join(lines) + "\n", encoding="utf-8")
+            return target
+        except OSError as e:
+            logger.warning("导出 folded 剖析数据失败: %s", e)
+            return None
+
+    def reset(self) -> None:
+        """清空已采集数据"""
+        with self._lock:
+            self._histograms.clear()
+            self._folded.clear()
+
+
+# ── 全局单例 ─────────────────────────────────────────────────
+
+profiler = Profiler()
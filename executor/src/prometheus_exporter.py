@@ -0,0 +1,225 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — Prometheus / OpenMetrics 文本导出
+
+供 Web UI 的 GET /metrics 使用，把以下状态渲染为 Prometheus text format 0.0.4：
+  - StateTracker：circuit breaker 状态、网络退避、continue 重试、stall 计数
+  - CursorLogMonitor：ToolCall / 错误累计、进行中调用、空闲秒数
+  - VisionAnalyzer：调用次数、累计耗时、缓存命中、错误
+  - 主循环：tick 数、各决策动作 / 来源通道计数、各阶段耗时直方图（来自 profiler）
+
+抓取路径刻意不加锁：各字段都是主循环写入的标量 / 小字典，
+CPython 下单次属性读取是原子的；直方图仅在 profiler 锁内做浅拷贝。
+"""
+
+from __future__ import annotations
+
+import time
+from typing import Any, Iterable, Optional
+
+from .profiler import profiler
+
+# 阶段耗时直方图的 le 边界（秒）：覆盖毫秒级 HTTP 到分钟级冷却等待
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+CIRCUIT_STATES = ("closed", "open", "half_open")
+
+
+def _escape(value: Any) -> str:
+    """转义 label 值中的反斜杠、双引号与换行"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(labels: Optional[dict[str, Any]]) -> str:
+    if not labels:
+        return ""
+    inner = ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+    return "{" + inner + "}"
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if isinstance(value, bool):
+        return "1" if value else "0"
+    if isinstance(value, int):
+        return str(value)
+    return repr(float(value))
+
+
+class _Writer:
+    """按 metric family 组织输出（同名指标的 HELP/TYPE 只写一次）"""
+
+    def __init__(self) -> None:
+        self.lines: list[str] = []
+
+    def family(self, name: str, kind: str, help_text: str) -> None:
+        self.lines.append(f"# HELP {name} {help_text}")
+        self.lines.append(f"# TYPE {name} {kind}")
+
+    def sample(self, name: str, value: float, labels: Optional[dict[str, Any]] = None) -> None:
+        self.lines.append(f"{name}{_labels(labels)} {_fmt(value)}")
+
+    def single(self, name: str, kind: str, help_text: str, value: float,
+               labels: Optional[dict[str, Any]] = None) -> None:
+        self.family(name, kind, help_text)
+        self.sample(name, value, labels)
+
+    def render(self) -> str:
+        return "\n".join(self.lines) + "\n"
+
+
+# ── 各组件导出 ───────────────────────────────────────────────
+
+def _write_executor(w: _Writer, executor: Any) -> None:
+    config = getattr(executor, "config", None)
+    w.single(
+        "executor_info", "gauge", "Executor static information",
+        1,
+        {
+            "executor_id": getattr(config, "executor_id", ""),
+            "project": getattr(config, "project_name", ""),
+            "version": __import__("src").__version__,
+        },
+    )
+    w.single("executor_running", "gauge", "Whether the executor main loop is running",
+             bool(getattr(executor, "running", False)))
+    w.single("executor_vision_enabled", "gauge", "Whether the vision channel is enabled",
+             bool(getattr(executor, "vision_enabled", False)))
+    w.single("executor_ticks_total", "counter", "Main loop ticks since start",
+             int(getattr(executor, "_tick_count", 0)))
+
+    decisions = dict(getattr(executor, "decision_counts", {}) or {})
+    w.family("executor_decisions_total", "counter", "Decisions taken by the dual-channel engine")
+    for action, count in sorted(decisions.items()):
+        w.sample("executor_decisions_total", count, {"action": action})
+
+    channels = dict(getattr(executor, "channel_counts", {}) or {})
+    w.family("executor_decision_channel_total", "counter", "Decisions by the channel that supplied the UI state")
+    for channel, count in sorted(channels.items()):
+        w.sample("executor_decision_channel_total", count, {"channel": channel})
+
+    budget = getattr(executor, "context_budget", None)
+    if budget is not None:
+        w.single("executor_context_estimated_tokens", "gauge", "Estimated tokens used by the current conversation",
+                 budget.estimated_tokens)
+        w.single("executor_context_budget_tokens", "gauge", "Context budget of a single conversation",
+                 budget.budget_tokens)
+        w.single("executor_context_rotations_total", "counter", "Planned new conversations triggered by the context budget",
+                 budget.rotations)
+
+
+def _write_tracker(w: _Writer, tracker: Any) -> None:
+    # 在 Flask 线程上运行：只读 tracker，不调用会推进状态的 resolve_circuit_state()。
+    # 用 tracker 自身（可注入）的时钟推导 open 窗口到期后的 half_open 与退避剩余时间
+    now = tracker.clock.time()
+    state = tracker.circuit_state
+    failures = int(tracker.circuit_failures)
+    if state == "open" and now >= tracker.circuit_open_until:
+        state, failures = "half_open", 0
+    w.family("executor_circuit_state", "gauge", "Circuit breaker state (1 for the current state)")
+    for s in CIRCUIT_STATES:
+        w.sample("executor_circuit_state", s == state, {"state": s})
+    w.single("executor_circuit_failures", "gauge", "Failures counted by the circuit breaker", failures)
+    w.single("executor_network_backoff_attempts", "gauge", "Current network backoff attempt number",
+             int(tracker.network_backoff_attempts))
+    w.single("executor_network_backoff_remaining_seconds", "gauge", "Seconds left in the current network backoff",
+             max(0.0, float(tracker.network_backoff_until) - now))
+    w.single("executor_continue_retries", "gauge", "Consecutive continue retries",
+             int(tracker.continue_retries))
+    w.single("executor_stall_continue_count", "gauge", "Ineffective continues sent during RESPONSE_STALL",
+             int(tracker.stall_continue_count))
+
+
+def _write_log_monitor(w: _Writer, monitor: Any) -> None:
+    w.single("executor_log_monitor_tool_calls_total", "counter", "Tool calls seen in Cursor renderer.log",
+             int(monitor.total_tool_calls))
+    w.single("executor_log_monitor_errors_total", "counter", "Network errors seen in Cursor renderer.log",
+             int(monitor.total_errors))
+    w.single("executor_log_monitor_pending_tool_calls", "gauge", "Tool calls currently in flight",
+             int(monitor.pending_tool_calls))
+    last = float(monitor.last_event_time)
+    if last > 0:
+        w.single("executor_log_monitor_idle_seconds", "gauge", "Seconds since the last AI activity event",
+                 max(0.0, time.time() - last))
+
+    sources = dict(getattr(monitor, "source_stats", None) or {})
+    if sources:
+        for key, kind, help_text in (
+            ("files", "gauge", "Log files currently tailed per source"),
+            ("lines", "counter", "Log lines read per source"),
+            ("bytes", "counter", "Log bytes read per source"),
+            ("events", "counter", "Events parsed per source"),
+            ("errors", "counter", "Parser exceptions per source"),
+        ):
+            name = f"executor_log_ingest_{key}" + ("" if kind == "gauge" else "_total")
+            w.family(name, kind, help_text)
+            for source, counters in sorted(sources.items()):
+                w.sample(name, int(counters.get(key, 0)), {"source": source})
+        w.single("executor_log_ingest_dropped_total", "counter", "Events dropped by the bounded log event bus",
+                 int(getattr(monitor, "bus_dropped", 0)))
+        w.single("executor_log_monitor_rate_limits_total", "counter", "Rate-limit responses seen in Cursor logs",
+                 int(getattr(monitor, "total_rate_limits", 0)))
+        w.single("executor_log_monitor_tokens_total", "counter", "Token usage reported in Cursor logs",
+                 int(getattr(monitor, "tokens_used", 0)))
+
+
+def _write_vision(w: _Writer, analyzer: Any) -> None:
+    stats = dict(getattr(analyzer, "stats", None) or {})
+    if not stats:
+        return
+    w.single("executor_vision_calls_total", "counter", "Vision model calls",
+             int(stats.get("calls", 0)))
+    w.single("executor_vision_cache_hits_total", "counter", "Vision results served from the identical-frame cache",
+             int(stats.get("cache_hits", 0)))
+    w.single("executor_vision_errors_total", "counter", "Vision model calls that raised",
+             int(stats.get("errors", 0)))
+    w.single("executor_vision_latency_seconds_total", "counter", "Cumulative vision model latency",
+             float(stats.get("latency_ms_total", 0.0)) / 1000.0)
+
+
+def _write_stage_histograms(w: _Writer, buckets: Optional[Iterable[float]] = None) -> None:
+    bounds = tuple(buckets or DURATION_BUCKETS)
+    exported = profiler.export_buckets()
+    name = "executor_stage_duration_seconds"
+    w.family(name, "histogram", "Duration of instrumented executor stages")
+    for stage in sorted(exported):
+        count, total_us, stage_buckets = exported[stage]
+        ordered = sorted(stage_buckets.items())
+        i = 0
+        cumulative = 0
+        for le in bounds:
+            limit_us = le * 1_000_000
+            while i < len(ordered) and ordered[i][0] <= limit_us:
+                cumulative += ordered[i][1]
+                i += 1
+            w.sample(f"{name}_bucket", cumulative, {"stage": stage, "le": _fmt(le)})
+        w.sample(f"{name}_bucket", count, {"stage": stage, "le": "+Inf"})
+        w.sample(f"{name}_sum", total_us / 1_000_000.0, {"stage": stage})
+        w.sample(f"{name}_count", count, {"stage": stage})
+
+
+# ── 入口 ─────────────────────────────────────────────────────
+
+def render_metrics(executor: Any = None) -> str:
+    """
+    渲染 Prometheus 文本格式指标。
+
+    Args:
+        executor: ExecutorLoop 实例（None 时仅导出阶段耗时直方图）
+    """
+    w = _Writer()
+    if executor is not None:
+        _write_executor(w, executor)
+        engine = getattr(executor, "engine", None)
+        if engine is not None:
+            _write_tracker(w, engine.tracker)
+        monitor = getattr(executor, "log_monitor", None)
+        if monitor is not None:
+            _write_log_monitor(w, monitor)
+        # 读 _analyzer 而不是懒加载属性 analyzer：抓取 /metrics 不应触发 VisionAnalyzer 构造
+        analyzer = getattr(executor, "_analyzer", None)
+        if analyzer is not None:
+            _write_vision(w, analyzer)
+    _write_stage_histograms(w)
+    return w.render()
@@ -1,8 +1,8 @@
 # -*- coding: utf-8 -*-
 """
 中断恢复管理器：
-- 生成 last_n_turns 摘要（基于本地事件环形缓冲）
-- 持久化 checkpoint_prompt（JSON 文件）
+- 生成 last_n_turns 摘要（基于结构化事件环形缓冲，摘要要素随事件到达增量维护）
+- 持久化 checkpoint_prompt（SQLite checkpoint 存储 + 兼容旧版 JSON/TXT/JSONL 文件）
 - 组装恢复提示（checkpoint + recall 结果）
 """
 
@@ -11,14 +11,100 @@ from __future__ import annotations
 import json
 import logging
 import re
-from dataclasses import dataclass, asdict
+import time
+from collections import deque
+from dataclasses import dataclass, asdict, fields
 from datetime import datetime
 from pathlib import Path
-from typing import Optional
+from typing import Any, Iterator, Optional
+
+from .checkpoint_store import CheckpointStore, atomic_write_text
 
 logger = logging.getLogger("executor.recovery")
 
 
+# ── 结构化事件 ───────────────────────────────────────────────
+
+_PHASE_RE = re.compile(r"\bphase-[0-9]+[A-Za-z]?\b")
+_TASK_RE = re.compile(r"\bT[0-9]+(?:\.[0-9]+)+\b")
+_REASON_RE = re.compile(
+    r"\b(CONNECTION_ERROR|PROVIDER_ERROR|API_TIMEOUT|RATE_LIMIT|CONTEXT_OVERFLOW|RESPONSE_STALL|RESPONSE_INTERRUPTED)\b"
+)
+_FIELD_RE = re.compile(r"\b(action|status)=(\S+)")
+_NETWORK_REASONS = ("CONNECTION_ERROR", "PROVIDER_ERROR", "API_TIMEOUT", "RATE_LIMIT")
+_PENDING_WORDS = ("pending", "send_task", "wait", "in_progress")
+
+# 事件类型 → 文本前缀（与 main 中 record_event 的格式一致）
+EVENT_PREFIXES = {"devplan": "DevPlan:", "ui": "UI:", "decision": "Decision:"}
+
+
+def _last_match(pattern: re.Pattern, text: str) -> str:
+    found = pattern.findall(text)
+    return found[-1] if found else ""
+
+
+class RecoveryEvent:
+    """一条结构化运行事件；字段在 record_event 时一次性确定，之后不再解析文本"""
+
+    __slots__ = ("seq", "timestamp", "kind", "phase_id", "task_id", "ui_status", "action", "text")
+
+    def __init__(
+        self,
+        seq: int,
+        timestamp: float,
+        kind: str,
+        phase_id: str,
+        task_id: str,
+        ui_status: str,
+        action: str,
+        text: str,
+    ):
+        self.seq = seq
+        self.timestamp = timestamp
+        self.kind = kind
+        self.phase_id = phase_id
+        self.task_id = task_id
+        self.ui_status = ui_status
+        self.action = action
+        self.text = text
+
+    def __repr__(self) -> str:
+        return f"RecoveryEvent(#{self.seq} {self.kind} {self.text[:40]!r})"
+
+
+class EventRing:
+    """定长环形缓冲：满了覆盖最旧的一条，追加 O(1)、无列表切片拷贝"""
+
+    __slots__ = ("capacity", "_items", "_start", "_size")
+
+    def __init__(self, capacity: int):
+        self.capacity = max(1, capacity)
+        self._items: list[Optional[RecoveryEvent]] = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+
+    def append(self, event: RecoveryEvent) -> None:
+        if self._size < self.capacity:
+            self._items[(self._start + self._size) % self.capacity] = event
+            self._size += 1
+        else:
+            self._items[self._start] = event
+            self._start = (self._start + 1) % self.capacity
+
+    def clear(self) -> None:
+        self._items = [None] * self.capacity
+        self._start = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __iter__(self) -> Iterator[RecoveryEvent]:
+        """旧 → 新"""
+        for i in range(self._size):
+            yield self._items[(self._start + i) % self.capacity]
+
+
 @dataclass
 class RecoveryCheckpoint:
     timestamp: str
@@ -34,29 +120,145 @@ class RecoveryCheckpoint:
     template_version: str = "v2"
     completed_snapshot: str = "未知"
     pending_snapshot: str = "未知"
+    # 写入代号：JSON / TXT / manifest / 存储记录共用，用于启动时判断文件是否属于同一次保存
+    generation: int = 0
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "RecoveryCheckpoint":
+        """忽略未知字段（兼容新旧版本写入的记录）"""
+        names = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in names})
 
 
 class RecoveryManager:
     # checkpoint_history.jsonl 最大保留行数
     MAX_HISTORY_LINES = 200
+    # checkpoints.db 最大保留条数
+    MAX_STORE_HISTORY = 1000
 
     def __init__(self, project_name: str, log_dir: str = "logs", max_events: int = 20):
         self.project_name = project_name
         self.max_events = max_events
-        self.events: list[str] = []
+        self._ring = EventRing(max_events)
+        self._seq = 0
+        self._reset_index()
         self.log_dir = Path(log_dir)
         self.log_dir.mkdir(parents=True, exist_ok=True)
         self.checkpoint_file = self.log_dir / "checkpoint_prompt.json"
         self.checkpoint_prompt_file = self.log_dir / "checkpoint_prompt.txt"
         self.checkpoint_history_file = self.log_dir / "checkpoint_history.jsonl"
+        # 提交标记：最后写入，记录本代 generation 及各文件字节数
+        self.checkpoint_manifest_file = self.log_dir / "checkpoint_manifest.json"
+        self._generation = 0
+        # checkpoint_history.jsonl 当前行数（首次轮转检查时统计一次，之后增量计数）
+        self._history_lines: Optional[int] = None
+        self.store: Optional[CheckpointStore] = None
+        try:
+            self.store = CheckpointStore(str(self.log_dir), max_history=self.MAX_STORE_HISTORY)
+            self.store.import_jsonl(self.checkpoint_history_file)
+        except Exception as e:
+            logger.warning("checkpoint 存储初始化失败，仅使用文件: %s", e)
+        self.verify_checkpoint_files()
+
+    # ── 事件记录 & 增量摘要索引 ──────────────────────────────
+
+    def _reset_index(self) -> None:
+        # 各摘要要素最近一次出现：key → (seq, value)
+        self._latest: dict[str, tuple[int, str]] = {}
+        # 最近两条「已完成 / 未完成」事件：(seq, 压缩文本)
+        self._completed: deque[tuple[int, str]] = deque(maxlen=2)
+        self._pending: deque[tuple[int, str]] = deque(maxlen=2)
 
-    def record_event(self, text: str) -> None:
+    @property
+    def events(self) -> list[str]:
+        """环形缓冲内事件原文（旧 → 新）"""
+        return [e.text for e in self._ring]
+
+    @events.setter
+    def events(self, texts: list[str]) -> None:
+        self._ring.clear()
+        self._reset_index()
+        for text in texts:
+            self.record_event(text)
+
+    def recent_events(self, n: Optional[int] = None) -> list[RecoveryEvent]:
+        """最近 n 条结构化事件（旧 → 新）"""
+        events = list(self._ring)
+        return events if n is None else events[-max(1, n):]
+
+    def record_event(
+        self,
+        text: str,
+        *,
+        kind: str = "",
+        phase_id: str = "",
+        task_id: str = "",
+        ui_status: str = "",
+        action: str = "",
+    ) -> None:
+        """
+        记录一条事件。调用方已知的结构化字段直接传入；
+        未传入的字段仅在此处从文本中提取一次，摘要阶段不再解析文本。
+        """
         text = (text or "").strip()
         if not text:
             return
-        self.events.append(text)
-        if len(self.events) > self.max_events:
-            self.events = self.events[-self.max_events:]
+        if not kind:
+            kind = next((k for k, prefix in EVENT_PREFIXES.items() if prefix in text), "other")
+        if not (ui_status and action):
+            fields_ = dict(_FIELD_RE.findall(text))
+            ui_status = ui_status or (fields_.get("status", "") if kind == "ui" else "")
+            action = action or fields_.get("action", "")
+        self._seq += 1
+        event = RecoveryEvent(
+            seq=self._seq,
+            timestamp=time.time(),
+            kind=kind,
+            phase_id=phase_id or _last_match(_PHASE_RE, text),
+            task_id=task_id or _last_match(_TASK_RE, text),
+            ui_status=ui_status,
+            action=action,
+            text=text,
+        )
+        self._ring.append(event)
+        self._index_event(event)
+
+    def _index_event(self, event: RecoveryEvent) -> None:
+        seq, text = event.seq, event.text
+        latest = self._latest
+        if event.phase_id:
+            latest["phase_id"] = (seq, event.phase_id)
+        if event.task_id:
+            latest["task_id"] = (seq, event.task_id)
+        reason = _last_match(_REASON_RE, text)
+        if reason:
+            latest["reason"] = (seq, reason)
+        prefix = EVENT_PREFIXES.get(event.kind)
+        if prefix:
+            body = text.split(prefix, 1)[1].strip() if prefix in text else text
+            latest[event.kind] = (seq, self._compact(body))
+        if "CONTEXT_OVERFLOW" in text:
+            latest["overflow"] = (seq, "")
+        if any(x in text for x in _NETWORK_REASONS):
+            latest["network"] = (seq, "")
+        if "RESPONSE_STALL" in text:
+            latest["stall"] = (seq, "")
+        lower = text.lower()
+        if "completed" in lower or "已完成" in text:
+            self._completed.append((seq, self._compact(text, 120)))
+        if any(k in lower for k in _PENDING_WORDS) or "未完成" in text:
+            self._pending.append((seq, self._compact(text, 120)))
+
+    def _window_start(self, n: int) -> int:
+        """最近 n 条事件窗口的起始 seq（不含）"""
+        return self._seq - min(max(1, n), len(self._ring))
+
+    def _recent(self, key: str, n: int) -> Optional[str]:
+        """key 在最近 n 条事件内最后一次出现的值；最后一次已滑出窗口则窗口内必然没有"""
+        hit = self._latest.get(key)
+        if hit is None or hit[0] <= self._window_start(n):
+            return None
+        return hit[1]
 
     def summarize_last_turns(self, n: int = 8) -> str:
         """
@@ -64,40 +266,29 @@ class RecoveryManager:
         - 第 1 段：任务上下文快照（phase/task/interruption）
         - 第 2 段：最近关键过程（DevPlan/UI/Decision）
         - 第 3 段：下一步恢复建议
+
+        各要素取自增量索引，耗时与事件数量、文本长度无关。
         """
-        recent = self.events[-max(1, n):]
-        if not recent:
+        if not len(self._ring):
             return "最近会话事件较少，暂无可用摘要。"
 
-        phase_id, task_id, reason = self._extract_context_tokens(recent)
+        phase_id = self._recent("phase_id", n)
+        task_id = self._recent("task_id", n)
+        reason = self._recent("reason", n)
         p1 = (
             f"任务上下文快照：当前关注 {phase_id or '未知阶段'} / {task_id or '未知子任务'}，"
             f"本轮中断信号为 {reason or '未明确'}。"
         )
 
-        timeline = self._build_timeline_summary(recent)
+        timeline = self._build_timeline_summary(n)
         p2 = f"最近关键过程：{timeline}"
 
-        suggestion = self._build_recovery_suggestion(recent)
+        suggestion = self._build_recovery_suggestion(n)
         p3 = f"恢复建议：{suggestion}"
 
         # 固定 3 段，便于后续模板稳定解析
         return "\n\n".join([p1, p2, p3])
 
-    @staticmethod
-    def _extract_context_tokens(events: list[str]) -> tuple[Optional[str], Optional[str], Optional[str]]:
-        text = "\n".join(events)
-        phase_match = re.findall(r"\bphase-[0-9]+[A-Za-z]?\b", text)
-        task_match = re.findall(r"\bT[0-9]+(?:\.[0-9]+)+\b", text)
-        reason_match = re.findall(
-            r"\b(CONNECTION_ERROR|PROVIDER_ERROR|API_TIMEOUT|RATE_LIMIT|CONTEXT_OVERFLOW|RESPONSE_STALL|RESPONSE_INTERRUPTED)\b",
-            text,
-        )
-        phase_id = phase_match[-1] if phase_match else None
-        task_id = task_match[-1] if task_match else None
-        reason = reason_match[-1] if reason_match else None
-        return phase_id, task_id, reason
-
     @staticmethod
     def _compact(event: str, max_len: int = 96) -> str:
         evt = " ".join(event.split())
@@ -105,30 +296,29 @@ class RecoveryManager:
             return evt
         return evt[: max_len - 1] + "…"
 
-    def _build_timeline_summary(self, events: list[str]) -> str:
-        devplan = [self._compact(e.split("DevPlan:", 1)[1].strip()) for e in events if "DevPlan:" in e]
-        ui = [self._compact(e.split("UI:", 1)[1].strip()) for e in events if "UI:" in e]
-        decision = [self._compact(e.split("Decision:", 1)[1].strip()) for e in events if "Decision:" in e]
+    def _build_timeline_summary(self, n: int) -> str:
+        devplan = self._recent("devplan", n)
+        ui = self._recent("ui", n)
+        decision = self._recent("decision", n)
 
         chunks: list[str] = []
         if devplan:
-            chunks.append(f"编排侧最近状态为「{devplan[-1]}」")
+            chunks.append(f"编排侧最近状态为「{devplan}」")
         if ui:
-            chunks.append(f"界面侧最近信号为「{ui[-1]}」")
+            chunks.append(f"界面侧最近信号为「{ui}」")
         if decision:
-            chunks.append(f"执行决策落在「{decision[-1]}」")
+            chunks.append(f"执行决策落在「{decision}」")
         if not chunks:
             # 兼容非标准事件
             chunks.append("已记录若干运行事件，但缺少标准 DevPlan/UI/Decision 标记")
         return "；".join(chunks) + "。"
 
-    def _build_recovery_suggestion(self, events: list[str]) -> str:
-        joined = "\n".join(events)
-        if "CONTEXT_OVERFLOW" in joined:
+    def _build_recovery_suggestion(self, n: int) -> str:
+        if self._recent("overflow", n) is not None:
             return "优先使用 checkpoint_prompt 开新对话恢复，并补充 recall_unified(task+error) 结果后继续。"
-        if any(x in joined for x in ("CONNECTION_ERROR", "PROVIDER_ERROR", "API_TIMEOUT", "RATE_LIMIT")):
+        if self._recent("network", n) is not None:
             return "先遵循退避/熔断冷却窗口，冷却后从当前子任务继续；若再次超窗则转人工接管。"
-        if "RESPONSE_STALL" in joined:
+        if self._recent("stall", n) is not None:
             return "先发送 continue 唤醒；连续无效时切到新对话恢复并写入 checkpoint。"
         return "先校验当前子任务状态，再按 checkpoint_prompt 的步骤继续开发并回写任务状态。"
 
@@ -169,35 +359,48 @@ class RecoveryManager:
         )
 
     def save_checkpoint(self, checkpoint: RecoveryCheckpoint) -> None:
+        """
+        事务式保存：存储记录 → JSON → TXT → manifest，四者共用同一 generation。
+
+        每个文件都是 临时文件 + fsync + 原子 rename；manifest 最后写入作为提交标记，
+        任一步骤前崩溃，启动时 verify_checkpoint_files 都能选出最新的完整一代并补齐文件。
+        """
+        self._generation += 1
+        checkpoint.generation = self._generation
+        data = asdict(checkpoint)
+        # 先写存储（单事务原子提交），文件写入失败时恢复仍可从存储取到最新 checkpoint
+        if self.store is not None:
+            self.store.append(data)
         try:
-            self.checkpoint_file.write_text(
-                json.dumps(asdict(checkpoint), ensure_ascii=False, indent=2),
-                encoding="utf-8",
-            )
-            self.checkpoint_prompt_file.write_text(
-                checkpoint.checkpoint_prompt + "\n",
-                encoding="utf-8",
-            )
+            self._write_checkpoint_files(data)
             with self.checkpoint_history_file.open("a", encoding="utf-8") as f:
-                f.write(json.dumps(asdict(checkpoint), ensure_ascii=False) + "\n")
+                f.write(json.dumps(data, ensure_ascii=False) + "\n")
+            if self._history_lines is not None:
+                self._history_lines += 1
             # 轮转：超过 MAX_HISTORY_LINES 时截断为最近一半
             self._rotate_history_if_needed()
         except Exception as e:
             logger.error("保存 checkpoint 失败: %s", e)
 
     def _rotate_history_if_needed(self) -> None:
-        """当 checkpoint_history.jsonl 超过 MAX_HISTORY_LINES 行时，保留最新一半"""
+        """
+        当 checkpoint_history.jsonl 超过 MAX_HISTORY_LINES 行时，保留最新一半。
+
+        行数只在首次检查时统计一次，之后按追加计数；只有真正需要轮转时才读取文件。
+        """
         try:
             if not self.checkpoint_history_file.exists():
+                self._history_lines = None
                 return
-            lines = self.checkpoint_history_file.read_text(encoding="utf-8").splitlines()
-            if len(lines) <= self.MAX_HISTORY_LINES:
+            if self._history_lines is None:
+                with self.checkpoint_history_file.open("rb") as f:
+                    self._history_lines = sum(1 for _ in f)
+            if self._history_lines <= self.MAX_HISTORY_LINES:
                 return
+            lines = self.checkpoint_history_file.read_text(encoding="utf-8").splitlines()
             keep = lines[-(self.MAX_HISTORY_LINES // 2):]
-            self.checkpoint_history_file.write_text(
-                "\n".join(keep) + "\n",
-                encoding="utf-8",
-            )
+            atomic_write_text(self.checkpoint_history_file, "\n".join(keep) + "\n")
+            self._history_lines = len(keep)
             logger.info(
                 "checkpoint_history.jsonl 轮转: %d → %d 行",
                 len(lines), len(keep),
@@ -205,21 +408,99 @@ class RecoveryManager:
         except Exception as e:
             logger.error("checkpoint_history.jsonl 轮转失败: %s", e)
 
+    def _write_checkpoint_files(self, data: dict[str, Any]) -> None:
+        """按 generation 原子写 JSON / TXT，最后写 manifest 提交"""
+        json_text = json.dumps(data, ensure_ascii=False, indent=2)
+        txt_text = str(data.get("checkpoint_prompt", "")) + "\n"
+        atomic_write_text(self.checkpoint_file, json_text)
+        atomic_write_text(self.checkpoint_prompt_file, txt_text)
+        manifest = {
+            "generation": int(data.get("generation", 0) or 0),
+            "timestamp": data.get("timestamp", ""),
+            "json_bytes": len(json_text.encode("utf-8")),
+            "txt_bytes": len(txt_text.encode("utf-8")),
+        }
+        atomic_write_text(self.checkpoint_manifest_file, json.dumps(manifest, ensure_ascii=False))
+
+    @staticmethod
+    def _read_json_file(path: Path) -> Optional[dict[str, Any]]:
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            return None
+        return data if isinstance(data, dict) else None
+
+    def verify_checkpoint_files(self) -> int:
+        """
+        启动校验：选出最新的完整一代 checkpoint，文件不一致时从该代补写。
+
+        只读 manifest 与 checkpoint_prompt.json（均很小）、stat 一次 TXT，
+        再取存储最新一条；不读取历史。旧版文件（无 generation）保持原样。
+
+        Returns:
+            当前 generation（无 checkpoint 时为 0）
+        """
+        manifest = self._read_json_file(self.checkpoint_manifest_file) or {}
+        file_data = self._read_json_file(self.checkpoint_file)
+        store_data = self.store.latest() if self.store is not None else None
+
+        def gen_of(d: Optional[dict[str, Any]]) -> int:
+            try:
+                return int((d or {}).get("generation", 0) or 0)
+            except (TypeError, ValueError):
+                return 0
+
+        best = max((d for d in (store_data, file_data) if d), key=gen_of, default=None)
+        generation = gen_of(best)
+        self._generation = max(generation, gen_of(manifest))
+        if best is None or generation == 0:
+            return self._generation
+
+        try:
+            txt_bytes = self.checkpoint_prompt_file.stat().st_size
+        except OSError:
+            txt_bytes = -1
+        consistent = (
+            gen_of(manifest) == generation
+            and gen_of(file_data) == generation
+            and manifest.get("txt_bytes") == txt_bytes
+        )
+        if not consistent:
+            logger.warning(
+                "checkpoint 文件不一致（manifest=%d json=%d 最新=%d），按最新完整一代补写",
+                gen_of(manifest), gen_of(file_data), generation,
+            )
+            try:
+                self._write_checkpoint_files(best)
+            except OSError as e:
+                logger.error("补写 checkpoint 文件失败: %s", e)
+        return self._generation
+
     def load_checkpoint(self) -> Optional[RecoveryCheckpoint]:
+        """最新 checkpoint（优先存储，回退 checkpoint_prompt.json）"""
+        latest = self.store.latest() if self.store is not None else None
+        if latest:
+            try:
+                return RecoveryCheckpoint.from_dict(latest)
+            except TypeError as e:
+                logger.warning("checkpoint 存储记录不完整，回退 JSON: %s", e)
         if not self.checkpoint_file.exists():
             return None
         try:
             data = json.loads(self.checkpoint_file.read_text(encoding="utf-8"))
-            return RecoveryCheckpoint(**data)
+            return RecoveryCheckpoint.from_dict(data)
         except Exception as e:
             logger.error("读取 checkpoint 失败: %s", e)
             return None
 
     def load_latest_checkpoint_prompt(self) -> str:
         """
-        加载最新 checkpoint_prompt（优先 TXT，回退 JSON）。
+        加载最新 checkpoint_prompt（优先存储，其次 TXT，回退 JSON）。
         用于恢复阶段“先拿到可直接注入的 prompt”。
         """
+        latest = self.store.latest() if self.store is not None else None
+        if latest and str(latest.get("checkpoint_prompt", "")).strip():
+            return str(latest["checkpoint_prompt"]).strip()
         try:
             if self.checkpoint_prompt_file.exists():
                 text = self.checkpoint_prompt_file.read_text(encoding="utf-8").strip()
@@ -233,6 +514,28 @@ class RecoveryManager:
             return cp.checkpoint_prompt.strip()
         return ""
 
+    def query_checkpoints(
+        self,
+        phase_id: Optional[str] = None,
+        task_id: Optional[str] = None,
+        interrupt_reason: Optional[str] = None,
+        limit: int = 20,
+    ) -> list[RecoveryCheckpoint]:
+        """按阶段 / 子任务 / 中断原因查询历史 checkpoint（新 → 旧）"""
+        if self.store is None:
+            return []
+        result = []
+        for data in self.store.query(phase_id, task_id, interrupt_reason, limit):
+            try:
+                result.append(RecoveryCheckpoint.from_dict(data))
+            except TypeError:
+                continue
+        return result
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
+
     def build_final_recovery_prompt(
         self,
         checkpoint: RecoveryCheckpoint,
@@ -323,13 +626,9 @@ class RecoveryManager:
         """
         从最近事件中提取「已完成/未完成」快照（弱结构，尽量可读）。
         """
-        recent = self.events[-max(1, min(12, len(self.events))):]
-        completed = [self._compact(e, 120) for e in recent if "completed" in e.lower() or "已完成" in e]
-        pending = [
-            self._compact(e, 120)
-            for e in recent
-            if any(k in e.lower() for k in ("pending", "send_task", "wait", "in_progress")) or "未完成" in e
-        ]
-        completed_text = "；".join(completed[-2:]) if completed else "暂无明确完成记录"
-        pending_text = "；".join(pending[-2:]) if pending else "待确认（请以 DevPlan 查询结果为准）"
+        start = self._window_start(12)
+        completed = [text for seq, text in self._completed if seq > start]
+        pending = [text for seq, text in self._pending if seq > start]
+        completed_text = "；".join(completed) if completed else "暂无明确完成记录"
+        pending_text = "；".join(pending) if pending else "待确认（请以 DevPlan 查询结果为准）"
         return completed_text, pending_text
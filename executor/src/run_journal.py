@@ -0,0 +1,110 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 运行日志快照（热重启）
+
+进程重启后，StateTracker 的防抖计数 / 熔断状态 / 退避截止时间、主循环的去重指纹、
+视觉分析器的连续无变化计数都会丢失：重启恰好落在熔断 open 窗口内时会立即再次请求
+Provider，同一中断点的恢复记忆也会被重复写入。
+
+RunJournal 把这些状态定期快照到 log_dir/run_journal.json（原子写入，几 KB），
+ExecutorLoop 启动时加载并回填：
+  - 内容未变化不写盘；变化后最多每 interval 秒写一次
+  - 熔断 / 退避相关字段变化时立即写盘（这正是重启最需要保住的状态）
+  - 超过 max_age 的快照视为过期，直接忽略
+
+时间戳一律为 epoch 秒（StateTracker 的 clock.time()），跨进程可比较。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from pathlib import Path
+from typing import Any, Optional
+
+from .checkpoint_store import atomic_write_text
+from .clock import SYSTEM_CLOCK
+
+logger = logging.getLogger("executor.journal")
+
+JOURNAL_VERSION = 1
+
+# 变化时需要立即落盘的字段（section, key）
+URGENT_FIELDS = (
+    ("tracker", "circuit_state"),
+    ("tracker", "circuit_open_until"),
+    ("tracker", "network_backoff_until"),
+)
+
+
+class RunJournal:
+    """
+    使用方式：
+        journal = RunJournal("logs", interval=30)
+        state = journal.load()            # 启动时：{"tracker": {...}, "loop": {...}, ...} 或 None
+        journal.maybe_save(snapshot)      # 每个 tick 后
+        journal.save(snapshot)            # 退出时强制写盘
+    """
+
+    def __init__(
+        self,
+        log_dir: str = "logs",
+        interval: float = 30.0,
+        max_age: float = 6 * 3600,
+        clock: Any = None,
+        filename: str = "run_journal.json",
+    ):
+        self.path = Path(log_dir) / filename
+        self.interval = max(0.0, interval)
+        self.max_age = max_age
+        self.clock = clock or SYSTEM_CLOCK
+        self._last_saved: Optional[dict[str, Any]] = None
+        self._last_saved_at = 0.0
+        self.stats = {"saves": 0, "skipped": 0}
+
+    def load(self) -> Optional[dict[str, Any]]:
+        """读取快照；不存在、损坏、版本不符或过期返回 None"""
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+        except FileNotFoundError:
+            return None
+        except (OSError, ValueError) as e:
+            logger.warning("运行日志快照读取失败，忽略: %s", e)
+            return None
+        if not isinstance(data, dict) or data.get("version") != JOURNAL_VERSION:
+            return None
+        age = self.clock.time() - float(data.get("saved_at", 0) or 0)
+        if age > self.max_age:
+            logger.info("运行日志快照已过期（%.0f 分钟前），忽略", age / 60)
+            return None
+        state = data.get("state")
+        if not isinstance(state, dict):
+            return None
+        self._last_saved = state
+        self._last_saved_at = self.clock.time()
+        return state
+
+    def maybe_save(self, state: dict[str, Any]) -> bool:
+        """状态有变化时按节流策略写盘；返回是否写入"""
+        if state == self._last_saved:
+            return False
+        urgent = self._last_saved is None or any(
+            (state.get(section) or {}).get(key) != (self._last_saved.get(section) or {}).get(key)
+            for section, key in URGENT_FIELDS
+        )
+        if not urgent and self.clock.time() - self._last_saved_at < self.interval:
+            self.stats["skipped"] += 1
+            return False
+        return self.save(state)
+
+    def save(self, state: dict[str, Any]) -> bool:
+        payload = {"version": JOURNAL_VERSION, "saved_at": self.clock.time(), "state": state}
+        try:
+            atomic_write_text(self.path, json.dumps(payload, ensure_ascii=False, separators=(",", ":")))
+        except (OSError, TypeError, ValueError) as e:
+            logger.warning("运行日志快照写入失败: %s", e)
+            return False
+        self._last_saved = state
+        self._last_saved_at = self.clock.time()
+        self.stats["saves"] += 1
+        return True
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 自适应轮询调度
+
+替代固定 poll_interval：根据上一轮的决策与各通道信号决定下一次 tick 前等待多久。
+
+规则（按优先级）：
+  1. all_done 保活        → 近乎暂停（poll_idle_pause）
+  2. 熔断器 open          → 等到熔断窗口结束（不超过 poll_idle_pause）
+  3. 刚发送过指令         → 最小间隔，尽快确认发送结果
+  4. 网络错误恢复中        → 最小间隔（退避冷却中则等到冷却结束），尽快捕捉恢复 / 升级
+  5. 日志显示 AI 持续活跃  → 从基准间隔起按 backoff_factor 指数退避，至多 poll_interval_max
+  6. 其他                 → 基准间隔 poll_interval
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+# 视为「刚发送过指令」的决策动作
+SEND_ACTIONS = frozenset({"send_task", "send_continue", "start_phase", "new_conversation"})
+
+
+@dataclass
+class PollDecision:
+    """一次调度结果"""
+    interval: int   # 下次 tick 前等待秒数
+    reason: str     # 选择该间隔的原因（展示到 Web UI）
+
+
+class AdaptivePollScheduler:
+    """
+    自适应轮询间隔计算器（不做 I/O、不读时钟，便于单测与回放）。
+
+    有状态：next_interval 会推进 / 重置 AI 活跃退避值 _active_interval
+    （规则 5 连续命中时逐次放大，命中其他规则时回到基准间隔），
+    因此结果取决于之前的调用序列；回放时需按相同顺序逐 tick 调用。
+
+    使用方式：
+        scheduler = AdaptivePollScheduler(base_interval=10, min_interval=3, max_interval=60)
+        decision = scheduler.next_interval(last_action="wait", ai_active=True)
+        countdown_wait(decision.interval)
+    """
+
+    def __init__(
+        self,
+        base_interval: int = 10,
+        min_interval: int = 3,
+        max_interval: int = 60,
+        backoff_factor: float = 1.5,
+        idle_pause: int = 300,
+    ):
+        # AI 活跃退避的当前值（浮点累积，输出时取整；configure 将其收敛到上下限内）
+        self._active_interval: float = float(base_interval)
+        self.configure(base_interval, min_interval, max_interval, backoff_factor, idle_pause)
+
+    def configure(
+        self,
+        base_interval: int,
+        min_interval: int,
+        max_interval: int,
+        backoff_factor: float,
+        idle_pause: int,
+    ) -> None:
+        """设置（或运行中热更新）各间隔参数；已累积的退避值收敛到新的上下限内"""
+        self.min_interval = max(1, int(min_interval))
+        self.max_interval = max(self.min_interval, int(max_interval))
+        self.base_interval = min(self.max_interval, max(self.min_interval, int(base_interval)))
+        self.backoff_factor = max(1.0, float(backoff_factor))
+        self.idle_pause = max(self.max_interval, int(idle_pause))
+        self._active_interval = min(float(self.max_interval), max(float(self.base_interval), self._active_interval))
+
+    def reset(self) -> None:
+        """清除退避累积，回到基准间隔"""
+        self._active_interval = float(self.base_interval)
+
+    def next_interval(
+        self,
+        last_action: str = "",
+        ai_active: bool = False,
+        recovering: bool = False,
+        backoff_remaining: float = 0.0,
+        circuit_open_remaining: float = 0.0,
+        all_done_keepalive: bool = False,
+    ) -> PollDecision:
+        """
+        计算下次轮询间隔。
+
+        Args:
+            last_action: 上一轮决策动作（Action.value）
+            ai_active: 日志通道判定 AI 正在活跃工作
+            recovering: 处于网络错误恢复中（网络类 UI 状态 / 恢复窗口进行中）
+            backoff_remaining: 网络指数退避剩余秒数（冷却期内轮询不会触发发送）
+            circuit_open_remaining: 熔断器 open 剩余秒数（0 表示未熔断）
+            all_done_keepalive: 收到 all_done 且开启了调试保活
+        """
+        if all_done_keepalive:
+            self.reset()
+            return PollDecision(self.idle_pause, "all_done 保活，暂停轮询")
+
+        if circuit_open_remaining > 0:
+            self.reset()
+            wait = min(self.idle_pause, max(self.min_interval, int(circuit_open_remaining + 0.999)))
+            return PollDecision(wait, f"熔断器打开，等待 {wait}s 后半开探测")
+
+        if last_action in SEND_ACTIONS:
+            self.reset()
+            return PollDecision(self.min_interval, f"刚执行 {last_action}，快速确认")
+
+        if recovering:
+            self.reset()
+            if backoff_remaining > self.min_interval:
+                wait = min(self.max_interval, int(backoff_remaining + 0.999))
+                return PollDecision(wait, f"网络退避冷却中，{wait}s 后重试")
+            return PollDecision(self.min_interval, "网络错误恢复中，快速轮询")
+
+        if ai_active:
+            interval = int(round(self._active_interval))
+            self._active_interval = min(float(self.max_interval), self._active_interval * self.backoff_factor)
+            return PollDecision(interval, "AI 持续活跃，指数退避")
+
+        self.reset()
+        return PollDecision(self.base_interval, "常态轮询")
@@ -0,0 +1,161 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 发送确认引擎（输入框 ROI 差分）
+
+发送后判断消息是否真正发出，原先只能依赖 _post_send_vision_check：
+固定等待 1 秒 + 全屏截图 + 四象限分割 + 一次视觉模型调用。
+
+本模块只截取聊天输入框附近的一小块区域（ROI），比较三张快照：
+
+    empty   粘贴前（输入框原始内容）
+    filled  粘贴后、按 Enter 前（文本已在输入框）
+    after   按 Enter 后轮询
+
+    d_fill = dist(filled, empty)   粘贴带来的变化量（参照尺度）
+    ratio  = dist(after, empty) / d_fill
+
+判定：
+    SENT       ratio ≤ sent_ratio          文本已离开输入框
+    QUEUED     ratio ≥ queued_ratio        文本仍留在输入框（Enter 未被接收，AI 生成中常见）
+    FAILED     补按 Enter 后仍为 QUEUED     （由调用方在二次确认时标记）
+    AMBIGUOUS  粘贴前后 ROI 无差异 / ratio 落在中间区间 → 交给视觉模型确认
+
+整个过程只涉及几十毫秒的 ROI 截图与差分，不调用模型。
+"""
+
+from __future__ import annotations
+
+import logging
+from dataclasses import dataclass
+from enum import Enum
+from typing import Any, Callable, Optional
+
+from .clock import SYSTEM_CLOCK
+
+logger = logging.getLogger("executor.send_confirm")
+
+
+class SendVerdict(str, Enum):
+    """发送确认结论"""
+    SENT = "sent"
+    QUEUED = "queued"
+    FAILED = "failed"
+    AMBIGUOUS = "ambiguous"
+
+
+@dataclass
+class ConfirmResult:
+    """一次确认的结论与依据"""
+    verdict: SendVerdict
+    ratio: float = 0.0          # dist(after, empty) / dist(filled, empty)
+    samples: int = 0            # 按 Enter 后的 ROI 采样次数
+    elapsed: float = 0.0        # 确认耗时（秒）
+
+    @property
+    def detail(self) -> str:
+        return (
+            f"[roi] verdict={self.verdict.value} ratio={self.ratio:.2f} "
+            f"samples={self.samples} elapsed={self.elapsed * 1000:.0f}ms"
+        )
+
+
+def roi_distance(a: Any, b: Any) -> float:
+    """
+    两张 ROI 快照的平均逐字节差（0~255）；尺寸不同视为完全不同。
+
+    快照为 bytes（PIL Image.tobytes()）；numpy 可用时向量化计算。
+    """
+    if a is None or b is None:
+        return float("inf")
+    if len(a) != len(b):
+        return 255.0
+    if not a:
+        return 0.0
+    try:
+        import numpy as np
+        return float(np.mean(np.abs(
+            np.frombuffer(a, dtype=np.uint8).astype(np.int16)
+            - np.frombuffer(b, dtype=np.uint8).astype(np.int16)
+        )))
+    except ImportError:
+        return sum(abs(x - y) for x, y in zip(a, b)) / len(a)
+
+
+class SendConfirmEngine:
+    """
+    输入框 ROI 差分确认。
+
+    使用方式：
+        confirm = SendConfirmEngine(grab=lambda: pyautogui.screenshot(region=roi).tobytes())
+        empty = confirm.capture()
+        ... 粘贴 ...
+        filled = confirm.capture()
+        ... 按 Enter ...
+        result = confirm.confirm(empty, filled)
+    """
+
+    def __init__(
+        self,
+        grab: Callable[[], Any],
+        clock: Any = None,
+        timeout: float = 0.6,
+        poll_interval: float = 0.05,
+        noise: float = 1.0,
+        sent_ratio: float = 0.35,
+        queued_ratio: float = 0.8,
+    ):
+        self.grab = grab
+        self.clock = clock or SYSTEM_CLOCK
+        self.timeout = max(0.0, float(timeout))
+        self.poll_interval = max(0.001, float(poll_interval))
+        self.noise = max(0.0, float(noise))
+        self.sent_ratio = float(sent_ratio)
+        self.queued_ratio = max(self.sent_ratio, float(queued_ratio))
+        # 累计结论统计（供诊断 / Web UI）
+        self.stats: dict[str, int] = {v.value: 0 for v in SendVerdict}
+
+    def capture(self) -> Optional[bytes]:
+        """截取一次 ROI；失败返回 None（调用方跳过 ROI 确认）"""
+        try:
+            return self.grab()
+        except Exception as e:
+            logger.debug("ROI 截图失败: %s", e)
+            return None
+
+    def classify(self, empty: Any, filled: Any, after: Any) -> tuple[SendVerdict, float]:
+        """单次三图判定（不含轮询）"""
+        d_fill = roi_distance(filled, empty)
+        if d_fill == float("inf") or after is None or d_fill <= self.noise:
+            # 粘贴前后输入框无可见差异：ROI 位置不对或渲染未完成，无法判断
+            return SendVerdict.AMBIGUOUS, 0.0
+        ratio = roi_distance(after, empty) / d_fill
+        if ratio <= self.sent_ratio:
+            return SendVerdict.SENT, ratio
+        if ratio >= self.queued_ratio or roi_distance(after, filled) <= self.noise:
+            return SendVerdict.QUEUED, ratio
+        return SendVerdict.AMBIGUOUS, ratio
+
+    def confirm(self, empty: Any, filled: Any) -> ConfirmResult:
+        """
+        按 Enter 后轮询 ROI，直到判定为 SENT 或超时。
+
+        超时时返回最后一次采样的结论（QUEUED / AMBIGUOUS）。
+        """
+        start = self.clock.time()
+        verdict, ratio, samples = SendVerdict.AMBIGUOUS, 0.0, 0
+        # 粘贴本身不可见时不必轮询，直接交给视觉通道
+        if empty is None or filled is None or roi_distance(filled, empty) <= self.noise:
+            return ConfirmResult(verdict)
+        while True:
+            after = self.capture()
+            samples += 1
+            verdict, ratio = self.classify(empty, filled, after)
+            elapsed = self.clock.time() - start
+            if verdict == SendVerdict.SENT or after is None or elapsed >= self.timeout - 1e-9:
+                break
+            self.clock.sleep(min(self.poll_interval, self.timeout - elapsed))
+        return ConfirmResult(verdict, ratio, samples, self.clock.time() - start)
+
+    def record(self, verdict: SendVerdict) -> None:
+        """记录一次最终结论（QUEUED 补按 Enter 后的复查只记最终结果）"""
+        self.stats[verdict.value] = self.stats.get(verdict.value, 0) + 1
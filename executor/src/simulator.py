@@ -0,0 +1,364 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 决策引擎离线回放 / 仿真
+
+在虚拟时钟下把 tick 轨迹（trace.py 记录的真实会话，或合成会话）
+送入 DualChannelEngine，不截图、不调视觉模型、不 sleep，
+单进程每秒可回放数十万 tick，用于比较不同引擎参数 / 策略的效果：
+
+  - 吞吐：回放 tick/s
+  - 恢复时长：从进入故障状态到 AI 重新活跃的虚拟秒数（p50 / p95 / max）
+  - 无效发送：AI 正在工作时的发送，以及同一故障期内未起作用的多余发送
+  - 与在线决策的一致率（轨迹中带有实际决策时）
+
+--policy 指定策略表 JSON（见 policy.py），可在同一批轨迹上对比不同决策矩阵。
+
+回放为开环：每个 tick 的输入取自轨迹，与回放出的决策无关。
+
+命令行：
+    python -m src.simulator logs/traces/*.jsonl.gz
+    python -m src.simulator --synthetic 1000000 --sessions 10 --set max_continue_retries=3
+    python -m src.simulator --synthetic 100000 --policy my_policy.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import logging
+import random
+import sys
+import time
+from dataclasses import dataclass, field
+from typing import Any, Iterable, Optional
+
+from .clock import VirtualClock
+from .config import UIStatus
+from .engine import DualChannelEngine
+from .policy import CompiledPolicy, load_policy_file
+from .scheduler import SEND_ACTIONS
+from .trace import TickRecord, load_trace
+
+# 视为「故障中」的 UI 状态（恢复时长的起点）
+FAULT_STATUSES = frozenset({
+    UIStatus.CONNECTION_ERROR.value,
+    UIStatus.PROVIDER_ERROR.value,
+    UIStatus.CONTEXT_OVERFLOW.value,
+    UIStatus.RATE_LIMIT.value,
+    UIStatus.API_TIMEOUT.value,
+    UIStatus.RESPONSE_INTERRUPTED.value,
+    UIStatus.RESPONSE_STALL.value,
+})
+
+
+def _ai_working(tick: TickRecord) -> bool:
+    """该 tick 的输入是否表明 AI 正在工作"""
+    if tick.ui_status == UIStatus.AI_GENERATING.value:
+        return True
+    return tick.log is not None and len(tick.log) > 2 and int(tick.log[2]) > 0
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    if not sorted_values:
+        return 0.0
+    idx = min(len(sorted_values) - 1, max(0, int(round(q * (len(sorted_values) - 1)))))
+    return sorted_values[idx]
+
+
+# ── 报告 ─────────────────────────────────────────────────────
+
+@dataclass
+class SimulationReport:
+    """一次（多会话）回放的汇总结果"""
+    sessions: int = 0
+    ticks: int = 0
+    wall_seconds: float = 0.0
+    virtual_seconds: float = 0.0
+    decisions: dict[str, int] = field(default_factory=dict)
+    sends: int = 0
+    wasted_sends: int = 0
+    recoveries: list[float] = field(default_factory=list)   # 每次故障的恢复虚拟秒数
+    unrecovered: int = 0
+    compared: int = 0          # 带在线决策的 tick 数
+    agreed: int = 0            # 回放决策与在线决策一致的 tick 数
+
+    @property
+    def ticks_per_second(self) -> float:
+        return self.ticks / self.wall_seconds if self.wall_seconds > 0 else 0.0
+
+    def merge(self, other: "SimulationReport") -> None:
+        self.sessions += other.sessions
+        self.ticks += other.ticks
+        self.wall_seconds += other.wall_seconds
+        self.virtual_seconds += other.virtual_seconds
+        for k, v in other.decisions.items():
+            self.decisions[k] = self.decisions.get(k, 0) + v
+        self.sends += other.sends
+        self.wasted_sends += other.wasted_sends
+        self.recoveries.extend(other.recoveries)
+        self.unrecovered += other.unrecovered
+        self.compared += other.compared
+        self.agreed += other.agreed
+
+    def to_dict(self) -> dict[str, Any]:
+        rec = sorted(self.recoveries)
+        return {
+            "sessions": self.sessions,
+            "ticks": self.ticks,
+            "ticks_per_second": round(self.ticks_per_second, 1),
+            "virtual_hours": round(self.virtual_seconds / 3600.0, 2),
+            "decisions": dict(sorted(self.decisions.items())),
+            "sends": self.sends,
+            "wasted_sends": self.wasted_sends,
+            "wasted_ratio": round(self.wasted_sends / self.sends, 4) if self.sends else 0.0,
+            "recoveries": len(rec),
+            "unrecovered": self.unrecovered,
+            "recovery_p50_s": round(_percentile(rec, 0.5), 1),
+            "recovery_p95_s": round(_percentile(rec, 0.95), 1),
+            "recovery_max_s": round(rec[-1], 1) if rec else 0.0,
+            "agreement": round(self.agreed / self.compared, 4) if self.compared else None,
+        }
+
+    def format(self) -> str:
+        d = self.to_dict()
+        lines = [
+            f"会话 {d['sessions']} | tick {d['ticks']} | 吞吐 {d['ticks_per_second']:.0f} tick/s | "
+            f"虚拟时长 {d['virtual_hours']}h",
+            "决策分布: " + ", ".join(f"{k}={v}" for k, v in d["decisions"].items()),
+            f"发送 {d['sends']} 次，无效 {d['wasted_sends']} 次（{d['wasted_ratio']:.1%}）",
+            f"故障恢复 {d['recoveries']} 次（未恢复 {d['unrecovered']}）: "
+            f"p50={d['recovery_p50_s']}s p95={d['recovery_p95_s']}s max={d['recovery_max_s']}s",
+        ]
+        if d["agreement"] is not None:
+            lines.append(f"与在线决策一致率: {d['agreement']:.1%}")
+        return "\n".join(lines)
+
+
+# ── 回放 ─────────────────────────────────────────────────────
+
+class Simulator:
+    """
+    在虚拟时钟下回放 tick 轨迹。
+
+    使用方式：
+        sim = Simulator(engine_kwargs={"max_continue_retries": 3}, seed=42)
+        report = sim.run_session(ticks)
+    """
+
+    def __init__(
+        self,
+        engine_kwargs: Optional[dict] = None,
+        seed: int = 0,
+        policy: CompiledPolicy | dict | None = None,
+    ):
+        self.engine_kwargs = dict(engine_kwargs or {})
+        self.seed = seed
+        # dict 只编译一次，各会话共享（编译结果只读）
+        self.policy = CompiledPolicy(policy, source="simulator") if isinstance(policy, dict) else policy
+
+    def make_engine(self, clock: VirtualClock, session_index: int = 0) -> DualChannelEngine:
+        return DualChannelEngine(
+            clock=clock,
+            rng=random.Random(self.seed + session_index),
+            policy=self.policy,
+            **self.engine_kwargs,
+        )
+
+    def run_session(self, ticks: Iterable[TickRecord], session_index: int = 0) -> SimulationReport:
+        """回放单个会话（每个会话使用全新的引擎与虚拟时钟）"""
+        report = SimulationReport(sessions=1)
+        clock: Optional[VirtualClock] = None
+        engine: Optional[DualChannelEngine] = None
+        prev_status = ""
+        first_t = last_t = 0.0
+        fault_start: Optional[float] = None
+        fault_sends = 0
+        decisions = report.decisions
+
+        engine_logger = logging.getLogger("executor.engine")
+        was_disabled = engine_logger.disabled
+        engine_logger.disabled = True
+        started = time.perf_counter()
+        try:
+            for tick in ticks:
+                if engine is None:
+                    clock = VirtualClock(start=tick.t)
+                    engine = self.make_engine(clock, session_index)
+                    first_t = tick.t
+                clock.set(tick.t)
+                last_t = tick.t
+
+                # 与主循环一致：上轮空闲 + 本轮屏幕变化 → AI 恢复，清零 continue 重试
+                if tick.screen_changing and prev_status in (UIStatus.IDLE.value, UIStatus.UNKNOWN.value):
+                    engine.reset_continue_retries()
+                prev_status = tick.ui_status
+
+                try:
+                    status = UIStatus(tick.ui_status)
+                except ValueError:
+                    status = UIStatus.UNKNOWN
+                decision = engine.decide(tick.devplan, status, tick.screen_changing, tick.br_no_change_seconds)
+                action = decision.action.value
+                decisions[action] = decisions.get(action, 0) + 1
+                report.ticks += 1
+
+                if tick.action:
+                    report.compared += 1
+                    report.agreed += tick.action == action
+
+                working = _ai_working(tick) or tick.screen_changing
+                is_send = action in SEND_ACTIONS
+                if is_send:
+                    report.sends += 1
+
+                if tick.ui_status in FAULT_STATUSES:
+                    if fault_start is None:
+                        fault_start = tick.t
+                        fault_sends = 0
+                    if is_send:
+                        fault_sends += 1
+                elif fault_start is not None and working:
+                    report.recoveries.append(tick.t - fault_start)
+                    # 同一故障期内，只有最后一次发送被视为起作用
+                    report.wasted_sends += max(0, fault_sends - 1)
+                    fault_start = None
+                elif is_send and working:
+                    report.wasted_sends += 1
+        finally:
+            engine_logger.disabled = was_disabled
+
+        if fault_start is not None:
+            report.unrecovered += 1
+            report.wasted_sends += fault_sends
+        report.wall_seconds = time.perf_counter() - started
+        report.virtual_seconds = max(0.0, last_t - first_t)
+        return report
+
+    def run(self, sessions: Iterable[Iterable[TickRecord]]) -> SimulationReport:
+        """依次回放多个会话并汇总"""
+        total = SimulationReport()
+        for i, ticks in enumerate(sessions):
+            total.merge(self.run_session(ticks, session_index=i))
+        return total
+
+
+# ── 合成会话 ─────────────────────────────────────────────────
+
+# 合成故障的相对频率
+_SYNTHETIC_FAULTS = (
+    (UIStatus.CONNECTION_ERROR, 4),
+    (UIStatus.PROVIDER_ERROR, 2),
+    (UIStatus.API_TIMEOUT, 2),
+    (UIStatus.RESPONSE_INTERRUPTED, 2),
+    (UIStatus.RESPONSE_STALL, 2),
+    (UIStatus.RATE_LIMIT, 1),
+    (UIStatus.CONTEXT_OVERFLOW, 1),
+)
+
+
+def synthetic_session(
+    n_ticks: int,
+    seed: int = 0,
+    interval: float = 15.0,
+    fault_rate: float = 0.02,
+    start: float = 1_700_000_000.0,
+) -> Iterable[TickRecord]:
+    """
+    生成一个合成会话（马尔可夫链）：生成中 → 空闲 → 发送新任务 / 唤醒 → 生成中，
+    期间按 fault_rate 随机进入故障并持续若干 tick。
+
+    以生成器形式产出，百万级 tick 也不占用额外内存。
+    """
+    rng = random.Random(seed)
+    faults = [s.value for s, w in _SYNTHETIC_FAULTS for _ in range(w)]
+    t = start
+    task_no = 1
+    mode = "generating"
+    remaining = rng.randint(5, 40)
+    fault_status = ""
+    idle_since = t
+
+    for _ in range(n_ticks):
+        t += interval * rng.uniform(0.8, 1.2)
+        if mode == "generating" and rng.random() < fault_rate:
+            mode, fault_status, remaining = "fault", rng.choice(faults), rng.randint(1, 8)
+        sub = {"taskId": f"T{task_no}", "title": f"synthetic task {task_no}"}
+        if mode == "generating":
+            yield TickRecord(t=t, devplan={"action": "wait", "subTask": sub},
+                             ui_status=UIStatus.AI_GENERATING.value, screen_changing=True,
+                             log=(1, 0.5, 1, 0))
+            remaining -= 1
+            if remaining <= 0:
+                mode, idle_since = "idle", t
+        elif mode == "fault":
+            yield TickRecord(t=t, devplan={"action": "wait", "subTask": sub},
+                             ui_status=fault_status, br_no_change_seconds=0.0,
+                             log=(0, 20.0, 0, 1))
+            remaining -= 1
+            if remaining <= 0:
+                mode, remaining = "generating", rng.randint(5, 40)
+        else:
+            # 空闲时 DevPlan 多数给出下一个任务，少数仍认为当前任务进行中（AI 中途停下）
+            devplan_action = "send_task" if rng.random() < 0.7 else "wait"
+            if devplan_action == "send_task":
+                task_no += 1
+            yield TickRecord(t=t, devplan={"action": devplan_action, "subTask": sub},
+                             ui_status=UIStatus.IDLE.value, br_no_change_seconds=t - idle_since,
+                             log=(0, t - idle_since, 0, 0))
+            if rng.random() < 0.5:
+                mode, remaining = "generating", rng.randint(5, 40)
+
+
+# ── 命令行 ───────────────────────────────────────────────────
+
+def _parse_overrides(items: list[str]) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for item in items:
+        key, _, raw = item.partition("=")
+        try:
+            out[key.strip()] = json.loads(raw)
+        except json.JSONDecodeError:
+            out[key.strip()] = raw
+    return out
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DevPlan Executor 决策引擎离线回放")
+    parser.add_argument("traces", nargs="*", help="轨迹文件（.jsonl / .jsonl.gz）")
+    parser.add_argument("--synthetic", type=int, default=0, help="每个合成会话的 tick 数")
+    parser.add_argument("--sessions", type=int, default=1, help="合成会话数量")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子")
+    parser.add_argument("--set", dest="overrides", action="append", default=[],
+                        metavar="KEY=VALUE", help="覆盖引擎参数，可重复")
+    parser.add_argument("--policy", help="决策策略表 JSON（默认内置矩阵）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出报告")
+    args = parser.parse_args(argv)
+
+    if not args.traces and args.synthetic <= 0:
+        parser.error("需要指定轨迹文件或 --synthetic")
+    policy = load_policy_file(args.policy) if args.policy else None
+
+    overrides = _parse_overrides(args.overrides)
+    total = SimulationReport()
+    for i, path in enumerate(args.traces):
+        header, ticks = load_trace(path)
+        kwargs = dict(header.get("engine") or {})
+        kwargs.update(overrides)
+        total.merge(Simulator(kwargs, seed=args.seed, policy=policy).run_session(ticks, session_index=i))
+    if args.synthetic > 0:
+        sim = Simulator(overrides, seed=args.seed, policy=policy)
+        total.merge(sim.run(
+            synthetic_session(args.synthetic, seed=args.seed + i) for i in range(args.sessions)
+        ))
+
+    policy_name = policy.name if policy is not None else "builtin"
+    if args.json:
+        print(json.dumps(dict(total.to_dict(), policy=policy_name), ensure_ascii=False, indent=2))
+    else:
+        print(f"策略: {policy_name}")
+        print(total.format())
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 冷启动耗时基准
+
+每次测量都在全新的子进程中进行（模块缓存为空，等同 supervisor 重启），分两段计时：
+  - import：导入 src.main
+  - init：构造 ExecutorLoop（及该场景启用的可选子系统）
+
+场景：
+  - fast：--no-ui --disable-vision（监督模式常用配置，不应加载 Flask / numpy / PIL / ollama）
+  - full：启用 Web UI 与视觉分析，强制创建 Flask 应用和 VisionAnalyzer
+
+输出各段耗时的中位数 / 最小值，以及子进程最终加载了哪些重量级依赖。
+
+命令行：
+    python -m src.startup_bench
+    python -m src.startup_bench --runs 10 --scenario fast --json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+from typing import Any, Optional
+
+# 只在对应子系统启用时才应出现的重量级依赖
+HEAVY_MODULES = ("flask", "numpy", "PIL", "ollama", "pyautogui", "onnxruntime")
+
+SCENARIOS: dict[str, dict[str, bool]] = {
+    "fast": {"no_ui": True, "disable_vision": True},
+    "full": {"no_ui": False, "disable_vision": False},
+}
+
+# 子进程内执行的测量脚本（参数经 argv 传入）
+_PROBE = """
+import json, sys, time
+t0 = time.perf_counter()
+from src.main import ExecutorLoop
+from src.config import ExecutorConfig
+t1 = time.perf_counter()
+opts = json.loads(sys.argv[1])
+loop = ExecutorLoop(ExecutorConfig(log_dir=sys.argv[2], **opts))
+if not opts["no_ui"]:
+    from src.ui_server import get_app
+    get_app()
+if not opts["disable_vision"]:
+    loop.analyzer
+t2 = time.perf_counter()
+heavy = [m for m in json.loads(sys.argv[3]) if m in sys.modules]
+print(json.dumps({"import_ms": (t1 - t0) * 1000, "init_ms": (t2 - t1) * 1000, "modules": heavy}))
+"""
+
+
+def measure_once(scenario: str) -> dict[str, Any]:
+    """在新子进程中测量一次指定场景"""
+    root = Path(__file__).resolve().parent.parent
+    with tempfile.TemporaryDirectory() as log_dir:
+        proc = subprocess.run(
+            [sys.executable, "-c", _PROBE, json.dumps(SCENARIOS[scenario]), log_dir, json.dumps(HEAVY_MODULES)],
+            cwd=str(root),
+            capture_output=True,
+            text=True,
+            timeout=120,
+        )
+    if proc.returncode != 0:
+        raise RuntimeError(f"启动基准子进程失败（{scenario}）:\n{proc.stderr.strip()}")
+    # 组件初始化日志可能写到 stdout，结果在最后一行
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def measure(scenario: str, runs: int = 5) -> dict[str, Any]:
+    """多次测量并汇总：各段耗时中位数 / 最小值（毫秒）"""
+    samples = [measure_once(scenario) for _ in range(max(1, runs))]
+    report: dict[str, Any] = {"scenario": scenario, "runs": len(samples), "modules": samples[-1]["modules"]}
+    for key in ("import_ms", "init_ms"):
+        values = [s[key] for s in samples]
+        report[key] = {"median": round(statistics.median(values), 1), "min": round(min(values), 1)}
+    totals = [s["import_ms"] + s["init_ms"] for s in samples]
+    report["total_ms"] = {"median": round(statistics.median(totals), 1), "min": round(min(totals), 1)}
+    return report
+
+
+def format_report(reports: list[dict[str, Any]]) -> str:
+    lines = [f"{'场景':<6} {'import(ms)':>12} {'init(ms)':>10} {'合计(ms)':>10}  已加载重量级依赖"]
+    for r in reports:
+        lines.append(
+            f"{r['scenario']:<8} {r['import_ms']['median']:>12.1f} {r['init_ms']['median']:>10.1f} "
+            f"{r['total_ms']['median']:>10.1f}  {', '.join(r['modules']) or '-'}"
+        )
+    lines.append(f"（中位数，每场景 {reports[0]['runs']} 次独立子进程）" if reports else "")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="DevPlan Executor 冷启动耗时基准")
+    parser.add_argument("--runs", type=int, default=5, help="每个场景的子进程次数")
+    parser.add_argument("--scenario", choices=sorted(SCENARIOS), action="append",
+                        help="只测指定场景，可重复（默认全部）")
+    parser.add_argument("--json", action="store_true", help="以 JSON 输出报告")
+    args = parser.parse_args(argv)
+
+    reports = [measure(name, args.runs) for name in (args.scenario or list(SCENARIOS))]
+    if args.json:
+        print(json.dumps(reports, ensure_ascii=False, indent=2))
+    else:
+        print(format_report(reports))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,276 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — GUI 操作时序自适应校准
+
+CursorController 的每一步 GUI 操作之后原本固定 sleep（见 cursor_controller.GUI_DELAYS），
+按最慢的机器取值。校准器在可以观测的步骤上改为「轮询直到生效」，并记录实际响应时间：
+
+  可探测步骤（wait_until）：
+    activate       窗口 isActive 变为 True
+    clipboard      剪贴板内容读回与写入一致
+    paste          输入框区域像素发生变化（粘贴已落地）
+    new_conversation_load  输入框区域像素发生变化（新对话界面已出现）
+
+  其余步骤（click / clear ...）无法直接观测，
+  按「本机响应系数」（可探测步骤实测 / 默认值的中位数）缩放默认等待。
+  几乎瞬时返回的探测（factor_exclude，如剪贴板读回）不参与系数计算；
+  等待 AI 侧处理的步骤（fixed_steps，如 queued_check）始终使用默认值。
+
+安全边界：每步等待限制在 [默认值 × min_fraction, 默认值 × max_factor]，
+按系数缩放的未观测步骤下限为 默认值 × scaled_min_fraction；
+探测超时记为一次 miss，EWMA 向上限回拉。
+
+校准结果持久化到 log_dir/gui_timing.json，下次启动直接使用。
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import statistics
+import tempfile
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional
+
+from .clock import SYSTEM_CLOCK
+from .send_confirm import roi_distance
+
+logger = logging.getLogger("executor.timing")
+
+TIMING_FILE_VERSION = 1
+
+
+@dataclass
+class _StepStats:
+    """单个步骤的实测统计"""
+    ewma: float = 0.0       # 响应时间指数滑动平均（秒）
+    samples: int = 0
+    misses: int = 0         # 探测超时次数
+
+
+class TimingCalibrator:
+    """
+    按实测响应时间调整 GUI 等待。
+
+    使用方式：
+        timing = TimingCalibrator(GUI_DELAYS, path="logs/gui_timing.json")
+        timing.wait_until("clipboard", lambda: pyperclip.paste() == text)
+        clock.sleep(timing.delay("click"))
+    """
+
+    # 每个步骤至少积累多少样本后才采用实测值
+    MIN_SAMPLES = 3
+
+    def __init__(
+        self,
+        defaults: dict[str, float],
+        path: str | Path | None = None,
+        clock: Any = None,
+        margin: float = 1.5,
+        min_fraction: float = 0.15,
+        scaled_min_fraction: float = 0.5,
+        max_factor: float = 2.0,
+        alpha: float = 0.2,
+        poll_interval: float = 0.02,
+        settle: float = 0.03,
+        save_every: int = 20,
+        factor_exclude: Iterable[str] = (),
+        fixed_steps: Iterable[str] = (),
+    ):
+        self.defaults = dict(defaults)
+        self.path = Path(path) if path else None
+        self.clock = clock or SYSTEM_CLOCK
+        self.margin = max(1.0, float(margin))
+        self.min_fraction = min(1.0, max(0.0, float(min_fraction)))
+        self.scaled_min_fraction = min(1.0, max(self.min_fraction, float(scaled_min_fraction)))
+        self.max_factor = max(1.0, float(max_factor))
+        self.alpha = min(1.0, max(0.01, float(alpha)))
+        self.poll_interval = max(0.001, float(poll_interval))
+        self.settle = max(0.0, float(settle))
+        self.save_every = max(1, int(save_every))
+        self.factor_exclude = frozenset(factor_exclude)
+        self.fixed_steps = frozenset(fixed_steps)
+        self._stats: dict[str, _StepStats] = {}
+        self._dirty = 0
+        if self.path is not None:
+            self.load()
+
+    # ── 边界 ─────────────────────────────────────────────────
+
+    def floor(self, step: str) -> float:
+        return self.defaults.get(step, 0.0) * self.min_fraction
+
+    def ceiling(self, step: str) -> float:
+        return self.defaults.get(step, 0.0) * self.max_factor
+
+    def _clamp(self, step: str, value: float) -> float:
+        return min(self.ceiling(step), max(self.floor(step), value))
+
+    # ── 观测 ─────────────────────────────────────────────────
+
+    def observe(self, step: str, seconds: float) -> None:
+        """记录一次实测响应时间"""
+        st = self._stats.setdefault(step, _StepStats())
+        seconds = max(0.0, float(seconds))
+        st.ewma = seconds if st.samples == 0 else (1 - self.alpha) * st.ewma + self.alpha * seconds
+        st.samples += 1
+        self._touch()
+
+    def observe_miss(self, step: str) -> None:
+        """探测超时：EWMA 拉向上限，避免在变慢的机器上持续过早操作"""
+        st = self._stats.setdefault(step, _StepStats())
+        limit = self.ceiling(step) / self.margin
+        st.ewma = limit if st.samples == 0 else (1 - self.alpha) * st.ewma + self.alpha * limit
+        st.samples += 1
+        st.misses += 1
+        self._touch()
+
+    def _touch(self) -> None:
+        self._dirty += 1
+        if self.path is not None and self._dirty >= self.save_every:
+            self.save()
+
+    # ── 等待 ─────────────────────────────────────────────────
+
+    def machine_factor(self) -> float:
+        """本机响应系数：各可探测步骤（实测 × 余量 / 默认值）的中位数；无数据时为 1"""
+        ratios = [
+            st.ewma * self.margin / self.defaults[step]
+            for step, st in self._stats.items()
+            if st.samples >= self.MIN_SAMPLES
+            and self.defaults.get(step, 0.0) > 0
+            and step not in self.factor_exclude
+        ]
+        if not ratios:
+            return 1.0
+        return min(self.max_factor, max(self.scaled_min_fraction, statistics.median(ratios)))
+
+    def delay(self, step: str) -> float:
+        """步骤的当前等待秒数（有足够实测用实测，否则按本机系数缩放默认值）"""
+        default = self.defaults.get(step, 0.0)
+        if default <= 0:
+            return 0.0
+        if step in self.fixed_steps:
+            return default
+        st = self._stats.get(step)
+        if st is not None and st.samples >= self.MIN_SAMPLES:
+            return self._clamp(step, st.ewma * self.margin)
+        return self._clamp(step, default * self.machine_factor())
+
+    def wait_until(self, step: str, predicate: Callable[[], bool]) -> bool:
+        """
+        轮询 predicate 直到为真（记录响应时间）或超过该步上限（记录 miss）。
+
+        predicate 抛异常视为探测不可用，退化为固定等待 delay(step)。
+
+        Returns:
+            是否在上限内观测到生效
+        """
+        budget = self.ceiling(step)
+        if budget <= 0:
+            return True
+        start = self.clock.time()
+        while True:
+            try:
+                ok = bool(predicate())
+            except Exception as e:
+                logger.debug("时序探测 %s 不可用: %s", step, e)
+                self.clock.sleep(self.delay(step))
+                return True
+            elapsed = self.clock.time() - start
+            if ok:
+                self.observe(step, elapsed)
+                self.clock.sleep(self.settle)
+                return True
+            if elapsed >= budget - 1e-9:
+                self.observe_miss(step)
+                return False
+            self.clock.sleep(min(self.poll_interval, budget - elapsed))
+
+    # ── 诊断 / 持久化 ───────────────────────────────────────
+
+    def snapshot(self) -> dict[str, Any]:
+        """各步骤默认值 / 当前值 / 样本数（供日志与 Web UI 展示）"""
+        return {
+            "machine_factor": round(self.machine_factor(), 3),
+            "steps": {
+                step: {
+                    "default": default,
+                    "current": round(self.delay(step), 3),
+                    "samples": self._stats[step].samples if step in self._stats else 0,
+                    "misses": self._stats[step].misses if step in self._stats else 0,
+                }
+                for step, default in self.defaults.items()
+            },
+        }
+
+    def load(self) -> bool:
+        if self.path is None or not self.path.exists():
+            return False
+        try:
+            data = json.loads(self.path.read_text(encoding="utf-8"))
+            if data.get("version") != TIMING_FILE_VERSION:
+                return False
+            for step, raw in (data.get("steps") or {}).items():
+                if step in self.defaults:
+                    self._stats[step] = _StepStats(
+                        ewma=float(raw.get("ewma", 0.0)),
+                        samples=int(raw.get("samples", 0)),
+                        misses=int(raw.get("misses", 0)),
+                    )
+        except (OSError, ValueError, TypeError, AttributeError) as e:
+            logger.warning("GUI 时序校准文件读取失败，使用默认值: %s", e)
+            self._stats.clear()
+            return False
+        logger.info("已加载 GUI 时序校准（本机系数 %.2f）: %s", self.machine_factor(), self.path)
+        return True
+
+    def save(self) -> bool:
+        if self.path is None:
+            return False
+        data = {
+            "version": TIMING_FILE_VERSION,
+            "steps": {
+                step: {"ewma": round(st.ewma, 4), "samples": st.samples, "misses": st.misses}
+                for step, st in self._stats.items()
+            },
+        }
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".gui_timing.", dir=str(self.path.parent))
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False, indent=2)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            logger.warning("GUI 时序校准保存失败: %s", e)
+            return False
+        self._dirty = 0
+        return True
+
+
+# 区域变化判定阈值（平均逐字节差，0~255）：光标闪烁 / 抗锯齿重绘只改动极少像素，远低于此值
+REGION_CHANGE_MIN_DISTANCE = 1.0
+
+
+def region_change_probe(
+    grab: Callable[[], Any],
+    min_distance: float = REGION_CHANGE_MIN_DISTANCE,
+) -> Optional[Callable[[], bool]]:
+    """
+    构造「区域像素发生变化」探测：先截一次基准，之后每次调用与基准比较。
+
+    Args:
+        grab: 截取目标区域并返回 bytes 快照（如 PIL Image.tobytes()）的函数
+        min_distance: 与基准的 roi_distance 超过该值才算变化（容忍光标闪烁等噪声）
+
+    Returns:
+        探测函数；基准截图失败时返回 None（调用方退化为固定等待）
+    """
+    try:
+        baseline = grab()
+    except Exception as e:
+        logger.debug("区域截图失败，跳过像素探测: %s", e)
+        return None
+    return lambda: roi_distance(grab(), baseline) > min_distance
@@ -0,0 +1,235 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — tick 轨迹记录 / 加载
+
+把每个 tick 送入决策引擎的输入（DevPlan 动作、UI 状态、屏幕变化、
+右下角无变化时长、日志通道摘要）以及实际决策写成紧凑 JSONL，
+供 simulator 在虚拟时钟下离线回放、比较不同策略参数。
+
+文件格式（每行一个 JSON 对象，.gz 后缀自动 gzip 压缩）：
+  {"type":"header","v":1,"executor_id":"...","engine":{...引擎参数...}}
+  {"t":1700000000.0,"d":{"action":"wait",...},"u":"AI_GENERATING","c":1,"b":0.0,
+   "l":[active,idle,pending,errors],"a":"wait","ch":"log"}
+
+为保持紧凑，devplan_data 只保留引擎会读取的字段（任务描述等长文本被丢弃）。
+被强制结束 / 崩溃的进程留下的 .gz 缺少结尾，加载时读到截断处为止（最后一条完整记录）。
+"""
+
+from __future__ import annotations
+
+import gzip
+import io
+import json
+import logging
+import zlib
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+logger = logging.getLogger("executor.trace")
+
+TRACE_VERSION = 1
+
+# 引擎构造参数（与 ExecutorConfig 字段同名），写入 header 供回放时重建引擎
+ENGINE_PARAMS = (
+    "status_trigger_threshold",
+    "min_send_interval",
+    "max_continue_retries",
+    "auto_start_next_phase",
+    "fallback_no_change_timeout",
+    "rate_limit_wait",
+    "api_timeout_wait",
+    "context_overflow_wait",
+    "stall_escalate_threshold",
+    "network_backoff_base",
+    "network_backoff_max",
+    "network_backoff_jitter_ratio",
+    "circuit_breaker_failure_threshold",
+    "circuit_breaker_open_seconds",
+    "network_recovery_window_seconds",
+    "network_recovery_window_cooldown",
+)
+
+
+@dataclass
+class TickRecord:
+    """一个 tick 的引擎输入 + 实际决策"""
+    t: float                           # tick 时间戳（epoch 秒）
+    devplan: dict                      # 精简后的 DevPlan next-action
+    ui_status: str                     # UIStatus.value
+    screen_changing: bool = False
+    br_no_change_seconds: float = 0.0
+    log: Optional[tuple] = None        # (is_ai_active, idle_seconds, pending, recent_errors)；None = 日志通道不可用
+    action: str = ""                   # 在线运行时的决策（回放时用于对比）
+    channel: str = ""
+
+    def to_json(self) -> str:
+        obj: dict[str, Any] = {
+            "t": round(self.t, 3),
+            "d": self.devplan,
+            "u": self.ui_status,
+            "c": 1 if self.screen_changing else 0,
+            "b": round(self.br_no_change_seconds, 1),
+        }
+        if self.log is not None:
+            obj["l"] = list(self.log)
+        if self.action:
+            obj["a"] = self.action
+        if self.channel:
+            obj["ch"] = self.channel
+        return json.dumps(obj, ensure_ascii=False, separators=(",", ":"))
+
+    @classmethod
+    def from_obj(cls, obj: dict) -> "TickRecord":
+        log = obj.get("l")
+        return cls(
+            t=float(obj.get("t", 0.0)),
+            devplan=obj.get("d") or {},
+            ui_status=obj.get("u", "UNKNOWN"),
+            screen_changing=bool(obj.get("c", 0)),
+            br_no_change_seconds=float(obj.get("b", 0.0)),
+            log=tuple(log) if log is not None else None,
+            action=obj.get("a", ""),
+            channel=obj.get("ch", ""),
+        )
+
+
+def compact_devplan(data: dict) -> dict:
+    """只保留决策引擎会读取的 DevPlan 字段"""
+    out: dict[str, Any] = {"action": data.get("action", "wait")}
+    if data.get("message"):
+        out["message"] = str(data["message"])[:120]
+    for key in ("subTask", "phase"):
+        item = data.get(key)
+        if isinstance(item, dict):
+            out[key] = {k: item[k] for k in ("taskId", "title") if k in item}
+    return out
+
+
+def compact_log_state(log_state: Any) -> Optional[tuple]:
+    """LogMonitorState → (active, idle, pending, errors)；不可用时返回 None"""
+    if log_state is None or not getattr(log_state, "log_file_found", False):
+        return None
+    idle = float(getattr(log_state, "idle_seconds", float("inf")))
+    return (
+        1 if getattr(log_state, "is_ai_active", False) else 0,
+        round(idle, 1) if idle != float("inf") else -1,
+        int(getattr(log_state, "pending_tool_calls", 0)),
+        len(getattr(log_state, "recent_errors", []) or []),
+    )
+
+
+def _open(path: Path, mode: str) -> io.TextIOBase:
+    if path.suffix == ".gz":
+        return io.TextIOWrapper(gzip.open(path, mode + "b"), encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+# ── 记录器 ───────────────────────────────────────────────────
+
+class TraceRecorder:
+    """
+    逐 tick 追加写入轨迹文件。
+
+    使用方式：
+        recorder = TraceRecorder.for_session("logs/traces", config)
+        recorder.record(ts, devplan_data, ui_status, changing, br_idle, log_state, "wait", "log")
+        recorder.close()
+    """
+
+    def __init__(self, path: str | Path, header: Optional[dict] = None, flush_every: int = 20):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._fh = _open(self.path, "w")
+        self._flush_every = max(1, int(flush_every))
+        self.count = 0
+        head = {"type": "header", "v": TRACE_VERSION}
+        head.update(header or {})
+        self._fh.write(json.dumps(head, ensure_ascii=False, separators=(",", ":")) + "\n")
+
+    @classmethod
+    def for_session(cls, trace_dir: str | Path, config: Any = None) -> "TraceRecorder":
+        """按启动时间创建 trace-YYYYmmdd-HHMMSS.jsonl.gz"""
+        name = datetime.now().strftime("trace-%Y%m%d-%H%M%S.jsonl.gz")
+        header: dict[str, Any] = {}
+        if config is not None:
+            header["executor_id"] = getattr(config, "executor_id", "")
+            header["engine"] = {k: getattr(config, k) for k in ENGINE_PARAMS if hasattr(config, k)}
+        return cls(Path(trace_dir) / name, header)
+
+    def record(
+        self,
+        timestamp: float,
+        devplan_data: dict,
+        ui_status: str,
+        screen_changing: bool,
+        br_no_change_seconds: float,
+        log_state: Any = None,
+        action: str = "",
+        channel: str = "",
+    ) -> None:
+        if self._fh is None:
+            return
+        rec = TickRecord(
+            t=timestamp,
+            devplan=compact_devplan(devplan_data),
+            ui_status=ui_status,
+            screen_changing=screen_changing,
+            br_no_change_seconds=br_no_change_seconds,
+            log=compact_log_state(log_state),
+            action=action,
+            channel=channel,
+        )
+        self._fh.write(rec.to_json() + "\n")
+        self.count += 1
+        if self.count % self._flush_every == 0:
+            self._fh.flush()
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.close()
+            self._fh = None
+            logger.info("轨迹已写入 %s（%d 个 tick）", self.path, self.count)
+
+
+# ── 加载 ─────────────────────────────────────────────────────
+
+def _read_lines(path: Path) -> Iterator[str]:
+    """逐行读取；gzip 流被截断（缺少结尾 / 数据不完整）时停在截断处"""
+    try:
+        with _open(path, "r") as fh:
+            yield from fh
+    except (EOFError, zlib.error) as e:
+        logger.warning("轨迹文件不完整，读取到最后一条完整记录为止: %s（%s）", path, e)
+
+
+def iter_trace(path: str | Path) -> Iterator[TickRecord]:
+    """逐条读取轨迹中的 tick 记录（跳过 header、损坏行与截断的末行）"""
+    for line in _read_lines(Path(path)):
+        if not line.endswith("\n"):
+            break                       # 写到一半的末行
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            obj = json.loads(line)
+        except json.JSONDecodeError:
+            continue
+        if obj.get("type") == "header":
+            continue
+        yield TickRecord.from_obj(obj)
+
+
+def load_trace(path: str | Path) -> tuple[dict, list[TickRecord]]:
+    """读取完整轨迹，返回 (header, ticks)"""
+    header: dict = {}
+    first = next(_read_lines(Path(path)), "").strip()
+    if first:
+        try:
+            obj = json.loads(first)
+            if obj.get("type") == "header":
+                header = obj
+        except json.JSONDecodeError:
+            pass
+    return header, list(iter_trace(path))
@@ -7,12 +7,17 @@ DevPlan Executor — Web UI 监控面板服务
   - GET  /api/state     → 返回当前状态 JSON（首次加载）
   - GET  /api/stream    → SSE 实时状态推送（不含截图 base64）
   - GET  /api/screenshots → 返回截图 base64（独立拉取，减少 SSE 带宽）
+  - GET  /api/metrics?range=6h → 运行指标历史（tick 耗时/决策/视觉调用/网络错误/内存）
+  - GET  /api/profile   → 各阶段耗时分位数（p50/p95/p99）；?format=folded 导出火焰图数据
+  - GET  /metrics       → Prometheus 文本格式指标（供集群监控抓取）
   - POST /api/find_input  → 触发 GUI 输入框定位
   - POST /api/send_text   → 通过 GUI 发送文本
   - POST /api/set_interval → 设置截图间隔
   - POST /api/start_phase  → 启动新阶段
 
 所有 GUI 相关操作通过 set_executor_refs() 注入的 CursorController 和 DevPlanClient 引用执行。
+
+Flask 只在真正启动 Web UI（或首次访问模块属性 app）时才导入，--no-ui 启动不承担其导入开销。
 """
 
 from __future__ import annotations
@@ -27,6 +32,9 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Optional
 
+from .profiler import profiler
+from .prometheus_exporter import render_metrics
+
 logger = logging.getLogger("executor.ui_server")
 
 
@@ -47,6 +55,7 @@ class UIState:
             "executor_id": "",
             "project_name": "",
             "poll_interval": 15,
+            "poll_reason": "",
             "split_quadrant": True,
             "vision_enabled": True,
             "screenshot_interval": 3.0,
@@ -63,6 +72,8 @@ class UIState:
             "raw_response": "",
             "decision_action": "",
             "decision_message": "",
+            "decision_channel": "",
+            "arbiter_confidence": 0.0,
             "continue_retries": 0,
             "next_tick_countdown": 0,
             "screenshot_base64_1": "",
@@ -187,18 +198,26 @@ ui_state = UIState()
 _gui_ref: Any = None
 _client_ref: Any = None
 _executor_ref: Any = None
+_metrics_ref: Any = None
 _UNSET = object()
 
 
-def set_executor_refs(gui: Any = _UNSET, client: Any = _UNSET, executor: Any = _UNSET) -> None:
+def set_executor_refs(
+    gui: Any = _UNSET,
+    client: Any = _UNSET,
+    executor: Any = _UNSET,
+    metrics: Any = _UNSET,
+) -> None:
     """注入 Executor 组件引用，供 Web UI API 调用"""
-    global _gui_ref, _client_ref, _executor_ref
+    global _gui_ref, _client_ref, _executor_ref, _metrics_ref
     if gui is not _UNSET:
         _gui_ref = gui
     if client is not _UNSET:
         _client_ref = client
     if executor is not _UNSET:
         _executor_ref = executor
+    if metrics is not _UNSET:
+        _metrics_ref = metrics
 
 
 # ── 工具函数 ─────────────────────────────────────────────────
@@ -283,6 +302,40 @@ def create_app():
         """返回截图 base64 数据"""
         return jsonify(ui_state.get_screenshots())
 
+    @app.route("/api/metrics")
+    def api_metrics():
+        """返回运行指标历史（range: 90 / 30m / 6h / 7d，默认 6h）"""
+        if _metrics_ref is None:
+            return jsonify({"success": False, "message": "运行指标未启用"})
+        try:
+            data = _metrics_ref.query(request.args.get("range", "6h"))
+            return jsonify({"success": True, **data})
+        except Exception as e:
+            return jsonify({"success": False, "message": str(e)})
+
+    @app.route("/api/profile")
+    def api_profile():
+        """返回阶段耗时直方图摘要；format=folded 时返回 folded 调用栈文本"""
+        if request.args.get("format") == "folded":
+            return Response(
+                "\n".join(profiler.folded_lines()) + "\n",
+                mimetype="text/plain",
+                headers={"Content-Disposition": "attachment; filename=profile.folded"},
+            )
+        return jsonify({
+            "success": True,
+            "collect_stacks": profiler.collect_stacks,
+            "stages": profiler.snapshot(),
+        })
+
+    @app.route("/metrics")
+    def prometheus_metrics():
+        """Prometheus 抓取端点（不加锁读取主循环状态）"""
+        return Response(
+            render_metrics(_executor_ref),
+            content_type="text/plain; version=0.0.4; charset=utf-8",
+        )
+
     @app.route("/api/find_input", methods=["POST"])
     def api_find_input():
         """触发 GUI 输入框定位"""
@@ -374,7 +427,7 @@ def start_server_thread(host: str = "127.0.0.1", port: int = 5000) -> Optional[t
     Returns:
         服务器线程，启动失败返回 None
     """
-    app = create_app()
+    app = get_app()
     if app is None:
         logger.error("Web UI 创建失败，跳过启动")
         return None
@@ -397,5 +450,19 @@ def start_server_thread(host: str = "127.0.0.1", port: int = 5000) -> Optional[t
     return thread
 
 
-# 兼容测试：模块导入时提供 app 对象
-app = create_app()
+_app = None
+
+
+def get_app():
+    """惰性创建并缓存 Flask 应用（Flask 未安装返回 None）"""
+    global _app
+    if _app is None:
+        _app = create_app()
+    return _app
+
+
+def __getattr__(name: str):
+    # 兼容 `from src.ui_server import app`：首次访问时才创建，导入本模块不再有副作用
+    if name == "app":
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -20,19 +20,27 @@ screen_changing 参数代替，比视觉模型关键词匹配更可靠。
 
 依赖（可选，缺失时降级为 IDLE）：
   - pyautogui: 截图
-  - ollama: 视觉模型推理
+  - ollama: 视觉模型推理（或 OpenAI 兼容服务 / onnxruntime 分类器，见 vision_backends.py）
   - Pillow: 图片处理
   - numpy: 截图对比
 """
 
 from __future__ import annotations
 
+import hashlib
 import logging
+import re
 import time
+from collections import OrderedDict
 from pathlib import Path
-from typing import Optional
+from typing import Any, Optional, Sequence
 
+from .clock import SYSTEM_CLOCK
 from .config import ExecutorConfig, UIStatus, STATUS_MARKERS
+from .marker_matcher import MarkerMatcher
+from .model_lifecycle import ModelLifecycle, extract_model_names
+from .vision_backends import OllamaBackend, VisionBackend, extract_chat_content, select_backends
+from .profiler import profiler
 
 logger = logging.getLogger("executor.vision")
 
@@ -118,6 +126,14 @@ Rules:
   CHANGED or UNCHANGED
 """
 
+PROMPT_LOCATE_INPUT = """This is a screenshot of the Cursor IDE window.
+
+Find the chat message input box (where the user types a prompt for the AI, usually at the bottom of the chat panel).
+
+Reply with ONLY its center as normalized coordinates in the range 0-1000, formatted as: X,Y
+(0,0 is the top-left corner of the image, 1000,1000 is the bottom-right corner).
+If there is no chat input box, reply: NONE"""
+
 ANALYSIS_PROMPT = """Analyze this screenshot of Cursor IDE chat panel.
 
 Determine the current state:
@@ -134,6 +150,52 @@ Determine the current state:
 Reply with ONLY one word: CONNECTION_ERROR, PROVIDER_ERROR, CONTEXT_OVERFLOW, RATE_LIMIT, API_TIMEOUT, RESPONSE_INTERRUPTED, AI_GENERATING, or IDLE"""
 
 
+# ── 流式输出：按 prompt 类型限制生成长度 / 提前结束 ────────────
+# 各 prompt 都要求模型先输出一个关键词；流式接收时一旦出现完整关键词即停止生成。
+
+PROMPT_KINDS: dict[str, str] = {
+    PROMPT_BOTTOM_RIGHT: "status",
+    PROMPT_TOP_RIGHT: "status",
+    ANALYSIS_PROMPT: "status",
+    PROMPT_CHANGE_COMPARE: "change",
+    PROMPT_SEND_QUEUED_CHECK: "queued",
+    PROMPT_LOCATE_INPUT: "locate",
+}
+
+# 默认最大生成 token 数（config.vision_num_predict 可按类型覆盖）
+NUM_PREDICT: dict[str, int] = {
+    "status": 12,
+    "change": 8,
+    "queued": 8,
+    "locate": 16,
+}
+
+# 状态优先级（高 → 低）
+_STATUS_PRIORITY = (
+    UIStatus.CONNECTION_ERROR, UIStatus.PROVIDER_ERROR, UIStatus.CONTEXT_OVERFLOW,
+    UIStatus.RATE_LIMIT, UIStatus.API_TIMEOUT, UIStatus.RESPONSE_INTERRUPTED,
+    UIStatus.AI_GENERATING, UIStatus.IDLE,
+)
+
+# 关键词前后不能紧邻字母 / 下划线（避免 UNCHANGED 命中 CHANGED、NOT_QUEUED 命中 QUEUED）
+_STATUS_WORDS = "|".join(s.value for s in _STATUS_PRIORITY)
+EARLY_EXIT_PATTERNS: dict[str, re.Pattern] = {
+    "status": re.compile(rf"(?<![A-Z_])({_STATUS_WORDS})(?![A-Z_])"),
+    "change": re.compile(r"(?<![A-Z_])(UNCHANGED|CHANGED)(?![A-Z_])"),
+    "queued": re.compile(r"(?<![A-Z_])(NOT_QUEUED|QUEUED)(?![A-Z_])"),
+    # 坐标必须看到数字之后的分隔符才算完整（数字可能被拆成多个 token）
+    "locate": re.compile(r"\d{1,4}\s*[,，]\s*\d{1,4}(?=\D)|(?<![A-Z])NONE(?![A-Z])"),
+}
+
+
+# 状态判定自动机（导入时编译一次）：Layer 1 枚举名按优先级，Layer 2 为 STATUS_MARKERS 关键词
+_ENUM_MATCHER = MarkerMatcher({s.value: [s.value] for s in _STATUS_PRIORITY})
+_MARKER_MATCHER = MarkerMatcher({
+    name: markers for name, markers in STATUS_MARKERS.items()
+    if name in UIStatus._value2member_map_
+})
+
+
 # ── 视觉分析器 ──────────────────────────────────────────────
 
 class VisionAnalyzer:
@@ -149,10 +211,26 @@ class VisionAnalyzer:
       4. 返回最终 UIStatus
     """
 
-    def __init__(self, config: ExecutorConfig):
+    # 视觉结果缓存容量（config.vision_result_cache 开启时：同一 prompt + 像素完全相同的图片直接复用结果）
+    RESULT_CACHE_SIZE = 32
+
+    def __init__(self, config: ExecutorConfig, clock: Any = None):
         self.config = config
+        # 时间源（仿真 / 测试可注入 VirtualClock 跳过截图间隔等待）
+        self.clock = clock or SYSTEM_CLOCK
         self._stall_no_change_count: int = 0  # 连续无变化计数（用于 RESPONSE_STALL 判定）
-        self._last_br_change_time: float = time.time()  # 右下角截图最后变化时间
+        # 调用统计（供指标存储 / Web UI 使用，只增不减）
+        self.stats: dict[str, float] = {
+            "calls": 0,
+            "cache_hits": 0,
+            "errors": 0,
+            "early_exits": 0,
+            "latency_ms_total": 0.0,
+        }
+        self._result_cache: Optional[OrderedDict[tuple[str, str], tuple[UIStatus, str]]] = (
+            OrderedDict() if getattr(config, "vision_result_cache", False) else None
+        )
+        self._last_br_change_time: float = self.clock.time()  # 右下角截图最后变化时间
         self._prev_br_pixels = None  # 上一次右下角截图的像素数据（用于时间兜底对比）
         self._prev_tr_pixels = None  # 上一次右上角截图的像素数据（用于时间兜底对比）
         self._init_deps()
@@ -196,7 +274,7 @@ class VisionAnalyzer:
             self._ollama = ollama
         except ImportError:
             self._ollama = None
-            logger.warning("ollama 未安装，视觉 AI 分析不可用")
+            logger.warning("ollama 未安装，Ollama 视觉后端不可用")
 
         try:
             import numpy as np
@@ -212,12 +290,44 @@ class VisionAnalyzer:
             self._pil_image = None
             logger.warning("Pillow 未安装，图片处理功能不可用")
 
-        # 可用性判断
-        self._available = bool(self._pyautogui and self._ollama)
-
-        # 模型就绪状态
+        # 模型就绪状态（由 ModelLifecycle / 各后端维护，此处保留镜像供诊断）
         self._model_tested = False
         self._model_ready = False
+        # 模型生命周期（ollama 可用时创建）
+        self.lifecycle: Optional[ModelLifecycle] = None
+        self.cascade_lifecycle: Optional[ModelLifecycle] = None
+        if self._ollama:
+            self.lifecycle = ModelLifecycle(
+                self._ollama,
+                self.config.model_name,
+                clock=self.clock,
+                keep_alive=self.config.model_keep_alive,
+                warm_interval=self.config.model_warm_interval,
+                recheck_interval=self.config.model_ready_recheck_interval,
+            )
+
+            if self.config.vision_cascade_model:
+                self.cascade_lifecycle = ModelLifecycle(
+                    self._ollama,
+                    self.config.vision_cascade_model,
+                    clock=self.clock,
+                    keep_alive=self.config.model_keep_alive,
+                    warm_interval=self.config.model_warm_interval,
+                    recheck_interval=self.config.model_ready_recheck_interval,
+                )
+
+        # 视觉后端链（按配置与主机显存自动选择；可选小→大模型级联）
+        self.backends: Sequence[VisionBackend] = select_backends(
+            self.config,
+            ollama=self._ollama,
+            lifecycle=self.lifecycle,
+            clock=self.clock,
+            answer_key=self._answer_key,
+            small_lifecycle=self.cascade_lifecycle,
+        )
+
+        # 可用性判断
+        self._available = bool(self._pyautogui and self.backends)
 
     @property
     def available(self) -> bool:
@@ -227,10 +337,25 @@ class VisionAnalyzer:
     @property
     def seconds_since_br_changed(self) -> float:
         """距离右下角截图最后一次变化过去了多少秒"""
-        return time.time() - self._last_br_change_time
+        return self.clock.time() - self._last_br_change_time
+
+    def mark_activity(self) -> None:
+        """其它通道确认 AI 活跃（本轮未截图）：重置右下角无变化计时"""
+        self._last_br_change_time = self.clock.time()
+
+    def journal_state(self) -> dict[str, Any]:
+        """热重启需要保留的状态（截图像素不保留，重启后重新建立对比基线）"""
+        return {"stall_no_change_count": self._stall_no_change_count}
+
+    def restore_journal_state(self, data: dict[str, Any]) -> None:
+        try:
+            self._stall_no_change_count = max(0, int(data.get("stall_no_change_count", 0)))
+        except (TypeError, ValueError):
+            pass
 
     # ── 主分析入口 ───────────────────────────────────────────
 
+    @profiler.timed("vision.analyze")
     def analyze(self) -> tuple[UIStatus, bool, str]:
         """
         执行一次完整的屏幕分析。
@@ -273,12 +398,14 @@ class VisionAnalyzer:
                 return UIStatus.IDLE, False, "截图失败"
             from datetime import datetime
             self.screenshot_time_1 = datetime.now().strftime("%H:%M:%S")
-            time.sleep(self.config.screenshot_interval)
+            with profiler.span("vision.interval_sleep"):
+                self.clock.sleep(self.config.screenshot_interval)
             ss2 = self._take_screenshot(self._snapshot_2_path)
             if ss2 is None:
                 return UIStatus.IDLE, False, "第二次截图失败"
             self.screenshot_time_2 = datetime.now().strftime("%H:%M:%S")
-            screen_changing = self._compare_screenshots(ss1, ss2)
+            with profiler.span("vision.compare"):
+                screen_changing = self._compare_screenshots(ss1, ss2)
             ui_status, raw_response = self._analyze_fullscreen(ss2)
 
         # ── 响应中断检测（累积型判断） ──
@@ -323,7 +450,7 @@ class VisionAnalyzer:
             return False, "视觉模型不可用"
 
         try:
-            time.sleep(max(0.0, delay_seconds))
+            self.clock.sleep(max(0.0, delay_seconds))
             ss = self._take_screenshot(str(self._log_dir / "send_check_full.png"))
             if ss is None:
                 return False, "发送后截图失败"
@@ -338,6 +465,61 @@ class VisionAnalyzer:
             logger.error("发送后 queued 检测失败: %s", e)
             return False, f"发送后 queued 检测异常: {e}"
 
+    def locate_input_box(self, bounds: tuple[int, int, int, int]) -> Optional[tuple[int, int]]:
+        """
+        视觉定位聊天输入框（CursorController.input_locator；结果由调用方按窗口边界缓存）。
+
+        Args:
+            bounds: Cursor 窗口 (left, top, width, height)
+
+        Returns:
+            输入框中心相对窗口左上角的像素坐标；定位失败返回 None
+        """
+        if not self._available or not self._ensure_model_ready():
+            return None
+        left, top, width, height = bounds
+        if width <= 0 or height <= 0:
+            return None
+        path = str(self._log_dir / "locate_input.png")
+        try:
+            with profiler.span("vision.capture"):
+                shot = self._pyautogui.screenshot(region=(left, top, width, height))
+            shot.save(path)
+        except Exception as e:
+            logger.error("输入框定位截图失败: %s", e)
+            return None
+        _, raw = self._call_vision_model(path, prompt=PROMPT_LOCATE_INPUT)
+        point = self._parse_point(raw)
+        if point is None:
+            logger.debug("视觉模型未给出输入框坐标: %s", (raw or "[empty]")[:80])
+            return None
+        return point[0] * width // 1000, point[1] * height // 1000
+
+    @classmethod
+    def _answer_key(cls, kind: str, raw_text: str) -> Optional[str]:
+        """
+        把模型回复归一化为可比较的答案键（级联一致性检查用）；无法解析返回 None。
+
+        坐标按 50/1000 分桶，允许小幅抖动视为一致。
+        """
+        if kind == "locate":
+            point = cls._parse_point(raw_text)
+            return None if point is None else f"{point[0] // 50},{point[1] // 50}"
+        pattern = EARLY_EXIT_PATTERNS.get(kind)
+        m = pattern.search(f"{raw_text or ''}\n".upper()) if pattern is not None else None
+        return m.group(0) if m else None
+
+    @staticmethod
+    def _parse_point(raw_text: str) -> Optional[tuple[int, int]]:
+        """解析 "X,Y"（0-1000 归一化）坐标回复"""
+        m = re.search(r"(\d{1,4})\s*[,，]\s*(\d{1,4})", raw_text or "")
+        if not m:
+            return None
+        x, y = int(m.group(1)), int(m.group(2))
+        if x > 1000 or y > 1000:
+            return None
+        return x, y
+
     # ── 四象限分析 ───────────────────────────────────────────
 
     def _analyze_quadrants(self, screenshot) -> tuple[UIStatus, str]:
@@ -428,10 +610,10 @@ class VisionAnalyzer:
                 changed = True
 
             if changed:
-                self._last_br_change_time = time.time()
+                self._last_br_change_time = self.clock.time()
                 logger.debug("工作区有变化 (TR=%.2f BR=%.2f)，更新变化时间", tr_diff, br_diff)
             else:
-                elapsed = time.time() - self._last_br_change_time
+                elapsed = self.clock.time() - self._last_br_change_time
                 logger.debug(
                     "工作区无变化 (TR=%.2f BR=%.2f)，已持续 %.0f 秒",
                     tr_diff, br_diff, elapsed,
@@ -454,6 +636,7 @@ class VisionAnalyzer:
         )
         return status, raw
 
+    @profiler.timed("vision.split_encode")
     def _split_into_quadrants(self, screenshot, suffix: str = "") -> None:
         """将全屏截图按比例分割为四个象限并保存"""
         if not self._pil_image:
@@ -504,19 +687,22 @@ class VisionAnalyzer:
         from datetime import datetime
         if quadrant == "tr":
             self.screenshot_time_1 = datetime.now().strftime("%H:%M:%S")
-        time.sleep(self.config.screenshot_interval)
+        with profiler.span("vision.interval_sleep"):
+            self.clock.sleep(self.config.screenshot_interval)
         ss2 = self._take_screenshot(full_2)
         if ss2 is None:
             return False, None
         if quadrant == "br":
             self.screenshot_time_2 = datetime.now().strftime("%H:%M:%S")
             # UI 展示默认使用右下这组双帧
-            ss1.save(self._snapshot_1_path)
-            ss2.save(self._snapshot_2_path)
+            with profiler.span("vision.png_encode"):
+                ss1.save(self._snapshot_1_path)
+                ss2.save(self._snapshot_2_path)
 
         self._split_into_quadrants(ss1, suffix=f"_{quadrant}_1")
         self._split_into_quadrants(ss2, suffix=f"_{quadrant}_2")
-        changed = self._compare_quadrant_pair(quadrant)
+        with profiler.span("vision.compare"):
+            changed = self._compare_quadrant_pair(quadrant)
         return changed, ss2
 
     def _compare_quadrant_pair(self, quadrant: str) -> bool:
@@ -531,8 +717,9 @@ class VisionAnalyzer:
             return False
         if not (p1.exists() and p2.exists()):
             return False
-        # 优先使用“拼接图单次视觉比较”方案（避免多轮比较依赖模型记忆）
-        if self._ollama and self._pil_image and self._ensure_model_ready():
+        # 优先使用“拼接图单次视觉比较”方案（避免多轮比较依赖模型记忆）；
+        # 走后端链，只有能回答 change 类 prompt 的后端（ONNX 状态分类器不行）才参与
+        if self._pil_image and self._can_answer("change"):
             composite = self._log_dir / f"quad_{quadrant}_compare_merged.png"
             if self._build_change_compare_image(str(p1), str(p2), str(composite)):
                 _, raw = self._call_vision_model(str(composite), prompt=PROMPT_CHANGE_COMPARE)
@@ -644,7 +831,7 @@ class VisionAnalyzer:
         prompt: Optional[str] = None,
     ) -> tuple[UIStatus, str]:
         """
-        调用 Ollama 视觉模型分析截图。
+        调用视觉后端（Ollama / OpenAI 兼容服务 / ONNX 分类器）分析截图。
 
         Args:
             image_path: 图片文件路径
@@ -653,50 +840,112 @@ class VisionAnalyzer:
         Returns:
             (UIStatus, raw_response)
         """
-        if not self._ollama:
-            return UIStatus.IDLE, "ollama 不可用"
+        if not self._active_backends():
+            return UIStatus.IDLE, "视觉后端不可用"
 
         if not Path(image_path).exists():
             return UIStatus.IDLE, f"图片不存在: {image_path}"
 
         use_prompt = prompt or ANALYSIS_PROMPT
 
+        # 缓存关闭时不对截图求摘要
+        cache_key = None
+        if self._result_cache is not None:
+            cache_key = self._result_cache_key(image_path, use_prompt)
+        cached = self._cache_lookup(cache_key)
+        if cached is not None:
+            return cached
+
+        started = time.perf_counter()
         try:
-            response = self._ollama.chat(
-                model=self.config.model_name,
-                messages=[{
-                    "role": "user",
-                    "content": use_prompt,
-                    "images": [image_path],
-                }],
-                options={"timeout": self.config.model_timeout},
-            )
-            # 兼容新版 ollama SDK（返回 Pydantic 对象）和旧版（返回 dict）
-            raw_text = self._extract_chat_content(response).strip()
+            with profiler.span("vision.model"):
+                raw_text = self._chat(image_path, use_prompt).strip()
+            self._record_call(started)
             if not raw_text:
                 return UIStatus.UNKNOWN, "模型返回空响应（empty content）"
-            status = self._parse_status(raw_text)
+            status, markers = self._explain_status(raw_text)
+            logger.debug("状态判定 %s（依据: %s）", status.value, ", ".join(markers) or "无命中→兜底")
+            self._cache_store(cache_key, (status, raw_text))
             return status, raw_text
         except Exception as e:
+            self._record_call(started, error=True)
             logger.error("视觉模型调用失败: %s", e)
             return UIStatus.UNKNOWN, f"模型调用异常: {e}"
 
+    def _active_backends(self) -> list[VisionBackend]:
+        """后端链（__init__ 按主机能力选择；未初始化时退化为单一 Ollama 后端）"""
+        if not self.backends and self._ollama:
+            self.backends = [OllamaBackend(self._ollama, self.config, lifecycle=self.lifecycle)]
+        return self.backends
+
+    def _can_answer(self, kind: str) -> bool:
+        """后端链上是否有支持该 prompt 类型且可用的后端"""
+        return any(b.supports(kind) and b.available() for b in self._active_backends())
+
+    def _chat(self, image_path: str, prompt: str) -> str:
+        """
+        在后端链上找第一个支持该 prompt 类型且可用的后端执行推理，返回文本。
+
+        流式后端出现完整关键词（状态名 / CHANGED / QUEUED / 坐标）即停止生成；
+        生成长度按 prompt 类型封顶。
+        """
+        kind = PROMPT_KINDS.get(prompt, "status")
+        overrides = getattr(self.config, "vision_num_predict", None) or {}
+        max_tokens = int(overrides.get(kind, NUM_PREDICT.get(kind, 0)))
+        for backend in self._active_backends():
+            if not backend.supports(kind) or not backend.available():
+                continue
+            text = backend.complete(
+                image_path, prompt, kind=kind, max_tokens=max_tokens, stop=EARLY_EXIT_PATTERNS.get(kind),
+            )
+            if backend.stopped_early:
+                self.stats["early_exits"] += 1
+            return text
+        raise RuntimeError(f"没有支持 {kind} 类 prompt 的可用视觉后端")
+
+    # ── 调用统计 & 结果缓存 ──────────────────────────────────
+
+    def _record_call(self, started: float, error: bool = False) -> None:
+        """累计一次模型调用的次数与耗时"""
+        self.stats["calls"] += 1
+        self.stats["latency_ms_total"] += (time.perf_counter() - started) * 1000.0
+        if error:
+            self.stats["errors"] += 1
+
+    @staticmethod
+    def _result_cache_key(image_path: str, prompt: str) -> Optional[tuple[str, str]]:
+        """缓存键 = (prompt 摘要, 图片字节摘要)；读取失败返回 None（不缓存）"""
+        try:
+            digest = hashlib.sha1(Path(image_path).read_bytes()).hexdigest()
+        except OSError:
+            return None
+        return hashlib.sha1(prompt.encode("utf-8")).hexdigest(), digest
+
+    def _cache_lookup(self, key: Optional[tuple[str, str]]) -> Optional[tuple[UIStatus, str]]:
+        cache = self._result_cache
+        if key is None or cache is None:
+            return None
+        hit = cache.get(key)
+        if hit is None:
+            return None
+        cache.move_to_end(key)
+        self.stats["cache_hits"] += 1
+        logger.debug("视觉结果缓存命中（图片与 prompt 均未变化）")
+        return hit
+
+    def _cache_store(self, key: Optional[tuple[str, str]], value: tuple[UIStatus, str]) -> None:
+        cache = self._result_cache
+        if key is None or cache is None:
+            return
+        cache[key] = value
+        cache.move_to_end(key)
+        while len(cache) > self.RESULT_CACHE_SIZE:
+            cache.popitem(last=False)
+
     @staticmethod
     def _extract_chat_content(response) -> str:
         """从 ollama.chat() 响应中提取文本内容（兼容新旧 SDK 版本）"""
-        try:
-            # 新版 SDK: Pydantic 对象 → response.message.content
-            if hasattr(response, "message") and hasattr(response.message, "content"):
-                return response.message.content or ""
-        except Exception:
-            pass
-        try:
-            # 旧版 SDK: dict → response["message"]["content"]
-            if isinstance(response, dict):
-                return response.get("message", {}).get("content", "")
-        except Exception:
-            pass
-        return ""
+        return extract_chat_content(response)
 
     # ── 状态解析（双层匹配） ──────────────────────────────────
 
@@ -713,38 +962,30 @@ class VisionAnalyzer:
           Layer 1: 精确匹配枚举名（Ollama 模型直接输出）
           Layer 2: 模糊匹配 STATUS_MARKERS 中的关键词
         """
-        if not raw_text:
-            return UIStatus.IDLE
+        return VisionAnalyzer._explain_status(raw_text)[0]
+
+    @staticmethod
+    def _explain_status(raw_text: str) -> tuple[UIStatus, list[str]]:
+        """
+        同 _parse_status，额外返回判定依据（命中的枚举名或关键词）。
 
-        text_upper = raw_text.upper().strip()
+        两层都使用预编译的 Aho-Corasick 自动机（见 marker_matcher），
+        文本只扫描一遍；兜底 IDLE 时依据为空列表。
+        """
+        if not raw_text:
+            return UIStatus.IDLE, []
 
         # Layer 1: 精确匹配枚举名（按优先级排列）
         # Ollama 通常直接返回枚举名，优先匹配
-        priority_order = [
-            UIStatus.CONNECTION_ERROR,
-            UIStatus.PROVIDER_ERROR,
-            UIStatus.CONTEXT_OVERFLOW,
-            UIStatus.RATE_LIMIT,
-            UIStatus.API_TIMEOUT,
-            UIStatus.RESPONSE_INTERRUPTED,
-            UIStatus.AI_GENERATING,
-            UIStatus.IDLE,
-        ]
-        for status in priority_order:
-            if status.value in text_upper:
-                return status
-
-        # Layer 2: 模糊匹配 STATUS_MARKERS（按声明顺序 = 优先级）
-        for status_name, markers in STATUS_MARKERS.items():
-            for marker in markers:
-                if marker.upper() in text_upper:
-                    try:
-                        return UIStatus(status_name)
-                    except ValueError:
-                        pass
+        match = _ENUM_MATCHER.match(raw_text)
+        if match is None:
+            # Layer 2: 模糊匹配 STATUS_MARKERS（按声明顺序 = 优先级）
+            match = _MARKER_MATCHER.match(raw_text)
+        if match is not None:
+            return UIStatus(match.status), match.markers
 
         # 兜底 → IDLE
-        return UIStatus.IDLE
+        return UIStatus.IDLE, []
 
     # ── 截图 & 对比 ──────────────────────────────────────────
 
@@ -754,11 +995,13 @@ class VisionAnalyzer:
             return None
 
         try:
-            if self.config.roi_region:
-                screenshot = self._pyautogui.screenshot(region=self.config.roi_region)
-            else:
-                screenshot = self._pyautogui.screenshot()
-            screenshot.save(save_path)
+            with profiler.span("vision.capture"):
+                if self.config.roi_region:
+                    screenshot = self._pyautogui.screenshot(region=self.config.roi_region)
+                else:
+                    screenshot = self._pyautogui.screenshot()
+            with profiler.span("vision.png_encode"):
+                screenshot.save(save_path)
             return screenshot
         except Exception as e:
             logger.error("截图失败: %s", e)
@@ -789,56 +1032,28 @@ class VisionAnalyzer:
     # ── 模型就绪检查 ─────────────────────────────────────────
 
     def _ensure_model_ready(self) -> bool:
-        """检查 Ollama 模型是否可用（仅检查一次）"""
-        if self._model_tested:
-            return self._model_ready
-
+        """检查是否有可用视觉后端（Ollama 未就绪时按间隔重新检测，见 ModelLifecycle）"""
         self._model_tested = True
+        self._model_ready = any(b.available() for b in self._active_backends())
+        return self._model_ready
 
-        if not self._ollama:
-            self._model_ready = False
-            return False
+    def _lifecycles(self) -> list[ModelLifecycle]:
+        return [lc for lc in (self.cascade_lifecycle, self.lifecycle) if lc is not None]
 
-        try:
-            result = self._ollama.list()
-            # 兼容新版 SDK（Pydantic 对象: result.models[i].model）
-            # 和旧版 SDK（dict: result["models"][i]["name"]）
-            model_names = self._extract_model_names(result)
-            # 检查模型名是否存在（支持 tag 匹配）
-            model_base = self.config.model_name.split(":")[0]
-            self._model_ready = any(
-                model_base in name for name in model_names
-            )
-            if self._model_ready:
-                logger.info("视觉模型已就绪: %s", self.config.model_name)
-            else:
-                logger.warning(
-                    "视觉模型 %s 未找到，可用模型: %s",
-                    self.config.model_name,
-                    ", ".join(model_names[:5]),
-                )
-            return self._model_ready
-        except Exception as e:
-            logger.error("检查 Ollama 模型失败: %s", e)
-            self._model_ready = False
-            return False
+    def preload_model(self) -> None:
+        """启动时后台预加载视觉模型（级联模式下小模型优先）"""
+        for lifecycle in self._lifecycles():
+            lifecycle.preload()
+
+    def keep_model_warm(self) -> None:
+        """空闲保温（每个 tick 结束时调用，未到间隔时为空操作）"""
+        for lifecycle in self._lifecycles():
+            lifecycle.keep_warm()
 
     @staticmethod
     def _extract_model_names(result) -> list[str]:
         """从 ollama.list() 结果中提取模型名列表（兼容新旧 SDK 版本）"""
-        try:
-            # 新版 SDK: Pydantic 对象 → result.models[i].model
-            if hasattr(result, "models") and not isinstance(result, dict):
-                return [m.model for m in result.models if hasattr(m, "model")]
-        except Exception:
-            pass
-        try:
-            # 旧版 SDK: dict → result["models"][i]["name"]
-            if isinstance(result, dict):
-                return [m.get("name", "") for m in result.get("models", [])]
-        except Exception:
-            pass
-        return []
+        return extract_model_names(result)
 
     # ── 诊断 ─────────────────────────────────────────────────
 
@@ -848,6 +1063,11 @@ class VisionAnalyzer:
             "available": self._available,
             "model_name": self.config.model_name,
             "model_ready": self._model_ready,
+            "model_lifecycle": self.lifecycle.diagnostics() if self.lifecycle is not None else None,
+            "cascade_lifecycle": (
+                self.cascade_lifecycle.diagnostics() if self.cascade_lifecycle is not None else None
+            ),
+            "backends": [b.describe() for b in self.backends],
             "pyautogui": self._pyautogui is not None,
             "ollama": self._ollama is not None,
             "numpy": self._numpy is not None,
@@ -0,0 +1,542 @@
+# -*- coding: utf-8 -*-
+"""
+DevPlan Executor — 可插拔视觉后端
+
+VisionAnalyzer 只负责截图、拼 prompt 与解析结果；真正的模型推理交给后端链：
+
+  OllamaBackend        本地 Ollama（默认 gemma3:27b，流式 + 提前结束，见 vision_analyzer）
+  OpenAICompatBackend  OpenAI 兼容的本地推理服务（llama.cpp server / vLLM / LM Studio 等，
+                       可挂小体量视觉模型）
+  OnnxStatusBackend    CPU 上运行的 ONNX 截图状态分类器（只做 UIStatus 分类，毫秒级）
+  CascadeBackend       小模型先答，置信度不足 / 多次采样不一致时再问大模型
+                       （config.vision_cascade_model 启用，替换链上的 Ollama 后端）
+
+选择规则（config.vision_backend）：
+  - "auto"：探测本机显存，≥ vision_gpu_min_vram_gb 时优先 Ollama 大模型；
+    否则优先 ONNX 分类器 → OpenAI 兼容小模型 → Ollama
+  - 显式顺序："onnx,ollama" 等，逗号分隔
+
+每次调用按 prompt 类型（status / change / queued / locate）在链上找第一个
+支持该类型且可用的后端。各后端累计调用次数、耗时与相对成本，供诊断展示。
+
+依赖全部可选：ollama / onnxruntime 缺失时对应后端不参与选择。
+"""
+
+from __future__ import annotations
+
+import base64
+import logging
+import re
+import shutil
+import subprocess
+import time
+from pathlib import Path
+from typing import Any, Callable, Optional
+
+import httpx
+
+from .clock import SYSTEM_CLOCK
+
+logger = logging.getLogger("executor.vision_backends")
+
+ALL_KINDS = frozenset({"status", "change", "queued", "locate"})
+
+# ONNX 分类器默认标签顺序（模型旁的 <model>.labels 或 config.onnx_labels 可覆盖）
+DEFAULT_ONNX_LABELS = [
+    "IDLE",
+    "AI_GENERATING",
+    "CONNECTION_ERROR",
+    "PROVIDER_ERROR",
+    "CONTEXT_OVERFLOW",
+    "RATE_LIMIT",
+    "API_TIMEOUT",
+    "RESPONSE_INTERRUPTED",
+]
+
+
+# ── 基类 ─────────────────────────────────────────────────────
+
+class VisionBackend:
+    """
+    视觉后端基类：子类实现 available() 与 _complete()。
+
+    cost_per_call 为单次调用的相对资源成本（27B GPU 模型记 1.0），
+    与实测耗时一起用于诊断比较。
+    """
+
+    name = "base"
+    cost_per_call = 1.0
+    kinds: frozenset[str] = ALL_KINDS
+
+    def __init__(self) -> None:
+        self.model = ""              # 模型标识（诊断展示用，子类覆盖）
+        self.stopped_early = False   # 最近一次调用是否提前结束生成
+        self.stats: dict[str, float] = {
+            "calls": 0,
+            "errors": 0,
+            "latency_ms_total": 0.0,
+            "last_latency_ms": 0.0,
+            "cost_total": 0.0,
+        }
+
+    def supports(self, kind: str) -> bool:
+        return kind in self.kinds
+
+    def available(self) -> bool:
+        raise NotImplementedError
+
+    def complete(
+        self,
+        image_path: str,
+        prompt: str,
+        kind: str = "status",
+        max_tokens: int = 0,
+        stop: Optional[re.Pattern] = None,
+    ) -> str:
+        """
+        对一张图片执行一次推理，返回模型原始文本。
+
+        Args:
+            max_tokens: 最大生成 token 数（0 不限制；分类器忽略）
+            stop: 流式输出中出现该模式即停止生成（不支持流式的后端忽略）
+        """
+        self.stopped_early = False
+        started = time.perf_counter()
+        try:
+            return self._complete(image_path, prompt, kind, max_tokens, stop)
+        except Exception:
+            self.stats["errors"] += 1
+            raise
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000.0
+            self.stats["calls"] += 1
+            self.stats["latency_ms_total"] += elapsed_ms
+            self.stats["last_latency_ms"] = round(elapsed_ms, 1)
+            self.stats["cost_total"] += self.cost_per_call
+
+    def _complete(
+        self, image_path: str, prompt: str, kind: str, max_tokens: int, stop: Optional[re.Pattern],
+    ) -> str:
+        raise NotImplementedError
+
+    def describe(self) -> dict[str, Any]:
+        calls = self.stats["calls"]
+        return {
+            "name": self.name,
+            "model": self.model,
+            "kinds": sorted(self.kinds),
+            "cost_per_call": self.cost_per_call,
+            "mean_latency_ms": round(self.stats["latency_ms_total"] / calls, 1) if calls else None,
+            **self.stats,
+        }
+
+
+# ── Ollama ───────────────────────────────────────────────────
+
+class OllamaBackend(VisionBackend):
+    """本地 Ollama 视觉模型（流式输出 + 关键词提前结束 + keep_alive）"""
+
+    name = "ollama"
+    cost_per_call = 1.0
+
+    def __init__(self, client: Any, config: Any, lifecycle: Any = None, model: str = ""):
+        super().__init__()
+        self.client = client
+        self.config = config
+        self.model = model or config.model_name
+        self.lifecycle = lifecycle
+        self.stats["early_exits"] = 0
+
+    def available(self) -> bool:
+        if self.client is None:
+            return False
+        return self.lifecycle.ensure_ready() if self.lifecycle is not None else True
+
+    def _complete(self, image_path, prompt, kind, max_tokens, stop) -> str:
+        started = time.perf_counter()
+        try:
+            text = self._chat(image_path, prompt, max_tokens, stop)
+        except Exception:
+            if self.lifecycle is not None:
+                self.lifecycle.note_failure()
+            raise
+        if self.lifecycle is not None:
+            self.lifecycle.note_call(time.perf_counter() - started)
+        return text
+
+    def _chat(self, image_path: str, prompt: str, max_tokens: int, stop: Optional[re.Pattern]) -> str:
+        options: dict[str, Any] = {"timeout": self.config.model_timeout}
+        if max_tokens > 0:
+            options["num_predict"] = max_tokens
+        kwargs: dict[str, Any] = {
+            "model": self.model,
+            "messages": [{"role": "user", "content": prompt, "images": [image_path]}],
+            "options": options,
+        }
+        keep_alive = self.lifecycle.keep_alive if self.lifecycle is not None else getattr(self.config, "model_keep_alive", None)
+        if keep_alive is not None:
+            kwargs["keep_alive"] = keep_alive
+        if not getattr(self.config, "vision_stream", False):
+            return extract_chat_content(self.client.chat(**kwargs))
+
+        # 流式：出现完整关键词即关闭流，Ollama 随连接断开停止生成
+        stream = self.client.chat(stream=True, **kwargs)
+        parts: list[str] = []
+        try:
+            for chunk in stream:
+                parts.append(extract_chat_content(chunk))
+                if stop is not None and stop.search("".join(parts).upper()):
+                    self.stopped_early = True
+                    self.stats["early_exits"] += 1
+                    break
+        finally:
+            close = getattr(stream, "close", None)
+            if callable(close):
+                close()
+        return "".join(parts)
+
+
+def extract_chat_content(response: Any) -> str:
+    """从 ollama.chat() 响应（或流式分块）中提取文本内容（兼容新旧 SDK 版本）"""
+    try:
+        # 新版 SDK: Pydantic 对象 → response.message.content
+        if hasattr(response, "message") and hasattr(response.message, "content"):
+            return response.message.content or ""
+    except Exception:
+        pass
+    try:
+        # 旧版 SDK: dict → response["message"]["content"]
+        if isinstance(response, dict):
+            return response.get("message", {}).get("content", "")
+    except Exception:
+        pass
+    return ""
+
+
+# ── OpenAI 兼容服务 ──────────────────────────────────────────
+
+class OpenAICompatBackend(VisionBackend):
+    """OpenAI 兼容 /chat/completions 接口（图片以 data URL 传入）"""
+
+    name = "openai"
+    cost_per_call = 0.3
+
+    # 可用性探测结果缓存秒数
+    PROBE_TTL = 60.0
+
+    def __init__(
+        self,
+        base_url: str,
+        model: str,
+        api_key: str = "",
+        timeout: float = 30.0,
+        clock: Any = None,
+        client: Optional[httpx.Client] = None,
+    ):
+        super().__init__()
+        self.base_url = base_url.rstrip("/")
+        self.model = model
+        self.clock = clock or SYSTEM_CLOCK
+        headers = {"Authorization": f"Bearer {api_key}"} if api_key else {}
+        self._client = client or httpx.Client(timeout=timeout, headers=headers)
+        self._probe: Optional[tuple[float, bool]] = None
+
+    def available(self) -> bool:
+        now = self.clock.time()
+        if self._probe is not None and now - self._probe[0] < self.PROBE_TTL:
+            return self._probe[1]
+        try:
+            ok = self._client.get(f"{self.base_url}/models", timeout=2.0).status_code < 400
+        except httpx.HTTPError as e:
+            logger.debug("OpenAI 兼容视觉服务不可达: %s", e)
+            ok = False
+        self._probe = (now, ok)
+        return ok
+
+    def _complete(self, image_path, prompt, kind, max_tokens, stop) -> str:
+        data = base64.b64encode(Path(image_path).read_bytes()).decode("ascii")
+        body: dict[str, Any] = {
+            "model": self.model,
+            "temperature": 0,
+            "messages": [{
+                "role": "user",
+                "content": [
+                    {"type": "text", "text": prompt},
+                    {"type": "image_url", "image_url": {"url": f"data:image/png;base64,{data}"}},
+                ],
+            }],
+        }
+        if max_tokens > 0:
+            body["max_tokens"] = max_tokens
+        try:
+            resp = self._client.post(f"{self.base_url}/chat/completions", json=body)
+            resp.raise_for_status()
+        except httpx.HTTPError:
+            self._probe = None   # 下次重新探测
+            raise
+        choices = resp.json().get("choices") or []
+        return (choices[0].get("message", {}).get("content") or "") if choices else ""
+
+
+# ── ONNX 状态分类器 ──────────────────────────────────────────
+
+class OnnxStatusBackend(VisionBackend):
+    """
+    CPU 上运行的截图状态分类器（onnxruntime）。
+
+    模型约定：输入 [1, 3, H, W] float32（RGB，像素 / 255），输出各标签 logits；
+    标签顺序取自 <model>.labels（每行一个），缺失时用 labels 参数或 DEFAULT_ONNX_LABELS。
+    只回答 status 类 prompt，输出形如 "CONNECTION_ERROR 0.97"。
+    """
+
+    name = "onnx"
+    cost_per_call = 0.01
+    kinds = frozenset({"status"})
+
+    def __init__(self, model_path: str, labels: Optional[list[str]] = None):
+        super().__init__()
+        self.model = str(model_path)
+        self.labels = list(labels or [])
+        self._session = None
+        self._input_name = ""
+        self._size = (224, 224)
+        self._load_error: Optional[str] = None
+
+    def available(self) -> bool:
+        return self._ensure_session()
+
+    def _ensure_session(self) -> bool:
+        if self._session is not None:
+            return True
+        if self._load_error is not None:
+            return False
+        try:
+            import onnxruntime as ort
+            self._session = ort.InferenceSession(self.model, providers=["CPUExecutionProvider"])
+        except ImportError:
+            self._load_error = "onnxruntime 未安装"
+        except Exception as e:
+            self._load_error = f"加载失败: {e}"
+        if self._session is None:
+            logger.warning("ONNX 状态分类器不可用（%s）: %s", self.model, self._load_error)
+            return False
+        inp = self._session.get_inputs()[0]
+        self._input_name = inp.name
+        shape = list(inp.shape)
+        if len(shape) == 4 and all(isinstance(d, int) and d > 0 for d in shape[2:]):
+            self._size = (shape[3], shape[2])
+        labels_file = Path(self.model).with_suffix(".labels")
+        if labels_file.exists():
+            self.labels = [l.strip() for l in labels_file.read_text(encoding="utf-8").splitlines() if l.strip()]
+        if not self.labels:
+            self.labels = list(DEFAULT_ONNX_LABELS)
+        logger.info("ONNX 状态分类器已加载: %s（%d 类，输入 %dx%d）", self.model, len(self.labels), *self._size)
+        return True
+
+    def _complete(self, image_path, prompt, kind, max_tokens, stop) -> str:
+        if not self._ensure_session():
+            raise RuntimeError(self._load_error or "ONNX 分类器不可用")
+        import numpy as np
+        from PIL import Image
+
+        with Image.open(image_path) as img:
+            arr = np.asarray(img.convert("RGB").resize(self._size), dtype=np.float32) / 255.0
+        batch = arr.transpose(2, 0, 1)[np.newaxis, ...]
+        logits = np.asarray(self._session.run(None, {self._input_name: batch})[0]).reshape(-1)
+        probs = np.exp(logits - logits.max())
+        probs /= probs.sum()
+        idx = int(probs.argmax())
+        label = self.labels[idx] if idx < len(self.labels) else "IDLE"
+        return f"{label} {float(probs[idx]):.2f}"
+
+
+# ── 两级级联 ─────────────────────────────────────────────────
+
+# 回复末尾的显式置信度（如 ONNX 分类器的 "RATE_LIMIT 0.91"）
+_CONFIDENCE_RE = re.compile(r"(?<![\d.,，])(0(?:\.\d+)?|1(?:\.0+)?)\s*$")
+
+
+class CascadeBackend(VisionBackend):
+    """
+    小模型优先的两级级联。
+
+    置信度来源（按优先级）：
+      1. 回复末尾的显式分数（分类器输出 "LABEL 0.91"）
+      2. 自洽性：小模型最多采样 samples 次，答案一致的比例
+    置信度低于 min_confidence、答案无法解析或小模型出错时升级到大模型。
+
+    按 "<prompt 类型>:<小模型答案>" 统计调用数 / 升级率 / 大模型改判数 / 端到端耗时，
+    用于对照基准截图集调整阈值。
+    """
+
+    name = "cascade"
+    cost_per_call = 0.0   # 自身不计成本，实际成本 = 小模型采样 + 升级部分的大模型调用
+
+    def __init__(
+        self,
+        small: VisionBackend,
+        large: VisionBackend,
+        answer_key: Callable[[str, str], Optional[str]],
+        min_confidence: float = 0.7,
+        samples: int = 2,
+    ):
+        super().__init__()
+        self.small = small
+        self.large = large
+        self.answer_key = answer_key
+        self.min_confidence = float(min_confidence)
+        self.samples = max(1, int(samples))
+        self.model = f"{small.model} → {large.model}"
+        self.kinds = small.kinds | large.kinds
+        self.classes: dict[str, dict[str, float]] = {}
+
+    def available(self) -> bool:
+        return self.small.available() or self.large.available()
+
+    def _complete(self, image_path, prompt, kind, max_tokens, stop) -> str:
+        started = time.perf_counter()
+        label, confidence, reply = self._ask_small(image_path, prompt, kind, max_tokens, stop)
+        escalate = label is None or confidence < self.min_confidence
+        final = reply
+        overridden = False
+        if escalate and self.large.available() and self.large.supports(kind):
+            final = self.large.complete(image_path, prompt, kind=kind, max_tokens=max_tokens, stop=stop)
+            self.stopped_early = self.large.stopped_early
+            overridden = label is not None and self.answer_key(kind, final) != label
+            logger.debug(
+                "[级联] %s 小模型=%s 置信度=%.2f → 大模型=%s", kind, label, confidence, final[:40],
+            )
+        else:
+            escalate = False
+        self._record(f"{kind}:{label or '?'}", escalate, overridden, (time.perf_counter() - started) * 1000.0)
+        return final
+
+    def _ask_small(self, image_path, prompt, kind, max_tokens, stop) -> tuple[Optional[str], float, str]:
+        """小模型作答：返回 (答案键, 置信度, 首次原始回复)"""
+        if not (self.small.supports(kind) and self.small.available()):
+            return None, 0.0, ""
+        keys: list[Optional[str]] = []
+        first = ""
+        for i in range(self.samples):
+            try:
+                reply = self.small.complete(image_path, prompt, kind=kind, max_tokens=max_tokens, stop=stop)
+            except Exception as e:
+                logger.debug("[级联] 小模型调用失败，升级: %s", e)
+                return None, 0.0, ""
+            if i == 0:
+                first = reply
+                self.stopped_early = self.small.stopped_early
+                m = _CONFIDENCE_RE.search(reply.strip()) if kind != "locate" else None
+                if m:
+                    return self.answer_key(kind, reply), float(m.group(1)), reply
+            keys.append(self.answer_key(kind, reply))
+            if keys[0] is None:
+                break
+        label = keys[0]
+        if label is None:
+            return None, 0.0, first
+        return label, keys.count(label) / len(keys), first
+
+    def _record(self, key: str, escalated: bool, overridden: bool, elapsed_ms: float) -> None:
+        c = self.classes.setdefault(key, {"count": 0, "escalations": 0, "overrides": 0, "latency_ms_total": 0.0})
+        c["count"] += 1
+        c["escalations"] += int(escalated)
+        c["overrides"] += int(overridden)
+        c["latency_ms_total"] += elapsed_ms
+
+    def describe(self) -> dict[str, Any]:
+        info = super().describe()
+        cost = self.small.stats["cost_total"] + self.large.stats["cost_total"]
+        info["cost_total"] = round(cost, 4)
+        info["cost_per_call"] = round(cost / self.stats["calls"], 4) if self.stats["calls"] else None
+        total = sum(c["count"] for c in self.classes.values())
+        info["escalation_rate"] = round(sum(c["escalations"] for c in self.classes.values()) / total, 3) if total else None
+        info["classes"] = {
+            key: {
+                "count": c["count"],
+                "escalation_rate": round(c["escalations"] / c["count"], 3),
+                "overrides": c["overrides"],
+                "mean_latency_ms": round(c["latency_ms_total"] / c["count"], 1),
+            }
+            for key, c in sorted(self.classes.items())
+        }
+        info["small"] = self.small.describe()
+        info["large"] = self.large.describe()
+        return info
+
+
+# ── 主机能力探测 & 后端选择 ─────────────────────────────────
+
+def detect_gpu_vram_gb() -> float:
+    """探测本机最大单卡显存（GB）；无 NVIDIA GPU / nvidia-smi 不可用时返回 0"""
+    exe = shutil.which("nvidia-smi")
+    if not exe:
+        return 0.0
+    try:
+        out = subprocess.run(
+            [exe, "--query-gpu=memory.total", "--format=csv,noheader,nounits"],
+            capture_output=True, text=True, timeout=3,
+        ).stdout
+        values = [float(x) for x in re.findall(r"\d+(?:\.\d+)?", out)]
+    except (OSError, subprocess.SubprocessError, ValueError):
+        return 0.0
+    return max(values) / 1024.0 if values else 0.0
+
+
+def select_backends(
+    config: Any,
+    ollama: Any = None,
+    lifecycle: Any = None,
+    vram_gb: Optional[float] = None,
+    clock: Any = None,
+    answer_key: Optional[Callable[[str, str], Optional[str]]] = None,
+    small_lifecycle: Any = None,
+) -> list[VisionBackend]:
+    """
+    按配置与主机能力构造后端链（顺序即优先级）。
+
+    Args:
+        ollama: 已导入的 ollama 模块（None 表示不可用）
+        vram_gb: 显存（GB），None 时自动探测
+        answer_key: 级联模式下把原始回复归一化为答案键（由 VisionAnalyzer 提供）
+        small_lifecycle: 级联小模型的生命周期管理
+    """
+    candidates: dict[str, VisionBackend] = {}
+    if ollama is not None:
+        candidates["ollama"] = OllamaBackend(ollama, config, lifecycle=lifecycle)
+        small_model = getattr(config, "vision_cascade_model", "")
+        if small_model and answer_key is not None:
+            candidates["ollama"] = CascadeBackend(
+                small=OllamaBackend(ollama, config, lifecycle=small_lifecycle, model=small_model),
+                large=candidates["ollama"],
+                answer_key=answer_key,
+                min_confidence=config.vision_cascade_min_confidence,
+                samples=config.vision_cascade_samples,
+            )
+    if getattr(config, "openai_base_url", ""):
+        candidates["openai"] = OpenAICompatBackend(
+            config.openai_base_url,
+            config.openai_model or config.model_name,
+            api_key=config.openai_api_key,
+            timeout=config.model_timeout,
+            clock=clock,
+        )
+    if getattr(config, "onnx_model_path", ""):
+        candidates["onnx"] = OnnxStatusBackend(config.onnx_model_path, labels=config.onnx_labels)
+
+    mode = (getattr(config, "vision_backend", "auto") or "auto").strip().lower()
+    if mode != "auto":
+        order = [n.strip() for n in mode.split(",") if n.strip()]
+        unknown = [n for n in order if n not in ("ollama", "openai", "onnx")]
+        if unknown:
+            logger.warning("未知视觉后端 %s，已忽略", ", ".join(unknown))
+    else:
+        vram = detect_gpu_vram_gb() if vram_gb is None else vram_gb
+        big_gpu = vram >= config.vision_gpu_min_vram_gb
+        order = ["ollama", "openai", "onnx"] if big_gpu else ["onnx", "openai", "ollama"]
+        logger.info(
+            "视觉后端自动选择: 显存 %.1f GB（%s）→ %s",
+            vram, "大显存" if big_gpu else "轻量优先",
+            " > ".join(n for n in order if n in candidates) or "无",
+        )
+    return [candidates[n] for n in order if n in candidates]
@@ -0,0 +1,171 @@
+# -*- coding: utf-8 -*-
+"""
+通道仲裁 — 日志优先跳过视觉 / 置信度模型 / 发送后日志确认测试
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.arbiter import ChannelArbiter
+from src.clock import VirtualClock
+from src.config import ExecutorConfig, UIStatus
+from src.engine import Action
+from src.log_monitor import LogEvent, LogEventType, LogMonitorState
+from src.main import ExecutorLoop
+
+
+def _state(pending=0, idle=0.0, errors=0, last_event=0.0, found=True):
+    return LogMonitorState(
+        is_ai_active=pending > 0 or idle < 30,
+        idle_seconds=idle,
+        last_tool_call_time=last_event,
+        pending_tool_calls=pending,
+        recent_errors=[
+            LogEvent(event_type=LogEventType.NETWORK_ERROR, timestamp=time.time(), raw_line="ECONNRESET")
+            for _ in range(errors)
+        ],
+        log_file_found=found,
+    )
+
+
+class TestChannelArbiter(unittest.TestCase):
+    def setUp(self):
+        self.arb = ChannelArbiter(idle_threshold=30, confidence_threshold=0.6, error_burst_threshold=3)
+
+    def test_ui_independent_actions_skip_vision(self):
+        v = self.arb.assess("all_done", None)
+        self.assertFalse(v.need_vision)
+        self.assertEqual(v.channel, "devplan")
+
+    def test_pending_calls_conclusive_even_for_send_task(self):
+        v = self.arb.assess("send_task", _state(pending=2, idle=1))
+        self.assertFalse(v.need_vision)
+        self.assertEqual(v.channel, "log")
+        self.assertEqual(v.ui_status, UIStatus.AI_GENERATING)
+
+    def test_wait_keeps_legacy_skip_within_idle_threshold(self):
+        self.assertFalse(self.arb.assess("wait", _state(idle=25)).need_vision)
+        self.assertTrue(self.arb.assess("wait", _state(idle=45)).need_vision)
+
+    def test_send_task_is_more_conservative(self):
+        self.assertFalse(self.arb.assess("send_task", _state(idle=5)).need_vision)
+        self.assertTrue(self.arb.assess("send_task", _state(idle=25)).need_vision)
+
+    def test_error_burst_escalates_to_vision(self):
+        v = self.arb.assess("wait", _state(pending=1, errors=3))
+        self.assertTrue(v.need_vision)
+        self.assertEqual(v.channel, "vision")
+        self.assertIn("突发", v.reason)
+
+    def test_missing_log_channel_needs_vision(self):
+        self.assertTrue(self.arb.assess("wait", None).need_vision)
+        self.assertTrue(self.arb.assess("wait", _state(found=False)).need_vision)
+
+    def test_send_confirmed_by_log(self):
+        sent_at = time.time()
+        self.assertIsNotNone(self.arb.send_confirmed_by_log(_state(last_event=sent_at + 0.5), sent_at))
+        self.assertIsNone(self.arb.send_confirmed_by_log(_state(last_event=sent_at - 5, idle=5), sent_at))
+        self.assertIsNone(self.arb.send_confirmed_by_log(_state(pending=1, errors=1), sent_at))
+
+
+class TestPostSendLogConfirmation(unittest.TestCase):
+    def test_log_confirmation_skips_vision_check(self):
+        loop = ExecutorLoop.__new__(ExecutorLoop)
+        loop.vision_enabled = True
+        loop.arbiter = ChannelArbiter()
+        sent_at = time.time()
+
+        class _Monitor:
+            def poll(self):
+                return _state(pending=1, last_event=sent_at + 0.2)
+
+        class _A:
+            available = True
+            calls = 0
+            def check_send_queued_after_delay(self, delay_seconds=1.0):
+                _A.calls += 1
+                return True, "queued"
+
+        class _G:
+            available = True
+            last_send_time = sent_at
+            def press_key(self, key):
+                return True
+
+        loop.log_monitor = _Monitor()
+        loop.analyzer = _A()
+        loop.gui = _G()
+        loop._post_send_vision_check("test")
+        self.assertEqual(_A.calls, 0)
+
+
+class _Analyzer:
+    """只模拟兜底计时：右下角无变化秒数由虚拟时钟推进"""
+
+    available = True
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.changed_at = clock.time()
+        self.analyze_calls = 0
+
+    @property
+    def seconds_since_br_changed(self) -> float:
+        return self.clock.time() - self.changed_at
+
+    def mark_activity(self) -> None:
+        self.changed_at = self.clock.time()
+
+    def analyze(self):
+        self.analyze_calls += 1
+        return UIStatus.AI_GENERATING, False, "stub"
+
+
+class _Client:
+    def get_next_action(self):
+        return {"action": "wait", "message": "AI 正在执行", "subTask": {"taskId": "T1"}}
+
+    def heartbeat(self, **_kwargs):
+        return None
+
+
+class TestLogGatedTicks(unittest.TestCase):
+    def test_long_log_gated_generation_does_not_trigger_fallback(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = ExecutorConfig(
+            log_dir=tmp.name, no_ui=True, disable_vision=True, metrics_enabled=False,
+            run_journal_enabled=False, config_watch_enabled=False,
+        )
+        clock = VirtualClock()
+        loop = ExecutorLoop(config, clock=clock)
+        self.addCleanup(loop.recovery.close)
+        loop.vision_enabled = True
+        loop.analyzer = _Analyzer(clock)
+        loop.arbiter = ChannelArbiter()
+        loop.client = _Client()
+
+        class _Monitor:
+            def poll(self):
+                return _state(pending=1, idle=1, last_event=clock.time())
+
+        loop.log_monitor = _Monitor()
+        actions = []
+        for _ in range(30):                                   # 30 × 5s = 150s，超过 90s 兜底阈值
+            clock.advance(5)
+            loop._tick()
+            actions.append(loop._last_decision_action)
+        self.assertEqual(loop.analyzer.analyze_calls, 0)
+        self.assertNotIn(Action.SEND_CONTINUE.value, actions)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,137 @@
+# -*- coding: utf-8 -*-
+"""
+配置热加载 — 文件变化检测 / 校验失败保留旧配置 / 命令行覆盖固定 / 推送到运行中的组件
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from types import SimpleNamespace
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import ExecutorConfig, UIStatus
+from src.config_watcher import ConfigDelta, ConfigWatcher
+from src.main import ExecutorLoop
+from src.model_lifecycle import ModelLifecycle
+
+
+def _write(path: Path, data: dict, bump: float) -> None:
+    path.write_text(json.dumps(data), encoding="utf-8")
+    # 同一秒内多次写入时 mtime 可能不变，显式推进
+    os.utime(path, (bump, bump))
+
+
+class TestConfigWatcher(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.path = Path(self._tmp.name) / "executor.json"
+        self.clock = VirtualClock(start=1_700_000_000.0)
+        _write(self.path, {"stall_threshold": 4, "network_backoff_max": 120}, 1_000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def _watcher(self, **kwargs) -> ConfigWatcher:
+        return ConfigWatcher(self.path, env_file=None, check_interval=5, clock=self.clock, **kwargs)
+
+    def test_delta_splits_hot_and_restart_fields(self):
+        watcher = self._watcher()
+        _write(self.path, {"stall_threshold": 8, "network_backoff_max": 300, "ui_port": 5099}, 2_000)
+        self.assertIsNone(watcher.poll())              # 节流窗口内不检查
+        self.clock.advance(5)
+        delta = watcher.poll()
+        self.assertEqual(delta.changes, {"stall_threshold": 8, "network_backoff_max": 300})
+        self.assertEqual(delta.restart_required, ["ui_port"])
+        self.assertEqual(delta.previous["stall_threshold"], 4)
+        self.clock.advance(5)
+        self.assertIsNone(watcher.poll())              # 文件未再变化
+
+    def test_invalid_file_keeps_current_config(self):
+        watcher = self._watcher()
+        self.path.write_text("{broken", encoding="utf-8")
+        os.utime(self.path, (2_000, 2_000))
+        self.clock.advance(5)
+        self.assertIsNone(watcher.poll())
+        _write(self.path, {"stall_threshold": "many"}, 3_000)
+        self.clock.advance(5)
+        self.assertIsNone(watcher.poll())
+        self.assertEqual(watcher.failures, 2)
+        self.assertEqual(watcher.config.stall_threshold, 4)
+
+        _write(self.path, {"stall_threshold": 6, "network_backoff_max": 120}, 4_000)
+        self.clock.advance(5)
+        self.assertEqual(watcher.poll().changes, {"stall_threshold": 6})
+
+    def test_fields_copied_into_backends_require_restart(self):
+        delta = ConfigWatcher.diff(
+            ExecutorConfig(),
+            ExecutorConfig(model_name="qwen2.5vl:7b", vision_cascade_samples=3, model_warm_interval=60),
+        )
+        self.assertEqual(delta.changes, {"model_warm_interval": 60})
+        self.assertEqual(sorted(delta.restart_required), ["model_name", "vision_cascade_samples"])
+
+    def test_pinned_fields_are_not_overridden(self):
+        watcher = self._watcher(pinned={"stall_threshold"})
+        _write(self.path, {"stall_threshold": 9, "network_backoff_max": 60}, 2_000)
+        self.clock.advance(5)
+        self.assertEqual(watcher.poll().changes, {"network_backoff_max": 60})
+
+
+class TestApplyConfigDelta(unittest.TestCase):
+    def test_thresholds_update_without_resetting_recovery(self):
+        clock = VirtualClock(start=1_700_000_000.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            config = ExecutorConfig(
+                log_dir=tmp, no_ui=True, disable_vision=True, metrics_enabled=False,
+                run_journal_enabled=False, config_watch_enabled=False,
+                status_trigger_threshold=1, min_send_interval=0, network_backoff_jitter_ratio=0.0,
+                circuit_breaker_failure_threshold=2, circuit_breaker_open_seconds=90,
+            )
+            loop = ExecutorLoop(config, clock=clock)
+            try:
+                devplan = {"action": "wait", "subTask": {"taskId": "T47.1", "title": "x"}}
+                for _ in range(2):
+                    loop.engine.decide(devplan, UIStatus.CONNECTION_ERROR, screen_changing=False)
+                self.assertEqual(loop.engine.tracker.resolve_circuit_state(), "open")
+
+                applied = loop.apply_config_delta(ConfigDelta(
+                    changes={"stall_threshold": 9, "network_backoff_max": 300, "poll_interval": 20},
+                    restart_required=["ui_port"],
+                ))
+                self.assertEqual(sorted(applied), ["network_backoff_max", "poll_interval", "stall_threshold"])
+                self.assertEqual(loop.engine.network_backoff_max, 300)
+                self.assertEqual(loop.gui.config.stall_threshold, 9)
+                self.assertEqual(loop.scheduler.base_interval, 20)
+                # 进行中的熔断窗口不受影响
+                self.assertEqual(loop.engine.tracker.resolve_circuit_state(), "open")
+                self.assertAlmostEqual(loop.engine.tracker.get_circuit_open_remaining(), 90.0)
+            finally:
+                loop.recovery.close()
+
+    def test_lifecycle_fields_reach_live_analyzer(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            config = ExecutorConfig(
+                log_dir=tmp, no_ui=True, disable_vision=True, metrics_enabled=False,
+                run_journal_enabled=False, config_watch_enabled=False,
+            )
+            loop = ExecutorLoop(config, clock=VirtualClock())
+            try:
+                lifecycle = ModelLifecycle(None, "gemma3:27b", keep_alive="30m", warm_interval=240)
+                loop._analyzer = SimpleNamespace(lifecycle=lifecycle, cascade_lifecycle=None)
+                loop.apply_config_delta(ConfigDelta(changes={"model_keep_alive": "2h", "model_warm_interval": 60}))
+                self.assertEqual((lifecycle.keep_alive, lifecycle.keep_alive_seconds), ("2h", 7200))
+                self.assertEqual(lifecycle.warm_interval, 60)
+            finally:
+                loop.recovery.close()
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,237 @@
+# -*- coding: utf-8 -*-
+"""
+对话上下文预算 — token 估算 / 预算耗尽阈值 / 引擎在安全点预防性开新对话
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from types import SimpleNamespace
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import ExecutorConfig, UIStatus
+from src.context_budget import ContextBudget, estimate_tokens
+from src.engine import Action, DualChannelEngine
+from src.main import ExecutorLoop
+from src.recovery_manager import RecoveryManager
+
+
+def _send_task_data(task_id: str = "T1.2") -> dict:
+    return {
+        "action": "send_task",
+        "phase": {"taskId": "phase-1"},
+        "subTask": {"taskId": task_id, "title": "实现登录", "description": "补充单元测试"},
+    }
+
+
+def _engine(budget: ContextBudget) -> DualChannelEngine:
+    engine = DualChannelEngine(status_trigger_threshold=1, min_send_interval=0)
+    engine.context_budget = budget
+    return engine
+
+
+class TestEstimate(unittest.TestCase):
+    def test_wide_chars_count_as_one_token(self):
+        self.assertEqual(estimate_tokens(""), 0)
+        self.assertEqual(estimate_tokens("abcdefgh"), 2)
+        self.assertEqual(estimate_tokens("实现登录"), 4)
+        self.assertEqual(estimate_tokens("实现 login"), 2 + 2)
+
+
+class TestContextBudget(unittest.TestCase):
+    def test_exhausted_at_trigger_ratio(self):
+        budget = ContextBudget(budget_tokens=10_000, trigger_ratio=0.8, tool_call_tokens=1000, turn_tokens=500)
+        budget.record_send("abcd" * 100)                      # 100 + 500
+        budget.record_continue()                              # 500
+        budget.record_tool_calls(6)                           # 6000
+        self.assertEqual(budget.estimated_tokens, 7100)
+        self.assertFalse(budget.exhausted)
+        budget.record_tool_calls(1)
+        self.assertTrue(budget.exhausted)
+        self.assertEqual((budget.turns, budget.tool_calls), (2, 7))
+
+        budget.reset(planned=True)
+        self.assertEqual((budget.estimated_tokens, budget.rotations), (0, 1))
+
+    def test_observed_usage_follows_latest_reading(self):
+        budget = ContextBudget(budget_tokens=10_000)
+        budget.record_continue()
+        budget.observe_usage(9_000, seq=1)
+        self.assertTrue(budget.exhausted)
+        budget.observe_usage(3_000, seq=2)
+        self.assertEqual(budget.estimated_tokens, 3_000)
+        budget.observe_usage(9_500, seq=2)                    # 同一序号重复上报被忽略
+        self.assertEqual(budget.estimated_tokens, 3_000)
+
+    def test_reset_ignores_previous_conversation_reading(self):
+        budget = ContextBudget(budget_tokens=200_000, turn_tokens=0)
+        budget.observe_usage(170_000, seq=4)
+        self.assertTrue(budget.exhausted)
+        budget.reset(planned=True)
+        budget.observe_usage(170_000, seq=4)                  # 旧对话最后一次读数仍在日志状态里
+        self.assertFalse(budget.exhausted)
+        budget.observe_usage(9_000, seq=5)
+        self.assertEqual(budget.estimated_tokens, 9_000)
+
+    def test_snapshot_roundtrip(self):
+        budget = ContextBudget()
+        budget.record_send("x" * 40)
+        budget.observe_usage(5_000, seq=1)
+        restored = ContextBudget()
+        restored.restore(budget.snapshot())
+        self.assertEqual(restored.estimated_tokens, budget.estimated_tokens)
+        self.assertEqual(restored.turns, 1)
+
+
+class TestLoopWiring(unittest.TestCase):
+    def _loop(self, **kwargs) -> ExecutorLoop:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        config = ExecutorConfig(
+            log_dir=tmp.name, no_ui=True, disable_vision=True, metrics_enabled=False,
+            run_journal_enabled=False, config_watch_enabled=False, **kwargs,
+        )
+        loop = ExecutorLoop(config, clock=VirtualClock())
+        self.addCleanup(loop.recovery.close)
+        return loop
+
+    def test_disabled_by_default(self):
+        loop = self._loop()
+        self.assertIsNone(loop.context_budget)
+        self.assertIsNone(loop.engine.context_budget)
+
+    def test_enabled_budget_is_shared_with_engine(self):
+        loop = self._loop(context_budget_enabled=True, context_budget_tokens=50_000)
+        self.assertIs(loop.engine.context_budget, loop.context_budget)
+        self.assertEqual(loop.context_budget.budget_tokens, 50_000)
+
+
+class TestEnginePreemptsOverflow(unittest.TestCase):
+    def test_send_task_becomes_planned_new_conversation(self):
+        budget = ContextBudget(budget_tokens=1_000)
+        budget.observe_usage(900, seq=1)
+        d = _engine(budget).decide(_send_task_data(), UIStatus.IDLE)
+        self.assertEqual(d.action, Action.NEW_CONVERSATION)
+        self.assertEqual((d.reason, d.task_id), ("CONTEXT_BUDGET", "T1.2"))
+        self.assertIn("T1.2 — 实现登录", d.task_content)
+        self.assertIn("已主动开启新对话", d.task_content)
+
+    def test_send_continue_becomes_new_conversation(self):
+        budget = ContextBudget(budget_tokens=1_000)
+        budget.observe_usage(900, seq=1)
+        d = _engine(budget).decide({"action": "wait", "subTask": {"taskId": "T1"}}, UIStatus.IDLE)
+        self.assertEqual((d.action, d.reason), (Action.NEW_CONVERSATION, "CONTEXT_BUDGET"))
+
+    def test_active_generation_is_not_interrupted(self):
+        budget = ContextBudget(budget_tokens=1_000)
+        budget.observe_usage(900, seq=1)
+        d = _engine(budget).decide(_send_task_data(), UIStatus.AI_GENERATING, screen_changing=True)
+        self.assertEqual(d.action, Action.WAIT)
+
+    def test_under_budget_keeps_decision(self):
+        d = _engine(ContextBudget()).decide(_send_task_data(), UIStatus.IDLE)
+        self.assertEqual((d.action, d.reason), (Action.SEND_TASK, ""))
+
+    def test_real_overflow_keeps_empty_reason(self):
+        d = _engine(ContextBudget()).decide(_send_task_data(), UIStatus.CONTEXT_OVERFLOW)
+        self.assertEqual((d.action, d.reason), (Action.NEW_CONVERSATION, ""))
+
+
+def _log_state(tool_calls: int = 0, tokens: int = 0, seq: int = 0) -> SimpleNamespace:
+    return SimpleNamespace(total_tool_calls=tool_calls, last_request_tokens=tokens, token_usage_events=seq)
+
+
+class _Result:
+    def __init__(self, success: bool):
+        self.success = success
+        self.message = "ok" if success else "失败"
+        self.queued = False
+        self.verdict = "sent" if success else "failed"     # ROI 已确认发送，跳过发送后视觉复核
+
+
+class _Gui:
+    available = True
+
+    def __init__(self, ok: bool = True):
+        self.ok = ok
+        self.sent: list[str] = []
+
+    def new_conversation(self):
+        return _Result(self.ok)
+
+    def send_task(self, text):
+        self.sent.append(text)
+        return _Result(True)
+
+    def send_continue(self):
+        return _Result(True)
+
+
+class _Client:
+    def recall_unified(self, query, **_kwargs):
+        return {"memories": []}
+
+    def save_memory(self, **_kwargs):
+        return {"status": "saved"}
+
+
+class TestLoopFeedsBudget(unittest.TestCase):
+    def test_tool_call_delta_and_session_switch(self):
+        loop = ExecutorLoop.__new__(ExecutorLoop)
+        loop.context_budget = ContextBudget(tool_call_tokens=100, turn_tokens=0)
+        loop._budget_tool_calls_seen = 0
+        loop._update_context_budget(_log_state(tool_calls=3))
+        loop._update_context_budget(_log_state(tool_calls=5))
+        self.assertEqual(loop.context_budget.estimated_tokens, 500)
+        # 新 session 日志计数从 0 开始
+        loop._update_context_budget(_log_state(tool_calls=1))
+        self.assertEqual(loop.context_budget.tool_calls, 6)
+        loop._update_context_budget(_log_state(tool_calls=1, tokens=2_000, seq=1))
+        self.assertEqual(loop.context_budget.estimated_tokens, 2_000)
+
+    def _rotate(self, gui: _Gui) -> ExecutorLoop:
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        loop = ExecutorLoop.__new__(ExecutorLoop)
+        loop.config = SimpleNamespace(executor_id="executor-test")
+        loop.client = _Client()
+        loop.gui = gui
+        loop.clock = VirtualClock()
+        loop.recovery = RecoveryManager("test-project", log_dir=self._tmp.name, max_events=20)
+        loop._last_recovery_memory_fingerprint = ""
+        loop._last_ui_status = UIStatus.IDLE
+        loop._last_devplan_data = _send_task_data()
+        loop.context_budget = ContextBudget(budget_tokens=200_000)
+        loop._budget_tool_calls_seen = 0
+        loop._update_context_budget(_log_state(tokens=170_000, seq=3))
+        engine = _engine(loop.context_budget)
+        decision = engine.decide(_send_task_data(), UIStatus.IDLE)
+        self.assertEqual(decision.reason, "CONTEXT_BUDGET")
+        loop._execute(decision)
+        return loop
+
+    def test_rotate_then_tick_does_not_rotate_again(self):
+        loop = self._rotate(_Gui())
+        self.assertEqual(loop.context_budget.rotations, 1)
+        # 下一轮日志状态仍带着旧对话的最后一次读数
+        loop._update_context_budget(_log_state(tokens=170_000, seq=3))
+        self.assertFalse(loop.context_budget.exhausted)
+        d = _engine(loop.context_budget).decide(_send_task_data(), UIStatus.IDLE)
+        self.assertEqual(d.action, Action.SEND_TASK)
+        loop._update_context_budget(_log_state(tokens=9_000, seq=4))
+        self.assertEqual(loop.context_budget.estimated_tokens, 9_000)
+
+    def test_failed_injection_keeps_budget(self):
+        loop = self._rotate(_Gui(ok=False))
+        self.assertEqual(loop.context_budget.rotations, 0)
+        self.assertTrue(loop.context_budget.exhausted)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -542,6 +542,10 @@ class TestVisionAnalyzerDiagnostics(unittest.TestCase):
         analyzer._pil_image = None
         analyzer._pyautogui = None
         analyzer._available = True
+        analyzer.lifecycle = None
+        analyzer.backends = []
+        analyzer.stats = {"calls": 0, "cache_hits": 0, "errors": 0, "early_exits": 0, "latency_ms_total": 0.0}
+        analyzer._result_cache = None
         p = Path(config.log_dir)
         p.mkdir(parents=True, exist_ok=True)
         img = p / "dummy.png"
@@ -567,6 +571,9 @@ class TestVisionAnalyzerDiagnostics(unittest.TestCase):
         analyzer._available = False
         analyzer._model_tested = False
         analyzer._model_ready = False
+        analyzer.lifecycle = None
+        analyzer.cascade_lifecycle = None
+        analyzer.backends = []
         # __new__ 跳过了 __init__，需手动设置截图路径属性
         analyzer._log_dir = Path(config.log_dir)
         analyzer._snapshot_path = str(analyzer._log_dir / "snapshot.png")
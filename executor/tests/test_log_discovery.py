@@ -0,0 +1,116 @@
+# -*- coding: utf-8 -*-
+"""
+Cursor 会话日志发现索引 — 增量跟进新 session / 新窗口 / 窗口归属 / 多窗口日志监控
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.log_discovery import SessionLogIndex
+from src.log_monitor import CursorLogMonitor
+
+OWNERS = {"window1": "executor-a", "window2": "executor-b"}
+START_LINE = "ToolCallEventService: Tracked tool call start - call_{n} (read_file)\n"
+
+
+def _log(root: Path, session: str, window: str, text: str = "") -> Path:
+    path = root / session / window / "renderer.log"
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+    return path
+
+
+def _bump(path: Path, mtime: float) -> None:
+    # 同一秒内创建目录时 mtime 可能不变，显式推进
+    os.utime(path, (mtime, mtime))
+
+
+class TestSessionLogIndex(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.root = Path(self._tmp.name)
+        for day in range(1, 29):
+            _log(self.root, f"202501{day:02d}T080000", "window1")
+        _log(self.root, "20260101T080000", "window1")
+        _log(self.root, "20260101T080000", "window2")
+        _bump(self.root, 1_000)
+
+    def tearDown(self):
+        self._tmp.cleanup()
+
+    def test_tracks_all_windows_of_latest_session_with_owners(self):
+        index = SessionLogIndex(self.root, window_owners=OWNERS)
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.session, "20260101T080000")
+        self.assertEqual([log.window for log in index.logs()], ["window1", "window2"])
+        self.assertEqual([log.window for log in index.for_owner("executor-b")], ["window2"])
+        self.assertEqual(index.stats["sessions_checked"], 1)
+
+        self.assertFalse(index.refresh())
+        self.assertEqual(index.stats["dir_listings"], 1)   # 目录未变化不再列出
+
+    def test_default_owner_gets_window1_only(self):
+        index = SessionLogIndex(self.root, default_owner="executor-a")
+        index.refresh()
+        self.assertEqual([log.window for log in index.for_owner("executor-a")], ["window1"])
+        self.assertEqual(index.owner_of("window2"), "")
+
+    def test_follows_new_session_incrementally(self):
+        index = SessionLogIndex(self.root, window_owners=OWNERS)
+        index.refresh()
+        (self.root / "20260102T090000").mkdir()
+        _bump(self.root, 2_000)
+        self.assertFalse(index.refresh())                   # 新 session 尚无日志
+        self.assertEqual(index.session, "20260101T080000")
+
+        _log(self.root, "20260102T090000", "window1")
+        self.assertTrue(index.refresh())                    # 只复查待定的新目录
+        self.assertEqual(index.session, "20260102T090000")
+        self.assertEqual(index.stats["dir_listings"], 2)
+        self.assertEqual(index.stats["sessions_checked"], 3)
+
+    def test_new_window_in_current_session(self):
+        index = SessionLogIndex(self.root, window_owners=dict(OWNERS, window3="executor-c"))
+        index.refresh()
+        _log(self.root, "20260101T080000", "window3")
+        _bump(self.root / "20260101T080000", 3_000)
+        self.assertTrue(index.refresh())
+        self.assertEqual(index.for_owner("executor-c")[0].window, "window3")
+
+
+class TestMultiWindowMonitor(unittest.TestCase):
+    def test_reads_only_owned_windows_and_follows_new_session(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            root = Path(tmp)
+            w1 = _log(root, "20260101T080000", "window1", "old line\n")
+            w2 = _log(root, "20260101T080000", "window2")
+            monitor = CursorLogMonitor(owner="executor-a", window_owners=OWNERS, logs_dir=root)
+            self.assertTrue(monitor.start())
+            self.assertEqual(monitor.log_paths, [w1])
+
+            with w1.open("a", encoding="utf-8") as f:
+                f.write(START_LINE.format(n=1))
+            with w2.open("a", encoding="utf-8") as f:
+                f.write(START_LINE.format(n=2))
+            state = monitor.poll()
+            self.assertEqual(state.total_tool_calls, 1)
+            self.assertEqual(state.log_files, 1)
+
+            new = _log(root, "20260102T090000", "window1", START_LINE.format(n=3))
+            _bump(root, 2_000)
+            state = monitor.poll()
+            self.assertEqual(monitor.log_paths, [new])
+            self.assertEqual(state.total_tool_calls, 2)     # 新 session 日志从头读取
+            self.assertEqual(state.pending_tool_calls, 2)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
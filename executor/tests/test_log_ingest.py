@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+多源日志采集 — 各来源解析器 / 有界事件总线 / 可插拔注册 / 限流信号直达仲裁器
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.arbiter import ChannelArbiter
+from src.config import UIStatus
+from src.log_ingest import (
+    PARSERS,
+    EventBus,
+    ExtHostLogParser,
+    LogEvent,
+    LogEventType,
+    LogParser,
+    NetworkLogParser,
+    build_parsers,
+    register_parser,
+)
+from src.log_monitor import CursorLogMonitor, LogMonitorState
+
+
+class TestParsers(unittest.TestCase):
+    def test_exthost_signals(self):
+        parser = ExtHostLogParser()
+        e = parser.parse('[warn] chat request failed: status 429 Too Many Requests, retry-after: 30', 0.0)
+        self.assertEqual((e.event_type, e.value, e.source), (LogEventType.RATE_LIMIT, 30.0, "exthost"))
+        e = parser.parse('usage {"prompt_tokens": 1200, "completion_tokens": 300}', 0.0)
+        self.assertEqual((e.event_type, e.value), (LogEventType.TOKEN_USAGE, 1500.0))
+        e = parser.parse('usage {"prompt_tokens": 1200, "total_tokens": 1600}', 0.0)
+        self.assertEqual(e.value, 1600.0)
+        e = parser.parse("[info] model changed to claude-4-sonnet", 0.0)
+        self.assertEqual((e.event_type, e.detail), (LogEventType.MODEL_SWITCH, "claude-4-sonnet"))
+        self.assertIsNone(parser.parse("[info] extension activated", 0.0))
+
+    def test_network_parser_keeps_socket_errors(self):
+        e = NetworkLogParser().parse("[error] request aborted: read ECONNRESET", 0.0)
+        self.assertEqual((e.event_type, e.detail), (LogEventType.NETWORK_ERROR, "ECONNRESET"))
+
+    def test_custom_parser_registration(self):
+        @register_parser
+        class MainLogParser(LogParser):
+            name = "test-main"
+            patterns = ("main.log",)
+
+            def parse(self, line, now):
+                return None
+
+        try:
+            with self.assertLogs("src.log_ingest", level="WARNING"):
+                parsers = build_parsers(["renderer", "test-main", "nope"])
+            self.assertEqual([p.name for p in parsers], ["renderer", "test-main"])
+        finally:
+            PARSERS.pop("test-main", None)
+
+
+class TestEventBus(unittest.TestCase):
+    def test_bounded_drops_oldest(self):
+        bus = EventBus(capacity=3)
+        for i in range(5):
+            bus.publish(LogEvent(LogEventType.TOKEN_USAGE, float(i), "", value=i))
+        self.assertEqual((len(bus), bus.published, bus.dropped), (3, 5, 2))
+        self.assertEqual([e.value for e in bus.drain()], [2, 3, 4])
+        self.assertEqual(len(bus), 0)
+
+
+class TestMultiSourceMonitor(unittest.TestCase):
+    def test_rate_limit_from_exthost_reaches_arbiter(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            window = Path(tmp) / "20260101T080000" / "window1"
+            (window / "exthost" / "anysphere.cursor-always-local").mkdir(parents=True)
+            (window / "exthost" / "GitHub.vscode-pull-request-github").mkdir(parents=True)
+            renderer = window / "renderer.log"
+            exthost = window / "exthost" / "anysphere.cursor-always-local" / "Cursor Always Local.log"
+            other = window / "exthost" / "GitHub.vscode-pull-request-github" / "GitHub Pull Request.log"
+            renderer.write_text("", encoding="utf-8")
+            exthost.write_text("[info] old request status 429\n", encoding="utf-8")
+            other.write_text("", encoding="utf-8")
+            (window / "exthost" / "exthost.log").write_text("", encoding="utf-8")
+
+            monitor = CursorLogMonitor(logs_dir=tmp)
+            self.assertTrue(monitor.start())
+            self.assertEqual(sorted(monitor.log_paths), sorted([renderer, exthost]))
+            self.assertFalse(monitor.poll().rate_limited)            # 启动前的内容不计入
+
+            with other.open("a", encoding="utf-8") as f:
+                f.write("[error] GraphQL request failed: status 429, x-ratelimit-remaining: 0\n")
+            self.assertFalse(monitor.poll().rate_limited)            # 其他扩展的限流不计入
+
+            with exthost.open("a", encoding="utf-8") as f:
+                f.write("[error] 429 Too Many Requests retry-after: 30\n")
+                f.write("[info] switched model to gpt-5\n")
+            state = monitor.poll()
+            self.assertTrue(state.rate_limited)
+            self.assertAlmostEqual(state.retry_after, 30.0, delta=2.0)
+            self.assertEqual(state.model, "gpt-5")
+            self.assertFalse(state.is_ai_active)                      # 限流不算 AI 活动
+            self.assertEqual(monitor.source_stats["exthost"]["events"], 2)
+            self.assertEqual(monitor.source_stats["renderer"]["lines"], 0)
+
+            verdict = ChannelArbiter().assess("wait", state)
+            self.assertFalse(verdict.need_vision)
+            self.assertEqual(verdict.ui_status, UIStatus.RATE_LIMIT)
+
+    def test_active_tool_calls_outweigh_log_rate_limit(self):
+        state = LogMonitorState(rate_limited=True, retry_after=30.0, pending_tool_calls=2,
+                                is_ai_active=True, idle_seconds=1.0, log_file_found=True)
+        verdict = ChannelArbiter().assess("wait", state)
+        self.assertNotEqual(verdict.ui_status, UIStatus.RATE_LIMIT)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
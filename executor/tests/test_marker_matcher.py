@@ -0,0 +1,79 @@
+# -*- coding: utf-8 -*-
+"""
+状态关键词多模式匹配 — Aho-Corasick 单次扫描 / 优先级决胜 / 判定依据 / 与逐个子串查找等价
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import STATUS_MARKERS, UIStatus
+from src.marker_matcher import MarkerMatcher
+from src.vision_analyzer import VisionAnalyzer
+
+
+def _naive(markers: dict, text: str):
+    """原实现：按声明顺序逐个子串查找"""
+    upper = text.upper()
+    for status, words in markers.items():
+        for word in words:
+            if word.upper() in upper:
+                return status
+    return None
+
+
+class TestMarkerMatcher(unittest.TestCase):
+    def test_overlapping_and_suffix_patterns(self):
+        matcher = MarkerMatcher({"A": ["she", "he"], "B": ["hers", "his"]})
+        hits = [(h.marker, h.start) for h in matcher.find_all("ushers")]
+        self.assertEqual(hits, [("she", 1), ("he", 2), ("hers", 2)])
+        m = matcher.match("USHERS")
+        self.assertEqual((m.status, m.markers), ("A", ["she", "he"]))
+        self.assertEqual(matcher.match("his").status, "B")
+        self.assertIsNone(matcher.match("nothing to see"))
+
+    def test_declaration_order_is_priority(self):
+        matcher = MarkerMatcher({"HIGH": ["timeout"], "LOW": ["request"]})
+        m = matcher.match("request failed: timeout")
+        self.assertEqual(m.status, "HIGH")
+        self.assertEqual({h.status for h in m.hits}, {"HIGH", "LOW"})
+
+    def test_equivalent_to_naive_loop(self):
+        rng = random.Random(7)
+        words = [m for ms in STATUS_MARKERS.values() for m in ms]
+        filler = ["the ", "request ", "ok ", "Cursor ", "\n", "重试 "]
+        matcher = MarkerMatcher(STATUS_MARKERS)
+        for _ in range(300):
+            parts = [rng.choice(filler) for _ in range(rng.randint(0, 6))]
+            parts += [rng.choice(words).swapcase() for _ in range(rng.randint(0, 2))]
+            rng.shuffle(parts)
+            text = "".join(parts)
+            m = matcher.match(text)
+            self.assertEqual(m.status if m else None, _naive(STATUS_MARKERS, text), text)
+
+    def test_scales_to_hundreds_of_markers(self):
+        markers = {f"S{i}": [f"marker-{i}-{j}" for j in range(20)] for i in range(30)}
+        matcher = MarkerMatcher(markers)
+        self.assertEqual(matcher.size, 600)
+        m = matcher.match("... MARKER-29-3 ... marker-7-5 ...")
+        self.assertEqual((m.status, m.markers), ("S7", ["marker-7-5"]))
+
+
+class TestExplainStatus(unittest.TestCase):
+    def test_enum_name_beats_markers_and_is_reported(self):
+        status, why = VisionAnalyzer._explain_status("RATE_LIMIT")
+        self.assertEqual((status, why), (UIStatus.RATE_LIMIT, ["RATE_LIMIT"]))
+
+    def test_fallback_is_idle_without_evidence(self):
+        self.assertEqual(VisionAnalyzer._explain_status(""), (UIStatus.IDLE, []))
+        self.assertEqual(VisionAnalyzer._parse_status("all quiet"), UIStatus.IDLE)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
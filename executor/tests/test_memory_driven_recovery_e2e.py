@@ -14,14 +14,23 @@ import os
 import sys
 import tempfile
 import unittest
+from types import SimpleNamespace
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
-import src.main as main_module
+from src.clock import VirtualClock
 from src.config import UIStatus
+from src.cursor_controller import SendResult
 from src.engine import Action, Decision
 from src.main import ExecutorLoop
 from src.recovery_manager import RecoveryManager
+from src.send_confirm import SendVerdict
+
+
+def _send_result(success: bool = True, message: str = "ok") -> SendResult:
+    """GUI 发送结果：成功时视为 ROI 已确认文本离开输入框（verdict=sent）"""
+    verdict = SendVerdict.SENT if success else SendVerdict.FAILED
+    return SendResult(success, message, verdict=verdict.value)
 
 
 class _FakeClient:
@@ -50,13 +59,6 @@ class _FakeClient:
         return {"status": "saved"}
 
 
-class _FakeResult:
-    def __init__(self, success=True, message="ok", queued=False):
-        self.success = success
-        self.message = message
-        self.queued = queued
-
-
 class _FakeGui:
     available = True
 
@@ -67,15 +69,15 @@ class _FakeGui:
 
     def new_conversation(self):
         self.new_count += 1
-        return _FakeResult(True, "ok")
+        return _send_result(True, "ok")
 
     def send_task(self, text):
         self.sent.append(text)
-        return _FakeResult(True, "ok")
+        return _send_result(True, "ok")
 
     def send_continue(self):
         self.continue_count += 1
-        return _FakeResult(True, "ok")
+        return _send_result(True, "ok")
 
 
 class _FakeConfig:
@@ -103,12 +105,8 @@ class TestMemoryDrivenRecoveryE2E(unittest.TestCase):
             )
             self.assertTrue(cp.checkpoint_prompt)
 
-            original_sleep = main_module.time.sleep
-            try:
-                main_module.time.sleep = lambda *_a, **_k: None
-                loop._attempt_startup_recovery()
-            finally:
-                main_module.time.sleep = original_sleep
+            loop.clock = VirtualClock()
+            loop._attempt_startup_recovery()
 
             self.assertEqual(loop.gui.new_count, 1)
             self.assertEqual(len(loop.gui.sent), 1)
@@ -129,24 +127,21 @@ class TestMemoryDrivenRecoveryE2E(unittest.TestCase):
             loop.gui = _FakeGui()
             loop.recovery = RecoveryManager("aifastdb-devplan", log_dir=tmp, max_events=20)
             loop._last_recovery_memory_fingerprint = ""
+            loop.context_budget = None
             loop._last_ui_status = UIStatus.CONTEXT_OVERFLOW
             loop._last_devplan_data = {
                 "phase": {"taskId": "phase-88", "title": "记忆驱动恢复"},
                 "subTask": {"taskId": "T88.5", "title": "端到端测试", "description": "验证链路"},
             }
 
-            original_sleep = main_module.time.sleep
-            try:
-                main_module.time.sleep = lambda *_a, **_k: None
-                decision = Decision(
-                    action=Action.NEW_CONVERSATION,
-                    message="上下文溢出，开新对话恢复 T88.5",
-                    task_id="T88.5",
-                    cooldown_seconds=1,
-                )
-                loop._execute(decision)
-            finally:
-                main_module.time.sleep = original_sleep
+            loop.clock = VirtualClock()
+            decision = Decision(
+                action=Action.NEW_CONVERSATION,
+                message="上下文溢出，开新对话恢复 T88.5",
+                task_id="T88.5",
+                cooldown_seconds=1,
+            )
+            loop._execute(decision)
 
             self.assertEqual(loop.gui.new_count, 1)
             self.assertEqual(len(loop.gui.sent), 1)
@@ -160,6 +155,32 @@ class TestMemoryDrivenRecoveryE2E(unittest.TestCase):
             self.assertTrue((loop.recovery.log_dir / "checkpoint_prompt.txt").exists())
 
 
+class TestPostSendCheck(unittest.TestCase):
+    def _loop(self, queued: bool) -> ExecutorLoop:
+        loop = ExecutorLoop.__new__(ExecutorLoop)
+        loop.vision_enabled = True
+        loop.arbiter = None
+        loop.log_monitor = None
+        loop.gui = _FakeGui()
+        loop.gui.keys = []
+        loop.gui.press_key = lambda key: loop.gui.keys.append(key) or True
+        loop._analyzer = SimpleNamespace(
+            available=True,
+            check_send_queued_after_delay=lambda delay_seconds: (queued, "stub"),
+        )
+        return loop
+
+    def test_roi_confirmed_send_skips_vision(self):
+        loop = self._loop(queued=True)
+        loop._post_send_vision_check("test", result=_send_result(True))
+        self.assertEqual(loop.gui.keys, [])
+
+    def test_unconfirmed_send_falls_back_to_vision(self):
+        loop = self._loop(queued=True)
+        loop._post_send_vision_check("test", result=SendResult(True, "ok", verdict=SendVerdict.AMBIGUOUS.value))
+        self.assertEqual(loop.gui.keys, ["enter"])
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
 
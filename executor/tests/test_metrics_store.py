@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+"""
+运行指标存储 — SQLite 时间序列写入 / 降采样 / 保留策略测试
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.metrics_store import MetricsStore, TickMetrics, parse_range
+
+
+class TestParseRange(unittest.TestCase):
+    def test_units(self):
+        self.assertEqual(parse_range("90"), 90)
+        self.assertEqual(parse_range("30m"), 1800)
+        self.assertEqual(parse_range("6h"), 6 * 3600)
+        self.assertEqual(parse_range("7d"), 7 * 86400)
+
+    def test_invalid_falls_back_to_default(self):
+        self.assertEqual(parse_range("abc", default=10), 10)
+        self.assertEqual(parse_range("", default=10), 10)
+        self.assertEqual(parse_range("0h", default=10), 10)
+
+
+class TestMetricsStore(unittest.TestCase):
+    def setUp(self):
+        self._tmp = tempfile.TemporaryDirectory()
+        self.store = MetricsStore(log_dir=self._tmp.name, raw_retention_hours=1, retention_days=1)
+
+    def tearDown(self):
+        self.store.close()
+        self._tmp.cleanup()
+
+    def test_short_range_returns_raw_ticks(self):
+        now = 1_000_000.0
+        self.store.record(TickMetrics(ts=now - 30, tick=1, total_ms=100.0, vision_ms=80.0,
+                                      action="wait", vision_calls=1, rss_mb=50.0))
+        self.store.record(TickMetrics(ts=now - 10, tick=2, total_ms=200.0, action="send_continue",
+                                      network_errors=1))
+        data = self.store.query("1h", now=now)
+        self.assertEqual(data["resolution"], 0)
+        self.assertEqual(len(data["points"]), 2)
+        first, second = data["points"]
+        self.assertEqual(first["vision_ms"], 80.0)
+        self.assertEqual(first["decisions"], {"wait": 1})
+        self.assertEqual(second["network_errors"], 1)
+
+    def test_long_range_uses_minute_rollup(self):
+        bucket = 1_000_020.0 // 60 * 60
+        for i in range(3):
+            self.store.record(TickMetrics(ts=bucket + i, tick=i, total_ms=100.0 * (i + 1),
+                                          action="wait" if i else "send_task", vision_calls=1))
+        data = self.store.query("6h", now=bucket + 30)
+        self.assertEqual(data["resolution"], 60)
+        self.assertEqual(len(data["points"]), 1)
+        point = data["points"][0]
+        self.assertEqual(point["ticks"], 3)
+        self.assertAlmostEqual(point["total_ms"], 200.0)  # 平均值
+        self.assertEqual(point["total_ms_max"], 300.0)
+        self.assertEqual(point["vision_calls"], 3)
+        self.assertEqual(point["decisions"], {"wait": 2, "send_task": 1})
+
+    def test_prune_drops_expired_rows(self):
+        now = 2_000_000.0
+        self.store.record(TickMetrics(ts=now - 2 * 86400, tick=1, total_ms=1.0, action="wait"))
+        self.store.record(TickMetrics(ts=now - 5, tick=2, total_ms=2.0, action="wait"))
+        self.store.prune(now=now)
+        self.assertEqual(len(self.store.query("1h", now=now)["points"]), 1)
+        self.assertEqual(len(self.store.query("7d", now=now)["points"]), 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
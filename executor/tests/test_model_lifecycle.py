@@ -0,0 +1,111 @@
+# -*- coding: utf-8 -*-
+"""
+视觉模型生命周期 — 预加载 / 空闲保温 / 失败后就绪重检 / 冷启动统计
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.model_lifecycle import ModelLifecycle, duration_seconds
+
+
+class _FakeOllama:
+    """模拟 Ollama：installed 控制模型是否存在，loaded 表示是否已在显存"""
+
+    def __init__(self, clock: VirtualClock, load_seconds: float = 8.0):
+        self.clock = clock
+        self.load_seconds = load_seconds
+        self.installed = True
+        self.loaded = False
+        self.up = True
+        self.generates: list[dict] = []
+
+    def list(self):
+        if not self.up:
+            raise ConnectionError("ollama down")
+        return {"models": [{"name": "gemma3:27b"}] if self.installed else []}
+
+    def generate(self, **kwargs):
+        if not self.up:
+            raise ConnectionError("ollama down")
+        self.generates.append(kwargs)
+        load = 0.0 if self.loaded else self.load_seconds
+        self.loaded = True
+        self.clock.advance(load)
+        return {"load_duration": int(load * 1e9)}
+
+
+def _make(clock: VirtualClock, ollama: _FakeOllama) -> ModelLifecycle:
+    return ModelLifecycle(
+        ollama, "gemma3:27b", clock=clock, keep_alive="30m",
+        warm_interval=240, recheck_interval=30, background=False,
+    )
+
+
+class TestModelLifecycle(unittest.TestCase):
+    def test_preload_and_idle_warm_pings(self):
+        clock = VirtualClock()
+        ollama = _FakeOllama(clock)
+        lc = _make(clock, ollama)
+        lc.preload()
+        self.assertTrue(lc.ready)
+        self.assertEqual(lc.stats["preloads"], 1)
+        self.assertEqual(lc.stats["cold_starts"], 1)
+        self.assertAlmostEqual(lc.stats["last_load_seconds"], 8.0)
+        self.assertEqual(ollama.generates[0]["keep_alive"], "30m")
+
+        clock.advance(100)
+        self.assertFalse(lc.keep_warm())          # 未到保温间隔
+        lc.note_call(0.4)                         # 正常调用刷新活动时间
+        clock.advance(239)
+        self.assertFalse(lc.keep_warm())
+        clock.advance(2)
+        self.assertTrue(lc.keep_warm())
+        self.assertEqual(lc.stats["warm_pings"], 1)
+        self.assertEqual(lc.stats["cold_starts"], 1)   # 模型仍驻留，保温不算冷启动
+
+    def test_readiness_is_rechecked_after_failures(self):
+        clock = VirtualClock()
+        ollama = _FakeOllama(clock)
+        ollama.up = False
+        lc = _make(clock, ollama)
+        self.assertFalse(lc.ensure_ready())
+        ollama.up = True
+        self.assertFalse(lc.ensure_ready())       # 重检限频
+        clock.advance(31)
+        self.assertTrue(lc.ensure_ready())
+        self.assertEqual(lc.stats["preloads"], 1)  # 恢复后立即预加载
+
+        lc.note_failure()
+        self.assertTrue(lc.ready)
+        lc.note_failure()
+        self.assertFalse(lc.ready)
+        ollama.installed = False
+        self.assertFalse(lc.ensure_ready())
+        self.assertEqual(lc.stats["readiness_checks"], 3)
+
+    def test_slow_call_after_keep_alive_expiry_counts_as_cold_start(self):
+        clock = VirtualClock()
+        lc = _make(clock, _FakeOllama(clock))
+        lc.note_call(0.5)
+        clock.advance(3600)
+        lc.note_call(9.0)
+        self.assertEqual(lc.stats["cold_starts"], 1)
+        self.assertEqual(lc.diagnostics()["max_load_seconds"], 9.0)
+
+    def test_duration_parsing(self):
+        self.assertEqual(duration_seconds("30m"), 1800)
+        self.assertEqual(duration_seconds("1h"), 3600)
+        self.assertEqual(duration_seconds(90), 90)
+        self.assertEqual(duration_seconds("-1"), float("inf"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -7,6 +7,7 @@ T86.5 — 网络故障注入回归测试
 2) circuit breaker 的 open/half-open/closed 状态流转
 3) 最大恢复窗口超窗后的 ERROR_RECOVERY 保护模式
 4) ERROR_RECOVERY 下 dead-letter 写入与去重
+5) 虚拟时钟快速模式下的批量恢复循环
 """
 
 from __future__ import annotations
@@ -19,10 +20,12 @@ import unittest
 # 确保 src 在路径上
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from src.clock import VirtualClock
 from src.config import ExecutorConfig, UIStatus
+from src.cursor_controller import CursorController, SendResult
 from src.engine import Action, Decision, DualChannelEngine
 from src.main import ExecutorLoop
-import src.main as main_module
+from src.send_confirm import SendVerdict
 
 
 def make_devplan_wait(task_id: str = "T86.5") -> dict:
@@ -51,6 +54,12 @@ def make_engine(**kwargs) -> DualChannelEngine:
     return DualChannelEngine(**defaults)
 
 
+def _send_result(success: bool = True, message: str = "ok") -> SendResult:
+    """GUI 发送结果：成功时视为 ROI 已确认文本离开输入框（verdict=sent）"""
+    verdict = SendVerdict.SENT if success else SendVerdict.FAILED
+    return SendResult(success, message, verdict=verdict.value)
+
+
 class TestNetworkBackoffAndCircuitBreaker(unittest.TestCase):
     def test_backoff_cooldown_is_applied(self):
         engine = make_engine()
@@ -114,6 +123,92 @@ class TestRecoveryWindow(unittest.TestCase):
         self.assertIn("恢复窗口已超时", d.message)
 
 
+class _FakeAutoGui:
+    def __init__(self) -> None:
+        self.presses = 0
+
+    def hotkey(self, *keys):
+        pass
+
+    def press(self, key):
+        self.presses += 1
+
+    def click(self, **kwargs):
+        pass
+
+    def size(self):
+        return (1920, 1080)
+
+
+class _FakeClipboard:
+    def copy(self, text):
+        pass
+
+
+class TestFastModeRecoveryCycles(unittest.TestCase):
+    """虚拟时钟下的端到端恢复循环：引擎 + 真实 CursorController.send_text，不产生真实等待"""
+
+    def _make_gui(self, clock: VirtualClock, config: ExecutorConfig) -> CursorController:
+        gui = CursorController.__new__(CursorController)
+        gui.config = config
+        gui.clock = clock
+        gui._delays = CursorController.resolve_delays(config)
+        gui._available = True
+        gui._pyautogui = _FakeAutoGui()
+        gui._pyperclip = _FakeClipboard()
+        gui._pygetwindow = None
+        gui._last_send_time = 0.0
+        gui.timing = None
+        gui.confirm = None
+        gui._input_point = None
+        gui._geometry = None
+        gui.input_locator = None
+        gui.window_cache_stats = {"hits": 0, "enumerations": 0, "invalidations": 0, "vision_locates": 0}
+        return gui
+
+    def test_thousands_of_recovery_cycles_run_in_virtual_time(self):
+        clock = VirtualClock(start=1_700_000_000.0)
+        config = ExecutorConfig(min_send_interval=5.0)
+        engine = make_engine(clock=clock)
+        gui = self._make_gui(clock, config)
+        cycles = 2000
+
+        started_wall = time.perf_counter()
+        started_virtual = clock.time()
+        sends = 0
+        for _ in range(cycles):
+            for _ in range(20):
+                d = engine.decide(make_devplan_wait(), UIStatus.CONNECTION_ERROR, screen_changing=False)
+                if d.action == Action.SEND_CONTINUE:
+                    result = gui.send_continue()
+                    self.assertTrue(result.success, result.message)
+                    sends += 1
+                    break
+                clock.advance(max(1, d.cooldown_seconds))
+            # AI 恢复：主循环在屏幕重新变化时清零重试与网络弹性状态
+            clock.advance(10)
+            engine.reset_continue_retries()
+            d = engine.decide(make_devplan_wait(), UIStatus.AI_GENERATING, screen_changing=True)
+            self.assertEqual(d.action, Action.WAIT)
+            clock.advance(10)
+
+        self.assertEqual(sends, cycles)
+        self.assertEqual(gui._pyautogui.presses, cycles)
+        self.assertEqual(engine.tracker.circuit_state, "closed")
+        # send_text 的 GUI 等待全部计入虚拟时间
+        self.assertGreater(clock.time() - started_virtual, cycles * 20)
+        self.assertLess(time.perf_counter() - started_wall, 10.0)
+
+    def test_gui_delays_are_configurable(self):
+        config = ExecutorConfig(gui_delays={"paste": 0.9, "bogus": 1.0}, gui_delay_scale=2.0)
+        delays = CursorController.resolve_delays(config)
+        self.assertEqual(delays["paste"], 1.8)
+        self.assertEqual(delays["clipboard"], 0.4)
+        self.assertNotIn("bogus", delays)
+        self.assertTrue(all(v == 0 for v in CursorController.resolve_delays(
+            ExecutorConfig(gui_delay_scale=0.0)).values()))
+
+
 class _FakeClient:
     def __init__(self) -> None:
         self.calls: list[dict] = []
@@ -149,6 +244,8 @@ class TestDeadLetterIntegration(unittest.TestCase):
     def test_post_send_vision_check_queued_triggers_enter(self):
         loop = ExecutorLoop.__new__(ExecutorLoop)
         loop.vision_enabled = True
+        loop.arbiter = None
+        loop.log_monitor = None
 
         class _A:
             available = True
@@ -273,6 +370,7 @@ class TestDeadLetterIntegration(unittest.TestCase):
         loop = ExecutorLoop.__new__(ExecutorLoop)
         loop.config = _FakeConfig()
         loop.client = _FakeClient()
+        loop.clock = VirtualClock()
         loop._last_startup_restore_fingerprint = ""
 
         class _CP:
@@ -294,12 +392,6 @@ class TestDeadLetterIntegration(unittest.TestCase):
                 extra = "\n".join(f"- {x}" for x in recalled_memories)
                 return "[FINAL_RECOVERY_PROMPT_V1]\n" + (base_checkpoint_prompt or checkpoint.checkpoint_prompt) + "\n" + extra
 
-        class _FakeResult:
-            def __init__(self, success=True, message="ok", queued=False):
-                self.success = success
-                self.message = message
-                self.queued = queued
-
         class _FakeGui:
             available = True
 
@@ -309,11 +401,11 @@ class TestDeadLetterIntegration(unittest.TestCase):
 
             def new_conversation(self):
                 self.new_count += 1
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
             def send_task(self, text):
                 self.sent.append(text)
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
         loop.recovery = _FakeRecovery()
         loop.gui = _FakeGui()
@@ -335,6 +427,7 @@ class TestDeadLetterIntegration(unittest.TestCase):
         loop.config = _FakeConfig()
         loop.client = _FakeClient()
         loop._last_recovery_memory_fingerprint = ""
+        loop.context_budget = None
         loop._last_ui_status = UIStatus.CONTEXT_OVERFLOW
         loop._last_devplan_data = {
             "phase": {"taskId": "phase-87", "title": "上下文溢出恢复增强"},
@@ -373,12 +466,6 @@ class TestDeadLetterIntegration(unittest.TestCase):
                 extra = "\n".join(f"- {x}" for x in recalled_memories)
                 return "[FINAL_RECOVERY_PROMPT_V1]\n" + (base_checkpoint_prompt or checkpoint.checkpoint_prompt) + "\n" + extra
 
-        class _FakeResult:
-            def __init__(self, success=True, message="ok", queued=False):
-                self.success = success
-                self.message = message
-                self.queued = queued
-
         class _FakeGui:
             available = True
 
@@ -389,31 +476,27 @@ class TestDeadLetterIntegration(unittest.TestCase):
 
             def new_conversation(self):
                 self.new_count += 1
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
             def send_task(self, text):
                 self.sent.append(text)
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
             def send_continue(self):
                 self.continue_count += 1
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
         loop.recovery = _FakeRecovery()
         loop.gui = _FakeGui()
 
-        original_sleep = main_module.time.sleep
-        try:
-            main_module.time.sleep = lambda *_args, **_kwargs: None
-            decision = Decision(
-                action=Action.NEW_CONVERSATION,
-                message="上下文溢出，开新对话恢复 T87.5",
-                task_id="T87.5",
-                cooldown_seconds=1,
-            )
-            loop._execute(decision)
-        finally:
-            main_module.time.sleep = original_sleep
+        loop.clock = VirtualClock()
+        decision = Decision(
+            action=Action.NEW_CONVERSATION,
+            message="上下文溢出，开新对话恢复 T87.5",
+            task_id="T87.5",
+            cooldown_seconds=1,
+        )
+        loop._execute(decision)
 
         self.assertEqual(loop.recovery.created, 1)
         self.assertGreaterEqual(len(loop.client.recall_calls), 2)  # 中断时 + 恢复前二次召回
@@ -431,12 +514,6 @@ class TestDeadLetterIntegration(unittest.TestCase):
     def test_inject_recovery_prompt_fallback_continue(self):
         loop = ExecutorLoop.__new__(ExecutorLoop)
 
-        class _FakeResult:
-            def __init__(self, success=True, message="ok", queued=False):
-                self.success = success
-                self.message = message
-                self.queued = queued
-
         class _FakeGui:
             available = True
 
@@ -447,15 +524,15 @@ class TestDeadLetterIntegration(unittest.TestCase):
 
             def new_conversation(self):
                 self.new_count += 1
-                return _FakeResult(False, "boom")
+                return _send_result(False, "boom")
 
             def send_task(self, text):
                 self.sent.append(text)
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
             def send_continue(self):
                 self.continue_count += 1
-                return _FakeResult(True, "ok")
+                return _send_result(True, "ok")
 
         loop.gui = _FakeGui()
         ok = loop._inject_recovery_prompt(
@@ -0,0 +1,123 @@
+# -*- coding: utf-8 -*-
+"""
+决策策略表 — 编译覆盖校验 / 自定义规则 / 文件热替换 / 回放对比测试
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import UIStatus
+from src.engine import Action, DualChannelEngine
+from src.policy import DEFAULT_POLICY, CompiledPolicy, PolicyError, PolicyStore
+from src.simulator import Simulator, synthetic_session
+
+# wait + 屏幕静止 + IDLE 时不唤醒，只等待（其余沿用内置矩阵）
+PATIENT_POLICY = {
+    "name": "patient",
+    "extends": "builtin",
+    "rules": [
+        {"devplan": "wait", "ui": ["IDLE", "UNKNOWN"], "changing": False,
+         "handler": "wait", "message": "{task_id} 静止，保守等待"},
+    ],
+}
+
+
+def _wait_data(task_id: str = "T1") -> dict:
+    return {"action": "wait", "subTask": {"taskId": task_id, "title": "x"}}
+
+
+class TestCompiledPolicy(unittest.TestCase):
+    def test_builtin_covers_every_combination(self):
+        policy = CompiledPolicy(DEFAULT_POLICY)
+        entry = policy.lookup("send_task", UIStatus.IDLE, False, False)
+        self.assertEqual(entry.handler, "send_task")
+        self.assertFalse(entry.fallback)
+        self.assertTrue(policy.lookup("send_task", UIStatus.IDLE, True, True).fallback)
+        # 未知 DevPlan 动作落到 "*"
+        self.assertIn("未知", policy.lookup("mystery", UIStatus.IDLE, False, False).message)
+
+    def test_incomplete_or_invalid_tables_are_rejected(self):
+        with self.assertRaises(PolicyError):
+            CompiledPolicy({"rules": [{"devplan": "wait", "handler": "wait"}]})
+        with self.assertRaises(PolicyError):
+            CompiledPolicy({"extends": "builtin", "rules": [{"handler": "explode"}]})
+        with self.assertRaises(PolicyError):
+            CompiledPolicy({"extends": "builtin", "rules": [{"ui": "SLEEPY", "handler": "wait"}]})
+        for template in ("{task} 静止", "JSON {", "{0}", "{title.missing}"):
+            with self.assertRaises(PolicyError):
+                CompiledPolicy({"extends": "builtin", "rules": [{"handler": "wait", "message": template}]})
+        CompiledPolicy({"extends": "builtin", "rules": [{"handler": "wait", "message": "{{literal}} {task_id}"}]})
+
+    def test_custom_rule_overrides_builtin_without_code_change(self):
+        engine = DualChannelEngine(status_trigger_threshold=1, min_send_interval=0)
+        self.assertEqual(engine.decide(_wait_data(), UIStatus.IDLE).action, Action.SEND_CONTINUE)
+
+        engine = DualChannelEngine(status_trigger_threshold=1, min_send_interval=0)
+        engine.set_policy(PATIENT_POLICY)
+        d = engine.decide(_wait_data(), UIStatus.IDLE)
+        self.assertEqual(d.action, Action.WAIT)
+        self.assertEqual(d.message, "T1 静止，保守等待")
+        # 未覆盖的行仍走内置矩阵
+        self.assertEqual(engine.decide(_wait_data(), UIStatus.CONTEXT_OVERFLOW).action, Action.NEW_CONVERSATION)
+
+
+class TestPolicyHotSwap(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+        self.path = os.path.join(self.tmp, "policy.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def _write(self, table, mtime: float) -> None:
+        with open(self.path, "w", encoding="utf-8") as f:
+            json.dump(table, f, ensure_ascii=False)
+        os.utime(self.path, (mtime, mtime))
+
+    def test_file_changes_are_picked_up_and_bad_files_ignored(self):
+        clock = VirtualClock(start=1000.0)
+        self._write(DEFAULT_POLICY, mtime=1000.0)
+        store = PolicyStore(self.path, check_interval=5.0, clock=clock)
+        engine = DualChannelEngine(status_trigger_threshold=1, min_send_interval=0, clock=clock, policy=store)
+        self.assertEqual(store.get().name, "builtin")
+
+        self._write(PATIENT_POLICY, mtime=2000.0)
+        self.assertEqual(store.get().name, "builtin")   # 检查间隔内不 stat
+        clock.advance(6)
+        self.assertEqual(engine.decide(_wait_data(), UIStatus.IDLE).action, Action.WAIT)
+        self.assertEqual(store.get().name, "patient")
+
+        with open(self.path, "w", encoding="utf-8") as f:
+            f.write("{broken")
+        os.utime(self.path, (3000.0, 3000.0))
+        clock.advance(6)
+        self.assertEqual(store.get().name, "patient")
+
+        bad_template = dict(PATIENT_POLICY, name="bad", rules=[dict(PATIENT_POLICY["rules"][0], message="{task} 静止")])
+        self._write(bad_template, mtime=4000.0)
+        clock.advance(6)
+        self.assertEqual(engine.decide(_wait_data(), UIStatus.IDLE).action, Action.WAIT)
+        self.assertEqual(store.get().name, "patient")
+
+
+class TestPolicyInSimulator(unittest.TestCase):
+    def test_policies_are_comparable_in_replay(self):
+        ticks = list(synthetic_session(3000, seed=11))
+        builtin = Simulator(seed=0).run_session(ticks)
+        patient = Simulator(seed=0, policy=PATIENT_POLICY).run_session(ticks)
+        self.assertEqual(builtin.ticks, patient.ticks)
+        self.assertNotEqual(builtin.decisions, patient.decisions)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+"""
+阶段耗时剖析器 — 直方图分位数 / 嵌套 span / folded 导出测试
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import time
+import unittest
+from pathlib import Path
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.profiler import LatencyHistogram, Profiler
+
+
+class TestLatencyHistogram(unittest.TestCase):
+    def test_percentiles_within_relative_error(self):
+        hist = LatencyHistogram()
+        for v in range(1, 10001):  # 1µs .. 10ms 均匀分布
+            hist.record(v * 1000)
+        self.assertEqual(hist.count, 10000)
+        for p, expected in ((50, 5_000_000), (95, 9_500_000), (99, 9_900_000)):
+            got = hist.percentile(p)
+            self.assertLess(abs(got - expected) / expected, 0.04, f"p{p}={got}")
+        self.assertEqual(hist.percentile(100), 10_000_000)
+
+    def test_small_values_exact(self):
+        hist = LatencyHistogram()
+        for v in (3, 3, 7):
+            hist.record(v)
+        self.assertEqual(hist.percentile(50), 3)
+        self.assertEqual(hist.percentile(99), 7)
+        self.assertEqual(hist.min_us, 3)
+
+    def test_empty(self):
+        self.assertEqual(LatencyHistogram().percentile(99), 0)
+
+
+class TestProfiler(unittest.TestCase):
+    def test_nested_spans_record_histograms_and_folded_self_time(self):
+        prof = Profiler()
+        prof.configure(collect_stacks=True)
+        with prof.span("tick") as outer:
+            with prof.span("tick.vision"):
+                time.sleep(0.002)
+            with prof.span("tick.decide"):
+                time.sleep(0.002)
+        self.assertGreaterEqual(outer.elapsed_ms, 4.0)
+        names = [row["name"] for row in prof.snapshot()]
+        self.assertEqual(names, ["tick", "tick.decide", "tick.vision"])
+        folded = dict(line.rsplit(" ", 1) for line in prof.folded_lines())
+        self.assertIn("tick;tick.vision", folded)
+        self.assertIn("tick;tick.decide", folded)
+        # 父 span 只计自身耗时（扣除子 span）
+        self.assertLess(int(folded.get("tick", "0")), int(folded["tick;tick.vision"]))
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = prof.dump_folded(Path(tmp) / "profile.folded")
+            self.assertIsNotNone(path)
+            content = path.read_text(encoding="utf-8")
+            self.assertIn("tick;tick.vision ", content)
+
+    def test_stacks_not_collected_by_default(self):
+        prof = Profiler()
+        with prof.span("a"):
+            with prof.span("b"):
+                pass
+        self.assertEqual(prof.folded_lines(), [])
+        self.assertEqual(len(prof.snapshot()), 2)
+
+    def test_timed_decorator_survives_exception(self):
+        prof = Profiler()
+
+        @prof.timed("gui.send_text")
+        def boom():
+            raise RuntimeError("x")
+
+        with self.assertRaises(RuntimeError):
+            boom()
+        self.assertEqual(prof.snapshot()[0]["count"], 1)
+        self.assertEqual(prof._stack(), [])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
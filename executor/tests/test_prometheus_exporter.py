@@ -0,0 +1,109 @@
+# -*- coding: utf-8 -*-
+"""
+Prometheus 导出 — /metrics 文本格式与各组件指标测试
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+from types import SimpleNamespace
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.engine import StateTracker
+from src.main import ExecutorLoop
+from src.profiler import profiler
+from src.prometheus_exporter import render_metrics
+from src.ui_server import app, set_executor_refs
+
+
+def _fake_executor():
+    tracker = StateTracker()
+    tracker.circuit_state = "open"
+    tracker.circuit_open_until = tracker.clock.time() + 60
+    tracker.network_backoff_attempts = 3
+    tracker.continue_retries = 2
+    monitor = SimpleNamespace(total_tool_calls=42, total_errors=5, pending_tool_calls=1, last_event_time=0.0)
+    return SimpleNamespace(
+        config=SimpleNamespace(executor_id="executor-9", project_name='proj"x'),
+        running=True,
+        vision_enabled=True,
+        _tick_count=7,
+        decision_counts={"wait": 5, "send_continue": 2},
+        engine=SimpleNamespace(tracker=tracker),
+        log_monitor=monitor,
+        _analyzer=SimpleNamespace(stats={"calls": 4, "cache_hits": 1, "errors": 0, "latency_ms_total": 2500.0}),
+    )
+
+
+class TestRenderMetrics(unittest.TestCase):
+    def test_exports_component_metrics(self):
+        text = render_metrics(_fake_executor())
+        self.assertIn('executor_circuit_state{state="open"} 1', text)
+        self.assertIn('executor_circuit_state{state="closed"} 0', text)
+        self.assertIn("executor_network_backoff_attempts 3", text)
+        self.assertIn("executor_continue_retries 2", text)
+        self.assertIn("executor_log_monitor_tool_calls_total 42", text)
+        self.assertIn("executor_log_monitor_pending_tool_calls 1", text)
+        self.assertNotIn("executor_log_monitor_idle_seconds", text)
+        self.assertIn("executor_vision_calls_total 4", text)
+        self.assertIn("executor_vision_latency_seconds_total 2.5", text)
+        self.assertIn('executor_decisions_total{action="send_continue"} 2', text)
+        self.assertIn('project="proj\\"x"', text)
+        self.assertIn("executor_ticks_total 7", text)
+
+    def test_tracker_gauges_use_injected_clock(self):
+        clock = VirtualClock(start=1_000.0)
+        tracker = StateTracker(clock=clock)
+        tracker.circuit_state = "open"
+        tracker.circuit_open_until = 1_030.0
+        tracker.network_backoff_until = 1_020.0
+        clock.advance(10)
+        text = render_metrics(SimpleNamespace(engine=SimpleNamespace(tracker=tracker)))
+        self.assertIn('executor_circuit_state{state="open"} 1', text)
+        self.assertIn("executor_network_backoff_remaining_seconds 10", text)
+        clock.advance(30)                                      # open 窗口已过期
+        text = render_metrics(SimpleNamespace(engine=SimpleNamespace(tracker=tracker)))
+        self.assertIn('executor_circuit_state{state="half_open"} 1', text)
+        self.assertIn("executor_network_backoff_remaining_seconds 0", text)
+        self.assertEqual(tracker.circuit_state, "open")          # 抓取不改变 tracker 状态
+
+    def test_scrape_does_not_build_lazy_analyzer(self):
+        loop = ExecutorLoop.__new__(ExecutorLoop)
+        loop.config = SimpleNamespace(executor_id="executor-1", project_name="proj")
+        loop._analyzer = None
+        render_metrics(loop)
+        self.assertIsNone(loop._analyzer)
+
+    def test_stage_histogram_is_cumulative(self):
+        for _ in range(3):
+            with profiler.span("test.prom_stage"):
+                pass
+        text = render_metrics(None)
+        lines = [l for l in text.splitlines()
+                 if l.startswith('executor_stage_duration_seconds_bucket{stage="test.prom_stage"')]
+        counts = [int(l.rsplit(" ", 1)[1]) for l in lines]
+        self.assertEqual(counts, sorted(counts))
+        self.assertTrue(lines[-1].startswith('executor_stage_duration_seconds_bucket{stage="test.prom_stage",le="+Inf"}'))
+        self.assertGreaterEqual(counts[-1], 3)
+        self.assertIn("# TYPE executor_stage_duration_seconds histogram", text)
+
+
+class TestMetricsRoute(unittest.TestCase):
+    def tearDown(self):
+        set_executor_refs(executor=None)
+
+    def test_metrics_endpoint(self):
+        set_executor_refs(executor=_fake_executor())
+        resp = app.test_client().get("/metrics")
+        self.assertEqual(resp.status_code, 200)
+        self.assertTrue(resp.content_type.startswith("text/plain"))
+        self.assertIn(b"executor_ticks_total 7", resp.data)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -5,20 +5,33 @@ T87.1 — last_n_turns 自动摘要器回归测试
 
 from __future__ import annotations
 
+import json
 import os
 import sys
 import tempfile
 import unittest
+from pathlib import Path
+from unittest import mock
 
 # 确保 src 在路径上
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
 
+from src import recovery_manager
+from src.checkpoint_store import atomic_write_text
 from src.recovery_manager import RecoveryManager
 
 
 class TestRecoveryManagerSummary(unittest.TestCase):
+
+    def _mgr(self, max_events: int = 20) -> RecoveryManager:
+        # 临时目录：checkpoints.db 不落在仓库的 logs/ 下，也不跨运行残留
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp.name, max_events=max_events)
+        self.addCleanup(mgr.close)
+        return mgr
     def test_summarize_last_turns_generates_three_paragraphs(self):
-        mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir="logs", max_events=20)
+        mgr = self._mgr(max_events=20)
         mgr.events = [
             "DevPlan: action=wait message=T87.1 正在执行",
             "UI: status=CONTEXT_OVERFLOW changing=False",
@@ -32,7 +45,7 @@ class TestRecoveryManagerSummary(unittest.TestCase):
         self.assertIn("恢复建议", parts[2])
 
     def test_context_tokens_extraction(self):
-        mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir="logs", max_events=20)
+        mgr = self._mgr(max_events=20)
         mgr.events = [
             "DevPlan: action=send_task message=phase-87 下一个 T87.2",
             "UI: status=CONNECTION_ERROR changing=False",
@@ -44,13 +57,13 @@ class TestRecoveryManagerSummary(unittest.TestCase):
         self.assertIn("CONNECTION_ERROR", summary)
 
     def test_empty_events_fallback(self):
-        mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir="logs", max_events=20)
+        mgr = self._mgr(max_events=20)
         mgr.events = []
         summary = mgr.summarize_last_turns()
         self.assertIn("暂无可用摘要", summary)
 
     def test_checkpoint_prompt_has_structured_sections(self):
-        mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir="logs", max_events=20)
+        mgr = self._mgr(max_events=20)
         prompt = mgr.build_checkpoint_prompt(
             phase_id="phase-87",
             phase_title="上下文溢出恢复增强",
@@ -133,6 +146,207 @@ class TestRecoveryManagerSummary(unittest.TestCase):
             self.assertIn("BASE_PROMPT", prompt)
 
 
+class TestCheckpointStore(unittest.TestCase):
+    def _save(self, mgr: RecoveryManager, task_id: str, reason: str = "CONTEXT_OVERFLOW"):
+        return mgr.create_and_persist_checkpoint(
+            phase_id="phase-87",
+            phase_title="上下文溢出恢复增强",
+            task_id=task_id,
+            task_title="t",
+            task_desc="",
+            interrupt_reason=reason,
+        )
+
+    def test_latest_and_indexed_queries(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self._save(mgr, "T87.1")
+            self._save(mgr, "T87.2", reason="CONNECTION_ERROR")
+            self._save(mgr, "T87.3")
+            self.assertEqual(mgr.load_checkpoint().task_id, "T87.3")
+            by_reason = mgr.query_checkpoints(interrupt_reason="CONTEXT_OVERFLOW")
+            self.assertEqual([cp.task_id for cp in by_reason], ["T87.3", "T87.1"])
+            self.assertEqual(len(mgr.query_checkpoints(task_id="T87.2")), 1)
+
+            # 旧版文件被删除后仍能从存储恢复
+            mgr.checkpoint_file.unlink()
+            mgr.checkpoint_prompt_file.unlink()
+            self.assertIn("T87.3", mgr.load_latest_checkpoint_prompt())
+            mgr.close()
+
+    def test_legacy_history_is_imported_once(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            old = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            old.close()
+            os.unlink(os.path.join(tmp, "checkpoints.db"))
+            old.store = None
+            self._save(old, "T86.9")
+
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self.assertEqual(mgr.store.count(), 1)
+            self.assertEqual(mgr.load_checkpoint().task_id, "T86.9")
+            mgr.close()
+            again = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self.assertEqual(again.store.count(), 1)
+            again.close()
+
+    def test_history_rotation_and_store_retention(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            mgr.MAX_HISTORY_LINES = 10
+            mgr.store.max_history = 8
+            mgr.store.PRUNE_EVERY = 4
+            for i in range(16):
+                self._save(mgr, f"T{i}")
+            lines = mgr.checkpoint_history_file.read_text(encoding="utf-8").splitlines()
+            self.assertLessEqual(len(lines), 10)
+            self.assertIn('"T15"', lines[-1])
+            self.assertEqual(mgr.store.count(), 8)
+            self.assertEqual(mgr.load_checkpoint().task_id, "T15")
+            mgr.close()
+
+
+class TestAtomicCheckpointWrites(unittest.TestCase):
+    def _save(self, mgr: RecoveryManager, task_id: str):
+        return mgr.create_and_persist_checkpoint(
+            phase_id="phase-88", phase_title="p", task_id=task_id,
+            task_title="t", task_desc="", interrupt_reason="CONTEXT_OVERFLOW",
+        )
+
+    def _crash_on(self, suffix: str):
+        real = recovery_manager.atomic_write_text
+
+        def flaky(path, text):
+            if path.name.endswith(suffix):
+                raise OSError("simulated crash")
+            real(path, text)
+
+        return mock.patch.object(recovery_manager, "atomic_write_text", flaky)
+
+    def test_generation_shared_by_all_artifacts(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self._save(mgr, "T88.1")
+            cp = self._save(mgr, "T88.2")
+            manifest = json.loads(mgr.checkpoint_manifest_file.read_text(encoding="utf-8"))
+            data = json.loads(mgr.checkpoint_file.read_text(encoding="utf-8"))
+            self.assertEqual(cp.generation, 2)
+            self.assertEqual((manifest["generation"], data["generation"]), (2, 2))
+            self.assertEqual(mgr.store.latest()["generation"], 2)
+            self.assertEqual(manifest["txt_bytes"], mgr.checkpoint_prompt_file.stat().st_size)
+            mgr.close()
+
+            with mock.patch.object(RecoveryManager, "_write_checkpoint_files") as rewrite:
+                again = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            rewrite.assert_not_called()
+            self.assertEqual(self._save(again, "T88.3").generation, 3)
+            again.close()
+
+    def test_atomic_write_keeps_byte_size_for_multiline_text(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            path = Path(tmp) / "prompt.txt"
+            text = "第一行\n第二行\r\n\n[RESUME_STEPS]\n"
+            atomic_write_text(path, text)
+            # 不做换行转换：Windows 上 "\n" 不会被写成 "\r\n"，大小与 manifest 记录一致
+            self.assertEqual(path.read_bytes(), text.encode("utf-8"))
+
+    def test_multiline_prompt_passes_startup_verification(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self._save(mgr, "T88.1")
+            self.assertGreater(mgr.checkpoint_prompt_file.read_text(encoding="utf-8").count("\n"), 5)
+            manifest = json.loads(mgr.checkpoint_manifest_file.read_text(encoding="utf-8"))
+            self.assertEqual(manifest["txt_bytes"], mgr.checkpoint_prompt_file.stat().st_size)
+            mgr.close()
+
+            with mock.patch.object(RecoveryManager, "_write_checkpoint_files") as rewrite:
+                again = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            rewrite.assert_not_called()
+            again.close()
+
+    def test_crash_between_json_and_txt_is_repaired_on_startup(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self._save(mgr, "T88.1")
+            with self._crash_on(".txt"):
+                self._save(mgr, "T88.2")
+            # TXT 仍是上一代，JSON 已是新一代
+            self.assertIn("T88.1", mgr.checkpoint_prompt_file.read_text(encoding="utf-8"))
+            mgr.close()
+
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self.assertIn("T88.2", mgr.checkpoint_prompt_file.read_text(encoding="utf-8"))
+            manifest = json.loads(mgr.checkpoint_manifest_file.read_text(encoding="utf-8"))
+            self.assertEqual(manifest["generation"], 2)
+            mgr.close()
+
+    def test_files_rebuilt_from_store_when_crash_precedes_json(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self._save(mgr, "T88.1")
+            with self._crash_on(".json"):
+                self._save(mgr, "T88.2")
+            mgr.close()
+
+            mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp, max_events=20)
+            self.assertEqual(
+                json.loads(mgr.checkpoint_file.read_text(encoding="utf-8"))["task_id"], "T88.2",
+            )
+            self.assertIn("T88.2", mgr.checkpoint_prompt_file.read_text(encoding="utf-8"))
+            mgr.close()
+
+
+class TestStructuredEvents(unittest.TestCase):
+
+    def _mgr(self, max_events: int = 20) -> RecoveryManager:
+        # 临时目录：checkpoints.db 不落在仓库的 logs/ 下，也不跨运行残留
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        mgr = RecoveryManager(project_name="aifastdb-devplan", log_dir=tmp.name, max_events=max_events)
+        self.addCleanup(mgr.close)
+        return mgr
+    def test_ring_keeps_last_events_and_structured_fields(self):
+        mgr = self._mgr(max_events=3)
+        mgr.record_event("DevPlan: action=wait message=x", kind="devplan", action="wait",
+                         phase_id="phase-90", task_id="T90.1")
+        mgr.record_event("UI: status=RATE_LIMIT changing=False via=log")
+        for i in range(3):
+            mgr.record_event(f"Decision: action=wait message=#{i}")
+        self.assertEqual(mgr.events, [f"Decision: action=wait message=#{i}" for i in range(3)])
+        ev = mgr.recent_events(1)[0]
+        self.assertEqual((ev.kind, ev.action), ("decision", "wait"))
+        self.assertFalse(hasattr(ev, "__dict__"))
+
+    def test_summary_window_drops_evicted_signals(self):
+        mgr = self._mgr(max_events=20)
+        mgr.record_event("DevPlan: action=send_task message=phase-91 T91.1", kind="devplan")
+        mgr.record_event("UI: status=CONTEXT_OVERFLOW changing=False", kind="ui")
+        summary = mgr.summarize_last_turns(n=2)
+        self.assertIn("phase-91", summary)
+        self.assertIn("开新对话", summary)
+
+        for i in range(2):
+            mgr.record_event(f"Decision: action=wait message=tick {i}", kind="decision")
+        summary = mgr.summarize_last_turns(n=2)
+        self.assertIn("未知阶段", summary)
+        self.assertNotIn("界面侧", summary)
+        self.assertNotIn("开新对话", summary)
+        self.assertIn("tick 1", summary)
+
+    def test_progress_snapshot_uses_last_two_in_window(self):
+        mgr = self._mgr(max_events=20)
+        mgr.events = [
+            "DevPlan: action=wait message=T1 completed",
+            "DevPlan: action=wait message=T2 completed",
+            "DevPlan: action=wait message=T3 已完成",
+        ]
+        completed, pending = mgr._extract_progress_snapshot()
+        self.assertNotIn("T1", completed)
+        self.assertIn("T2", completed)
+        self.assertIn("T3", completed)
+        self.assertIn("T3", pending)
+
+
 if __name__ == "__main__":
     unittest.main(verbosity=2)
 
@@ -0,0 +1,105 @@
+# -*- coding: utf-8 -*-
+"""
+运行状态快照（热重启）— 熔断窗口跨重启保留 / 去重指纹跨重启保留 / 写盘节流 / 过期忽略
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import UIStatus
+from src.engine import Action, DualChannelEngine
+from src.main import ExecutorLoop
+from src.run_journal import RunJournal
+
+
+def _devplan_wait() -> dict:
+    return {"action": "wait", "subTask": {"taskId": "T45.1", "title": "x"}, "message": "等待 T45.1 完成"}
+
+
+def _loop(clock: VirtualClock, log_dir: str) -> ExecutorLoop:
+    loop = ExecutorLoop.__new__(ExecutorLoop)
+    loop.clock = clock
+    loop.engine = DualChannelEngine(
+        status_trigger_threshold=1,
+        min_send_interval=0.0,
+        network_backoff_jitter_ratio=0.0,
+        circuit_breaker_failure_threshold=2,
+        circuit_breaker_open_seconds=90,
+        clock=clock,
+    )
+    loop.journal = RunJournal(log_dir, interval=30, clock=clock)
+    loop.vision_enabled = False
+    loop._analyzer = None
+    loop.context_budget = None
+    loop._last_dead_letter_fingerprint = ""
+    loop._last_recovery_memory_fingerprint = ""
+    loop._last_startup_restore_fingerprint = ""
+    return loop
+
+
+class TestWarmRestart(unittest.TestCase):
+    def test_open_circuit_and_dedup_keys_survive_restart(self):
+        clock = VirtualClock(start=1_700_000_000.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            first = _loop(clock, tmp)
+            for _ in range(2):
+                first.engine.decide(_devplan_wait(), UIStatus.CONNECTION_ERROR, screen_changing=False)
+            self.assertEqual(first.engine.tracker.resolve_circuit_state(), "open")
+            first._last_recovery_memory_fingerprint = "phase-45|T45.1|CONTEXT_OVERFLOW"
+            first._save_run_journal(force=True)
+
+            clock.advance(20)
+            second = _loop(clock, tmp)
+            second._restore_run_journal()
+            tracker = second.engine.tracker
+            self.assertEqual(tracker.resolve_circuit_state(), "open")
+            self.assertAlmostEqual(tracker.get_circuit_open_remaining(), 70.0)
+            self.assertEqual(second._last_recovery_memory_fingerprint, "phase-45|T45.1|CONTEXT_OVERFLOW")
+
+            d = second.engine.decide(_devplan_wait(), UIStatus.CONNECTION_ERROR, screen_changing=False)
+            self.assertEqual(d.action, Action.WAIT_COOLDOWN)
+
+    def test_cold_start_without_journal(self):
+        clock = VirtualClock(start=1_700_000_000.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            loop = _loop(clock, tmp)
+            loop._restore_run_journal()
+            self.assertEqual(loop.engine.tracker.resolve_circuit_state(), "closed")
+
+
+class TestRunJournal(unittest.TestCase):
+    def test_throttled_unless_breaker_changes(self):
+        clock = VirtualClock(start=1_700_000_000.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = RunJournal(tmp, interval=30, clock=clock)
+            base = {"tracker": {"circuit_state": "closed", "continue_retries": 0}}
+            self.assertTrue(journal.maybe_save(base))
+            self.assertFalse(journal.maybe_save(dict(base)))                      # 无变化
+            self.assertFalse(journal.maybe_save({"tracker": {"circuit_state": "closed", "continue_retries": 1}}))
+            self.assertTrue(journal.maybe_save({"tracker": {"circuit_state": "open", "continue_retries": 1}}))
+            clock.advance(31)
+            self.assertTrue(journal.maybe_save({"tracker": {"circuit_state": "open", "continue_retries": 2}}))
+            self.assertEqual(journal.stats, {"saves": 3, "skipped": 1})
+
+    def test_stale_or_corrupt_snapshot_is_ignored(self):
+        clock = VirtualClock(start=1_700_000_000.0)
+        with tempfile.TemporaryDirectory() as tmp:
+            journal = RunJournal(tmp, max_age=3600, clock=clock)
+            journal.save({"tracker": {}})
+            self.assertIsNotNone(RunJournal(tmp, max_age=3600, clock=clock).load())
+            clock.advance(3601)
+            self.assertIsNone(RunJournal(tmp, max_age=3600, clock=clock).load())
+            journal.path.write_text("{not json", encoding="utf-8")
+            self.assertIsNone(RunJournal(tmp, clock=clock).load())
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
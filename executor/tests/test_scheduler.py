@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+"""
+自适应轮询调度 — 发送后加速 / AI 活跃退避 / 熔断与保活暂停测试
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.scheduler import AdaptivePollScheduler
+
+
+class TestAdaptivePollScheduler(unittest.TestCase):
+    def setUp(self):
+        self.s = AdaptivePollScheduler(base_interval=10, min_interval=3, max_interval=40,
+                                       backoff_factor=2.0, idle_pause=300)
+
+    def test_idle_uses_base_interval(self):
+        self.assertEqual(self.s.next_interval(last_action="wait").interval, 10)
+
+    def test_fast_after_send_and_during_recovery(self):
+        self.assertEqual(self.s.next_interval(last_action="send_continue").interval, 3)
+        self.assertEqual(self.s.next_interval(last_action="wait", recovering=True).interval, 3)
+
+    def test_recovery_waits_out_backoff(self):
+        d = self.s.next_interval(recovering=True, backoff_remaining=17.2)
+        self.assertEqual(d.interval, 18)
+
+    def test_ai_active_backs_off_exponentially_up_to_max(self):
+        got = [self.s.next_interval(ai_active=True).interval for _ in range(5)]
+        self.assertEqual(got, [10, 20, 40, 40, 40])
+        # AI 停止后回到基准
+        self.assertEqual(self.s.next_interval().interval, 10)
+        self.assertEqual(self.s.next_interval(ai_active=True).interval, 10)
+
+    def test_send_resets_backoff(self):
+        self.s.next_interval(ai_active=True)
+        self.s.next_interval(ai_active=True)
+        self.s.next_interval(last_action="send_task")
+        self.assertEqual(self.s.next_interval(ai_active=True).interval, 10)
+
+    def test_pause_for_circuit_open_and_keepalive(self):
+        self.assertEqual(self.s.next_interval(circuit_open_remaining=120.0).interval, 120)
+        self.assertEqual(self.s.next_interval(circuit_open_remaining=9999.0).interval, 300)
+        d = self.s.next_interval(last_action="all_done", all_done_keepalive=True)
+        self.assertEqual(d.interval, 300)
+        self.assertIn("all_done", d.reason)
+
+    def test_bounds_are_sanitized(self):
+        s = AdaptivePollScheduler(base_interval=100, min_interval=0, max_interval=5, idle_pause=1)
+        self.assertEqual(s.min_interval, 1)
+        self.assertEqual(s.base_interval, 5)
+        self.assertEqual(s.idle_pause, 5)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
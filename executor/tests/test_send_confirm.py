@@ -0,0 +1,156 @@
+# -*- coding: utf-8 -*-
+"""
+发送确认引擎 — ROI 差分判定 / send_text 排队补按 / 视觉通道仅在不明确时调用
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import ExecutorConfig
+from src.cursor_controller import CursorController, SendResult
+from src.main import ExecutorLoop
+from src.send_confirm import SendConfirmEngine, SendVerdict
+
+EMPTY = bytes([30] * 400)
+FILLED = bytes([30] * 200 + [220] * 200)
+
+
+class _Shot:
+    def __init__(self, data: bytes):
+        self.data = data
+
+    def tobytes(self) -> bytes:
+        return self.data
+
+
+class _InputBoxGui:
+    """模拟输入框：粘贴后填充；前 enter_ignored 次 Enter 不被接收（排队）"""
+
+    def __init__(self, enter_ignored: int = 0):
+        self.box = EMPTY
+        self.enter_ignored = enter_ignored
+        self.presses = 0
+
+    def hotkey(self, *keys):
+        if keys == ("ctrl", "v"):
+            self.box = FILLED
+
+    def press(self, key):
+        self.presses += 1
+        if self.presses > self.enter_ignored:
+            self.box = EMPTY
+
+    def click(self, **kwargs):
+        pass
+
+    def size(self):
+        return (1920, 1080)
+
+    def screenshot(self, region=None):
+        return _Shot(self.box)
+
+
+class _Clipboard:
+    def copy(self, text):
+        self.text = text
+
+    def paste(self):
+        return self.text
+
+
+def _make_gui(autogui, clock: VirtualClock) -> CursorController:
+    config = ExecutorConfig(min_send_interval=0)
+    gui = CursorController.__new__(CursorController)
+    gui.config = config
+    gui.clock = clock
+    gui._delays = CursorController.resolve_delays(config)
+    gui._available = True
+    gui._pyautogui = autogui
+    gui._pyperclip = _Clipboard()
+    gui._pygetwindow = None
+    gui._last_send_time = 0.0
+    gui.timing = None
+    gui._input_point = None
+    gui._geometry = None
+    gui.input_locator = None
+    gui.window_cache_stats = {"hits": 0, "enumerations": 0, "invalidations": 0, "vision_locates": 0}
+    gui.confirm = SendConfirmEngine(grab=gui._grab_input_roi, clock=clock, timeout=config.send_confirm_timeout)
+    return gui
+
+
+class TestClassify(unittest.TestCase):
+    def test_verdicts(self):
+        engine = SendConfirmEngine(grab=lambda: EMPTY)
+        self.assertEqual(engine.classify(EMPTY, FILLED, EMPTY)[0], SendVerdict.SENT)
+        self.assertEqual(engine.classify(EMPTY, FILLED, FILLED)[0], SendVerdict.QUEUED)
+        half = bytes([30] * 300 + [220] * 100)
+        self.assertEqual(engine.classify(EMPTY, FILLED, half)[0], SendVerdict.AMBIGUOUS)
+        # 粘贴不可见 → 无法判断
+        self.assertEqual(engine.classify(EMPTY, EMPTY, EMPTY)[0], SendVerdict.AMBIGUOUS)
+        self.assertEqual(engine.confirm(EMPTY, EMPTY).samples, 0)
+
+
+class TestSendTextConfirm(unittest.TestCase):
+    def test_sent_is_confirmed_in_milliseconds(self):
+        clock = VirtualClock()
+        gui = _make_gui(_InputBoxGui(), clock)
+        start = clock.time()
+        result = gui.send_text("请继续")
+        self.assertTrue(result.success)
+        self.assertEqual(result.verdict, "sent")
+        self.assertFalse(result.queued)
+        self.assertLess(clock.time() - start, 3.0)
+        self.assertEqual(gui.confirm.stats["sent"], 1)
+
+    def test_queued_text_gets_a_second_enter(self):
+        autogui = _InputBoxGui(enter_ignored=1)
+        gui = _make_gui(autogui, VirtualClock())
+        result = gui.send_text("请继续")
+        self.assertTrue(result.success)
+        self.assertTrue(result.queued)
+        self.assertEqual(result.verdict, "sent")
+        self.assertEqual(autogui.presses, 2)
+
+    def test_text_stuck_in_box_is_reported_failed(self):
+        autogui = _InputBoxGui(enter_ignored=5)
+        gui = _make_gui(autogui, VirtualClock())
+        result = gui.send_text("请继续")
+        self.assertFalse(result.success)
+        self.assertEqual(result.verdict, "failed")
+        self.assertEqual(autogui.presses, 2)
+
+
+class _CountingAnalyzer:
+    available = True
+
+    def __init__(self):
+        self.calls = 0
+
+    def check_send_queued_after_delay(self, delay_seconds=1.0):
+        self.calls += 1
+        return False, "stub"
+
+
+class TestVisionOnlyWhenAmbiguous(unittest.TestCase):
+    def test_post_send_check_skips_vision_after_roi_sent(self):
+        loop = ExecutorLoop.__new__(ExecutorLoop)
+        loop.vision_enabled = True
+        loop.arbiter = None
+        loop.log_monitor = None
+        loop.analyzer = _CountingAnalyzer()
+        loop.gui = _make_gui(_InputBoxGui(), VirtualClock())
+        loop._post_send_vision_check("continue", result=SendResult(True, "ok", verdict="sent"))
+        self.assertEqual(loop.analyzer.calls, 0)
+        loop._post_send_vision_check("continue", result=SendResult(True, "ok", verdict="ambiguous"))
+        self.assertEqual(loop.analyzer.calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
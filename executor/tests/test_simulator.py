@@ -0,0 +1,129 @@
+# -*- coding: utf-8 -*-
+"""
+决策引擎回放 — 虚拟时钟 / 轨迹读写 / 确定性仿真测试
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import UIStatus
+from src.engine import Action, DualChannelEngine
+from src.log_monitor import LogMonitorState
+from src.simulator import Simulator, synthetic_session
+from src.trace import TickRecord, TraceRecorder, load_trace
+
+
+class TestVirtualClock(unittest.TestCase):
+    def test_engine_backoff_runs_on_virtual_time(self):
+        clock = VirtualClock(start=1000.0)
+        engine = DualChannelEngine(min_send_interval=5.0, circuit_breaker_open_seconds=60, clock=clock)
+        engine.tracker.circuit_state = "open"
+        engine.tracker.circuit_open_until = clock.time() + 60
+        self.assertEqual(engine.tracker.get_circuit_open_remaining(), 60)
+        clock.sleep(61)
+        self.assertEqual(engine.tracker.resolve_circuit_state(), "half_open")
+
+        engine.tracker.record_send()
+        self.assertFalse(engine.tracker.can_send(5.0))
+        clock.advance(5)
+        self.assertTrue(engine.tracker.can_send(5.0))
+
+    def test_clock_never_goes_backwards(self):
+        clock = VirtualClock(start=10.0)
+        clock.set(5.0)
+        self.assertEqual(clock.time(), 10.0)
+
+
+class TestTraceRoundTrip(unittest.TestCase):
+    def setUp(self):
+        self.tmp = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+    def test_record_and_load_gzip(self):
+        path = os.path.join(self.tmp, "t.jsonl.gz")
+        rec = TraceRecorder(path, {"engine": {"max_continue_retries": 2}})
+        log_state = LogMonitorState(is_ai_active=True, idle_seconds=3.0, pending_tool_calls=1, log_file_found=True)
+        devplan = {"action": "send_task", "subTask": {"taskId": "T1", "title": "x", "description": "long" * 100}}
+        rec.record(100.0, devplan, "IDLE", False, 12.0, log_state, "send_task", "vision")
+        rec.record(115.0, {"action": "wait"}, "AI_GENERATING", True, 0.0, None, "wait", "log")
+        rec.close()
+
+        header, ticks = load_trace(path)
+        self.assertEqual(header["engine"], {"max_continue_retries": 2})
+        self.assertEqual(len(ticks), 2)
+        self.assertNotIn("description", ticks[0].devplan["subTask"])
+        self.assertEqual(ticks[0].log, (1, 3.0, 1, 0))
+        self.assertIsNone(ticks[1].log)
+        self.assertTrue(ticks[1].screen_changing)
+
+    def test_load_truncated_gzip_from_killed_run(self):
+        path = os.path.join(self.tmp, "t.jsonl.gz")
+        rec = TraceRecorder(path, {"engine": {}})
+        for i in range(200):
+            rec.record(100.0 + i, {"action": "wait"}, "AI_GENERATING", True, 0.0, None, "wait", "log")
+        rec.close()
+        with open(path, "rb") as f:
+            data = f.read()
+
+        # 缺少 gzip 结尾（进程被杀时尚未写出）
+        with open(path, "wb") as f:
+            f.write(data[:-8])
+        with self.assertLogs("executor.trace", level="WARNING"):
+            _, ticks = load_trace(path)
+        self.assertEqual(len(ticks), 200)
+
+        # 压缩数据在中途截断：读到最后一条完整记录为止
+        with open(path, "wb") as f:
+            f.write(data[: len(data) // 2])
+        _, ticks = load_trace(path)
+        self.assertTrue(0 < len(ticks) < 200)
+        self.assertEqual([t.t for t in ticks], [100.0 + i for i in range(len(ticks))])
+
+
+class TestSimulator(unittest.TestCase):
+    def test_replay_is_deterministic(self):
+        sim = Simulator(seed=7)
+        a = sim.run_session(synthetic_session(5000, seed=3))
+        b = sim.run_session(synthetic_session(5000, seed=3))
+        self.assertEqual(a.decisions, b.decisions)
+        self.assertEqual(a.recoveries, b.recoveries)
+        self.assertEqual(a.ticks, 5000)
+        self.assertGreater(len(a.recoveries), 0)
+
+    def test_recovery_and_wasted_sends(self):
+        base = 1000.0
+        wait = {"action": "wait", "subTask": {"taskId": "T1"}}
+        ticks = [
+            TickRecord(t=base, devplan=wait, ui_status=UIStatus.CONNECTION_ERROR.value),
+            TickRecord(t=base + 15, devplan=wait, ui_status=UIStatus.CONNECTION_ERROR.value),
+            TickRecord(t=base + 30, devplan=wait, ui_status=UIStatus.CONNECTION_ERROR.value),
+            TickRecord(t=base + 45, devplan=wait, ui_status=UIStatus.AI_GENERATING.value,
+                       screen_changing=True, action="wait"),
+        ]
+        # 连续 3 次确认后才发送继续，随后 AI 恢复 → 一次有效发送
+        report = Simulator(seed=1).run_session(ticks)
+        self.assertEqual(report.recoveries, [45.0])
+        self.assertEqual(report.decisions.get(Action.SEND_CONTINUE.value), 1)
+        self.assertEqual(report.wasted_sends, 0)
+        self.assertEqual((report.compared, report.agreed), (1, 1))
+
+    def test_engine_overrides_change_outcome(self):
+        ticks = list(synthetic_session(3000, seed=5, fault_rate=0.1))
+        strict = Simulator({"max_continue_retries": 1}, seed=0).run_session(ticks)
+        loose = Simulator({"max_continue_retries": 10}, seed=0).run_session(ticks)
+        self.assertNotEqual(strict.decisions, loose.decisions)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
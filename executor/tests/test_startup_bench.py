@@ -0,0 +1,36 @@
+# -*- coding: utf-8 -*-
+"""
+冷启动 — --no-ui / --disable-vision 时不加载 Flask 与视觉依赖；基准脚本可运行
+"""
+
+from __future__ import annotations
+
+import os
+import subprocess
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.startup_bench import format_report, measure
+
+ROOT = os.path.join(os.path.dirname(__file__), "..")
+
+
+class TestLazyStartup(unittest.TestCase):
+    def test_fast_start_skips_optional_subsystems(self):
+        report = measure("fast", runs=1)
+        for module in ("flask", "numpy", "PIL", "ollama"):
+            self.assertNotIn(module, report["modules"])
+        self.assertGreater(report["total_ms"]["median"], 0)
+        self.assertIn("fast", format_report([report]))
+
+    def test_ui_server_import_has_no_flask_side_effect(self):
+        code = "import sys, src.ui_server; print('flask' in sys.modules)"
+        out = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+        self.assertEqual(out.stdout.strip(), "False", out.stderr)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
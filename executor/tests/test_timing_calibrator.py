@@ -0,0 +1,115 @@
+# -*- coding: utf-8 -*-
+"""
+GUI 时序自适应校准 — 实测收敛 / 安全边界 / 超时回退 / 本机系数 / 持久化测试
+"""
+
+from __future__ import annotations
+
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.cursor_controller import GUI_DELAYS, TIMING_FACTOR_EXCLUDE, TIMING_FIXED_STEPS
+from src.timing_calibrator import TimingCalibrator, region_change_probe
+
+DEFAULTS = {"activate": 0.5, "clipboard": 0.2, "click": 0.3, "paste": 0.5}
+
+
+def _ready_after(clock: VirtualClock, seconds: float):
+    """在 seconds 秒后变为 True 的探测"""
+    deadline = clock.time() + seconds
+    return lambda: clock.time() >= deadline
+
+
+class TestTimingCalibrator(unittest.TestCase):
+    def test_fast_machine_shrinks_waits_within_floor(self):
+        clock = VirtualClock()
+        timing = TimingCalibrator(DEFAULTS, clock=clock)
+        for _ in range(10):
+            self.assertTrue(timing.wait_until("activate", _ready_after(clock, 0.04)))
+            self.assertTrue(timing.wait_until("clipboard", lambda: True))
+        self.assertLess(timing.delay("activate"), DEFAULTS["activate"] / 3)
+        # 立即生效的步骤也不会低于下限
+        self.assertAlmostEqual(timing.delay("clipboard"), timing.floor("clipboard"))
+        # 无法探测的步骤按本机系数缩放
+        self.assertLess(timing.delay("click"), DEFAULTS["click"])
+        self.assertGreaterEqual(timing.delay("click"), timing.floor("click"))
+
+    def test_timeouts_are_bounded_and_raise_the_wait(self):
+        clock = VirtualClock()
+        timing = TimingCalibrator(DEFAULTS, clock=clock)
+        start = clock.time()
+        self.assertFalse(timing.wait_until("paste", lambda: False))
+        self.assertAlmostEqual(clock.time() - start, timing.ceiling("paste"), places=6)
+        for _ in range(5):
+            timing.wait_until("paste", lambda: False)
+        self.assertAlmostEqual(timing.delay("paste"), timing.ceiling("paste"))
+        self.assertEqual(timing.snapshot()["steps"]["paste"]["misses"], 6)
+
+    def test_broken_probe_falls_back_to_fixed_wait(self):
+        clock = VirtualClock()
+        timing = TimingCalibrator(DEFAULTS, clock=clock)
+
+        def boom():
+            raise RuntimeError("no display")
+
+        self.assertTrue(timing.wait_until("activate", boom))
+        self.assertAlmostEqual(clock.time(), DEFAULTS["activate"])
+        self.assertIsNone(region_change_probe(boom))
+
+    def test_region_probe_ignores_caret_blink(self):
+        frames = [bytes(1000)]
+        probe = region_change_probe(lambda: frames[-1])
+        frames.append(bytes([255] * 3) + bytes(997))           # 光标闪烁：极少像素变化
+        self.assertFalse(probe())
+        frames.append(bytes([200] * 300) + bytes(700))         # 文本粘贴落地
+        self.assertTrue(probe())
+
+    def test_instant_probes_do_not_collapse_machine_factor(self):
+        clock = VirtualClock()
+        timing = TimingCalibrator(
+            GUI_DELAYS, clock=clock,
+            factor_exclude=TIMING_FACTOR_EXCLUDE, fixed_steps=TIMING_FIXED_STEPS,
+        )
+        for _ in range(3):
+            timing.wait_until("clipboard", lambda: True)
+            timing.wait_until("activate", lambda: True)
+            timing.wait_until("paste", _ready_after(clock, 0.05))
+        # 剪贴板 / 激活探测瞬时返回，不能把系数压到 min_fraction
+        self.assertAlmostEqual(timing.machine_factor(), timing.scaled_min_fraction)
+        self.assertGreater(timing.machine_factor(), timing.min_fraction)
+        for step in ("click", "clear", "restore", "key"):
+            self.assertAlmostEqual(timing.delay(step), GUI_DELAYS[step] * timing.scaled_min_fraction)
+        # AI 侧等待不随本机速度缩放
+        for step in TIMING_FIXED_STEPS:
+            self.assertEqual(timing.delay(step), GUI_DELAYS[step])
+
+    def test_calibration_persists_across_runs(self):
+        tmp = tempfile.mkdtemp()
+        try:
+            path = os.path.join(tmp, "gui_timing.json")
+            clock = VirtualClock()
+            timing = TimingCalibrator(DEFAULTS, path=path, clock=clock)
+            for _ in range(5):
+                timing.wait_until("activate", _ready_after(clock, 0.1))
+            self.assertTrue(timing.save())
+
+            reloaded = TimingCalibrator(DEFAULTS, path=path, clock=VirtualClock())
+            self.assertAlmostEqual(reloaded.delay("activate"), timing.delay("activate"), places=3)
+            self.assertAlmostEqual(reloaded.machine_factor(), timing.machine_factor(), places=3)
+
+            with open(path, "w", encoding="utf-8") as f:
+                f.write("not json")
+            self.assertEqual(TimingCalibrator(DEFAULTS, path=path).delay("activate"), DEFAULTS["activate"])
+        finally:
+            shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
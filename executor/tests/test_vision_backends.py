@@ -0,0 +1,179 @@
+# -*- coding: utf-8 -*-
+"""
+可插拔视觉后端 — 按显存自动选择 / 按 prompt 类型回退 / OpenAI 兼容请求 / 成本与耗时统计
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sys
+import tempfile
+import unittest
+from collections import OrderedDict
+from pathlib import Path
+
+import httpx
+import numpy
+from PIL import Image
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import ExecutorConfig, UIStatus
+from src.vision_analyzer import PROMPT_BOTTOM_RIGHT, PROMPT_CHANGE_COMPARE, VisionAnalyzer
+from src.vision_backends import (
+    OnnxStatusBackend,
+    OpenAICompatBackend,
+    VisionBackend,
+    select_backends,
+)
+
+
+class _ScriptedBackend(VisionBackend):
+    def __init__(self, name: str, reply: str, kinds=None, up: bool = True, cost: float = 1.0):
+        super().__init__()
+        self.name = name
+        self.reply = reply
+        self.up = up
+        self.cost_per_call = cost
+        if kinds is not None:
+            self.kinds = frozenset(kinds)
+
+    def available(self) -> bool:
+        return self.up
+
+    def _complete(self, image_path, prompt, kind, max_tokens, stop) -> str:
+        return self.reply
+
+
+class TestBackendSelection(unittest.TestCase):
+    def _config(self, **kwargs) -> ExecutorConfig:
+        return ExecutorConfig(
+            openai_base_url="http://127.0.0.1:9/v1",
+            onnx_model_path="/nonexistent/status.onnx",
+            **kwargs,
+        )
+
+    def test_auto_prefers_lightweight_path_without_big_gpu(self):
+        fake_ollama = object()
+        small = select_backends(self._config(), ollama=fake_ollama, vram_gb=0.0)
+        self.assertEqual([b.name for b in small], ["onnx", "openai", "ollama"])
+        big = select_backends(self._config(), ollama=fake_ollama, vram_gb=24.0)
+        self.assertEqual([b.name for b in big], ["ollama", "openai", "onnx"])
+
+    def test_explicit_order_and_missing_backends(self):
+        chain = select_backends(self._config(vision_backend="onnx, ollama"), ollama=None)
+        self.assertEqual([b.name for b in chain], ["onnx"])
+        self.assertEqual(select_backends(ExecutorConfig(), ollama=None, vram_gb=0.0), [])
+
+    def test_onnx_backend_degrades_without_runtime_or_model(self):
+        backend = OnnxStatusBackend("/nonexistent/status.onnx")
+        self.assertFalse(backend.available())
+        self.assertFalse(backend.supports("change"))
+
+
+class TestBackendChain(unittest.TestCase):
+    def setUp(self):
+        fd, self.image = tempfile.mkstemp(suffix=".png")
+        os.write(fd, b"fake-image")
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.image)
+
+    def _analyzer(self, backends) -> VisionAnalyzer:
+        analyzer = VisionAnalyzer.__new__(VisionAnalyzer)
+        analyzer.config = ExecutorConfig()
+        analyzer._ollama = None
+        analyzer.lifecycle = None
+        analyzer.backends = backends
+        analyzer.stats = {"calls": 0, "cache_hits": 0, "errors": 0, "early_exits": 0, "latency_ms_total": 0.0}
+        analyzer._result_cache = None
+        return analyzer
+
+    def test_prompt_kind_routes_to_first_capable_available_backend(self):
+        down = _ScriptedBackend("openai", "IDLE", up=False)
+        onnx = _ScriptedBackend("onnx", "RATE_LIMIT 0.91", kinds={"status"}, cost=0.01)
+        big = _ScriptedBackend("ollama", "UNCHANGED")
+        analyzer = self._analyzer([down, onnx, big])
+
+        status, raw = analyzer._call_vision_model(self.image, prompt=PROMPT_BOTTOM_RIGHT)
+        self.assertEqual(status, UIStatus.RATE_LIMIT)
+        _, raw = analyzer._call_vision_model(self.image, prompt=PROMPT_CHANGE_COMPARE)
+        self.assertEqual(raw, "UNCHANGED")
+
+        self.assertEqual((down.stats["calls"], onnx.stats["calls"], big.stats["calls"]), (0, 1, 1))
+        self.assertAlmostEqual(onnx.describe()["cost_total"], 0.01)
+        self.assertIsNotNone(big.describe()["mean_latency_ms"])
+
+    def test_change_compare_uses_selected_backend_chain(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for n in (1, 2):
+                Image.new("RGB", (40, 20), (30, 30, 30)).save(os.path.join(tmp, f"quad_bottom_right_br_{n}.png"))
+            openai = _ScriptedBackend("openai", "CHANGED")
+            analyzer = self._analyzer([openai])
+            analyzer._log_dir, analyzer._pil_image, analyzer._numpy = Path(tmp), Image, numpy
+            self.assertTrue(analyzer._compare_quadrant_pair("br"))      # 无 Ollama 也走所选后端
+            self.assertEqual(openai.stats["calls"], 1)
+
+            onnx = _ScriptedBackend("onnx", "IDLE 0.9", kinds={"status"})
+            analyzer = self._analyzer([onnx])
+            analyzer._log_dir, analyzer._pil_image, analyzer._numpy = Path(tmp), Image, numpy
+            self.assertFalse(analyzer._compare_quadrant_pair("br"))     # 回退像素差分
+            self.assertEqual(onnx.stats["calls"], 0)
+
+    def test_backends_are_per_instance(self):
+        a, b = self._analyzer([]), self._analyzer([])
+        a._ollama = object()
+        a._active_backends()
+        self.assertEqual(len(a.backends), 1)
+        self.assertEqual(b.backends, [])
+
+    def test_result_cache_is_opt_in(self):
+        big = _ScriptedBackend("ollama", "IDLE")
+        analyzer = self._analyzer([big])
+        analyzer.stats = {"calls": 0, "cache_hits": 0, "errors": 0, "latency_ms_total": 0.0}
+        analyzer._result_cache = None                                    # 默认关闭
+        for _ in range(2):
+            analyzer._call_vision_model(self.image, prompt=PROMPT_BOTTOM_RIGHT)
+        self.assertEqual((big.stats["calls"], analyzer.stats["cache_hits"]), (2, 0))
+
+        analyzer._result_cache = OrderedDict()                           # vision_result_cache=true
+        for _ in range(2):
+            analyzer._call_vision_model(self.image, prompt=PROMPT_BOTTOM_RIGHT)
+        self.assertEqual((big.stats["calls"], analyzer.stats["cache_hits"]), (3, 1))
+
+    def test_no_backend_available(self):
+        analyzer = self._analyzer([_ScriptedBackend("ollama", "IDLE", up=False)])
+        self.assertFalse(analyzer._ensure_model_ready())
+        status, raw = analyzer._call_vision_model(self.image, prompt=PROMPT_BOTTOM_RIGHT)
+        self.assertEqual(status, UIStatus.UNKNOWN)
+        self.assertIn("可用视觉后端", raw)
+
+
+class TestOpenAICompatBackend(unittest.TestCase):
+    def test_request_shape_and_reply(self):
+        seen = {}
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            if request.url.path.endswith("/models"):
+                return httpx.Response(200, json={"data": []})
+            seen.update(json.loads(request.content))
+            return httpx.Response(200, json={"choices": [{"message": {"content": "AI_GENERATING"}}]})
+
+        client = httpx.Client(transport=httpx.MockTransport(handler))
+        backend = OpenAICompatBackend("http://local/v1", "qwen2.5-vl-3b", client=client)
+        with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as f:
+            f.write(b"png")
+        try:
+            self.assertTrue(backend.available())
+            self.assertEqual(backend.complete(f.name, "status?", max_tokens=12), "AI_GENERATING")
+        finally:
+            os.unlink(f.name)
+        self.assertEqual(seen["max_tokens"], 12)
+        self.assertTrue(seen["messages"][0]["content"][1]["image_url"]["url"].startswith("data:image/png;base64,"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,99 @@
+# -*- coding: utf-8 -*-
+"""
+小→大模型级联 — 显式分数 / 自洽性升级 / 按状态类别统计升级率与改判
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import ExecutorConfig
+from src.vision_analyzer import VisionAnalyzer
+from src.vision_backends import CascadeBackend, OllamaBackend, VisionBackend, select_backends
+
+
+class _Replies(VisionBackend):
+    """按顺序返回预设回复（循环）"""
+
+    def __init__(self, model: str, replies: list, cost: float = 1.0):
+        super().__init__()
+        self.model = model
+        self.replies = list(replies)
+        self.cost_per_call = cost
+        self._i = 0
+
+    def available(self) -> bool:
+        return True
+
+    def _complete(self, image_path, prompt, kind, max_tokens, stop) -> str:
+        reply = self.replies[self._i % len(self.replies)]
+        self._i += 1
+        if isinstance(reply, Exception):
+            raise reply
+        return reply
+
+
+def _cascade(small_replies, large_replies, samples=2, min_confidence=0.7) -> CascadeBackend:
+    return CascadeBackend(
+        small=_Replies("small", small_replies, cost=0.1),
+        large=_Replies("large", large_replies),
+        answer_key=VisionAnalyzer._answer_key,
+        min_confidence=min_confidence,
+        samples=samples,
+    )
+
+
+class TestCascade(unittest.TestCase):
+    def test_consistent_small_answers_skip_large_model(self):
+        cascade = _cascade(["IDLE"], ["CONNECTION_ERROR"])
+        for _ in range(5):
+            self.assertEqual(cascade.complete("x.png", "p", kind="status"), "IDLE")
+        self.assertEqual(cascade.large.stats["calls"], 0)
+        info = cascade.describe()
+        self.assertEqual(info["classes"]["status:IDLE"]["escalation_rate"], 0.0)
+        self.assertAlmostEqual(info["cost_per_call"], 0.2)
+
+    def test_disagreement_escalates_and_counts_overrides(self):
+        cascade = _cascade(["RATE_LIMIT", "IDLE"], ["API_TIMEOUT"])
+        self.assertEqual(cascade.complete("x.png", "p", kind="status"), "API_TIMEOUT")
+        c = cascade.describe()["classes"]["status:RATE_LIMIT"]
+        self.assertEqual((c["count"], c["escalation_rate"], c["overrides"]), (1, 1.0, 1))
+
+    def test_explicit_score_decides_without_resampling(self):
+        cascade = _cascade(["CONNECTION_ERROR 0.95", "IDLE 0.40"], ["IDLE"])
+        self.assertEqual(cascade.complete("x.png", "p", kind="status"), "CONNECTION_ERROR 0.95")
+        self.assertEqual(cascade.small.stats["calls"], 1)
+        self.assertEqual(cascade.complete("x.png", "p", kind="status"), "IDLE")
+        self.assertEqual(cascade.large.stats["calls"], 1)
+        self.assertEqual(cascade.describe()["escalation_rate"], 0.5)
+
+    def test_unparseable_or_failing_small_model_escalates(self):
+        cascade = _cascade(["hmm, not sure"], ["UNCHANGED"], samples=1)
+        self.assertEqual(cascade.complete("x.png", "p", kind="change"), "UNCHANGED")
+        cascade = _cascade([RuntimeError("model not found")], ["QUEUED"])
+        self.assertEqual(cascade.complete("x.png", "p", kind="queued"), "QUEUED")
+        self.assertIn("queued:?", cascade.describe()["classes"])
+
+    def test_answer_keys(self):
+        key = VisionAnalyzer._answer_key
+        self.assertEqual(key("change", "UNCHANGED."), "UNCHANGED")
+        self.assertEqual(key("queued", "not_queued"), "NOT_QUEUED")
+        self.assertEqual(key("locate", "512,940"), key("locate", "520,948"))
+        self.assertIsNone(key("status", "no idea"))
+
+    def test_cascade_replaces_ollama_when_configured(self):
+        config = ExecutorConfig(vision_cascade_model="qwen2.5vl:3b")
+        chain = select_backends(config, ollama=object(), vram_gb=24.0, answer_key=VisionAnalyzer._answer_key)
+        self.assertIsInstance(chain[0], CascadeBackend)
+        self.assertIsInstance(chain[0].small, OllamaBackend)
+        self.assertEqual(chain[0].small.model, "qwen2.5vl:3b")
+        self.assertEqual(chain[0].large.model, config.model_name)
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
@@ -0,0 +1,100 @@
+# -*- coding: utf-8 -*-
+"""
+视觉模型流式输出 — 关键词提前结束 / num_predict 封顶 / 非流式兼容
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.config import ExecutorConfig, UIStatus
+from src.vision_analyzer import (
+    PROMPT_BOTTOM_RIGHT,
+    PROMPT_CHANGE_COMPARE,
+    PROMPT_LOCATE_INPUT,
+    VisionAnalyzer,
+)
+
+
+class _StreamingOllama:
+    """按块返回预设输出，记录消费块数与是否被关闭"""
+
+    def __init__(self, chunks: list[str]):
+        self.chunks = chunks
+        self.consumed = 0
+        self.closed = False
+        self.kwargs: dict = {}
+
+    def chat(self, stream: bool = False, **kwargs):
+        self.kwargs = dict(kwargs, stream=stream)
+        if not stream:
+            return {"message": {"content": "".join(self.chunks)}}
+        return self._gen()
+
+    def _gen(self):
+        try:
+            for c in self.chunks:
+                self.consumed += 1
+                yield {"message": {"content": c}}
+        finally:
+            self.closed = True
+
+
+def _make_analyzer(ollama, **config_kwargs) -> VisionAnalyzer:
+    analyzer = VisionAnalyzer.__new__(VisionAnalyzer)
+    analyzer.config = ExecutorConfig(**config_kwargs)
+    analyzer._ollama = ollama
+    analyzer.lifecycle = None
+    analyzer.backends = []
+    analyzer.stats = {"calls": 0, "cache_hits": 0, "errors": 0, "early_exits": 0, "latency_ms_total": 0.0}
+    analyzer._result_cache = None
+    return analyzer
+
+
+class TestVisionStreaming(unittest.TestCase):
+    def setUp(self):
+        fd, self.image = tempfile.mkstemp(suffix=".png")
+        os.write(fd, b"fake-image")
+        os.close(fd)
+
+    def tearDown(self):
+        os.unlink(self.image)
+
+    def test_status_keyword_stops_generation(self):
+        ollama = _StreamingOllama(["CONNECTION", "_ERROR", "\n", "The popup shows", " a retry button"])
+        analyzer = _make_analyzer(ollama)
+        status, raw = analyzer._call_vision_model(self.image, prompt=PROMPT_BOTTOM_RIGHT)
+        self.assertEqual(status, UIStatus.CONNECTION_ERROR)
+        self.assertEqual(ollama.consumed, 2)
+        self.assertTrue(ollama.closed)
+        self.assertEqual(analyzer.stats["early_exits"], 1)
+        self.assertEqual(ollama.kwargs["options"]["num_predict"], 12)
+
+    def test_prefix_words_are_not_matched_early(self):
+        ollama = _StreamingOllama(["UN", "CHANGED", " because"])
+        raw = _make_analyzer(ollama)._chat(self.image, PROMPT_CHANGE_COMPARE)
+        self.assertEqual(VisionAnalyzer._parse_change_verdict(raw), False)
+
+        # 坐标数字可能被拆开，必须看到后续分隔符才停止
+        ollama = _StreamingOllama(["512", ",", "9", "40", "\n", "extra"])
+        raw = _make_analyzer(ollama)._chat(self.image, PROMPT_LOCATE_INPUT)
+        self.assertEqual(VisionAnalyzer._parse_point(raw), (512, 940))
+        self.assertEqual(ollama.consumed, 5)
+
+    def test_overrides_and_non_streaming_mode(self):
+        ollama = _StreamingOllama(["IDLE"])
+        analyzer = _make_analyzer(ollama, vision_stream=False, vision_num_predict={"status": 0})
+        status, raw = analyzer._call_vision_model(self.image, prompt=PROMPT_BOTTOM_RIGHT)
+        self.assertEqual(status, UIStatus.IDLE)
+        self.assertFalse(ollama.kwargs["stream"])
+        self.assertNotIn("num_predict", ollama.kwargs["options"])
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)
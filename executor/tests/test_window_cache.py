@@ -0,0 +1,146 @@
+# -*- coding: utf-8 -*-
+"""
+CursorController 窗口句柄 / 输入框坐标缓存 — 命中 / 边界失效 / 失焦 / 视觉定位测试
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import unittest
+
+# 确保 src 在路径上
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), ".."))
+
+from src.clock import VirtualClock
+from src.config import ExecutorConfig
+from src.cursor_controller import CursorController
+from src.vision_analyzer import VisionAnalyzer
+
+
+class _FakeWindow:
+    def __init__(self, title="main.py - Cursor", left=100, top=50, width=1200, height=800):
+        self.title = title
+        self.left, self.top, self.width, self.height = left, top, width, height
+        self.isMinimized = False
+        self.isActive = True
+        self.closed = False
+        self.activations = 0
+
+    def __getattribute__(self, name):
+        if name in ("left", "top", "width", "height") and object.__getattribute__(self, "closed"):
+            raise OSError("window handle is invalid")
+        return object.__getattribute__(self, name)
+
+    def activate(self):
+        self.activations += 1
+        self.isActive = True
+
+    def restore(self):
+        self.isMinimized = False
+
+
+class _FakeGetWindow:
+    def __init__(self, window):
+        self.window = window
+        self.calls = 0
+
+    def getWindowsWithTitle(self, title):
+        self.calls += 1
+        return [self.window] if title in self.window.title else []
+
+
+class _FakeAutoGui:
+    def __init__(self):
+        self.clicks = []
+
+    def click(self, x=None, y=None):
+        self.clicks.append((x, y))
+
+    def hotkey(self, *keys):
+        pass
+
+    def size(self):
+        return 1920, 1080
+
+
+def _make_gui(window: _FakeWindow) -> CursorController:
+    gui = CursorController.__new__(CursorController)
+    gui.config = ExecutorConfig()
+    gui.clock = VirtualClock()
+    gui._delays = CursorController.resolve_delays(gui.config)
+    gui._available = True
+    gui._pyautogui = _FakeAutoGui()
+    gui._pygetwindow = _FakeGetWindow(window)
+    gui._last_send_time = 0.0
+    gui.timing = None
+    gui.confirm = None
+    gui._input_point = None
+    gui._geometry = None
+    gui.input_locator = None
+    gui.window_cache_stats = {"hits": 0, "enumerations": 0, "invalidations": 0, "vision_locates": 0}
+    return gui
+
+
+class TestWindowCache(unittest.TestCase):
+    def test_repeated_sends_skip_enumeration(self):
+        window = _FakeWindow()
+        gui = _make_gui(window)
+        for _ in range(20):
+            self.assertTrue(gui.activate_window())
+            self.assertTrue(gui.click_input_area())
+        self.assertEqual(gui._pygetwindow.calls, 1)
+        self.assertEqual(window.activations, 0)          # 已是前台窗口，不重复激活
+        self.assertEqual(set(gui._pyautogui.clicks), {(700, 770)})
+
+    def test_move_resize_and_focus_loss_revalidate_bounds(self):
+        window = _FakeWindow()
+        gui = _make_gui(window)
+        gui.click_input_area()
+
+        window.left, window.width = 300, 1000
+        gui.click_input_area()
+        self.assertEqual(gui._pyautogui.clicks[-1], (800, 770))
+        self.assertEqual(gui._pygetwindow.calls, 1)      # 句柄保留，只重算坐标
+
+        window.isActive = False
+        self.assertTrue(gui.activate_window())
+        self.assertEqual(window.activations, 1)
+        self.assertEqual(gui.window_cache_stats["invalidations"], 1)
+
+        window.closed = True
+        gui._pygetwindow.window = _FakeWindow(left=0, top=0)
+        gui.click_input_area()
+        self.assertEqual(gui._pygetwindow.calls, 2)
+        self.assertEqual(gui._pyautogui.clicks[-1], (600, 720))
+
+    def test_vision_locator_result_is_cached_per_geometry(self):
+        window = _FakeWindow()
+        gui = _make_gui(window)
+        calls = []
+        gui.input_locator = lambda bounds: calls.append(bounds) or (900, 760)
+        for _ in range(5):
+            gui.click_input_area()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(gui._pyautogui.clicks[-1], (1000, 810))
+        self.assertEqual(gui.get_window_info()["input_source"], "vision")
+
+        window.height = 700
+        gui.click_input_area()
+        self.assertEqual(len(calls), 2)
+
+        # 定位失败 / 越界时退回启发式坐标
+        gui.input_locator = lambda bounds: (5000, 5000)
+        window.height = 600
+        gui.click_input_area()
+        self.assertEqual(gui._pyautogui.clicks[-1], (700, 570))
+
+    def test_parse_point(self):
+        self.assertEqual(VisionAnalyzer._parse_point("512, 940"), (512, 940))
+        self.assertEqual(VisionAnalyzer._parse_point("Center: 500，900"), (500, 900))
+        self.assertIsNone(VisionAnalyzer._parse_point("NONE"))
+        self.assertIsNone(VisionAnalyzer._parse_point("1500,20"))
+
+
+if __name__ == "__main__":
+    unittest.main(verbosity=2)